@@ -0,0 +1,98 @@
+"""
+Idempotency-Key support for API writes.
+
+A client that retries a POST after a timeout sends the same Idempotency-Key
+header. The first request reserves the key in the data service; retries get
+the stored response (marked with Idempotent-Replayed: true) instead of
+starting another crew run or appending another session. A retry that arrives
+while the first request is still running gets 409, and a key reused with a
+different body gets 422. Keys expire after settings.idempotency_ttl_seconds.
+"""
+import hashlib
+import json
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+from contentagency.config import settings
+from contentagency.services.data_service import data_service
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+def request_fingerprint(payload: Any) -> str:
+    """Hash a request body so a reused key with a different body is detected."""
+    if isinstance(payload, BaseModel):
+        payload = payload.model_dump(mode="json")
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _serialize(response: Any, status_code: int) -> tuple:
+    if isinstance(response, Response):
+        return response.status_code, json.loads(response.body)
+    if isinstance(response, BaseModel):
+        return status_code, response.model_dump(mode="json")
+    return status_code, response
+
+
+def respond_idempotently(
+    scope: str,
+    key: Optional[str],
+    payload: Any,
+    handler: Callable[[], Any],
+    status_code: int = 200,
+    refresh: Optional[Callable[[Dict[str, Any]], Any]] = None
+) -> Any:
+    """
+    Run a write handler at most once per Idempotency-Key.
+
+    Args:
+        scope: Endpoint name; the same key may be used on different endpoints
+        key: Idempotency-Key header value (None runs the handler normally)
+        payload: Request body, fingerprinted to detect key reuse
+        handler: Performs the write and returns the response
+        status_code: Status of the handler's response when it returns a model
+        refresh: Optional hook to update a stored body on replay (e.g. the
+            current status of a queued job)
+
+    Returns:
+        The handler's response, or the stored response on a replay
+
+    Raises:
+        HTTPException: 409 while the original request is in flight, 422 when
+            the key was used with a different request body
+    """
+    if not key:
+        return handler()
+
+    scoped_key = f"{scope}:{key}"
+    fingerprint = request_fingerprint(payload)
+    record = data_service.claim_idempotency_key(scoped_key, fingerprint, settings.idempotency_pending_seconds)
+    if record is not None:
+        if record["fingerprint"] != fingerprint:
+            raise HTTPException(
+                status_code=422,
+                detail=f"{IDEMPOTENCY_HEADER} was already used with a different request body"
+            )
+        if record["state"] != "completed":
+            raise HTTPException(
+                status_code=409,
+                detail=f"A request with this {IDEMPOTENCY_HEADER} is still in progress",
+                headers={"Retry-After": "5"}
+            )
+        body = refresh(record["body"]) if refresh else record["body"]
+        return JSONResponse(status_code=record["status_code"], content=body, headers={REPLAYED_HEADER: "true"})
+
+    try:
+        response = handler()
+    except BaseException:
+        # Failed requests are not stored, so the client's retry runs again
+        data_service.release_idempotency_key(scoped_key)
+        raise
+
+    stored_status, body = _serialize(response, status_code)
+    data_service.complete_idempotency_key(scoped_key, stored_status, body, settings.idempotency_ttl_seconds)
+    return response
@@ -1,31 +1,63 @@
 """
 ContentAgency REST API - Production backend for frontend integration.
 """
-from fastapi import FastAPI, HTTPException
+import json
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+from fastapi import FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-import uvicorn
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import ValidationError as PydanticValidationError
 
 from contentagency.config import settings
 from contentagency.api.models import (
     UserInterestsRequest,
+    InterestsPatchRequest,
     RecentPostsRequest,
+    PostsPatchRequest,
+    PatchResponse,
     BrainstormRequest,
     BrainstormResponse,
+    BatchBrainstormItem,
+    BatchBrainstormRequest,
     BrainstormResult,
+    JobResponse,
     SuccessResponse,
     ErrorResponse,
     HealthResponse
 )
+from contentagency.api.idempotency import respond_idempotently
+from contentagency.services.batch import parse_batch_ndjson, run_batch, run_batch_queued
 from contentagency.services.data_service import data_service
-from contentagency.services.crew_runner import run_brainstorm_crew
-from contentagency.exceptions import ValidationError
+from contentagency.services.job_queue import JobNotFoundError, get_job_queue
+# Loads the crew stack on first use; keeps API startup light
+from contentagency.services.crew_loader import preload_crew_stack, run_brainstorm_session
+from contentagency.services.metrics import CREW_RUNS_QUEUED, instrument_app
+from contentagency.services.prewarm import PrewarmScheduler
+from contentagency.services.profiling import list_profiles, profile_requests
+from contentagency.services.serving import serve
+from contentagency.services.tracing import inject_context, trace_app
+from contentagency.exceptions import ValidationError, VersionConflictError
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Optionally warm the crew stack and schedule research pre-warming at startup."""
+    if settings.preload_crew:
+        preload_crew_stack()
+    scheduler = PrewarmScheduler().start() if settings.prewarm_enabled else None
+    yield
+    if scheduler is not None:
+        scheduler.stop()
+
 
 # Create FastAPI app
 app = FastAPI(
     title=settings.api_title,
     description=settings.api_description,
-    version=settings.api_version
+    version=settings.api_version,
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -37,6 +69,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Route latency histograms and GET /metrics, plus a root span per request
+instrument_app(app, "api")
+trace_app(app, "api")
+# Per-request profiles (PROFILING_TARGET=requests or the X-Profile-Token header)
+profile_requests(app)
+
+
+def _queued_crew_runs() -> int:
+    """Current job queue depth, read when /metrics is scraped."""
+    # No queue file: nothing was ever queued, and a scrape should not create one
+    if not Path(settings.job_queue_path).exists():
+        return 0
+    return get_job_queue().counts()["queued"]
+
+
+CREW_RUNS_QUEUED.set_function(_queued_crew_runs)
+
 
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
@@ -47,9 +96,8 @@ async def health_check():
     )
 
 
-@app.post(f"/api/{settings.api_version}/interests", response_model=SuccessResponse)
-async def update_interests(request: UserInterestsRequest):
-    """Update user interests."""
+def _save_interests(request: UserInterestsRequest) -> SuccessResponse:
+    """Save user interests from a request."""
     try:
         # Convert Pydantic model to dict format expected by data service
         interests_data = {
@@ -70,9 +118,14 @@ async def update_interests(request: UserInterestsRequest):
         )
 
 
-@app.post(f"/api/{settings.api_version}/posts", response_model=SuccessResponse)
-async def update_posts(request: RecentPostsRequest):
-    """Update recent posts."""
+@app.post(f"/api/{settings.api_version}/interests", response_model=SuccessResponse)
+def update_interests(request: UserInterestsRequest, idempotency_key: str = Header(None)):
+    """Update user interests. Retries with the same Idempotency-Key header are applied once."""
+    return respond_idempotently("interests", idempotency_key, request, lambda: _save_interests(request))
+
+
+def _save_posts(request: RecentPostsRequest) -> SuccessResponse:
+    """Save recent posts from a request."""
     try:
         # Convert Pydantic model to dict format expected by data service
         posts_data = {
@@ -93,53 +146,177 @@ async def update_posts(request: RecentPostsRequest):
         )
 
 
-@app.post(f"/api/{settings.api_version}/brainstorm", response_model=BrainstormResponse)
-async def run_brainstorm(request: BrainstormRequest):
+@app.post(f"/api/{settings.api_version}/posts", response_model=SuccessResponse)
+def update_posts(request: RecentPostsRequest, idempotency_key: str = Header(None)):
+    """Update recent posts. Retries with the same Idempotency-Key header are applied once."""
+    return respond_idempotently("posts", idempotency_key, request, lambda: _save_posts(request))
+
+
+def _apply_patch(patch, request, ops: list, field: str) -> PatchResponse:
+    """Apply a PATCH through the data service and describe the new version."""
+    try:
+        document = patch(request.user_id, ops, base_version=request.base_version)
+    except VersionConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to patch {field}: {str(e)}")
+
+    return PatchResponse(
+        message=f"Applied {len(ops)} changes to {field} for user {request.user_id}",
+        user_id=request.user_id,
+        version=document["version"],
+        count=len(document.get(field, []))
+    )
+
+
+def _patch_interests(request: InterestsPatchRequest) -> PatchResponse:
+    """Apply incremental interest changes from a request."""
+    ops = (
+        [{"op": "add", "item": {"topic": item.topic}} for item in request.add]
+        + [{"op": "remove", "key": topic} for topic in request.remove]
+        + [{"op": "update", "key": item.topic, "item": {"topic": item.new_topic.strip()}} for item in request.update]
+    )
+    return _apply_patch(data_service.patch_user_interests, request, ops, "interests")
+
+
+@app.patch(f"/api/{settings.api_version}/interests", response_model=PatchResponse)
+def patch_interests(request: InterestsPatchRequest, idempotency_key: str = Header(None)):
     """
-    Run the brainstorming crew.
+    Add, remove or rename interests without resending the full list.
 
-    Can optionally override user_id, interests, and posts for this session.
-    If not provided, uses data from the data service.
+    Send base_version (from the previous response) to fail with 409 instead
+    of overwriting a concurrent change.
     """
+    return respond_idempotently("interests_patch", idempotency_key, request, lambda: _patch_interests(request))
+
+
+def _patch_posts(request: PostsPatchRequest) -> PatchResponse:
+    """Apply incremental post changes from a request."""
+    ops = (
+        [{"op": "add", "item": post.model_dump()} for post in request.add]
+        + [{"op": "remove", "key": post_id} for post_id in request.remove]
+        + [{"op": "update", "key": post.id, "item": post.model_dump(exclude_unset=True)} for post in request.update]
+    )
+    return _apply_patch(data_service.patch_recent_posts, request, ops, "posts")
+
+
+@app.patch(f"/api/{settings.api_version}/posts", response_model=PatchResponse)
+def patch_posts(request: PostsPatchRequest, idempotency_key: str = Header(None)):
+    """
+    Add, remove or edit single posts without resending the post history.
+
+    Send base_version (from the previous response) to fail with 409 instead
+    of overwriting a concurrent change.
+    """
+    return respond_idempotently("posts_patch", idempotency_key, request, lambda: _patch_posts(request))
+
+
+def _resolve_brainstorm_inputs(request: BrainstormRequest):
+    """Return (user_id, user_interests, recent_posts) from the request or the data service."""
+    # Determine user_id
+    user_id = request.user_id or settings.default_user_id
+
+    # Get user interests (from request or data service)
+    if request.interests:
+        user_interests = {
+            "user_id": request.interests.user_id,
+            "interests": [{"topic": item.topic} for item in request.interests.interests]
+        }
+    else:
+        user_interests = data_service.get_user_interests(user_id)
+
+    # Get recent posts (from request or data service)
+    if request.posts:
+        recent_posts = [post.model_dump() for post in request.posts.posts]
+    else:
+        recent_posts = data_service.select_posts(user_id, limit=5)
+
+    return user_id, user_interests, recent_posts
+
+
+def _job_response(job: dict, queue_position: int = None) -> JobResponse:
+    """Convert a stored job into its API representation."""
+    return JobResponse(
+        job_id=job["id"],
+        kind=job["kind"],
+        status=job["status"],
+        priority=job["priority_class"],
+        queue_position=queue_position,
+        user_id=job.get("user_id"),
+        attempts=job["attempts"],
+        max_attempts=job["max_attempts"],
+        created_at=job["created_at"],
+        started_at=job.get("started_at"),
+        finished_at=job.get("finished_at"),
+        cancel_requested=job.get("cancel_requested", False),
+        error=job.get("error"),
+        result=BrainstormResult(**job["result"]) if job["kind"] == "brainstorm" and job.get("result") else None
+    )
+
+
+def _enqueue_brainstorm(request: BrainstormRequest) -> JSONResponse:
+    """Queue a brainstorm job for the crew workers and return 202 with its status."""
+    user_id, user_interests, recent_posts = _resolve_brainstorm_inputs(request)
+    if not user_interests or not user_interests.get("interests"):
+        raise HTTPException(
+            status_code=400,
+            detail="Please add at least one user interest before running the crew"
+        )
+
+    queue = get_job_queue()
+    job = queue.enqueue(
+        "brainstorm",
+        {"user_id": user_id, "user_interests": user_interests, "recent_posts": recent_posts},
+        user_id=user_id,
+        trace_context=inject_context(),
+        priority=request.priority
+    )
+    return JSONResponse(status_code=202, content=_job_response(job, queue.queue_position(job["id"])).model_dump())
+
+
+def _refresh_job_body(body: dict) -> dict:
+    """On an idempotent replay, report the queued job's current status."""
+    if "job_id" not in body:
+        return body
+    queue = get_job_queue()
     try:
-        # Determine user_id
-        user_id = request.user_id or settings.default_user_id
-
-        # Get user interests (from request or data service)
-        if request.interests:
-            user_interests = {
-                "user_id": request.interests.user_id,
-                "interests": [{"topic": item.topic} for item in request.interests.interests]
-            }
-        else:
-            user_interests = data_service.get_user_interests()
+        job = queue.get(body["job_id"])
+    except JobNotFoundError:
+        return body
+    position = queue.queue_position(job["id"]) if job["status"] == "queued" else None
+    return _job_response(job, position).model_dump()
 
-        # Get recent posts (from request or data service)
-        if request.posts:
-            recent_posts = [post.model_dump() for post in request.posts.posts]
-        else:
-            recent_posts = data_service.get_recent_posts(limit=5)
+
+def _run_brainstorm_inline(request: BrainstormRequest) -> BrainstormResponse:
+    """Run the crew in this process and return the session it produced."""
+    try:
+        user_id, user_interests, recent_posts = _resolve_brainstorm_inputs(request)
 
         # Run the brainstorming crew with user_id
-        run_brainstorm_crew(user_interests, recent_posts, user_id=user_id)
-
-        # Retrieve the latest result
-        brainstorm_results = data_service.get_brainstorm_results()
-        latest_session = brainstorm_results["sessions"][-1] if brainstorm_results.get("sessions") else None
-
-        if latest_session:
-            result = BrainstormResult(
-                user_id=latest_session.get("user_id", user_id),
-                timestamp=latest_session.get("timestamp", ""),
-                suggestions=latest_session.get("suggestions", []),
-                trending_context_summary=latest_session.get("trending_context_summary", "")
+        session = run_brainstorm_session(user_interests, recent_posts, user_id=user_id)["session"]
+
+        # A run stopped before producing anything saved no session
+        if session.get("partial") and not session["suggestions"] and not session["trending_context_summary"]:
+            return BrainstormResponse(
+                status="stopped",
+                message=f"Brainstorming stopped early without results: {session['stop_reason']}",
+                result=None
             )
-        else:
-            result = None
 
+        result = BrainstormResult(
+            user_id=session["user_id"],
+            timestamp=session["timestamp"],
+            suggestions=session["suggestions"],
+            trending_context_summary=session["trending_context_summary"],
+            partial=session.get("partial", False),
+            stop_reason=session.get("stop_reason")
+        )
         return BrainstormResponse(
             status="success",
-            message="Brainstorming complete!",
+            message=f"Brainstorming stopped early: {result.stop_reason}" if result.partial
+            else "Brainstorming complete!",
             result=result
         )
 
@@ -155,8 +332,128 @@ async def run_brainstorm(request: BrainstormRequest):
         )
 
 
+@app.post(f"/api/{settings.api_version}/brainstorm", response_model=BrainstormResponse)
+def run_brainstorm(request: BrainstormRequest, idempotency_key: str = Header(None)):
+    """
+    Run the brainstorming crew.
+
+    Can optionally override user_id, interests, and posts for this session.
+    If not provided, uses data from the data service.
+
+    With BRAINSTORM_MODE=queue the crew runs on a brainstorm_worker process
+    instead: the request returns 202 with a job to poll at /jobs/{job_id}.
+
+    A retry carrying the same Idempotency-Key header returns the original
+    response (or the original job's current status) instead of running again.
+    """
+    if settings.brainstorm_mode == "queue":
+        return respond_idempotently(
+            "brainstorm", idempotency_key, request, lambda: _enqueue_brainstorm(request), refresh=_refresh_job_body
+        )
+    return respond_idempotently("brainstorm", idempotency_key, request, lambda: _run_brainstorm_inline(request))
+
+
+def _parse_batch_request(body: bytes, content_type: str) -> tuple:
+    """Return (items, max_parallel) from a JSON batch request or an NDJSON file."""
+    try:
+        if content_type.startswith("application/x-ndjson"):
+            lines = parse_batch_ndjson(body.decode("utf-8").splitlines())
+            items = [BatchBrainstormItem.model_validate(line) for line in lines]
+            max_parallel = None
+        else:
+            request = BatchBrainstormRequest.model_validate_json(body or b"{}")
+            items = [BatchBrainstormItem(user_id=user_id) for user_id in request.user_ids] + request.items
+            max_parallel = request.max_parallel
+    except (ValueError, PydanticValidationError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if not items:
+        raise HTTPException(status_code=400, detail="Provide at least one user_id or item")
+    return [item.model_dump(exclude_none=True) for item in items], max_parallel
+
+
+@app.post(f"/api/{settings.api_version}/brainstorm/batch")
+async def run_brainstorm_batch(request: Request):
+    """
+    Brainstorm for many users and stream one NDJSON line per user as it finishes.
+
+    The body is either JSON ({"user_ids": [...], "items": [...], "max_parallel": n})
+    or, with Content-Type application/x-ndjson, one {"user_id", "interests"?,
+    "posts"?} object per line. Users without inline data use their saved
+    interests and posts. Runs are bounded by max_parallel (BATCH_MAX_PARALLEL)
+    and research for topics shared by several users runs once.
+
+    With BRAINSTORM_MODE=queue each user becomes a batch-priority job for the
+    crew workers, and lines are streamed as the jobs finish.
+    """
+    items, max_parallel = _parse_batch_request(await request.body(), request.headers.get("content-type", ""))
+    if settings.brainstorm_mode == "queue":
+        results = run_batch_queued(items, get_job_queue())
+    else:
+        results = run_batch(items, max_parallel=max_parallel)
+    # Starlette iterates a sync generator on a worker thread, so runs do not block the event loop
+    lines = (json.dumps(result, default=str) + "\n" for result in results)
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+
+@app.post(f"/api/{settings.api_version}/jobs", response_model=JobResponse, status_code=202)
+def create_job(request: BrainstormRequest, idempotency_key: str = Header(None)):
+    """Queue a brainstorm job for the crew workers, regardless of BRAINSTORM_MODE."""
+    return respond_idempotently(
+        "jobs", idempotency_key, request, lambda: _enqueue_brainstorm(request), refresh=_refresh_job_body
+    )
+
+
+@app.get(f"/api/{settings.api_version}/jobs/{{job_id}}", response_model=JobResponse)
+def get_job(job_id: str):
+    """Get the status (and result, once finished) of a queued job, with its queue position while queued."""
+    queue = get_job_queue()
+    try:
+        job = queue.get(job_id)
+        return _job_response(job, queue.queue_position(job_id) if job["status"] == "queued" else None)
+    except JobNotFoundError as e:
+        raise HTTPException(
+            status_code=404,
+            detail=str(e)
+        )
+
+
+@app.delete(f"/api/{settings.api_version}/jobs/{{job_id}}", response_model=JobResponse, status_code=202)
+def cancel_job(job_id: str):
+    """
+    Cancel a job.
+
+    Queued jobs are cancelled immediately; running jobs stop at their next LLM
+    call (within seconds) and keep any partial result.
+    """
+    try:
+        return _job_response(get_job_queue().cancel(job_id))
+    except JobNotFoundError as e:
+        raise HTTPException(
+            status_code=404,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=409,
+            detail=str(e)
+        )
+
+
+@app.get(f"/api/{settings.api_version}/jobs")
+def list_jobs(status: str = None, user_id: str = None, limit: int = 50):
+    """List recent jobs, newest first."""
+    queue = get_job_queue()
+    jobs = [_job_response(job).model_dump() for job in queue.list(status=status, user_id=user_id, limit=limit)]
+    return {
+        "status": "success",
+        "count": len(jobs),
+        "counts": queue.counts(),
+        "jobs": jobs
+    }
+
+
 @app.get(f"/api/{settings.api_version}/results")
-async def get_results(limit: int = 10):
+def get_results(limit: int = 10):
     """Get brainstorm results."""
     try:
         results = data_service.get_brainstorm_results()
@@ -175,6 +472,37 @@ async def get_results(limit: int = 10):
         )
 
 
+@app.get(f"/api/{settings.api_version}/posts/rollups")
+def get_post_rollups(user_id: str = None):
+    """Get a user's post counts, engagement totals and monthly trends per topic and platform."""
+    user_id = user_id or settings.default_user_id
+    try:
+        rollups = data_service.get_topic_rollups(user_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to retrieve post rollups: {str(e)}"
+        )
+    return {"status": "success", "user_id": user_id, "rollups": rollups}
+
+
+@app.get(f"/api/{settings.api_version}/profiles")
+def get_profiles(limit: int = 50, x_profile_token: str = Header(None)):
+    """List stored request and crew run profiles, newest first."""
+    if settings.profiling_admin_token and x_profile_token != settings.profiling_admin_token:
+        raise HTTPException(
+            status_code=403,
+            detail="A valid X-Profile-Token header is required"
+        )
+
+    profiles = list_profiles(limit=limit)
+    return {
+        "status": "success",
+        "count": len(profiles),
+        "profiles": profiles
+    }
+
+
 @app.exception_handler(ValidationError)
 async def validation_error_handler(exc: ValidationError):
     """Handle ValidationError exceptions."""
@@ -201,16 +529,19 @@ async def general_exception_handler(exc: Exception):
     )
 
 
-def start_api(host: str = None, port: int = None):
+def start_api(host: str = None, port: int = None, workers: int = None):
     """Start the API server."""
     host = host or settings.host
     port = port or settings.port
+    workers = workers or settings.api_workers
 
     print(f"🚀 Starting ContentAgency API at http://{host}:{port}")
     print(f"📚 API Documentation: http://{host}:{port}/docs")
     print(f"🔄 CORS enabled for: {', '.join(settings.cors_origins)}")
+    if workers > 1:
+        print(f"👷 Workers: {workers} (data backend: {settings.data_backend})")
 
-    uvicorn.run(app, host=host, port=port)
+    serve(app, "contentagency.api.main:app", host=host, port=port, workers=workers)
 
 
 if __name__ == "__main__":
@@ -1,8 +1,16 @@
 """
 Pydantic models for API request/response validation.
 """
-from typing import List, Optional
-from pydantic import BaseModel, Field, field_validator
+from typing import List, Literal, Optional
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+from contentagency.services.post_index import parse_timestamp
+
+
+def _check_published_date(v: Optional[str]) -> Optional[str]:
+    if v is not None and parse_timestamp(v) is None:
+        raise ValueError('published_date must be an ISO 8601 date or datetime')
+    return v
 
 
 class InterestItem(BaseModel):
@@ -37,6 +45,16 @@ class PostItem(BaseModel):
     content: str = Field(..., description="Post content")
     title: Optional[str] = Field(None, description="Post title (optional)")
     topics: Optional[List[str]] = Field(default_factory=list, description="Post topics")
+    published_date: Optional[str] = Field(None, description="Publication date (ISO 8601)")
+    likes: Optional[int] = Field(None, ge=0, description="Likes or reactions")
+    comments: Optional[int] = Field(None, ge=0, description="Comments")
+    shares: Optional[int] = Field(None, ge=0, description="Shares or reposts")
+    impressions: Optional[int] = Field(None, ge=0, description="Impressions")
+
+    @field_validator('published_date')
+    @classmethod
+    def published_date_is_iso(cls, v: Optional[str]) -> Optional[str]:
+        return _check_published_date(v)
 
 
 class RecentPostsRequest(BaseModel):
@@ -45,11 +63,83 @@ class RecentPostsRequest(BaseModel):
     posts: List[PostItem] = Field(..., description="List of recent posts")
 
 
+class InterestUpdate(BaseModel):
+    """Rename of an existing interest."""
+    topic: str = Field(..., min_length=1, description="Current topic")
+    new_topic: str = Field(..., min_length=1, description="New topic")
+
+
+class InterestsPatchRequest(BaseModel):
+    """Request model for incremental interest changes."""
+    user_id: str = Field(..., min_length=1, description="User identifier")
+    base_version: Optional[int] = Field(None, description="Version last read; the patch fails with 409 if it changed since")
+    add: List[InterestItem] = Field(default_factory=list, description="Interests to add")
+    remove: List[str] = Field(default_factory=list, description="Topics to remove")
+    update: List[InterestUpdate] = Field(default_factory=list, description="Interests to rename")
+
+    @model_validator(mode='after')
+    def has_operations(self) -> "InterestsPatchRequest":
+        if not (self.add or self.remove or self.update):
+            raise ValueError('At least one add, remove or update is required')
+        return self
+
+
+class PostUpdate(BaseModel):
+    """Fields to change on an existing post (omitted fields are kept)."""
+    id: str = Field(..., description="Post identifier")
+    platform: Optional[str] = Field(None, description="Platform name")
+    content: Optional[str] = Field(None, description="Post content")
+    title: Optional[str] = Field(None, description="Post title")
+    topics: Optional[List[str]] = Field(None, description="Post topics")
+    published_date: Optional[str] = Field(None, description="Publication date (ISO 8601)")
+    likes: Optional[int] = Field(None, ge=0, description="Likes or reactions")
+    comments: Optional[int] = Field(None, ge=0, description="Comments")
+    shares: Optional[int] = Field(None, ge=0, description="Shares or reposts")
+    impressions: Optional[int] = Field(None, ge=0, description="Impressions")
+
+    @field_validator('published_date')
+    @classmethod
+    def published_date_is_iso(cls, v: Optional[str]) -> Optional[str]:
+        return _check_published_date(v)
+
+
+class PostsPatchRequest(BaseModel):
+    """Request model for incremental post changes."""
+    user_id: str = Field(..., min_length=1, description="User identifier")
+    base_version: Optional[int] = Field(None, description="Version last read; the patch fails with 409 if it changed since")
+    add: List[PostItem] = Field(default_factory=list, description="Posts to add (an existing id is replaced)")
+    remove: List[str] = Field(default_factory=list, description="Ids of posts to remove")
+    update: List[PostUpdate] = Field(default_factory=list, description="Posts to edit")
+
+    @model_validator(mode='after')
+    def has_operations(self) -> "PostsPatchRequest":
+        if not (self.add or self.remove or self.update):
+            raise ValueError('At least one add, remove or update is required')
+        return self
+
+
 class BrainstormRequest(BaseModel):
     """Request model for running brainstorm crew."""
     user_id: Optional[str] = Field(None, description="User identifier (optional, uses default if not provided)")
     interests: Optional[UserInterestsRequest] = Field(None, description="Override user interests for this session")
     posts: Optional[RecentPostsRequest] = Field(None, description="Override recent posts for this session")
+    priority: Literal["interactive", "batch", "prefetch"] = Field(
+        "interactive", description="Priority class when the run is queued"
+    )
+
+
+class BatchBrainstormItem(BaseModel):
+    """One user in a batch brainstorm."""
+    user_id: str = Field(..., min_length=1, description="User identifier")
+    interests: Optional[List[InterestItem]] = Field(None, description="Interests (optional, uses the user's saved interests)")
+    posts: Optional[List[PostItem]] = Field(None, description="Recent posts (optional, uses the user's saved posts)")
+
+
+class BatchBrainstormRequest(BaseModel):
+    """Request model for brainstorming for many users."""
+    user_ids: List[str] = Field(default_factory=list, description="Users to brainstorm for with their saved data")
+    items: List[BatchBrainstormItem] = Field(default_factory=list, description="Users with inline interests and posts")
+    max_parallel: Optional[int] = Field(None, ge=1, description="Concurrent runs (optional, BATCH_MAX_PARALLEL by default)")
 
 
 class ResourceLink(BaseModel):
@@ -57,6 +147,14 @@ class ResourceLink(BaseModel):
     title: str = Field(..., description="Resource title")
     url: str = Field(..., description="Resource URL")
     published_date: Optional[str] = Field(None, description="Publication date")
+    published_ts: Optional[float] = Field(None, description="Publication date in Unix seconds (None if unreadable)")
+
+
+class DuplicateMatch(BaseModel):
+    """Earlier suggestion a new one nearly repeats."""
+    title: str = Field(..., description="Title of the earlier suggestion")
+    timestamp: Optional[str] = Field(None, description="When it was suggested (None for an earlier idea of the same session)")
+    similarity: float = Field(..., description="Estimated Jaccard similarity of title and description")
 
 
 class ContentSuggestion(BaseModel):
@@ -70,6 +168,8 @@ class ContentSuggestion(BaseModel):
     resource_links: List[ResourceLink] = Field(default_factory=list, description="Related resources")
     engagement_potential: str = Field(..., description="Expected engagement level (High/Moderate/Low)")
     engagement_reason: str = Field(..., description="Why this will engage the audience")
+    duplicate_of: Optional[DuplicateMatch] = Field(None, description="Earlier suggestion this one nearly repeats")
+    score: Optional[float] = Field(None, description="Ranking score (interest match, link recency and engagement)")
 
 
 class BrainstormResult(BaseModel):
@@ -78,6 +178,8 @@ class BrainstormResult(BaseModel):
     timestamp: str
     suggestions: List[ContentSuggestion] = Field(..., description="List of content suggestions")
     trending_context_summary: Optional[str] = Field(None, description="Summary of trending context")
+    partial: bool = Field(False, description="Whether the run stopped early (cancelled or out of budget)")
+    stop_reason: Optional[str] = Field(None, description="Why a partial run stopped")
 
 
 class BrainstormResponse(BaseModel):
@@ -87,6 +189,24 @@ class BrainstormResponse(BaseModel):
     result: Optional[BrainstormResult] = Field(None, description="Brainstorm result")
 
 
+class JobResponse(BaseModel):
+    """Status of a queued crew job."""
+    job_id: str = Field(..., description="Job identifier")
+    kind: str = Field(..., description="Job type (e.g. brainstorm)")
+    status: str = Field(..., description="queued, running, succeeded, failed or cancelled")
+    priority: str = Field("interactive", description="Priority class (interactive, batch or prefetch)")
+    queue_position: Optional[int] = Field(None, description="Approximate place in line within its priority class (1 = next), while queued")
+    user_id: Optional[str] = Field(None, description="User the job runs for")
+    attempts: int = Field(0, description="Attempts started so far")
+    max_attempts: int = Field(..., description="Attempts before the job fails for good")
+    created_at: float = Field(..., description="Enqueue time (Unix seconds)")
+    started_at: Optional[float] = Field(None, description="First claim time (Unix seconds)")
+    finished_at: Optional[float] = Field(None, description="Completion time (Unix seconds)")
+    cancel_requested: bool = Field(False, description="Whether cancellation was requested")
+    error: Optional[str] = Field(None, description="Last error, if any")
+    result: Optional[BrainstormResult] = Field(None, description="Brainstorm result once succeeded")
+
+
 class ErrorResponse(BaseModel):
     """Standardized error response."""
     status: str = Field(default="error", description="Operation status")
@@ -100,6 +220,15 @@ class SuccessResponse(BaseModel):
     message: str = Field(..., description="Success message")
 
 
+class PatchResponse(BaseModel):
+    """Response to an incremental update."""
+    status: str = Field(default="success", description="Operation status")
+    message: str = Field(..., description="Success message")
+    user_id: str = Field(..., description="User identifier")
+    version: int = Field(..., description="New version, to send as base_version with the next patch")
+    count: int = Field(..., description="Number of interests or posts after the patch")
+
+
 class HealthResponse(BaseModel):
     """Health check response."""
     status: str = Field(default="healthy", description="Service health status")
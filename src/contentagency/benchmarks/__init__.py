@@ -0,0 +1,6 @@
+"""
+Performance benchmarks for ContentAgency hot paths.
+
+Run with ``uv run benchmark`` (or ``python -m contentagency.benchmarks``).
+Results are written as JSON so runs can be compared for regressions.
+"""
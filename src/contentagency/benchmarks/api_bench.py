@@ -0,0 +1,76 @@
+"""
+Throughput benchmarks for read-heavy HTTP endpoints under concurrency.
+
+Requests are served in-process through httpx's ASGI transport, so the numbers
+measure application overhead (routing, data service, serialization) rather
+than the network stack.
+"""
+import asyncio
+import tempfile
+import time
+from contextlib import ExitStack
+from typing import Any, Dict, List
+from unittest.mock import patch
+
+import httpx
+
+from contentagency.benchmarks.common import summarize
+from contentagency.benchmarks.data_service_bench import seed_history
+from contentagency.services.data_service import FileDataService
+
+QUICK = {"history": 100, "concurrency": [1, 4], "requests": 50}
+FULL = {"history": 1000, "concurrency": [1, 8, 32], "requests": 500}
+
+
+async def _drive(app, path: str, concurrency: int, total: int) -> Dict[str, Any]:
+    """Issue total GET requests with at most concurrency in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(path)
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - started
+
+    stats = summarize(latencies)
+    stats["throughput_rps"] = round(total / elapsed, 2)
+    stats["errors"] = errors
+    return stats
+
+
+def run(quick: bool = False) -> Dict[str, Any]:
+    """Measure /api/v1/results and /api/data throughput per concurrency level."""
+    from contentagency.api import main as api_main
+    from contentagency import web_ui
+
+    config = QUICK if quick else FULL
+    targets = {
+        "api_results": (api_main.app, f"/api/{api_main.settings.api_version}/results?limit=10"),
+        "web_ui_data": (web_ui.app, "/api/data"),
+    }
+
+    results: Dict[str, Any] = {"history_sessions": config["history"]}
+    with tempfile.TemporaryDirectory() as tmpdir, ExitStack() as stack:
+        seed_history(tmpdir, config["history"])
+        service = FileDataService(data_dir=tmpdir)
+        stack.enter_context(patch.object(api_main, "data_service", service))
+        stack.enter_context(patch.object(web_ui, "data_service", service))
+
+        for name, (app, path) in targets.items():
+            results[name] = {
+                f"concurrency_{level}": asyncio.run(_drive(app, path, level, config["requests"]))
+                for level in config["concurrency"]
+            }
+
+    return results
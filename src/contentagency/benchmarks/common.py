@@ -0,0 +1,87 @@
+"""
+Shared timing helpers and synthetic data generators for benchmarks.
+"""
+import statistics
+import time
+from typing import Any, Callable, Dict, List
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Summarize latency samples (seconds) into milliseconds statistics."""
+    ordered = sorted(samples)
+    count = len(ordered)
+
+    def percentile(p: float) -> float:
+        index = min(count - 1, max(0, int(round(p * (count - 1)))))
+        return ordered[index]
+
+    return {
+        "runs": count,
+        "min_ms": round(ordered[0] * 1000, 4),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 4),
+        "p50_ms": round(percentile(0.50) * 1000, 4),
+        "p95_ms": round(percentile(0.95) * 1000, 4),
+        "max_ms": round(ordered[-1] * 1000, 4),
+    }
+
+
+def measure(fn: Callable[[], Any], repeat: int = 5, warmup: int = 1) -> Dict[str, float]:
+    """Time a zero-argument callable and return summary statistics."""
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    for _ in range(max(1, repeat)):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+
+    return summarize(samples)
+
+
+def make_suggestion(index: int) -> Dict[str, Any]:
+    """Build a structured suggestion like the ones stored per session."""
+    return {
+        "id": f"suggestion_{index}",
+        "title": f"Benchmark Topic {index}",
+        "description": "Synthetic suggestion used to size brainstorm history.",
+        "platform_fit": ["LinkedIn", "Medium"],
+        "interest_alignment": "Aligns with AI interests",
+        "trend_connection": "Recent model releases",
+        "resource_links": [{
+            "title": "Example article",
+            "url": f"https://example.com/article/{index}",
+            "published_date": "September 2025"
+        }],
+        "engagement_potential": "High",
+        "engagement_reason": "Timely and broadly relevant"
+    }
+
+
+def make_session(index: int, suggestions_per_session: int = 1) -> Dict[str, Any]:
+    """Build one stored brainstorm session."""
+    return {
+        "user_id": f"user_{index % 50:03d}",
+        "timestamp": f"2025-10-04T10:{index % 60:02d}:00",
+        "suggestions": [make_suggestion(i + 1) for i in range(suggestions_per_session)],
+        "trending_context_summary": "Synthetic trending context."
+    }
+
+
+def make_brainstorm_markdown(num_suggestions: int) -> str:
+    """Build crew-style markdown output with the given number of suggestions."""
+    parts = ["**Content Topic Suggestions:**\n"]
+    for i in range(1, num_suggestions + 1):
+        parts.append(
+            f'\n{i}. **Topic Title**: "Benchmark Topic {i}"\n'
+            f"   - **Description**: Explore benchmark topic {i} and why it matters to practitioners right now.\n"
+            f"   - **Platform Fit**: LinkedIn, Medium - professional audiences\n"
+            f"   - **Interest Alignment**: Aligns with AI and data interests\n"
+            f"   - **Trend Connection**: Related to recent industry developments\n"
+            f"   - **Resource Links**:\n"
+            f"     - [Article {i}](https://example.com/articles/{i}) - Published: September 2025\n"
+            f"     - [Report {i}](https://example.com/reports/{i}) - Published: August 2025\n"
+            f"   - **Engagement Potential**: High, due to timely relevance\n"
+        )
+    parts.append("\n## Trending Context Summary\nSynthetic trends summary for benchmarking.\n")
+    return "".join(parts)
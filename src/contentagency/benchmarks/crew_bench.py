@@ -0,0 +1,86 @@
+"""
+Benchmarks for crew setup overhead and end-to-end crew runs.
+
+End-to-end runs replay a cassette (see services/cassette.py), so they need no
+network access and measure the pipeline's own overhead plus any injected
+latency.
+"""
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict
+from unittest.mock import patch
+
+from contentagency.benchmarks.common import measure
+from contentagency.config import settings
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent.parent
+SAMPLE_INTERESTS = {"user_id": "bench_user", "interests": [{"topic": "AI"}, {"topic": "Data Engineering"}]}
+
+
+def _build_crew():
+    from crewai import Crew, Process
+    from contentagency.crew import Contentagency
+
+    crew_instance = Contentagency()
+    return Crew(
+        agents=[crew_instance.trend_researcher(), crew_instance.brainstorming_strategist()],
+        tasks=[crew_instance.trend_research_task(), crew_instance.brainstorming_task()],
+        process=Process.sequential,
+        verbose=False
+    )
+
+
+def run(quick: bool = False, cassette: str = "demo", latency: str = "") -> Dict[str, Any]:
+    """Measure crew construction and a replayed end-to-end run."""
+    from contentagency.services import crew_runner
+    from contentagency.services.cassette import reset_active_cassette
+    from contentagency.services.data_service import FileDataService
+
+    # Skip crewAI's interactive first-run trace prompt during benchmarks
+    os.environ.setdefault("CREWAI_TESTING", "true")
+    os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+
+    repeat = 2 if quick else 5
+    results: Dict[str, Any] = {}
+
+    previous = {
+        name: getattr(settings, name)
+        for name in ("cassette_mode", "cassette_dir", "cassette_name", "cassette_latency", "task_checkpoints_enabled")
+    }
+    previous_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        try:
+            # crewAI resolves task output files relative to the working directory
+            os.chdir(tmpdir)
+            results["setup"] = measure(_build_crew, repeat=repeat)
+
+            settings.cassette_mode = "replay"
+            settings.cassette_dir = str(PROJECT_ROOT / "cassettes")
+            settings.cassette_name = cassette
+            settings.cassette_latency = latency
+
+            service = FileDataService(data_dir=str(Path(tmpdir) / "data"))
+
+            def run_once():
+                # Each run starts from a fresh replay of the cassette
+                reset_active_cassette()
+                crew_runner.run_brainstorm_crew(SAMPLE_INTERESTS, [], user_id="bench_user")
+
+            with patch.object(crew_runner, "data_service", service):
+                settings.task_checkpoints_enabled = False
+                stats = measure(run_once, repeat=repeat)
+                stats["cassette"] = cassette
+                stats["latency"] = latency or "none"
+                results["end_to_end_replay"] = stats
+
+                # Warm checkpoints once, then measure fully checkpointed reruns
+                settings.task_checkpoints_enabled = True
+                results["rerun_checkpointed"] = measure(run_once, repeat=repeat)
+        finally:
+            os.chdir(previous_cwd)
+            for name, value in previous.items():
+                setattr(settings, name, value)
+            reset_active_cassette()
+
+    return results
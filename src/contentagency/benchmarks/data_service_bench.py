@@ -0,0 +1,47 @@
+"""
+Benchmarks for FileDataService read and save latency as session history grows.
+"""
+import json
+import tempfile
+from pathlib import Path
+from typing import Any, Dict
+
+from contentagency.benchmarks.common import make_session, measure
+from contentagency.services.data_service import FileDataService
+
+QUICK_SIZES = [10, 100, 1000]
+FULL_SIZES = [10, 100, 1000, 10000, 100000]
+
+
+def seed_history(data_dir: str, num_sessions: int) -> None:
+    """Write a brainstorm_results.json containing num_sessions sessions."""
+    sessions = [make_session(i) for i in range(num_sessions)]
+    with open(Path(data_dir) / "brainstorm_results.json", 'w') as f:
+        json.dump({"sessions": sessions}, f)
+
+
+def run(quick: bool = False) -> Dict[str, Any]:
+    """Measure brainstorm history reads and appends per history size."""
+    results = {}
+    for size in (QUICK_SIZES if quick else FULL_SIZES):
+        repeat = 5 if size <= 10000 else 2
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            seed_history(tmpdir, size)
+            service = FileDataService(data_dir=tmpdir)
+            file_bytes = (Path(tmpdir) / "brainstorm_results.json").stat().st_size
+
+            results[f"sessions_{size}"] = {
+                "file_bytes": file_bytes,
+                "get_brainstorm_results": measure(service.get_brainstorm_results, repeat=repeat),
+                "get_brainstorm_results_by_user": measure(
+                    lambda: service.get_brainstorm_results(user_id="user_001"), repeat=repeat
+                ),
+                "save_brainstorm_results": measure(
+                    lambda: service.save_brainstorm_results("user_001", make_session(size)),
+                    repeat=repeat,
+                    warmup=0
+                ),
+            }
+
+    return results
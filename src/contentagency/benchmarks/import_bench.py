@@ -0,0 +1,103 @@
+"""
+Cold-start import time of the server entry modules.
+
+Each measurement imports a module in a fresh interpreter with ``-X importtime``
+and reads the cumulative import time of the module from the report, so the
+numbers track what a new API worker or serverless instance pays at startup.
+The tracing case also builds the tracer, as the first traced request does,
+and checks that it does not load the crew stack either.
+"""
+import json
+import os
+import re
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional
+
+from contentagency.benchmarks.common import summarize
+
+SERVER_MODULES = ["contentagency.api.main", "contentagency.web_ui"]
+CREW_MODULES = ["contentagency.services.crew_runner"]
+
+# API cold start with tracing on: import, then build the tracer like the first request
+TRACING_CASE = {
+    "module": "contentagency.api.main",
+    "env": {"TRACING_EXPORTER": "file", "TRACING_FILE": os.devnull},
+    "setup": "from contentagency.services.tracing import get_tracer; get_tracer(); ",
+}
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+_PROBE = (
+    "import json, sys; import {module}; {setup}"
+    "print(json.dumps({{'crew_stack_loaded': 'crewai' in sys.modules, 'modules': len(sys.modules)}}))"
+)
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Parse ``-X importtime`` output into self/cumulative microseconds per module."""
+    entries = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            entries.append({
+                "module": match.group(4),
+                "self_us": int(match.group(1)),
+                "cumulative_us": int(match.group(2)),
+                "depth": len(match.group(3)) // 2,
+            })
+    return entries
+
+
+def import_module_cold(module: str, env: Optional[Dict[str, str]] = None, setup: str = "") -> Dict[str, Any]:
+    """
+    Import a module in a fresh interpreter and report its import cost.
+
+    Args:
+        module: Module to import
+        env: Extra environment variables for the interpreter (optional)
+        setup: Statements run after the import, before checking what is loaded
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE.format(module=module, setup=setup)],
+        capture_output=True, text=True, check=True, env={**os.environ, **(env or {})}
+    )
+    entries = parse_importtime(completed.stderr)
+    target = next(entry for entry in entries if entry["module"] == module)
+    probe = json.loads(completed.stdout.strip().splitlines()[-1])
+    return {
+        "seconds": target["cumulative_us"] / 1e6,
+        "crew_stack_loaded": probe["crew_stack_loaded"],
+        "modules": probe["modules"],
+        "entries": entries,
+    }
+
+
+def measure_import(
+    module: str, repeat: int = 3, env: Optional[Dict[str, str]] = None, setup: str = ""
+) -> Dict[str, Any]:
+    """Measure a module's cold import time over several fresh interpreters."""
+    runs = [import_module_cold(module, env=env, setup=setup) for _ in range(max(1, repeat))]
+    stats = summarize([run["seconds"] for run in runs])
+    last = runs[-1]
+    heaviest = sorted(
+        (entry for entry in last["entries"] if entry["depth"] == 1),
+        key=lambda entry: entry["cumulative_us"], reverse=True
+    )[:5]
+    stats["crew_stack_loaded"] = last["crew_stack_loaded"]
+    stats["modules_loaded"] = last["modules"]
+    stats["heaviest_imports"] = [
+        {"module": entry["module"], "cumulative_ms": round(entry["cumulative_us"] / 1000, 2)} for entry in heaviest
+    ]
+    return stats
+
+
+def run(quick: bool = False) -> Dict[str, Any]:
+    """Measure cold import time of the server modules (and the crew stack)."""
+    modules = SERVER_MODULES if quick else SERVER_MODULES + CREW_MODULES
+    repeat = 2 if quick else 5
+    results = {module: measure_import(module, repeat=repeat) for module in modules}
+    results[f"{TRACING_CASE['module']} (tracing)"] = measure_import(
+        TRACING_CASE["module"], repeat=repeat, env=TRACING_CASE["env"], setup=TRACING_CASE["setup"]
+    )
+    return results
@@ -0,0 +1,32 @@
+"""
+Benchmarks for parse_brainstorm_markdown and rank_suggestions on outputs from
+small to very large.
+"""
+from typing import Any, Dict
+
+from contentagency.benchmarks.common import make_brainstorm_markdown, measure
+from contentagency.services.crew_runner import parse_brainstorm_markdown
+from contentagency.services.ranking import rank_suggestions
+
+INTERESTS = {"interests": [{"topic": "AI"}, {"topic": "Data Engineering"}, {"topic": "Benchmark practitioners"}]}
+
+QUICK_SIZES = [5, 50]
+FULL_SIZES = [10, 100, 1000, 5000]
+
+
+def run(quick: bool = False) -> Dict[str, Any]:
+    """Measure parser and ranking latency per output size (number of suggestions)."""
+    results = {}
+    for size in (QUICK_SIZES if quick else FULL_SIZES):
+        markdown = make_brainstorm_markdown(size)
+        repeat = 5 if size <= 1000 else 2
+
+        stats = measure(lambda: parse_brainstorm_markdown(markdown), repeat=repeat)
+        stats["input_bytes"] = len(markdown)
+        stats["suggestions"] = len(parse_brainstorm_markdown(markdown)["suggestions"])
+        results[f"suggestions_{size}"] = stats
+
+        suggestions = parse_brainstorm_markdown(markdown)["suggestions"]
+        results[f"rank_{size}"] = measure(lambda: rank_suggestions(suggestions, INTERESTS), repeat=repeat)
+
+    return results
@@ -0,0 +1,153 @@
+"""
+Benchmark entry point.
+
+Usage:
+    uv run benchmark                      # full suite
+    uv run benchmark --quick              # small sizes, for CI smoke runs
+    uv run benchmark --only parser,api    # subset of suites
+    uv run benchmark --baseline old.json  # flag regressions against a previous run
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from contentagency.config import settings
+
+
+def _suites() -> Dict[str, Callable[..., Dict[str, Any]]]:
+    # Imported lazily so a subset run only pays for the modules it needs
+    def parser(quick):
+        from contentagency.benchmarks import parser_bench
+        return parser_bench.run(quick)
+
+    def data_service(quick):
+        from contentagency.benchmarks import data_service_bench
+        return data_service_bench.run(quick)
+
+    def api(quick):
+        from contentagency.benchmarks import api_bench
+        return api_bench.run(quick)
+
+    def crew(quick):
+        from contentagency.benchmarks import crew_bench
+        return crew_bench.run(quick)
+
+    def imports(quick):
+        from contentagency.benchmarks import import_bench
+        return import_bench.run(quick)
+
+    return {"parser": parser, "data_service": data_service, "api": api, "crew": crew, "imports": imports}
+
+
+SUITES = ("parser", "data_service", "api", "crew", "imports")
+
+
+def run_benchmarks(only: Optional[List[str]] = None, quick: bool = False) -> Dict[str, Any]:
+    """
+    Run the selected benchmark suites.
+
+    Args:
+        only: Suite names to run (defaults to all)
+        quick: Use small input sizes
+
+    Returns:
+        Report dictionary with metadata and per-suite results
+    """
+    selected = only or list(SUITES)
+    unknown = [name for name in selected if name not in SUITES]
+    if unknown:
+        raise ValueError(f"Unknown benchmark suite(s): {', '.join(unknown)}")
+
+    suites = _suites()
+    report: Dict[str, Any] = {
+        "timestamp": datetime.now().isoformat(),
+        "quick": quick,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": {},
+    }
+
+    for name in selected:
+        started = time.perf_counter()
+        report["results"][name] = suites[name](quick)
+        report["results"][name]["suite_seconds"] = round(time.perf_counter() - started, 3)
+
+    return report
+
+
+def _flatten(results: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    """Flatten nested results to {path: value} for comparable metrics."""
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(_flatten(value, path))
+        elif key in ("p50_ms", "throughput_rps") and isinstance(value, (int, float)):
+            flat[path] = float(value)
+    return flat
+
+
+def compare_reports(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.2) -> List[str]:
+    """
+    Compare two reports and describe metrics that regressed beyond threshold.
+
+    Latency (p50_ms) regresses when it grows; throughput_rps when it drops.
+    """
+    now = _flatten(current.get("results", {}))
+    before = _flatten(baseline.get("results", {}))
+
+    regressions = []
+    for path, old in before.items():
+        new = now.get(path)
+        if new is None or old <= 0:
+            continue
+        change = (new - old) / old
+        if path.endswith("throughput_rps"):
+            change = -change
+        if change > threshold:
+            regressions.append(f"{path}: {old:g} -> {new:g} ({change:+.0%})")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    """CLI entry point for the benchmark suite."""
+    parser = argparse.ArgumentParser(description="ContentAgency performance benchmarks")
+    parser.add_argument("--quick", action="store_true", help="use small input sizes")
+    parser.add_argument("--only", default="", help=f"comma-separated suites ({', '.join(SUITES)})")
+    parser.add_argument("--output", default="", help="JSON report path")
+    parser.add_argument("--baseline", default="", help="previous JSON report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="regression threshold (0.2 = 20%%)")
+    args = parser.parse_args(argv if argv is not None else sys.argv[1:])
+
+    only = [name.strip() for name in args.only.split(",") if name.strip()] or None
+    report = run_benchmarks(only=only, quick=args.quick)
+
+    output = Path(args.output) if args.output else (
+        Path(settings.output_dir) / "benchmarks" / f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"📊 Benchmark report written to {output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare_reports(report, baseline, args.threshold)
+        if regressions:
+            print("⚠️  Regressions detected:")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print("✅ No regressions beyond threshold")
+
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
 """
 Application configuration using Pydantic Settings.
 """
-from typing import List, Optional
+import os
+from typing import Dict, List, Literal, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import computed_field
 
@@ -34,6 +35,101 @@ class Settings(BaseSettings):
     # Server Configuration
     host: str = "0.0.0.0"
     port: int = 8000
+    # Import the crew stack at startup instead of on the first brainstorm
+    preload_crew: bool = False
+    # Worker processes; with more than one, workers can be recycled after
+    # a number of crew runs or above a resident memory threshold (0 = never)
+    api_workers: int = 1
+    worker_max_crew_runs: int = 0
+    worker_max_memory_mb: int = 0
+
+    # Data Backend Configuration
+    # file: JSON files under data/ (locked across processes)
+    # database: SQLite at database_url, for multi-worker deployments
+    data_backend: Literal["file", "database"] = "file"
+    database_url: str = "data/contentagency.db"
+    # PATCHes append to a per-user operation log, folded into the document
+    # every patch_compact_ops operations
+    patch_compact_ops: int = 100
+    # Idempotency-Key records: completed responses are kept for the TTL; a
+    # reservation whose request never finished is dropped after pending_seconds
+    idempotency_ttl_seconds: float = 86400.0
+    idempotency_pending_seconds: float = 900.0
+    # Example posts for the prompt: score = recency (halved every half-life)
+    # blended with engagement by engagement_weight, minus diversity_weight for
+    # topics already picked
+    post_recency_half_life_days: float = 30.0
+    post_engagement_weight: float = 0.5
+    post_diversity_weight: float = 0.3
+    # New suggestions close to an earlier one (estimated Jaccard similarity of
+    # title and description >= dedup_threshold) are flagged with duplicate_of,
+    # filtered out, or left alone (off)
+    dedup_mode: Literal["off", "flag", "filter"] = "flag"
+    dedup_threshold: float = 0.5
+    # MinHash signature length and LSH bands (num_perm must divide into bands)
+    dedup_num_perm: int = 128
+    dedup_bands: int = 32
+    # Latest suggested titles listed in the prompt as ideas not to repeat
+    dedup_avoid_hints: int = 20
+    # After parsing, resource links older than link_max_age_days are dropped and
+    # suggestions are sorted by a blend of interest match (TF-IDF), link recency
+    # and the engagement label
+    rank_suggestions: bool = True
+    link_max_age_days: float = 90.0
+    rank_relevance_weight: float = 0.5
+    rank_recency_weight: float = 0.3
+    rank_engagement_weight: float = 0.2
+    # Retrieval context for the prompt: the context_top_k snippets of the
+    # knowledge files and the user's past posts and suggestions most similar
+    # to their interests (0 disables). Hashing embeddings of
+    # context_embedding_dim dimensions; an inverted file speeds up searches
+    # once an index has context_ann_min_rows rows (0 = always exact)
+    knowledge_dir: str = "knowledge"
+    context_top_k: int = 5
+    context_min_score: float = 0.1
+    context_embedding_dim: int = 256
+    context_chunk_chars: int = 500
+    context_max_posts: int = 1000
+    context_ann_min_rows: int = 20000
+    context_ann_probes: int = 8
+
+    # Job Queue Configuration
+    # inline: POST /brainstorm runs the crew in the API process
+    # queue: the API enqueues a job and brainstorm_worker processes run it
+    brainstorm_mode: Literal["inline", "queue"] = "inline"
+    job_queue_backend: Literal["sqlite"] = "sqlite"
+    job_queue_path: str = "data/jobs.db"
+    # Workers heartbeat every lease/3; a job whose lease expires is retried elsewhere
+    job_lease_seconds: float = 60.0
+    job_max_attempts: int = 3
+    # Weighted fair queuing: share of claims per priority class, and per user within a class
+    # (users not listed weigh 1)
+    job_class_weights: Dict[str, float] = {"interactive": 16.0, "batch": 4.0, "prefetch": 1.0}
+    job_user_weights: Dict[str, float] = {}
+    worker_poll_interval: float = 1.0
+    # How often a worker checks whether its running job was cancelled
+    job_cancel_poll_seconds: float = 2.0
+
+    # Crew Run Budgets (0 = unlimited)
+    # A cancelled or exhausted run stops at its next LLM call and keeps partial results
+    run_max_seconds: float = 0
+    run_max_tokens: int = 0
+    task_max_seconds: float = 0
+    task_max_tokens: int = 0
+
+    # Observability Configuration
+    metrics_enabled: bool = True
+    # Tracing exporter: none, console, file (JSON lines) or otlp
+    tracing_exporter: Literal["none", "console", "file", "otlp"] = "none"
+    tracing_file: str = "output/traces.jsonl"
+    tracing_service_name: str = "contentagency"
+    # Profiling: off, requests (every HTTP request) or crew_runs (every crew run)
+    profiling_target: Literal["off", "requests", "crew_runs"] = "off"
+    profiling_engine: Literal["cprofile", "sampling"] = "cprofile"
+    profiling_dir: str = "output/profiles"
+    profiling_sample_interval: float = 0.005
+    # Requests carrying this value in X-Profile-Token are profiled; empty disables
+    profiling_admin_token: str = ""
 
     # Output Configuration
     output_dir: str = "output"
@@ -41,9 +137,63 @@ class Settings(BaseSettings):
     brainstorm_file: str = "brainstorm_suggestions.md"
     report_file: str = "report.md"
 
+    # Crew Execution Configuration
+    # sequential: research all interests, then brainstorm
+    # pipelined: research -> brainstorm per interest concurrently, then merge
+    crew_process: Literal["sequential", "pipelined"] = "sequential"
+    pipeline_max_workers: int = 4
+    pipeline_max_suggestions: int = 10
+    # Batch brainstorming: concurrent user runs (and shared research steps)
+    batch_max_parallel: int = 4
+
+    # Research pre-warming for recently active users (local "HH:MM" times)
+    prewarm_enabled: bool = False  # run the scheduler inside the API process
+    prewarm_times: List[str] = ["05:30"]
+    prewarm_active_days: int = 7
+    prewarm_max_parallel: int = 2
+    # Queue research for newly added interests right away (queue mode)
+    prefetch_on_change: bool = True
+
+    # Article reading tool: fetched pages are cached by normalized URL for all
+    # users and runs, and the researcher gets a summary of at most
+    # article_summary_chars
+    article_cache_dir: str = "output/articles"
+    article_cache_ttl_hours: float = 168.0
+    article_summary_chars: int = 1200
+    article_fetch_timeout: float = 15.0
+    article_max_bytes: int = 2_000_000
+
+    # Task Checkpoint Configuration
+    task_checkpoints_enabled: bool = True
+    checkpoint_dir: str = "output/checkpoints"
+
     # Model Configuration (inherit from parent .env if exists)
     openai_api_key: str = ""
     model: str = "gpt-4o"
+    # Model per task or agent name; overrides `model` keys in tasks.yaml and agents.yaml
+    model_routes: Dict[str, str] = {}
+    # USD per million [prompt, completion] tokens for models litellm has no price for
+    model_prices: Dict[str, List[float]] = {}
+
+    # Record/Replay Configuration (off, record, replay)
+    cassette_mode: Literal["off", "record", "replay"] = "off"
+    cassette_dir: str = "cassettes"
+    cassette_name: str = "default"
+    cassette_latency: str = ""
+    cassette_seed: int = 0
+    cassette_allow_fallback: bool = True
+
+    # Rate-Limit Governor Configuration (0 disables a bucket)
+    governor_enabled: bool = True
+    openai_rpm: int = 500
+    openai_tpm: int = 30000
+    serper_rpm: int = 300
+    governor_initial_concurrency: int = 4
+    governor_max_concurrency: int = 32
+    governor_latency_target_seconds: float = 30.0
+    governor_max_retries: int = 5
+    # SQLite file shared by worker processes; empty keeps limits per process
+    governor_state_path: str = ""
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -53,5 +203,22 @@ class Settings(BaseSettings):
     )
 
 
+def disable_crewai_telemetry() -> None:
+    """
+    Keep crewAI's telemetry off the network.
+
+    crewAI sets up its telemetry exporter when it is imported, so this must
+    run before the crew stack is loaded. OTEL_SDK_DISABLED would also turn
+    off this app's own spans, so it is only set when tracing is off.
+    """
+    os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+    if settings.tracing_exporter == "none":
+        os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+
+
 # Global settings instance
 settings = Settings()
+
+# Replays must never reach the network
+if settings.cassette_mode == "replay":
+    disable_crewai_telemetry()
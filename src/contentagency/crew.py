@@ -1,11 +1,11 @@
 from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task, before_kickoff, after_kickoff
 from crewai.agents.agent_builder.base_agent import BaseAgent
-from crewai_tools import SerperDevTool
 from typing import List
 from pathlib import Path
 
 from contentagency.config import settings
+from contentagency.services.llm_gateway import build_article_tool, build_llm, build_search_tool
 # If you want to run a snippet of code before or after the crew starts,
 # you can use the @before_kickoff and @after_kickoff decorators
 # https://docs.crewai.com/concepts/crews#example-crew-class-with-decorators
@@ -39,7 +39,8 @@ class Contentagency():
     def trend_researcher(self) -> Agent:
         return Agent(
             config=self.agents_config['trend_researcher'], # type: ignore[index]
-            tools=[SerperDevTool()],
+            llm=build_llm('trend_researcher'),
+            tools=[build_search_tool(), build_article_tool()],
             verbose=True
         )
 
@@ -47,6 +48,7 @@ class Contentagency():
     def brainstorming_strategist(self) -> Agent:
         return Agent(
             config=self.agents_config['brainstorming_strategist'], # type: ignore[index]
+            llm=build_llm('brainstorming_strategist'),
             verbose=True
         )
 
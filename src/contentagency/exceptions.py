@@ -11,3 +11,11 @@ class ValidationError(Exception):
 class DataFormatError(Exception):
     """Raised when data format is invalid or malformed."""
     pass
+
+
+class VersionConflictError(Exception):
+    """Raised when an update names a base version that is no longer current."""
+
+    def __init__(self, message: str, current_version: int):
+        super().__init__(message)
+        self.current_version = current_version
@@ -1,12 +1,17 @@
 #!/usr/bin/env python
+import argparse
+import json
 import sys
+import time
 import warnings
 
 from datetime import datetime
 
-from contentagency.crew import Contentagency
+from contentagency.config import disable_crewai_telemetry, settings
 from contentagency.services.data_service import data_service
-from contentagency.services.crew_runner import run_brainstorm_crew
+from contentagency.services.checkpoints import TASK_ORDER
+# Loads crewAI on first use, after the CLI flags are applied
+from contentagency.services.crew_loader import run_brainstorm_crew
 from contentagency.exceptions import ValidationError
 
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
@@ -26,29 +31,52 @@ def run():
     }
 
     try:
+        from contentagency.crew import Contentagency
         Contentagency().crew().kickoff(inputs=inputs)
     except Exception as e:
         raise Exception(f"An error occurred while running the crew: {e}")
 
 
+def _apply_cassette_args(argv: list) -> None:
+    """
+    Apply --record/--replay [cassette_name] CLI flags to the settings.
+    """
+    for flag, mode in (("--record", "record"), ("--replay", "replay")):
+        if flag in argv:
+            settings.cassette_mode = mode
+            if mode == "replay":
+                disable_crewai_telemetry()
+            position = argv.index(flag)
+            if position + 1 < len(argv) and not argv[position + 1].startswith("--"):
+                settings.cassette_name = argv[position + 1]
+
+
 def brainstorm():
     """
     Run the unified brainstorming crew with trend research and content generation.
     CLI-specific wrapper around shared crew runner logic.
+
+    Pass --record [name] or --replay [name] to capture or replay LLM and
+    Serper calls through a local cassette (see settings.cassette_*).
     """
+    _apply_cassette_args(sys.argv[1:])
+
     try:
         # Load user data using the data service
-        user_interests = data_service.get_user_interests()
-        recent_posts = data_service.get_recent_posts(limit=5)
+        user_id = settings.default_user_id
+        user_interests = data_service.get_user_interests(user_id)
+        recent_posts = data_service.select_posts(user_id, limit=5)
 
         print("🧠 Starting unified brainstorming crew...")
         print(f"📊 Analyzing {len(user_interests.get('interests', []))} interest areas")
         print(f"📈 Reviewing {len(recent_posts)} recent posts")
         print("🔍 Crew will perform trend research followed by content brainstorming")
+        if settings.cassette_mode != "off":
+            print(f"📼 Cassette {settings.cassette_mode}: {settings.cassette_dir}/{settings.cassette_name}.json")
         print("\n🚀 Starting collaborative crew execution...")
 
         # Run the shared crew logic
-        result = run_brainstorm_crew(user_interests, recent_posts)
+        result = run_brainstorm_crew(user_interests, recent_posts, user_id=user_id)
 
         print("\n✅ Unified brainstorming crew complete! Results saved to brainstorm_suggestions.md")
         print("📊 Trend research was incorporated into the collaborative workflow")
@@ -63,6 +91,85 @@ def brainstorm():
         raise Exception(f"An error occurred while running brainstorming: {e}")
 
 
+def brainstorm_batch(argv: list = None):
+    """
+    Brainstorm for many users and print one NDJSON result line per user.
+
+    Usage: brainstorm_batch [user_id ...] [--file users.ndjson] [--max-parallel N]
+    [--output results.ndjson]. Each line of the file is {"user_id", "interests"?,
+    "posts"?}; users without inline data use their saved interests and posts.
+    Research for topics shared by several users runs once. Also accepts
+    --record/--replay [name].
+    """
+    parser = argparse.ArgumentParser(prog="brainstorm_batch", description="Brainstorm for many users")
+    parser.add_argument("user_ids", nargs="*", help="Users to brainstorm for with their saved data")
+    parser.add_argument("--file", help="NDJSON file with one user per line ('-' for stdin)")
+    parser.add_argument("--max-parallel", type=int, default=None, help="Concurrent runs (default: BATCH_MAX_PARALLEL)")
+    parser.add_argument("--output", help="Write results to this file instead of stdout")
+    args, extra = parser.parse_known_args(sys.argv[1:] if argv is None else argv)
+    _apply_cassette_args(extra)
+
+    from contentagency.services.batch import parse_batch_ndjson, run_batch
+
+    try:
+        items = [{"user_id": user_id} for user_id in args.user_ids]
+        if args.file:
+            if args.file == "-":
+                items += parse_batch_ndjson(sys.stdin)
+            else:
+                with open(args.file) as f:
+                    items += parse_batch_ndjson(f)
+    except (OSError, ValueError) as e:
+        print(f"❌ Could not read batch: {e}", file=sys.stderr)
+        sys.exit(1)
+    if not items:
+        parser.error("give at least one user id or --file")
+
+    print(f"🧠 Brainstorming for {len(items)} users...", file=sys.stderr)
+    started = time.monotonic()
+    statuses = {}
+    output = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for result in run_batch(items, max_parallel=args.max_parallel):
+            statuses[result["status"]] = statuses.get(result["status"], 0) + 1
+            output.write(json.dumps(result, default=str) + "\n")
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    summary = ", ".join(f"{count} {status}" for status, count in sorted(statuses.items()))
+    print(f"✅ Batch complete in {time.monotonic() - started:.1f}s: {summary}", file=sys.stderr)
+    return statuses
+
+
+def prewarm(argv: list = None):
+    """
+    Pre-warm trend research for recently active users' interests.
+
+    Usage: prewarm [--once]. Without --once, runs daily at PREWARM_TIMES until
+    interrupted. In queue mode the research is enqueued for the crew workers.
+    """
+    parser = argparse.ArgumentParser(prog="prewarm", description="Pre-warm trend research")
+    parser.add_argument("--once", action="store_true", help="Run one pre-warm round now and exit")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    from contentagency.services.prewarm import PrewarmScheduler, prewarm_job_queue, prewarm_once
+
+    if args.once:
+        counts = prewarm_once(job_queue=prewarm_job_queue())
+        print(f"✅ Pre-warm complete: {', '.join(f'{count} {result}' for result, count in counts.items())}")
+        return counts
+
+    print(f"⏰ Pre-warming research daily at {', '.join(settings.prewarm_times)}")
+    scheduler = PrewarmScheduler().start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        scheduler.stop()
+
+
 def train():
     """
     Train the crew for a given number of iterations.
@@ -72,6 +179,7 @@ def train():
         'current_year': str(datetime.now().year)
     }
     try:
+        from contentagency.crew import Contentagency
         Contentagency().crew().train(n_iterations=int(sys.argv[1]), filename=sys.argv[2], inputs=inputs)
 
     except Exception as e:
@@ -79,11 +187,27 @@ def train():
 
 def replay():
     """
-    Replay the crew execution from a specific task.
+    Replay the brainstorming crew from a named task.
+
+    Usage: replay <task_name>, where task_name is one of the crew's tasks
+    (e.g. brainstorming_task). Earlier tasks reuse their latest checkpoint,
+    so no crewAI task ids are needed.
     """
+    if len(sys.argv) < 2:
+        print(f"Usage: replay <task_name>  (one of: {', '.join(TASK_ORDER)})")
+        sys.exit(1)
+
     try:
-        Contentagency().crew().replay(task_id=sys.argv[1])
+        user_id = settings.default_user_id
+        user_interests = data_service.get_user_interests(user_id)
+        recent_posts = data_service.select_posts(user_id, limit=5)
 
+        print(f"🔁 Replaying crew from {sys.argv[1]}...")
+        return run_brainstorm_crew(user_interests, recent_posts, user_id=user_id, from_task=sys.argv[1])
+
+    except ValidationError as e:
+        print(f"\n❌ Validation Error: {str(e)}")
+        sys.exit(1)
     except Exception as e:
         raise Exception(f"An error occurred while replaying the crew: {e}")
 
@@ -97,6 +221,7 @@ def test():
     }
 
     try:
+        from contentagency.crew import Contentagency
         Contentagency().crew().test(n_iterations=int(sys.argv[1]), eval_llm=sys.argv[2], inputs=inputs)
 
     except Exception as e:
@@ -0,0 +1,434 @@
+"""
+Fetching, summarizing and caching articles for the trend researcher.
+
+Articles are stored by a hash of their normalized URL (lowercased scheme and
+host, no fragment, default port, trailing slash or tracking parameters), so
+the same article cited with different tracking links, by different users or
+in different runs is fetched once. Each entry keeps the extracted text and
+an extractive summary of at most settings.article_summary_chars: the
+highest-scoring sentences by word frequency, in their original order. The
+researcher reads the summary instead of a whole page.
+
+HTTP goes through a transport (urllib by default), so tests and offline runs
+can plug in a stub. Concurrent fetches of one URL in a process wait for the
+first instead of fetching it again.
+
+URLs come from the model, which search results and page text can steer, so
+only hosts that resolve to public addresses are fetched: loopback, private,
+link-local (cloud metadata) and reserved addresses are refused, for the
+requested URL and every redirect the urllib transport follows. The urllib
+transport connects to the addresses it checked, so a DNS answer that changes
+after the check (DNS rebinding) cannot point the request elsewhere.
+"""
+import hashlib
+import http.client
+import ipaddress
+import json
+import os
+import re
+import socket
+import threading
+import time
+import urllib.request
+from dataclasses import dataclass
+from datetime import datetime
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Protocol
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from contentagency.config import settings
+from contentagency.services.metrics import record_cache
+
+# Query parameters that only track where a click came from
+_TRACKING_PARAMS = re.compile(r"^(utm_\w+|fbclid|gclid|mc_cid|mc_eid|ref|ref_src|igshid)$", re.IGNORECASE)
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Elements whose text is not part of the article
+_SKIPPED_TAGS = {"script", "style", "noscript", "nav", "header", "footer", "aside", "form", "svg", "template"}
+_BLOCK_TAGS = {"p", "h1", "h2", "h3", "h4", "li", "blockquote", "pre", "div", "section", "article", "br", "tr"}
+_XHTML = "application/xhtml+xml"
+_PUBLISHED_META = ("article:published_time", "og:published_time", "datepublished", "date", "pubdate", "dc.date")
+
+_STOPWORDS = frozenset(
+    "a about after all also an and any are as at be been but by can could did do does for from had has have he her "
+    "his how i if in into is it its just more most my no not of on one or our out over she so some such than that "
+    "the their them then there these they this those to up was we were what when which who will with would you your".split()
+)
+
+# Per-process single flight: concurrent fetches of one URL share a lock
+_FETCH_LOCKS = [threading.Lock() for _ in range(64)]
+
+
+@dataclass
+class HttpResponse:
+    """What a transport returns for a GET."""
+    status: int
+    body: str
+    content_type: str = "text/html"
+    url: str = ""
+
+
+class HttpTransport(Protocol):
+    """Performs HTTP GETs for the article fetcher."""
+
+    def get(self, url: str, timeout: float, max_bytes: int) -> HttpResponse:
+        ...
+
+
+def resolve_host(host: str, port: int) -> List[str]:
+    """IP addresses a host name resolves to."""
+    return [info[4][0] for info in socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)]
+
+
+def public_addresses(host: str, port: int, url: str) -> List[str]:
+    """
+    Resolve a host, refusing it unless every address is public.
+
+    Raises:
+        ValueError: If the host does not resolve or resolves to a loopback,
+            private, link-local, reserved or multicast address
+    """
+    try:
+        addresses = resolve_host(host, port)
+    except (OSError, UnicodeError) as e:
+        raise ValueError(f"Could not resolve {host}: {e}") from e
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split("%", 1)[0])
+        ip = getattr(ip, "ipv4_mapped", None) or ip
+        if not ip.is_global or ip.is_multicast:
+            raise ValueError(f"Refusing to fetch {url}: {host} is not a public address ({ip})")
+    return addresses
+
+
+def check_public_url(url: str) -> None:
+    """
+    Refuse URLs the researcher must not reach.
+
+    Raises:
+        ValueError: If the URL is not http(s) or its host resolves to a
+            loopback, private, link-local, reserved or multicast address
+    """
+    parts = urlsplit(url.strip())
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError(f"Not an http(s) URL: {url}")
+    public_addresses(parts.hostname, parts.port or _DEFAULT_PORTS[parts.scheme], url)
+
+
+def _connect_public(address, timeout=socket._GLOBAL_DEFAULT_TIMEOUT, source_address=None) -> socket.socket:
+    """
+    socket.create_connection that connects only to the addresses it checked.
+
+    Resolving again here, rather than trusting the check made before the
+    request, closes the window in which a host's DNS record could switch to
+    an internal address (DNS rebinding).
+    """
+    host, port = address
+    error: Optional[OSError] = None
+    for ip in public_addresses(host, port, f"{host}:{port}"):
+        try:
+            return socket.create_connection((ip, port), timeout, source_address)
+        except OSError as e:
+            error = e
+    raise error or OSError(f"Could not connect to {host}:{port}")
+
+
+class _PublicHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection to the checked address of its host."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._create_connection = _connect_public
+
+
+class _PublicHTTPSConnection(http.client.HTTPSConnection):
+    """HTTPS connection to the checked address of its host (SNI and certificate check use the host name)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._create_connection = _connect_public
+
+
+class _PublicHTTPHandler(urllib.request.HTTPHandler):
+
+    def http_open(self, req):
+        return self.do_open(_PublicHTTPConnection, req)
+
+
+class _PublicHTTPSHandler(urllib.request.HTTPSHandler):
+
+    def https_open(self, req):
+        return self.do_open(_PublicHTTPSConnection, req, context=self._context)
+
+
+class _PublicRedirectHandler(urllib.request.HTTPRedirectHandler):
+    """Follows redirects only to public http(s) URLs."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        check_public_url(newurl)
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+
+class UrllibTransport:
+    """
+    Standard library transport.
+
+    Connections go to the addresses checked when they are opened, not to a
+    second DNS answer. Proxies from the environment are not used: the proxy
+    would resolve the host itself, after the check.
+    """
+
+    USER_AGENT = "Mozilla/5.0 (compatible; contentagency-research/1.0)"
+
+    def get(self, url: str, timeout: float, max_bytes: int) -> HttpResponse:
+        request = urllib.request.Request(url, headers={"User-Agent": self.USER_AGENT, "Accept": "text/html,text/plain"})
+        opener = urllib.request.build_opener(
+            urllib.request.ProxyHandler({}), _PublicHTTPHandler, _PublicHTTPSHandler, _PublicRedirectHandler
+        )
+        with opener.open(request, timeout=timeout) as response:
+            # Binary responses are rejected later: do not download them
+            body = response.read(max_bytes) if is_text_content(response.headers.get_content_type()) else b""
+            charset = response.headers.get_content_charset() or "utf-8"
+            return HttpResponse(
+                status=response.status,
+                body=body.decode(charset, errors="replace"),
+                content_type=response.headers.get_content_type(),
+                url=response.geturl()
+            )
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a URL for cache keys."""
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or "https").lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _TRACKING_PARAMS.match(name)
+    ))
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+def url_key(url: str) -> str:
+    """Content address of a URL: sha256 of its normalized form."""
+    return hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+
+
+class _ArticleParser(HTMLParser):
+    """Collects an HTML page's title, publication date and readable text."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ""
+        self.published: Optional[str] = None
+        self.blocks: List[str] = [""]
+        self._skipping = 0
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIPPED_TAGS:
+            self._skipping += 1
+        elif tag == "title":
+            self._in_title = True
+        elif tag == "meta":
+            attributes = {name.lower(): value for name, value in attrs if value}
+            name = (attributes.get("property") or attributes.get("name") or attributes.get("itemprop") or "").lower()
+            if name in _PUBLISHED_META and not self.published:
+                self.published = attributes.get("content")
+            elif name == "og:title" and attributes.get("content"):
+                self.title = attributes["content"].strip()
+        elif tag == "time" and not self.published:
+            self.published = dict(attrs).get("datetime")
+        if tag in _BLOCK_TAGS:
+            self.blocks.append("")
+
+    def handle_endtag(self, tag):
+        if tag in _SKIPPED_TAGS and self._skipping:
+            self._skipping -= 1
+        elif tag == "title":
+            self._in_title = False
+        if tag in _BLOCK_TAGS:
+            self.blocks.append("")
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title = self.title or data.strip()
+        elif not self._skipping:
+            self.blocks[-1] += data
+
+
+def is_text_content(content_type: str) -> bool:
+    """Whether a response of this content type can be read as an article (text/* or XHTML)."""
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type.startswith("text/") or media_type == _XHTML
+
+
+def extract_article(body: str, content_type: str = "text/html") -> Dict[str, Any]:
+    """
+    Extract the title, publication date and text of a page.
+
+    Returns:
+        {'title', 'published', 'text'}; text is the page's text blocks, one per line
+
+    Raises:
+        ValueError: If the content type is not text/* or XHTML (PDFs, images, ...)
+    """
+    if not is_text_content(content_type):
+        raise ValueError(f"Unsupported content type {content_type}")
+    if "html" not in content_type:
+        return {"title": "", "published": None, "text": body.strip()}
+    parser = _ArticleParser()
+    parser.feed(body)
+    parser.close()
+    lines = [re.sub(r"\s+", " ", block).strip() for block in parser.blocks]
+    return {
+        "title": re.sub(r"\s+", " ", parser.title).strip(),
+        "published": parser.published,
+        "text": "\n".join(line for line in lines if line),
+    }
+
+
+def summarize(text: str, max_chars: Optional[int] = None) -> str:
+    """
+    Extractive summary: the most informative sentences, in their original order.
+
+    Sentences are scored by the average document frequency of their content
+    words, with a bonus for the lead (articles put the news first), and
+    picked until max_chars (defaults to settings.article_summary_chars).
+    """
+    max_chars = max_chars or settings.article_summary_chars
+    sentences = [
+        s.strip() for line in text.splitlines() for s in re.split(r"(?<=[.!?])\s+", line)
+        if 40 <= len(s.strip()) <= 600
+    ]
+    if not sentences:
+        return text[:max_chars].strip()
+
+    words = [[w for w in re.findall(r"[a-z0-9']+", s.lower()) if w not in _STOPWORDS] for s in sentences]
+    frequency: Dict[str, int] = {}
+    for sentence_words in words:
+        for word in set(sentence_words):
+            frequency[word] = frequency.get(word, 0) + 1
+    scores = [
+        (sum(frequency[w] for w in sentence_words) / (len(sentence_words) or 1)) * (1.5 if i < 3 else 1.0)
+        for i, sentence_words in enumerate(words)
+    ]
+
+    picked, length = [], 0
+    for i in sorted(range(len(sentences)), key=lambda i: -scores[i]):
+        if length + len(sentences[i]) + 1 > max_chars:
+            continue
+        picked.append(i)
+        length += len(sentences[i]) + 1
+    if not picked:
+        return sentences[0][:max_chars]
+    return " ".join(sentences[i] for i in sorted(picked))
+
+
+class ArticleStore:
+    """Content-addressed file store of fetched articles."""
+
+    def __init__(self, cache_dir: str = None):
+        self._cache_dir = cache_dir
+
+    @property
+    def root(self) -> Path:
+        # Resolved lazily so settings changes (and tests) take effect
+        return Path(self._cache_dir or settings.article_cache_dir)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Return the cached article for a URL unless missing or older than settings.article_cache_ttl_hours."""
+        try:
+            with open(self._path(url_key(url)), 'r') as f:
+                article = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if time.time() - article.get("fetched_at", 0) > settings.article_cache_ttl_hours * 3600:
+            return None
+        return article
+
+    def put(self, article: Dict[str, Any]) -> None:
+        path = self._path(article["key"])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Unique temp name per writer: pipelined runs fetch concurrently
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(article, f)
+        os.replace(tmp_path, path)
+
+
+def fetch_article(url: str, transport: Optional[HttpTransport] = None, store: Optional[ArticleStore] = None) -> Dict[str, Any]:
+    """
+    Return an article's summary, fetching it only if it is not cached.
+
+    Args:
+        url: Article URL
+        transport: HTTP transport (optional, defaults to urllib)
+        store: Article store (optional, defaults to the shared one)
+
+    Returns:
+        Article dict: 'key', 'url', 'final_url', 'title', 'published',
+        'summary', 'text_chars', 'fetched_at' and 'cached' (served from the store)
+
+    Raises:
+        ValueError: If the URL is not a public http(s) URL or the page could
+            not be fetched
+    """
+    if urlsplit(url.strip()).scheme not in ("http", "https"):
+        raise ValueError(f"Not an http(s) URL: {url}")
+    store = store or article_store
+    key = url_key(url)
+    with _FETCH_LOCKS[int(key[:8], 16) % len(_FETCH_LOCKS)]:
+        cached = store.get(url)
+        record_cache("article", cached is not None)
+        if cached is not None:
+            return {**cached, "cached": True}
+
+        check_public_url(url)
+        try:
+            response = (transport or UrllibTransport()).get(
+                url, timeout=settings.article_fetch_timeout, max_bytes=settings.article_max_bytes
+            )
+        except Exception as e:
+            raise ValueError(f"Could not fetch {url}: {e}") from e
+        if response.status >= 400:
+            raise ValueError(f"Could not fetch {url}: HTTP {response.status}")
+
+        try:
+            extracted = extract_article(response.body, response.content_type)
+        except ValueError as e:
+            raise ValueError(f"Could not read {url}: {e}") from e
+        article = {
+            "key": key,
+            "url": normalize_url(url),
+            "final_url": response.url or url,
+            "title": extracted["title"],
+            "published": extracted["published"],
+            "summary": summarize(extracted["text"]),
+            "text": extracted["text"],
+            "text_chars": len(extracted["text"]),
+            "fetched_at": time.time(),
+        }
+        store.put(article)
+        return {**article, "cached": False}
+
+
+def format_article(article: Dict[str, Any]) -> str:
+    """Tool output for an article: title, date, URL and summary."""
+    lines = [f"Title: {article['title'] or 'Unknown'}"]
+    if article.get("published"):
+        lines.append(f"Published: {article['published']}")
+    lines.append(f"URL: {article['final_url']}")
+    fetched = datetime.fromtimestamp(article["fetched_at"]).strftime("%Y-%m-%d")
+    lines.append(f"Summary (extractive, from {article['text_chars']} characters fetched {fetched}): {article['summary']}")
+    return "\n".join(lines)
+
+
+# Default store for the application
+article_store = ArticleStore()
@@ -0,0 +1,247 @@
+"""
+Batch brainstorming for many users.
+
+A morning batch for many creator accounts runs with bounded parallelism
+(settings.batch_max_parallel runs at a time) instead of one HTTP call per
+user. Topics shared by several users are researched once: the research step
+of a pipelined run is checkpointed by topic and date only, so the batch
+researches each distinct topic first and starts a user's run as soon as all
+of that user's topics are ready; the run then serves its research from the
+checkpoints. Results are yielded per user as runs finish, ready to stream
+as NDJSON.
+
+In queue mode the batch enqueues one "batch" priority job per user instead
+and reports each job as the crew workers finish it.
+"""
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from contentagency.config import settings
+from contentagency.services.crew_loader import run_brainstorm_session
+from contentagency.services.data_service import data_service
+from contentagency.services.job_queue import FINISHED_STATUSES
+from contentagency.services.prompts import build_crew_inputs
+from contentagency.services.tracing import bind_context, span
+
+
+def parse_batch_ndjson(lines: Iterable[str]) -> List[Dict[str, Any]]:
+    """
+    Parse a batch file with one JSON object per line.
+
+    Each line names a user ("user_id") and may carry that user's "interests"
+    and "posts"; whatever is missing is read from the data service. A bare
+    JSON string is accepted as a user id.
+
+    Args:
+        lines: NDJSON lines (blank lines are skipped)
+
+    Returns:
+        Batch items in file order
+
+    Raises:
+        ValueError: If a line is not valid JSON or has no user_id
+    """
+    items = []
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Line {number}: invalid JSON ({e.msg})")
+        if isinstance(item, str):
+            item = {"user_id": item}
+        if not isinstance(item, dict) or not item.get("user_id"):
+            raise ValueError(f"Line {number}: expected an object with a user_id")
+        items.append(item)
+    return items
+
+
+def resolve_batch_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Fill in a batch item's interests and posts.
+
+    Args:
+        item: Dict with 'user_id' and optional 'interests' and 'posts' (either
+            the API documents or bare lists)
+
+    Returns:
+        Dict with 'user_id', 'interests' (interests document) and 'posts' (list)
+    """
+    user_id = item["user_id"]
+    interests = item.get("interests")
+    if interests is None:
+        interests = data_service.get_user_interests(user_id)
+    elif isinstance(interests, list):
+        interests = {"user_id": user_id, "interests": interests}
+
+    posts = item.get("posts")
+    if posts is None:
+        posts = data_service.select_posts(user_id)
+    elif isinstance(posts, dict):
+        posts = posts.get("posts", [])
+
+    return {"user_id": user_id, "interests": interests, "posts": posts}
+
+
+def _resolve_items(items: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Resolve batch items, yielding an error result for users that cannot run."""
+    for item in items:
+        try:
+            resolved = resolve_batch_item(item)
+        except ValueError as e:
+            yield {"user_id": item.get("user_id"), "status": "error", "error": str(e), "seconds": 0.0}
+            continue
+        if not resolved["interests"].get("interests"):
+            yield {
+                "user_id": resolved["user_id"], "status": "error", "seconds": 0.0,
+                "error": "Please add at least one user interest before running the crew"
+            }
+            continue
+        yield resolved
+
+
+def _topic_key(interest: Dict[str, Any]) -> str:
+    """Identify interests whose research inputs (and checkpoint) are identical."""
+    return json.dumps(interest, sort_keys=True, default=str)
+
+
+def _research_shared_topic(interest: Dict[str, Any]) -> None:
+    """Research one topic into the checkpoint store for the users' runs."""
+    from contentagency.services.pipeline import research_topic
+
+    with span("batch.research", topic=interest.get("topic")):
+        research_topic(interest, build_crew_inputs({"interests": [interest]}, []))
+
+
+def _run_user(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one user's brainstorm and describe the outcome."""
+    started = time.monotonic()
+    try:
+        session = run_brainstorm_session(
+            item["interests"], item["posts"], user_id=item["user_id"], process="pipelined"
+        )["session"]
+    except Exception as e:
+        return {
+            "user_id": item["user_id"], "status": "error", "error": str(e),
+            "seconds": round(time.monotonic() - started, 3)
+        }
+    return {
+        "user_id": item["user_id"],
+        "status": "interrupted" if session.get("partial") else "success",
+        "session": session,
+        "seconds": round(time.monotonic() - started, 3)
+    }
+
+
+def run_batch(items: List[Dict[str, Any]], max_parallel: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Brainstorm for many users, yielding each result as its run finishes.
+
+    Args:
+        items: Batch items (see parse_batch_ndjson)
+        max_parallel: Maximum concurrent runs and research steps (optional,
+            defaults to settings.batch_max_parallel)
+
+    Yields:
+        Dicts with 'user_id', 'status' ("success", "interrupted" or "error"),
+        'session' or 'error', and 'seconds'
+    """
+    max_parallel = max(1, max_parallel or settings.batch_max_parallel)
+    results: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+
+    ready = []
+    for outcome in _resolve_items(items):
+        if "status" in outcome:
+            yield outcome
+        else:
+            ready.append(outcome)
+    if not ready:
+        return
+
+    # No span around the loop: a streaming response resumes this generator on different threads
+    with ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix="batch") as executor:
+        run_user = bind_context(lambda item: results.put(_run_user(item)))
+
+        # Research each distinct topic once, before any user run needs it
+        research: Dict[str, Future] = {}
+        if settings.task_checkpoints_enabled:
+            research_one = bind_context(_research_shared_topic)
+            for item in ready:
+                for interest in item["interests"]["interests"]:
+                    key = _topic_key(interest)
+                    if key not in research:
+                        research[key] = executor.submit(research_one, interest)
+
+        def schedule(item: Dict[str, Any]) -> None:
+            pending = {research[_topic_key(i)] for i in item["interests"]["interests"] if _topic_key(i) in research}
+            if not pending:
+                executor.submit(run_user, item)
+                return
+            remaining = [len(pending)]
+            lock = threading.Lock()
+
+            def topic_done(_future: Future) -> None:
+                # A failed research step is retried by the user's own topic path
+                with lock:
+                    remaining[0] -= 1
+                    if remaining[0]:
+                        return
+                executor.submit(run_user, item)
+
+            for future in pending:
+                future.add_done_callback(topic_done)
+
+        for item in ready:
+            schedule(item)
+
+        for _ in ready:
+            yield results.get()
+
+
+def run_batch_queued(items: List[Dict[str, Any]], job_queue: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Enqueue one batch-priority job per user and yield each as it finishes.
+
+    Args:
+        items: Batch items (see parse_batch_ndjson)
+        job_queue: Job queue the crew workers claim from
+
+    Yields:
+        The same result dicts as run_batch, plus 'job_id'
+    """
+    jobs = {}
+    for resolved in _resolve_items(items):
+        if "status" in resolved:
+            yield resolved
+            continue
+        job = job_queue.enqueue(
+            "brainstorm",
+            {
+                "user_id": resolved["user_id"], "user_interests": resolved["interests"],
+                "recent_posts": resolved["posts"], "process": "pipelined"
+            },
+            user_id=resolved["user_id"],
+            priority="batch"
+        )
+        jobs[job["id"]] = time.monotonic()
+
+    while jobs:
+        for job_id in list(jobs):
+            job = job_queue.get(job_id)
+            if job["status"] not in FINISHED_STATUSES:
+                continue
+            result = {"user_id": job["user_id"], "job_id": job_id, "seconds": round(time.monotonic() - jobs.pop(job_id), 3)}
+            if job["status"] == "succeeded":
+                session = job["result"] or {}
+                result.update(status="interrupted" if session.get("partial") else "success", session=session)
+            else:
+                result.update(status="error", error=job["error"] or f"Job {job['status']}")
+            yield result
+        if jobs:
+            time.sleep(settings.worker_poll_interval)
@@ -0,0 +1,150 @@
+"""
+Cancellation and hard budgets for crew runs.
+
+A RunBudget tracks wall-clock time and LLM tokens for a whole run and for
+each task in it. The gateway checks the active budget before every LLM call
+and search, so a cancelled run, or one that has used up its budget, stops at
+the next call boundary instead of looping (and spending) indefinitely. The
+crew runner then keeps whatever finished first, such as the research or the
+suggestions parsed so far.
+"""
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from contentagency.config import settings
+
+
+class RunInterruptedError(TimeoutError):
+    """
+    Raised inside a crew run when it is cancelled or out of budget.
+
+    Subclasses TimeoutError because crewAI agents re-raise TimeoutError
+    without their usual retries.
+    """
+
+    def __init__(self, reason: str, partial_output: str = ""):
+        super().__init__(reason)
+        self.reason = reason
+        # Output produced before the interruption (research or brainstorm markdown)
+        self.partial_output = partial_output
+
+
+class RunBudget:
+    """Wall-clock and token limits for one crew run and each of its tasks (0 = unlimited)."""
+
+    def __init__(
+        self,
+        max_seconds: float = 0,
+        max_tokens: int = 0,
+        task_max_seconds: float = 0,
+        task_max_tokens: int = 0
+    ):
+        self.max_seconds = max_seconds
+        self.max_tokens = max_tokens
+        self.task_max_seconds = task_max_seconds
+        self.task_max_tokens = task_max_tokens
+        self.started = time.monotonic()
+        self.tokens = 0
+        self.cancel_reason: Optional[str] = None
+        # (task name, task object id) -> [start time, tokens]; concurrent paths run separate tasks
+        self._tasks: Dict[Tuple[str, int], list] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls) -> "RunBudget":
+        """Create a budget from the run_* and task_* settings."""
+        return cls(
+            max_seconds=settings.run_max_seconds,
+            max_tokens=settings.run_max_tokens,
+            task_max_seconds=settings.task_max_seconds,
+            task_max_tokens=settings.task_max_tokens
+        )
+
+    def cancel(self, reason: str = "Run cancelled") -> None:
+        """Stop the run at its next LLM call or search."""
+        self.cancel_reason = reason
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def _task(self, task: Any) -> Optional[list]:
+        if task is None:
+            return None
+        key = (getattr(task, "name", None) or "task", id(task))
+        with self._lock:
+            return self._tasks.setdefault(key, [time.monotonic(), 0])
+
+    def check(self, task: Any = None) -> None:
+        """
+        Raise if the run is cancelled or a run or task budget is exhausted.
+
+        Args:
+            task: The crewAI task about to call the LLM (optional); its
+                clock starts at the first check
+
+        Raises:
+            RunInterruptedError: With the reason the run must stop
+        """
+        if self.cancel_reason:
+            raise RunInterruptedError(self.cancel_reason)
+        if self.max_seconds and self.elapsed >= self.max_seconds:
+            raise RunInterruptedError(f"Run time budget of {self.max_seconds:g}s exhausted")
+        if self.max_tokens and self.tokens >= self.max_tokens:
+            raise RunInterruptedError(f"Run token budget of {self.max_tokens} exhausted")
+
+        usage = self._task(task)
+        if usage is None:
+            return
+        name = getattr(task, "name", None) or "task"
+        if self.task_max_seconds and time.monotonic() - usage[0] >= self.task_max_seconds:
+            raise RunInterruptedError(f"Time budget of {self.task_max_seconds:g}s exhausted in {name}")
+        if self.task_max_tokens and usage[1] >= self.task_max_tokens:
+            raise RunInterruptedError(f"Token budget of {self.task_max_tokens} exhausted in {name}")
+
+    def charge(self, tokens: Optional[int], task: Any = None) -> None:
+        """Count tokens used by an LLM call against the run and its task."""
+        if not tokens:
+            return
+        usage = self._task(task)
+        with self._lock:
+            self.tokens += tokens
+            if usage is not None:
+                usage[1] += tokens
+
+
+_current_budget: contextvars.ContextVar[Optional[RunBudget]] = contextvars.ContextVar(
+    "contentagency_run_budget", default=None
+)
+
+
+def current_budget() -> Optional[RunBudget]:
+    """Return the budget of the crew run executing in this context, if any."""
+    return _current_budget.get()
+
+
+@contextmanager
+def use_budget(budget: RunBudget) -> Iterator[RunBudget]:
+    """Make a budget the active one for the calls made inside the block."""
+    token = _current_budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _current_budget.reset(token)
+
+
+def check_budget(task: Any = None) -> None:
+    """Check the active budget (no-op outside a budgeted run)."""
+    budget = current_budget()
+    if budget is not None:
+        budget.check(task)
+
+
+def charge_budget(tokens: Optional[int], task: Any = None) -> None:
+    """Charge tokens to the active budget (no-op outside a budgeted run)."""
+    budget = current_budget()
+    if budget is not None:
+        budget.charge(tokens, task)
@@ -0,0 +1,259 @@
+"""
+Record/replay cassettes for external calls (LLM completions, Serper searches).
+
+In ``record`` mode every real call is captured as a request/response pair and
+written to a local JSON cassette. In ``replay`` mode the cassette serves those
+responses deterministically, so the whole pipeline can run without network
+access or API keys. An optional latency distribution can be injected during
+replay to make load tests and benchmarks behave like the real providers.
+"""
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from contentagency.config import settings
+
+
+CASSETTE_MODES = ("off", "record", "replay")
+CASSETTE_VERSION = 1
+
+
+class CassetteMissError(Exception):
+    """Raised in replay mode when no recorded interaction matches a request."""
+    pass
+
+
+def request_key(kind: str, request: Any) -> str:
+    """Build a stable hash for a request payload."""
+    payload = json.dumps({"kind": kind, "request": request}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LatencyModel:
+    """
+    Injected latency for replayed calls.
+
+    Spec format (``settings.cassette_latency``):
+    - ``""`` or ``"none"``: no delay
+    - ``"recorded"``: sleep for the duration captured while recording
+    - ``"fixed:0.5"``: constant delay in seconds
+    - ``"uniform:0.2,1.5"``: uniform between min and max seconds
+    - ``"normal:1.0,0.25"``: gaussian with mean and stddev (clamped at 0)
+    - ``"lognormal:0.0,0.5"``: lognormal with mu and sigma
+
+    Any spec may be suffixed with ``*<scale>`` (e.g. ``"recorded*0.1"``).
+    """
+
+    def __init__(self, spec: str = "", seed: int = 0):
+        self.spec = (spec or "").strip()
+        self.scale = 1.0
+        self._rng = random.Random(seed)
+
+        body = self.spec
+        if "*" in body:
+            body, scale = body.rsplit("*", 1)
+            self.scale = float(scale)
+
+        name, _, raw_params = body.partition(":")
+        self.kind = name.strip().lower() or "none"
+        self.params = [float(p) for p in raw_params.split(",") if p.strip()]
+
+        expected = {"none": 0, "recorded": 0, "fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+        if self.kind not in expected:
+            raise ValueError(f"Unknown latency distribution: {self.kind}")
+        if len(self.params) != expected[self.kind]:
+            raise ValueError(f"Latency distribution '{self.kind}' expects {expected[self.kind]} parameter(s)")
+
+    def sample(self, recorded_duration: float = 0.0) -> float:
+        """Return a delay in seconds for one replayed call."""
+        if self.kind == "none":
+            delay = 0.0
+        elif self.kind == "recorded":
+            delay = recorded_duration
+        elif self.kind == "fixed":
+            delay = self.params[0]
+        elif self.kind == "uniform":
+            delay = self._rng.uniform(self.params[0], self.params[1])
+        elif self.kind == "normal":
+            delay = self._rng.gauss(self.params[0], self.params[1])
+        else:
+            delay = self._rng.lognormvariate(self.params[0], self.params[1])
+        return max(0.0, delay * self.scale)
+
+
+class Cassette:
+    """
+    A JSON file of recorded interactions.
+
+    Replay first looks up an exact request hash. If nothing matches and
+    ``allow_fallback`` is set, the next unused interaction of the same kind is
+    served in recorded order (wrapping around once all were served), which
+    keeps replays working when prompts contain volatile values such as the
+    current date, or when a run makes more calls than were recorded.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        mode: str = "replay",
+        latency: str = "",
+        seed: int = 0,
+        allow_fallback: bool = True
+    ):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unknown cassette mode: {mode}")
+
+        self.path = Path(path)
+        self.mode = mode
+        self.allow_fallback = allow_fallback
+        self.latency = LatencyModel(latency, seed=seed)
+        self._lock = threading.Lock()
+        self.interactions: List[Dict[str, Any]] = []
+        self._used: set = set()
+
+        if mode == "replay":
+            self._load()
+        elif mode == "record" and self.path.exists():
+            # Recording into an existing cassette appends to it
+            self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            if self.mode == "replay":
+                raise CassetteMissError(f"Cassette not found: {self.path}")
+            return
+        except json.JSONDecodeError:
+            raise ValueError(f"Invalid JSON format in cassette {self.path}")
+
+        self.interactions = data.get("interactions", [])
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump({"version": CASSETTE_VERSION, "interactions": self.interactions}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def _find(self, kind: str, key: str) -> Optional[int]:
+        for index, interaction in enumerate(self.interactions):
+            if index not in self._used and interaction["kind"] == kind and interaction["key"] == key:
+                return index
+        # Exact match already consumed: allow re-serving identical requests
+        for index, interaction in enumerate(self.interactions):
+            if interaction["kind"] == kind and interaction["key"] == key:
+                return index
+        if self.allow_fallback:
+            same_kind = [index for index, interaction in enumerate(self.interactions) if interaction["kind"] == kind]
+            unused = [index for index in same_kind if index not in self._used]
+            if same_kind and not unused:
+                # Every interaction of this kind was served: start over (load tests)
+                self._used.difference_update(same_kind)
+                unused = same_kind
+            if unused:
+                return unused[0]
+        return None
+
+    def play(
+        self, kind: str, request: Any, real_call: Callable[[], Any], details: Optional[Dict[str, Any]] = None
+    ) -> Any:
+        """
+        Serve a call through the cassette.
+
+        Args:
+            kind: Interaction family, e.g. "llm" or "serper"
+            request: JSON-serializable request payload used for matching
+            real_call: Zero-argument callable performing the real request
+            details: Dict that real_call fills with JSON-serializable facts
+                about the call (e.g. token usage), recorded with the response;
+                on replay it receives the recorded ones (optional)
+
+        Returns:
+            The recorded or live response
+        """
+        key = request_key(kind, request)
+
+        if self.mode == "replay":
+            with self._lock:
+                index = self._find(kind, key)
+                if index is None:
+                    raise CassetteMissError(f"No recorded '{kind}' interaction for request {key[:12]}")
+                self._used.add(index)
+                interaction = self.interactions[index]
+            if details is not None:
+                details.update(interaction.get("details") or {})
+
+            delay = self.latency.sample(interaction.get("duration", 0.0))
+            if delay:
+                time.sleep(delay)
+            return interaction["response"]
+
+        started = time.perf_counter()
+        response = real_call()
+        duration = time.perf_counter() - started
+
+        if self.mode == "record":
+            interaction = {
+                "kind": kind,
+                "key": key,
+                "request": request,
+                "response": response,
+                "duration": round(duration, 4)
+            }
+            if details:
+                interaction["details"] = dict(details)
+            with self._lock:
+                self.interactions.append(interaction)
+                self._save()
+
+        return response
+
+
+_active_cassette: Optional[Cassette] = None
+_active_lock = threading.Lock()
+
+
+def cassette_path(name: str = None) -> Path:
+    """Resolve the cassette file for a cassette name."""
+    return Path(settings.cassette_dir) / f"{name or settings.cassette_name}.json"
+
+
+def get_active_cassette() -> Optional[Cassette]:
+    """
+    Return the process-wide cassette configured in settings.
+
+    Returns None when ``settings.cassette_mode`` is "off".
+    """
+    global _active_cassette
+
+    if settings.cassette_mode == "off":
+        return None
+
+    with _active_lock:
+        if _active_cassette is None or _active_cassette.mode != settings.cassette_mode:
+            if settings.cassette_mode == "replay":
+                # Settings and --replay turn telemetry off before crewAI is imported;
+                # this covers a mode switched at runtime (crewAI re-checks before each event)
+                os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+            _active_cassette = Cassette(
+                str(cassette_path()),
+                mode=settings.cassette_mode,
+                latency=settings.cassette_latency,
+                seed=settings.cassette_seed,
+                allow_fallback=settings.cassette_allow_fallback
+            )
+        return _active_cassette
+
+
+def reset_active_cassette() -> None:
+    """Drop the cached cassette so the next call re-reads settings."""
+    global _active_cassette
+    with _active_lock:
+        _active_cassette = None
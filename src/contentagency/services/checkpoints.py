@@ -0,0 +1,129 @@
+"""
+Task-level checkpoints for crew runs.
+
+Each task's output is persisted under a key derived from everything that can
+change it: the task and agent configuration, the model, the inputs the task
+template actually references, and the outputs of upstream tasks. A later run
+with the same key can reuse the output instead of re-executing the task.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from contentagency.config import settings
+from contentagency.services.metrics import record_cache
+from contentagency.services.model_routing import load_crew_config, resolve_model
+
+# Execution order of the crew's tasks
+TASK_ORDER = ["trend_research_task", "brainstorming_task"]
+
+_PLACEHOLDER = re.compile(r"\{(\w+)\}")
+
+
+def hash_text(text: str) -> str:
+    """Return a sha256 hex digest of a text value."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def task_checkpoint_key(task_name: str, inputs: Dict[str, Any], upstream: Iterable[str] = ()) -> str:
+    """
+    Compute the checkpoint key for a task.
+
+    Args:
+        task_name: Task name from tasks.yaml
+        inputs: Crew inputs used to render task and agent templates
+        upstream: Outputs of tasks this task depends on
+
+    Returns:
+        Hex digest identifying the task's rendered inputs and config
+    """
+    task_config = load_crew_config("tasks").get(task_name)
+    if task_config is None:
+        raise ValueError(f"Unknown task: {task_name}")
+    agent_config = load_crew_config("agents").get(task_config.get("agent"), {})
+
+    templates = [
+        task_config.get("description", ""),
+        task_config.get("expected_output", ""),
+        *(str(agent_config.get(field, "")) for field in ("role", "goal", "backstory")),
+    ]
+    referenced = sorted({name for text in templates for name in _PLACEHOLDER.findall(text)})
+
+    payload = {
+        "task": task_name,
+        "task_config": task_config,
+        "agent_config": agent_config,
+        "model": resolve_model(task_name),
+        "inputs": {name: inputs.get(name) for name in referenced},
+        "upstream": [hash_text(output) for output in upstream],
+    }
+    return hash_text(json.dumps(payload, sort_keys=True, default=str))
+
+
+class TaskCheckpointStore:
+    """File-based store of task outputs keyed by checkpoint key."""
+
+    def __init__(self, checkpoint_dir: str = None):
+        self._checkpoint_dir = checkpoint_dir
+
+    @property
+    def root(self) -> Path:
+        # Resolved lazily so settings changes (and tests) take effect
+        return Path(self._checkpoint_dir or settings.checkpoint_dir)
+
+    def _write(self, path: Path, data: Dict[str, Any]) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Unique temp name per writer: pipelined runs save checkpoints concurrently
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def _read(self, path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except json.JSONDecodeError:
+            # A corrupt checkpoint is treated as a miss and recomputed
+            return None
+
+    def get(self, task_name: str, key: str) -> Optional[Dict[str, Any]]:
+        """Return the checkpoint for a task and key, or None."""
+        checkpoint = self._read(self.root / task_name / f"{key}.json")
+        record_cache("checkpoint", checkpoint is not None)
+        return checkpoint
+
+    def latest(self, task_name: str) -> Optional[Dict[str, Any]]:
+        """Return the most recently saved checkpoint for a task, or None."""
+        return self._read(self.root / task_name / "latest.json")
+
+    def discard_latest(self, task_name: str, key: str) -> bool:
+        """Forget the latest checkpoint of a task if it is the one with this key."""
+        latest = self.latest(task_name)
+        if latest is None or latest.get("key") != key:
+            return False
+        (self.root / task_name / "latest.json").unlink(missing_ok=True)
+        return True
+
+    def put(self, task_name: str, key: str, output: str) -> Dict[str, Any]:
+        """Persist a task output under its key and mark it as the latest."""
+        checkpoint = {
+            "task": task_name,
+            "key": key,
+            "output": output,
+            "created_at": datetime.now().isoformat(),
+        }
+        self._write(self.root / task_name / f"{key}.json", checkpoint)
+        self._write(self.root / task_name / "latest.json", checkpoint)
+        return checkpoint
+
+
+# Default instance for the application
+checkpoint_store = TaskCheckpointStore()
@@ -0,0 +1,358 @@
+"""
+Local retrieval index over knowledge files and a user's past content.
+
+Snippets (chunks of the files in settings.knowledge_dir, the user's past
+posts and past suggestions) are embedded on the CPU with a hashing
+embedding: word unigrams and bigrams are hashed into
+settings.context_embedding_dim signed buckets with sublinear term
+frequencies, and the vector is L2-normalized, so no model has to be
+downloaded or loaded. Vectors live in a memory-mapped float32 matrix
+(vectors.f32) that grows as rows are appended; snippet metadata lives in
+SQLite next to it.
+
+The index is built incrementally: each sync adds only snippets whose text
+is new and deactivates the ones that disappeared. A search scores the
+query against the active rows of the user (and the shared knowledge) with
+one matrix product. Once an index has settings.context_ann_min_rows rows,
+an inverted file (k-means centroids, each row assigned to its nearest) is
+trained, and searches only score the rows of the
+settings.context_ann_probes closest clusters.
+"""
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from contentagency.config import settings
+
+KNOWLEDGE_EXTENSIONS = (".txt", ".md")
+
+# Snippets available to every user (knowledge files)
+SHARED = ""
+
+_KMEANS_ITERATIONS = 10
+_KMEANS_SAMPLE = 20_000
+
+
+def embed(texts: Iterable[str], dim: int) -> np.ndarray:
+    """Hashing embeddings of texts (float32, L2-normalized rows)."""
+    texts = list(texts)
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+    for i, text in enumerate(texts):
+        words = re.findall(r"[a-z0-9]+", text.lower())
+        counts: Dict[str, int] = {}
+        for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            counts[feature] = counts.get(feature, 0) + 1
+        for feature, count in counts.items():
+            h = zlib.crc32(feature.encode("utf-8"))
+            vectors[i, h % dim] += (1.0 if h & 0x80000000 else -1.0) * (1.0 + math.log(count))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=vectors, where=norms > 0)
+
+
+def chunk_text(text: str, max_chars: Optional[int] = None) -> List[str]:
+    """Split text into snippets of at most max_chars, at paragraph and then word boundaries."""
+    max_chars = max_chars or settings.context_chunk_chars
+    chunks: List[str] = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        current = ""
+        for word in paragraph.split():
+            if current and len(current) + 1 + len(word) > max_chars:
+                chunks.append(current)
+                current = ""
+            current = f"{current} {word}" if current else word
+        if current:
+            chunks.append(current)
+    return chunks
+
+
+class ContextIndex:
+    """Memory-mapped embedding index of knowledge and past content snippets."""
+
+    def __init__(self, directory: str, dim: Optional[int] = None):
+        self.directory = Path(directory)
+        self.dim = dim or settings.context_embedding_dim
+        self._local = threading.local()
+        self._schema_ready = False
+        self._vectors: Optional[np.memmap] = None
+        self._centroids: Optional[np.ndarray] = None
+        self._centroids_stamp: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def vectors_path(self) -> Path:
+        return self.directory / "vectors.f32"
+
+    @property
+    def centroids_path(self) -> Path:
+        return self.directory / "centroids.npy"
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.directory / "entries.db"), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        if not self._schema_ready:
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS entries ("
+                    "row INTEGER PRIMARY KEY, key TEXT NOT NULL UNIQUE, source TEXT NOT NULL, user_id TEXT NOT NULL, "
+                    "text TEXT NOT NULL, active INTEGER NOT NULL DEFAULT 1, cluster INTEGER NOT NULL DEFAULT -1)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_user ON entries (user_id, active, cluster)")
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_source ON entries (source, user_id, active)")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS stamps (source TEXT NOT NULL, user_id TEXT NOT NULL, stamp TEXT NOT NULL, "
+                    "PRIMARY KEY (source, user_id))"
+                )
+                conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+                conn.execute("INSERT OR IGNORE INTO meta (name, value) VALUES ('dim', ?)", (self.dim,))
+            built_with = conn.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()[0]
+            if built_with != self.dim:
+                raise ValueError(
+                    f"Context index at {self.directory} has {built_with}-dimensional embeddings, not {self.dim}; "
+                    "delete it to rebuild"
+                )
+            self._schema_ready = True
+        return conn
+
+    def _matrix(self, rows_needed: int = 0) -> np.memmap:
+        """The vector matrix, grown to hold rows_needed rows and reopened if another process grew it."""
+        row_bytes = self.dim * 4
+        size = self.vectors_path.stat().st_size if self.vectors_path.exists() else 0
+        if rows_needed * row_bytes > size:
+            capacity = max(1024, 2 * rows_needed)
+            with open(self.vectors_path, "ab") as f:
+                f.truncate(capacity * row_bytes)
+            size = capacity * row_bytes
+        if self._vectors is None or self._vectors.shape[0] * row_bytes != size:
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(size // row_bytes, self.dim))
+        return self._vectors
+
+    def _key(self, source: str, user_id: str, text: str) -> str:
+        return hashlib.sha1(f"{source}\0{user_id}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_stamp(self, source: str, user_id: str = SHARED) -> Optional[str]:
+        """What a source was last synced from (e.g. file sizes and times), or None."""
+        row = self._connect().execute(
+            "SELECT stamp FROM stamps WHERE source = ? AND user_id = ?", (source, user_id)
+        ).fetchone()
+        return row[0] if row else None
+
+    def set_stamp(self, source: str, user_id: str, stamp: str) -> None:
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT INTO stamps (source, user_id, stamp) VALUES (?, ?, ?) "
+                "ON CONFLICT(source, user_id) DO UPDATE SET stamp = excluded.stamp",
+                (source, user_id, stamp)
+            )
+
+    def sync(self, source: str, user_id: str, snippets: List[str], replace: bool = True) -> int:
+        """
+        Bring one source of a user (or SHARED) in line with its current snippets.
+
+        Args:
+            source: Snippet kind, e.g. "knowledge", "post" or "suggestion"
+            user_id: Owner of the snippets (SHARED for everyone)
+            snippets: Current snippet texts
+            replace: Deactivate indexed snippets that are no longer in snippets
+                (False for append-only sources)
+
+        Returns:
+            Number of snippets embedded
+        """
+        wanted = {self._key(source, user_id, text): text for text in snippets if text.strip()}
+        conn = self._connect()
+        with self._lock, conn:
+            conn.execute("BEGIN IMMEDIATE")
+            known = dict(conn.execute(
+                "SELECT key, active FROM entries WHERE source = ? AND user_id = ?", (source, user_id)
+            ).fetchall())
+            if replace:
+                gone = [(key,) for key, active in known.items() if active and key not in wanted]
+                conn.executemany("UPDATE entries SET active = 0 WHERE key = ?", gone)
+            conn.executemany(
+                "UPDATE entries SET active = 1 WHERE key = ?",
+                [(key,) for key in wanted if known.get(key) == 0]
+            )
+
+            new = [(key, text) for key, text in wanted.items() if key not in known]
+            if new:
+                start = conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM entries").fetchone()[0]
+                vectors = embed([text for _, text in new], self.dim)
+                matrix = self._matrix(start + len(new))
+                matrix[start:start + len(new)] = vectors
+                matrix.flush()
+                centroids = self._load_centroids(conn)
+                clusters = (
+                    np.argmax(vectors @ centroids.T, axis=1) if centroids is not None else np.full(len(new), -1)
+                )
+                conn.executemany(
+                    "INSERT INTO entries (row, key, source, user_id, text, cluster) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(start + i, key, source, user_id, text, int(clusters[i])) for i, (key, text) in enumerate(new)]
+                )
+        if new and settings.context_ann_min_rows > 0:
+            self._maybe_train()
+        return len(new)
+
+    def _load_centroids(self, conn: sqlite3.Connection) -> Optional[np.ndarray]:
+        row = conn.execute("SELECT value FROM meta WHERE name = 'trained_rows'").fetchone()
+        stamp = row[0] if row else None
+        if stamp != self._centroids_stamp:
+            self._centroids = np.load(self.centroids_path) if stamp and self.centroids_path.exists() else None
+            self._centroids_stamp = stamp
+        return self._centroids
+
+    def _maybe_train(self) -> None:
+        """Train (or retrain, once the index doubled) the inverted file."""
+        conn = self._connect()
+        active = conn.execute("SELECT COUNT(*) FROM entries WHERE active = 1").fetchone()[0]
+        row = conn.execute("SELECT value FROM meta WHERE name = 'trained_rows'").fetchone()
+        if active < settings.context_ann_min_rows or (row and active < 2 * row[0]):
+            return
+        with self._lock, conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = np.array([r for (r,) in conn.execute("SELECT row FROM entries WHERE active = 1")], dtype=np.int64)
+            matrix = self._matrix()
+            centroids = train_centroids(matrix, rows, int(math.sqrt(len(rows))))
+            tmp = self.centroids_path.with_suffix(".tmp.npy")
+            np.save(tmp, centroids)
+            os.replace(tmp, self.centroids_path)
+
+            all_rows = np.array([r for (r,) in conn.execute("SELECT row FROM entries")], dtype=np.int64)
+            for start in range(0, len(all_rows), 50_000):
+                batch = all_rows[start:start + 50_000]
+                clusters = np.argmax(np.asarray(matrix[batch]) @ centroids.T, axis=1)
+                conn.executemany(
+                    "UPDATE entries SET cluster = ? WHERE row = ?",
+                    zip(clusters.tolist(), batch.tolist())
+                )
+            conn.execute(
+                "INSERT INTO meta (name, value) VALUES ('trained_rows', ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = excluded.value",
+                (len(rows),)
+            )
+
+    def search(
+        self, query: str, k: int, user_id: str, min_score: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Find the snippets of a user (and the shared knowledge) most similar to a query.
+
+        Args:
+            query: Text to match (e.g. the user's interests)
+            k: Maximum number of snippets
+            user_id: Whose snippets to search
+            min_score: Minimum cosine similarity (optional, defaults to settings.context_min_score)
+
+        Returns:
+            Snippets, best first: {'source', 'text', 'score'}
+        """
+        min_score = settings.context_min_score if min_score is None else min_score
+        if k <= 0 or not self.vectors_path.exists():
+            return []
+        conn = self._connect()
+        vector = embed([query], self.dim)[0]
+        sql = "SELECT row FROM entries WHERE active = 1 AND user_id IN (?, ?)"
+        params: List[Any] = [user_id, SHARED]
+        centroids = self._load_centroids(conn)
+        if centroids is not None:
+            probes = np.argsort(-(centroids @ vector))[:settings.context_ann_probes]
+            sql += f" AND cluster IN ({','.join('?' * len(probes))})"
+            params += probes.tolist()
+        rows = np.array([r for (r,) in conn.execute(sql, params)], dtype=np.int64)
+        if rows.size == 0:
+            return []
+
+        scores = np.asarray(self._matrix()[rows]) @ vector
+        top = np.argsort(-scores)[:k] if rows.size <= k else np.argpartition(-scores, k - 1)[:k]
+        top = [i for i in top[np.argsort(-scores[top])] if scores[i] >= min_score]
+        if not top:
+            return []
+        texts = dict(
+            (row, (source, text)) for row, source, text in conn.execute(
+                f"SELECT row, source, text FROM entries WHERE row IN ({','.join('?' * len(top))})",
+                [int(rows[i]) for i in top]
+            )
+        )
+        return [
+            {"source": texts[int(rows[i])][0], "text": texts[int(rows[i])][1], "score": round(float(scores[i]), 3)}
+            for i in top
+        ]
+
+
+def train_centroids(matrix: np.ndarray, rows: np.ndarray, clusters: int, seed: int = 0) -> np.ndarray:
+    """Spherical k-means centroids of the given rows (on a sample of at most 20k rows)."""
+    rng = np.random.default_rng(seed)
+    sample = np.asarray(matrix[np.sort(rng.choice(rows, size=min(len(rows), _KMEANS_SAMPLE), replace=False))])
+    clusters = max(1, min(clusters, len(sample)))
+    centroids = sample[rng.choice(len(sample), size=clusters, replace=False)].copy()
+    for _ in range(_KMEANS_ITERATIONS):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, sample)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        # Empty clusters keep their previous centroid
+        centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+    return centroids.astype(np.float32)
+
+
+def sync_knowledge(index: ContextIndex, directory: Optional[str] = None) -> int:
+    """Index the knowledge files (shared by all users) if they changed since the last sync."""
+    root = Path(directory or settings.knowledge_dir)
+    files = sorted(p for p in root.rglob("*") if p.is_file() and p.suffix.lower() in KNOWLEDGE_EXTENSIONS) \
+        if root.is_dir() else []
+    stamp = json.dumps([[str(p), p.stat().st_mtime_ns, p.stat().st_size] for p in files])
+    if index.get_stamp("knowledge") == stamp:
+        return 0
+    snippets = [chunk for p in files for chunk in chunk_text(p.read_text(encoding="utf-8", errors="replace"))]
+    added = index.sync("knowledge", SHARED, snippets)
+    index.set_stamp("knowledge", SHARED, stamp)
+    return added
+
+
+def suggestion_cursor(index: ContextIndex, user_id: str) -> Optional[str]:
+    """Timestamp of the user's last indexed session (None before the first sync)."""
+    return index.get_stamp("suggestion", user_id)
+
+
+def sync_user_content(
+    index: ContextIndex, user_id: str, posts: List[Dict[str, Any]], sessions: List[Dict[str, Any]]
+) -> int:
+    """
+    Index a user's past posts and suggestions.
+
+    Posts are synced in full (edited and deleted posts are replaced); sessions
+    are append-only, so only those with a timestamp after the last indexed
+    session's (suggestion_cursor) are embedded, and callers only need to pass
+    those (deleted or trimmed sessions do not shift it).
+    """
+    added = index.sync("post", user_id, [
+        chunk for post in posts if isinstance(post, dict)
+        for chunk in chunk_text(" ".join(filter(None, [str(post.get("content") or ""), ", ".join(
+            str(topic) for topic in post.get("topics") or []
+        )])))
+    ])
+
+    cursor = suggestion_cursor(index, user_id)
+    new_sessions = [
+        session for session in sessions if cursor is None or (session.get("timestamp") or "") > cursor
+    ]
+    if new_sessions:
+        added += index.sync("suggestion", user_id, [
+            f"{s.get('title', '')}: {s.get('description', '')}"
+            for session in new_sessions for s in session.get("suggestions", [])
+        ], replace=False)
+        index.set_stamp("suggestion", user_id, max(session.get("timestamp") or "" for session in new_sessions))
+    return added
@@ -0,0 +1,84 @@
+"""
+Lazy access to the crew stack (crewAI, crewai_tools, litellm).
+
+Importing the crew stack takes seconds and a few hundred MB, while most API and
+web UI requests (health checks, results, data updates) never run a crew. The
+servers import run_brainstorm_crew from here instead of services.crew_runner,
+so the stack is loaded on the first brainstorm, or ahead of time with
+preload_crew_stack() in processes dedicated to running crews.
+"""
+import importlib
+import sys
+import threading
+from typing import Any, Dict, List, Optional
+
+from contentagency.services.serving import get_recycler
+
+CREW_RUNNER_MODULE = "contentagency.services.crew_runner"
+
+
+def crew_stack_loaded() -> bool:
+    """Whether the crew stack has been imported in this process."""
+    return CREW_RUNNER_MODULE in sys.modules
+
+
+def load_crew_runner():
+    """Import and return the crew runner module (no-op once loaded)."""
+    return importlib.import_module(CREW_RUNNER_MODULE)
+
+
+def _after_crew_run() -> None:
+    # Supervised workers may restart themselves after enough crew runs
+    recycler = get_recycler()
+    if recycler is not None:
+        recycler.after_crew_run()
+
+
+def run_brainstorm_crew(
+    user_interests: Dict[str, Any],
+    recent_posts: List[Dict[str, Any]],
+    user_id: str = None,
+    from_task: Optional[str] = None
+) -> str:
+    """Run services.crew_runner.run_brainstorm_crew, importing it on first use."""
+    try:
+        return load_crew_runner().run_brainstorm_crew(
+            user_interests, recent_posts, user_id=user_id, from_task=from_task
+        )
+    finally:
+        _after_crew_run()
+
+
+def run_brainstorm_session(
+    user_interests: Dict[str, Any],
+    recent_posts: List[Dict[str, Any]],
+    user_id: str = None,
+    from_task: Optional[str] = None,
+    process: Optional[str] = None
+) -> Dict[str, Any]:
+    """Run services.crew_runner.run_brainstorm_session, importing it on first use."""
+    try:
+        return load_crew_runner().run_brainstorm_session(
+            user_interests, recent_posts, user_id=user_id, from_task=from_task, process=process
+        )
+    finally:
+        _after_crew_run()
+
+
+def preload_crew_stack(background: bool = True) -> Optional[threading.Thread]:
+    """
+    Import the crew stack ahead of the first brainstorm.
+
+    Args:
+        background: Import on a daemon thread so startup is not blocked
+
+    Returns:
+        The loader thread when background is True, otherwise None
+    """
+    if not background:
+        load_crew_runner()
+        return None
+
+    thread = threading.Thread(target=load_crew_runner, name="crew-preload", daemon=True)
+    thread.start()
+    return thread
@@ -3,14 +3,33 @@ Shared crew execution logic for both CLI and web UI.
 Eliminates code duplication and provides a single source of truth.
 """
 import re
+from contextlib import contextmanager, nullcontext
 from datetime import datetime
-from typing import Dict, List, Any
+from pathlib import Path
+from typing import Dict, List, Any, Optional
 from crewai import Crew, Process
+from crewai.tasks.task_output import TaskOutput
 
+from contentagency.config import settings
 from contentagency.crew import Contentagency
+from contentagency.services.budgets import RunBudget, RunInterruptedError, current_budget, use_budget
+from contentagency.services.checkpoints import TASK_ORDER, checkpoint_store, task_checkpoint_key
 from contentagency.services.data_service import data_service
+from contentagency.services.metrics import CREW_PHASE_SECONDS, CREW_RUNS, CREW_RUNS_ACTIVE, observe_task
+from contentagency.services.profiling import profile_run
+from contentagency.services.ranking import parse_link_date, rank_suggestions
+from contentagency.services.prompts import (
+    build_crew_inputs,
+    format_interests_for_prompt,
+    format_posts_for_prompt,
+    research_checkpoint_key,
+)
+from contentagency.services.tracing import register_task_listeners, span
 from contentagency.exceptions import ValidationError
 
+# Task spans: registered with the crew stack so tracing alone never imports crewAI
+register_task_listeners()
+
 
 def parse_brainstorm_markdown(markdown_text: str) -> Dict[str, Any]:
     """
@@ -112,8 +131,8 @@ def _extract_field(text: str, pattern: str, multiline: bool = False) -> str:
     return ""
 
 
-def _extract_resource_links(text: str) -> List[Dict[str, str]]:
-    """Extract resource links from text."""
+def _extract_resource_links(text: str) -> List[Dict[str, Any]]:
+    """Extract resource links from text, with their dates parsed into published_ts."""
     links = []
 
     # Pattern: [Title](URL) - Published: Date
@@ -128,61 +147,245 @@ def _extract_resource_links(text: str) -> List[Dict[str, str]]:
         links.append({
             "title": link_title,
             "url": url,
-            "published_date": published_date
+            "published_date": published_date,
+            "published_ts": parse_link_date(published_date)
         })
 
     return links
 
 
-def format_interests_for_prompt(user_interests: dict) -> str:
-    """Format user interests for the prompt."""
-    if not user_interests or 'interests' not in user_interests:
-        return "No specific interests provided."
+def handle_duplicate_suggestions(user_id: str, suggestions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Flag or drop suggestions that nearly repeat the user's earlier ones.
 
-    formatted = "**User Interest Areas:**\n"
-    for interest in user_interests['interests']:
-        # Handle missing 'topic' field safely
-        topic = interest.get('topic', 'Untitled Topic')
-        formatted += f"- **{topic}**\n"
+    Uses the data service's MinHash/LSH index of saved suggestions, according
+    to settings.dedup_mode: "flag" adds duplicate_of to the repeated ones,
+    "filter" removes them and "off" leaves the suggestions alone.
 
-    return formatted
+    Returns:
+        The suggestions to save
+    """
+    if settings.dedup_mode == "off" or not suggestions:
+        return suggestions
+    with crew_phase("dedup", suggestions=len(suggestions)):
+        matches = data_service.find_duplicate_suggestions(user_id, suggestions)
+    if settings.dedup_mode == "filter":
+        kept = [suggestion for suggestion, match in zip(suggestions, matches) if match is None]
+        if len(kept) < len(suggestions):
+            print(f"🔁 Dropped {len(suggestions) - len(kept)} near-duplicate suggestions")
+        return kept
+    for suggestion, match in zip(suggestions, matches):
+        if match is not None:
+            suggestion["duplicate_of"] = match
+    return suggestions
+
+
+def research_only_markdown(research: str) -> str:
+    """Brainstorm-format markdown carrying only the trend research (no suggestions yet)."""
+    return f"## Trending Context Summary\n{research}\n" if research else ""
+
+
+@contextmanager
+def crew_phase(phase: str, **attributes: Any):
+    """Time a run phase for metrics and trace it as a span."""
+    with CREW_PHASE_SECONDS.time(phase=phase), span(f"crew.{phase}", **attributes) as current:
+        yield current
+
+
+def _lookup_checkpoint(task_name: str, key: str, force: bool, use_latest: bool) -> Optional[Dict[str, Any]]:
+    """Find a reusable checkpoint for a task, honoring replay overrides."""
+    if force or not settings.task_checkpoints_enabled:
+        return None
+    checkpoint = checkpoint_store.get(task_name, key)
+    if checkpoint is None and use_latest:
+        checkpoint = checkpoint_store.latest(task_name)
+    return checkpoint
+
+
+def _run_sequential_crew(crew_instance: Contentagency, inputs: Dict[str, Any], from_task: Optional[str] = None) -> str:
+    """
+    Run trend research followed by brainstorming, skipping checkpointed tasks.
 
+    The pipeline starts at the first task whose checkpoint key changed. When
+    from_task is given, earlier tasks reuse their latest checkpoint and
+    from_task onwards is always re-executed.
+    """
+    start_index = TASK_ORDER.index(from_task) if from_task else None
 
-def format_posts_for_prompt(recent_posts: list) -> str:
-    """Format recent posts for the prompt."""
-    if not recent_posts:
-        return "No recent posts available for analysis."
+    def forced(task_name: str) -> bool:
+        return start_index is not None and TASK_ORDER.index(task_name) >= start_index
 
-    formatted = "**Recent Post Performance:**\n"
-    for post in recent_posts:
-        # Handle missing required fields safely
-        post_id = post.get('id', 'unknown')
-        platform = post.get('platform', 'unknown')
-        content = post.get('content', '')
+    def replaying_past(task_name: str) -> bool:
+        return start_index is not None and TASK_ORDER.index(task_name) < start_index
 
-        formatted += f"\n**Post ID {post_id}** ({platform})\n"
-        if post.get('title'):
-            formatted += f"Title: {post['title']}\n"
-        formatted += f"Content: {content[:150]}{'...' if len(content) > 150 else ''}\n"
-        formatted += f"Topics: {', '.join(post.get('topics', []))}\n"
+    research_key = task_checkpoint_key("trend_research_task", inputs)
+    research_checkpoint = _lookup_checkpoint(
+        "trend_research_task", research_key,
+        force=forced("trend_research_task"), use_latest=replaying_past("trend_research_task")
+    )
 
-    return formatted
+    research_task = crew_instance.trend_research_task()
+    brainstorming_task = crew_instance.brainstorming_task()
+
+    if research_checkpoint is not None:
+        research_output = research_checkpoint["output"]
+        brainstorm_key = task_checkpoint_key("brainstorming_task", inputs, upstream=[research_output])
+        brainstorm_checkpoint = _lookup_checkpoint(
+            "brainstorming_task", brainstorm_key, force=forced("brainstorming_task"), use_latest=False
+        )
+        if brainstorm_checkpoint is not None:
+            # Nothing changed: serve the whole run from checkpoints
+            output = brainstorm_checkpoint["output"]
+            output_path = Path(settings.output_dir) / settings.brainstorm_file
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            output_path.write_text(output)
+            return output
+
+        # Start at brainstorming, feeding it the checkpointed research as context
+        research_task.output = TaskOutput(
+            name="trend_research_task",
+            description="Checkpointed trend research",
+            raw=research_output,
+            agent="Trend Research and Analysis Specialist"
+        )
+        brainstorming_task.context = [research_task]
+        crew = Crew(
+            agents=[crew_instance.brainstorming_strategist()],
+            tasks=[brainstorming_task],
+            process=Process.sequential,
+            verbose=True
+        )
+        try:
+            result = crew.kickoff(inputs=inputs)
+        except RunInterruptedError as e:
+            raise RunInterruptedError(e.reason, partial_output=research_only_markdown(research_output)) from e
+        observe_task(brainstorming_task)
+        outputs = [output.raw for output in getattr(result, "tasks_output", None) or []]
+        if settings.task_checkpoints_enabled and len(outputs) == 1:
+            checkpoint_store.put("brainstorming_task", brainstorm_key, outputs[0])
+        return str(result)
 
+    # Create unified crew with both agents and tasks
+    # Tasks will execute sequentially: trend_research_task -> brainstorming_task
+    unified_crew = Crew(
+        agents=[
+            crew_instance.trend_researcher(),
+            crew_instance.brainstorming_strategist()
+        ],
+        tasks=[
+            research_task,
+            brainstorming_task
+        ],
+        process=Process.sequential,
+        verbose=True
+    )
+
+    try:
+        result = unified_crew.kickoff(inputs=inputs)
+    except RunInterruptedError as e:
+        # Keep the research if it finished before the run was stopped
+        research = research_task.output.raw if research_task.output is not None else ""
+        if research and settings.task_checkpoints_enabled:
+            checkpoint_store.put("trend_research_task", research_key, research)
+        raise RunInterruptedError(e.reason, partial_output=research_only_markdown(research)) from e
+    observe_task(research_task)
+    observe_task(brainstorming_task)
+
+    outputs = [output.raw for output in getattr(result, "tasks_output", None) or []]
+    if settings.task_checkpoints_enabled and len(outputs) == 2:
+        checkpoint_store.put("trend_research_task", research_key, outputs[0])
+        brainstorm_key = task_checkpoint_key("brainstorming_task", inputs, upstream=[outputs[0]])
+        checkpoint_store.put("brainstorming_task", brainstorm_key, outputs[1])
 
-def run_brainstorm_crew(user_interests: Dict[str, Any], recent_posts: List[Dict[str, Any]], user_id: str = None) -> str:
+    return str(result)
+
+
+def run_brainstorm_crew(
+    user_interests: Dict[str, Any],
+    recent_posts: List[Dict[str, Any]],
+    user_id: str = None,
+    from_task: Optional[str] = None
+) -> str:
     """
     Run the unified brainstorming crew with trend research and content generation.
 
+    See run_brainstorm_session() for details.
+
+    Returns:
+        The crew result as a string
+    """
+    return run_brainstorm_session(user_interests, recent_posts, user_id=user_id, from_task=from_task)["result"]
+
+
+def research_interests(user_interests: Dict[str, Any], force: bool = False) -> str:
+    """
+    Run only the trend research for a set of interests and checkpoint it.
+
+    The next brainstorm with the same interests (on the same day) then starts
+    at the brainstorming task.
+
+    Args:
+        user_interests: Interests dictionary ('interests' list)
+        force: Re-run the research even if today's checkpoint exists
+
+    Returns:
+        Trend research markdown
+    """
+    key = research_checkpoint_key(user_interests)
+    if not force:
+        checkpoint = checkpoint_store.get("trend_research_task", key)
+        if checkpoint is not None:
+            return checkpoint["output"]
+
+    with crew_phase("setup"):
+        crew_instance = Contentagency()
+    research_task = crew_instance.trend_research_task()
+    # Pre-warming must not overwrite the report of a user's latest run
+    research_task.output_file = None
+    crew = Crew(agents=[crew_instance.trend_researcher()], tasks=[research_task], process=Process.sequential, verbose=True)
+    output = str(crew.kickoff(inputs=build_crew_inputs(user_interests, [])))
+    observe_task(research_task)
+    checkpoint_store.put("trend_research_task", key, output)
+    return output
+
+
+def run_brainstorm_session(
+    user_interests: Dict[str, Any],
+    recent_posts: List[Dict[str, Any]],
+    user_id: str = None,
+    from_task: Optional[str] = None,
+    process: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Run the unified brainstorming crew and return the saved session.
+
+    With settings.crew_process == "pipelined", each interest is researched and
+    brainstormed on its own concurrent path and the ideas are merged at the end
+    (see services/pipeline.py).
+
+    Task outputs are checkpointed by a hash of their rendered inputs and config,
+    so a rerun only executes tasks whose inputs changed (e.g. new recent posts
+    rerun brainstorming but reuse the day's trend research).
+
     Args:
         user_interests: User interests dictionary
         recent_posts: List of recent posts with engagement data
         user_id: User identifier for saving results (optional, extracted from user_interests if not provided)
+        from_task: Force re-execution from this task onwards, reusing the latest
+            checkpoints of earlier tasks (optional, one of TASK_ORDER)
+        process: "sequential" or "pipelined" (optional, defaults to settings.crew_process)
+
+    The run is bounded by the active RunBudget (or one built from the run_*
+    and task_* settings). When it is cancelled or a budget runs out, the
+    output finished so far (the research, or the suggestions of completed
+    topic paths) is returned and saved with partial=True and a stop_reason.
 
     Returns:
-        The crew result as a string
+        Dictionary with the crew result string ("result") and the structured
+        session saved through the data service ("session")
 
     Raises:
-        ValidationError: If user_interests is empty or invalid
+        ValidationError: If user_interests is empty or invalid, or from_task is unknown
     """
     # Validate user interests
     if not user_interests or 'interests' not in user_interests:
@@ -192,54 +395,69 @@ def run_brainstorm_crew(user_interests: Dict[str, Any], recent_posts: List[Dict[
     if not interests_list or len(interests_list) == 0:
         raise ValidationError("Please add at least one user interest before running the crew")
 
+    if from_task is not None and from_task not in TASK_ORDER:
+        raise ValidationError(f"Unknown task '{from_task}'. Choose one of: {', '.join(TASK_ORDER)}")
+
     # Extract user_id from user_interests if not provided
     if user_id is None:
         user_id = user_interests.get('user_id', 'default_user')
 
-    # Format the data for the tasks
-    interests_summary = format_interests_for_prompt(user_interests)
-    posts_summary = format_posts_for_prompt(recent_posts)
-
-    # Create crew instance
-    crew_instance = Contentagency()
-
-    # Input data for the crew
-    current_datetime = datetime.now()
-    inputs = {
-        'user_interests': interests_summary,
-        'recent_posts': posts_summary,
-        'current_year': str(current_datetime.year),
-        'current_date': current_datetime.strftime("%B %d, %Y")
-    }
-
-    # Create unified crew with both agents and tasks
-    # Tasks will execute sequentially: trend_research_task -> brainstorming_task
-    unified_crew = Crew(
-        agents=[
-            crew_instance.trend_researcher(),
-            crew_instance.brainstorming_strategist()
-        ],
-        tasks=[
-            crew_instance.trend_research_task(),
-            crew_instance.brainstorming_task()
-        ],
-        process=Process.sequential,
-        verbose=True
+    process = process or settings.crew_process
+    context_snippets = None
+    if settings.context_top_k > 0:
+        with crew_phase("context"):
+            query = " ".join(str(interest.get("topic", "")) for interest in interests_list)
+            context_snippets = data_service.search_context(user_id, query, settings.context_top_k)
+    inputs = build_crew_inputs(
+        user_interests, recent_posts, data_service.get_topic_rollups(user_id),
+        avoid_titles=data_service.recent_suggestion_titles(user_id, settings.dedup_avoid_hints)
+        if settings.dedup_avoid_hints > 0 else None,
+        context_snippets=context_snippets
     )
 
-    # Run the crew
-    result = unified_crew.kickoff(inputs=inputs)
-
-    # Parse markdown output into structured format
-    structured_data = parse_brainstorm_markdown(str(result))
-
-    # Save structured results using data service
-    results_data = {
-        "timestamp": datetime.now().isoformat(),
-        "suggestions": structured_data["suggestions"],
-        "trending_context_summary": structured_data.get("trending_context_summary", "")
-    }
-
-    data_service.save_brainstorm_results(user_id, results_data)
-
-    return str(result)
+    budget = current_budget() or RunBudget.from_settings()
+    stop_reason = None
+    profiling = profile_run("crew_run") if settings.profiling_target == "crew_runs" else nullcontext()
+    with CREW_RUNS_ACTIVE.track(), span("crew.run", user_id=user_id, process=process, from_task=from_task), \
+            profiling, use_budget(budget):
+        try:
+            # Run the crew, resuming from the first task whose inputs changed
+            try:
+                if process == "pipelined":
+                    from contentagency.services.pipeline import run_pipelined_crew
+                    result = run_pipelined_crew(user_interests, inputs, from_task=from_task)
+                else:
+                    with crew_phase("setup"):
+                        crew_instance = Contentagency()
+                    result = _run_sequential_crew(crew_instance, inputs, from_task=from_task)
+            except RunInterruptedError as e:
+                print(f"⏹️  Crew run stopped early: {e.reason}")
+                result, stop_reason = e.partial_output, e.reason
+
+            # Parse markdown output into structured format
+            with crew_phase("parse"):
+                structured_data = parse_brainstorm_markdown(str(result))
+            suggestions = handle_duplicate_suggestions(user_id, structured_data["suggestions"])
+            if settings.rank_suggestions:
+                with crew_phase("rank", suggestions=len(suggestions)):
+                    suggestions = rank_suggestions(suggestions, user_interests)
+
+            # Save structured results using data service
+            results_data = {
+                "timestamp": datetime.now().isoformat(),
+                "suggestions": suggestions,
+                "trending_context_summary": structured_data.get("trending_context_summary", "")
+            }
+            if stop_reason is not None:
+                results_data.update(partial=True, stop_reason=stop_reason)
+
+            # A run stopped before producing anything leaves no session behind
+            if stop_reason is None or results_data["suggestions"] or results_data["trending_context_summary"]:
+                with crew_phase("save"):
+                    data_service.save_brainstorm_results(user_id, results_data)
+        except Exception:
+            CREW_RUNS.inc(status="error")
+            raise
+
+    CREW_RUNS.inc(status="success" if stop_reason is None else "interrupted")
+    return {"result": str(result), "session": {"user_id": user_id, **results_data}}
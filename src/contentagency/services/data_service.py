@@ -1,14 +1,126 @@
 """
 Data service layer for accessing user data and content.
 Designed to be migration-friendly for future database integration.
+
+Saving a user's interests or posts emits a change event with a diff
+(see services/events.py).
 """
 
 import json
 import os
-from typing import Dict, List, Any, Protocol
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Any, Optional, Protocol, Tuple
 from abc import ABC, abstractmethod
 from pathlib import Path
 
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory file locks
+    fcntl = None
+
+from contentagency.config import settings
+from contentagency.exceptions import VersionConflictError
+from contentagency.services.context_index import ContextIndex, suggestion_cursor, sync_knowledge, sync_user_content
+from contentagency.services.dedup import SuggestionIndex
+from contentagency.services.events import change_events, interests_event, posts_event
+from contentagency.services.invalidation import register_subscribers
+from contentagency.services.metrics import timed_operation
+from contentagency.services.post_index import PostIndex, PostIndexCache, normalize_post
+from contentagency.services.rollups import build_rollups, update_rollups
+from contentagency.services.tracing import traced
+
+
+def _user_key(user_id: str) -> str:
+    """Make a user id safe to use as a file or document name."""
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", user_id)
+
+
+# Documents that accept PATCH operations: their list field and the field identifying an item
+_PATCHABLE = {"user_interests": ("interests", "topic"), "recent_posts": ("posts", "id")}
+
+# A session's timestamp in the database backend (also the expression of its index)
+_SESSION_TIMESTAMP = "json_extract(data, '$.timestamp')"
+
+
+def _item_key(key_field: str, value: Any) -> str:
+    # Topics match case-insensitively, like change event diffs
+    return str(value).strip().lower() if key_field == "topic" else str(value)
+
+
+def apply_patch_ops(document: Dict[str, Any], name: str, ops: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Apply PATCH operations to a user_interests or recent_posts document.
+
+    Operations are {"op": "add", "item": {...}} (re-adding an existing item
+    replaces it), {"op": "remove", "key": ...} and {"op": "update", "key": ...,
+    "item": {fields to change}}, where the key is a topic or a post id.
+
+    Args:
+        document: Current document
+        name: "user_interests" or "recent_posts"
+        ops: Operations, applied in order
+
+    Returns:
+        The patched document (the input is not modified)
+
+    Raises:
+        ValueError: If an update names an item that does not exist
+    """
+    field, key_field = _PATCHABLE[name]
+    items = {_item_key(key_field, item.get(key_field)): item for item in document.get(field, [])}
+    for op in ops:
+        if op["op"] == "add":
+            items[_item_key(key_field, op["item"].get(key_field))] = op["item"]
+        elif op["op"] == "remove":
+            items.pop(_item_key(key_field, op["key"]), None)
+        elif op["op"] == "update":
+            key = _item_key(key_field, op["key"])
+            if key not in items:
+                raise ValueError(f"Cannot update {key_field} '{op['key']}': not found")
+            updated = {**items[key], **op["item"]}
+            # Keep the item in place, even when its key (e.g. a topic) changes
+            items = {
+                (_item_key(key_field, updated.get(key_field)) if k == key else k): (updated if k == key else item)
+                for k, item in items.items()
+            }
+        else:
+            raise ValueError(f"Unknown patch operation: {op['op']}")
+    return {**document, field: list(items.values())}
+
+
+def _normalize_posts(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {**data, "posts": [normalize_post(post) for post in data.get("posts", [])]}
+
+
+def _normalize_post_ops(ops: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [{**op, "item": normalize_post(op["item"])} if "item" in op else op for op in ops]
+
+
+def _check_version(current: Dict[str, Any], base_version: Optional[int]) -> None:
+    if base_version is not None and current.get("version", 0) != base_version:
+        raise VersionConflictError(
+            f"Version {base_version} is out of date (current version is {current.get('version', 0)})",
+            current_version=current.get("version", 0)
+        )
+
+
+def _stat(path: Path) -> Optional[os.stat_result]:
+    try:
+        return path.stat()
+    except FileNotFoundError:
+        return None
+
+
+def _instrumented(operation: str):
+    """Time an operation for metrics and run it inside a tracing span."""
+    def decorator(fn):
+        return timed_operation(operation)(traced(f"data_service.{operation}")(fn))
+    return decorator
+
 
 class DataServiceProtocol(Protocol):
     """Protocol defining the interface for data services."""
@@ -21,14 +133,58 @@ class DataServiceProtocol(Protocol):
         """Get recent posts by user."""
         ...
 
+    def select_posts(self, user_id: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Pick the user's best example posts for the prompt (recent, engaging, diverse topics)."""
+        ...
+
+    def get_topic_rollups(self, user_id: str) -> Dict[str, Any]:
+        """Get the user's post counts, engagement totals and monthly trends per topic and platform."""
+        ...
+
+    def patch_user_interests(self, user_id: str, ops: List[Dict[str, Any]], base_version: Optional[int] = None) -> Dict[str, Any]:
+        """Apply add/remove/update operations to a user's interests; returns the new version."""
+        ...
+
+    def patch_recent_posts(self, user_id: str, ops: List[Dict[str, Any]], base_version: Optional[int] = None) -> Dict[str, Any]:
+        """Apply add/remove/update operations to a user's posts; returns the new version."""
+        ...
+
     def get_brainstorm_results(self, user_id: str) -> Dict[str, Any]:
         """Get brainstorming session results."""
         ...
 
+    def get_brainstorm_sessions_after(self, user_id: str, timestamp: Optional[str]) -> List[Dict[str, Any]]:
+        """Get a user's sessions saved with a later timestamp (all of them when timestamp is None)."""
+        ...
+
     def save_brainstorm_results(self, user_id: str, results: Dict[str, Any]) -> None:
         """Save brainstorming session results."""
         ...
 
+    def find_duplicate_suggestions(self, user_id: str, suggestions: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """Find, per suggestion, a near-duplicate among the user's earlier suggestions (or None)."""
+        ...
+
+    def recent_suggestion_titles(self, user_id: str, limit: int = 20) -> List[str]:
+        """Get the titles of the user's latest suggestions, newest first."""
+        ...
+
+    def search_context(self, user_id: str, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Find the knowledge and past content snippets most relevant to a query."""
+        ...
+
+    def claim_idempotency_key(self, key: str, fingerprint: str, ttl_seconds: float) -> Optional[Dict[str, Any]]:
+        """Reserve an idempotency key, or return the live record already holding it."""
+        ...
+
+    def complete_idempotency_key(self, key: str, status_code: int, body: Any, ttl_seconds: float) -> None:
+        """Store the response for a reserved idempotency key."""
+        ...
+
+    def release_idempotency_key(self, key: str) -> None:
+        """Drop a reserved idempotency key so the request can be retried."""
+        ...
+
 
 class FileDataService:
     """File-based data service for development. Easily replaceable with database service."""
@@ -40,15 +196,162 @@ class FileDataService:
             self.data_dir = project_root / "data"
         else:
             self.data_dir = Path(data_dir)
+        self._post_indexes = PostIndexCache()
+        self._suggestion_index: Optional[SuggestionIndex] = None
+        self._suggestion_index_lock = threading.Lock()
+        self._context_index: Optional[ContextIndex] = None
+        self._context_index_lock = threading.Lock()
 
         self.data_dir.mkdir(exist_ok=True)
 
+    @contextmanager
+    def _locked(self, name: str):
+        """
+        Hold an exclusive cross-process lock for one data file.
+
+        API workers are separate processes, so read-modify-write updates
+        (e.g. appending a brainstorm session) must not interleave.
+        """
+        lock_path = self.data_dir / f".{name}.lock"
+        with open(lock_path, 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _write_json(self, path: Path, data: Dict[str, Any]) -> None:
+        """Write JSON atomically so readers never see a partial file."""
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def _read_json(self, path: Path, default: Any) -> Any:
+        """Read a JSON file, or return default if it does not exist yet."""
+        if not path.exists():
+            return default
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def _user_file(self, user_id: str, filename: str) -> Path:
+        """Path of a per-user copy of a data file."""
+        return self.data_dir / "users" / _user_key(user_id) / filename
+
+    def _ops_file(self, user_id: str, filename: str) -> Path:
+        """Append-only log of the PATCH operations since the user's copy was written."""
+        return self._user_file(user_id, filename).with_suffix(".ops.jsonl")
+
+    def _user_lock(self, user_id: str, filename: str):
+        return self._locked(f"{_user_key(user_id)}.{filename}")
+
+    def _read_user_copy(self, user_id: str, filename: str) -> Optional[Tuple[Dict[str, Any], int]]:
+        """Return a user's copy with its logged operations applied, and the log length (or None)."""
+        user_file = self._user_file(user_id, filename)
+        if not user_file.exists():
+            return None
+        with open(user_file, 'r') as f:
+            document = json.load(f)
+
+        entries = []
+        ops_file = self._ops_file(user_id, filename)
+        if ops_file.exists():
+            with open(ops_file, 'r') as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # A torn append from a crashed writer was never acknowledged
+                        continue
+        for entry in entries:
+            if entry["version"] > document.get("version", 0):
+                document = {**apply_patch_ops(document, Path(filename).stem, entry["ops"]), "version": entry["version"]}
+        return document, len(entries)
+
+    def _load_document(self, user_id: Optional[str], filename: str) -> Optional[Dict[str, Any]]:
+        """Load a user's copy of a data file, falling back to the global file."""
+        if user_id:
+            copy = self._read_user_copy(user_id, filename)
+            if copy is not None:
+                return copy[0]
+        with open(self.data_dir / filename, 'r') as f:
+            data = json.load(f)
+        # The global file belongs to whichever user saved last
+        if user_id and data.get("user_id") and data.get("user_id") != user_id:
+            return None
+        if not user_id and data.get("user_id"):
+            # That user's copy is authoritative: PATCHes only update the copy
+            copy = self._read_user_copy(data["user_id"], filename)
+            if copy is not None:
+                return copy[0]
+        return data
+
+    def _previous_document(self, user_id: Optional[str], filename: str) -> Optional[Dict[str, Any]]:
+        """The version a write replaces, for its change event (None if there is none)."""
+        try:
+            return self._load_document(user_id, filename)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _save_document(self, data: Dict[str, Any], filename: str) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+        """Write a whole document (global file and user copy) as its next version."""
+        user_id = data.get("user_id")
+        with self._locked(filename), (self._user_lock(user_id, filename) if user_id else nullcontext()):
+            previous = self._previous_document(user_id, filename)
+            saved = {**data, "version": (previous or {}).get("version", 0) + 1}
+            self._write_json(self.data_dir / filename, saved)
+            if user_id:
+                user_file = self._user_file(user_id, filename)
+                user_file.parent.mkdir(parents=True, exist_ok=True)
+                self._write_json(user_file, saved)
+                # The new copy supersedes every logged operation
+                self._ops_file(user_id, filename).unlink(missing_ok=True)
+                if filename == "recent_posts.json":
+                    self._roll_up(user_id, previous, saved)
+        return previous, saved
+
+    def _patch_document(
+        self, user_id: str, filename: str, ops: List[Dict[str, Any]], base_version: Optional[int]
+    ) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+        """Append operations to a user's log (the copy is only rewritten on compaction)."""
+        user_file = self._user_file(user_id, filename)
+        user_file.parent.mkdir(parents=True, exist_ok=True)
+        with self._user_lock(user_id, filename):
+            copy = self._read_user_copy(user_id, filename)
+            previous, logged = copy if copy is not None else (self._previous_document(user_id, filename), None)
+            current = previous or {"user_id": user_id, _PATCHABLE[Path(filename).stem][0]: [], "version": 0}
+            _check_version(current, base_version)
+            patched = {**apply_patch_ops(current, Path(filename).stem, ops), "version": current.get("version", 0) + 1}
+
+            if logged is None or logged + 1 >= settings.patch_compact_ops:
+                # First copy for this user, or the log is long enough to fold in
+                self._write_json(user_file, patched)
+                self._ops_file(user_id, filename).unlink(missing_ok=True)
+            else:
+                with open(self._ops_file(user_id, filename), 'a') as f:
+                    f.write(json.dumps({"version": patched["version"], "ops": ops}) + "\n")
+            if filename == "recent_posts.json":
+                self._roll_up(user_id, previous, patched)
+        return previous, patched
+
+    def _roll_up(self, user_id: str, previous: Optional[Dict[str, Any]], posts: Dict[str, Any]) -> None:
+        """Update a user's topic rollups for a post write (under the user's posts lock)."""
+        path = self._user_file(user_id, "topic_rollups.json")
+        try:
+            rollups = self._read_json(path, None)
+        except json.JSONDecodeError:
+            rollups = None
+        self._write_json(path, update_rollups(rollups, previous, posts))
+
+    @_instrumented("get_user_interests")
     def get_user_interests(self, user_id: str = None) -> Dict[str, Any]:
-        """Load user interests from JSON file."""
+        """Load user interests from JSON file (the given user's, if saved)."""
         try:
-            interests_file = self.data_dir / "user_interests.json"
-            with open(interests_file, 'r') as f:
-                data = json.load(f)
+            data = self._load_document(user_id, "user_interests.json")
+            if data is None:
+                return {"user_id": user_id, "interests": []}
             return data
         except FileNotFoundError:
             # Return empty structure with provided or default user_id
@@ -56,51 +359,149 @@ class FileDataService:
         except json.JSONDecodeError:
             raise ValueError("Invalid JSON format in user interests file")
 
+    @_instrumented("save_user_interests")
     def save_user_interests(self, data: Dict[str, Any]) -> None:
         """Save user interests to JSON file."""
         try:
-            interests_file = self.data_dir / "user_interests.json"
-            with open(interests_file, 'w') as f:
-                json.dump(data, f, indent=2)
+            previous, saved = self._save_document(data, "user_interests.json")
         except Exception as e:
             raise ValueError(f"Failed to save user interests: {str(e)}")
+        change_events.emit(interests_event(data.get("user_id"), previous, saved))
 
-    def get_recent_posts(self, user_id: str = None, limit: int = 10) -> List[Dict[str, Any]]:
-        """Load recent posts from JSON file."""
-        try:
-            posts_file = self.data_dir / "recent_posts.json"
-            with open(posts_file, 'r') as f:
-                data = json.load(f)
+    @_instrumented("patch_user_interests")
+    def patch_user_interests(self, user_id: str, ops: List[Dict[str, Any]], base_version: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Apply add/remove/update operations to a user's interests.
 
-            # Get all posts if no user_id specified or file doesn't filter by user
-            posts = data.get("posts", [])
+        Args:
+            user_id: User whose interests to change
+            ops: Operations (see apply_patch_ops)
+            base_version: Version the client last read (optional); the patch is
+                rejected if the interests changed since
 
-            # Filter by user_id only if specified and file has user_id
-            if user_id and data.get("user_id"):
-                filtered_posts = [post for post in posts if data.get("user_id") == user_id]
-            else:
-                filtered_posts = posts
+        Returns:
+            The patched interests document, with its new version
 
-            # Sort by published_date (most recent first) and limit
-            sorted_posts = sorted(filtered_posts,
-                                key=lambda x: x.get("published_date", ""),
-                                reverse=True)
+        Raises:
+            VersionConflictError: If base_version is not the current version
+            ValueError: If an operation is invalid
+        """
+        previous, patched = self._patch_document(user_id, "user_interests.json", ops, base_version)
+        change_events.emit(interests_event(user_id, previous, patched))
+        return patched
 
-            return sorted_posts[:limit]
+    def _load_posts(self, user_id: Optional[str]) -> List[Dict[str, Any]]:
+        try:
+            data = self._load_document(user_id, "recent_posts.json")
         except FileNotFoundError:
             return []
         except json.JSONDecodeError:
             raise ValueError("Invalid JSON format in recent posts file")
+        return (data or {}).get("posts", [])
+
+    def _post_index(self, user_id: Optional[str]) -> PostIndex:
+        """The user's post index, rebuilt only when one of their post files changed."""
+        if not user_id:
+            # Whose posts these are depends on the last save; not worth caching
+            return PostIndex(self._load_posts(user_id))
+        paths = (
+            self._user_file(user_id, "recent_posts.json"),
+            self._ops_file(user_id, "recent_posts.json"),
+            self.data_dir / "recent_posts.json"
+        )
+        stamp = tuple(
+            (stat.st_ino, stat.st_mtime_ns, stat.st_size) if (stat := _stat(path)) else None for path in paths
+        )
+        return self._post_indexes.get(user_id, stamp, lambda: self._load_posts(user_id))
+
+    @_instrumented("get_recent_posts")
+    def get_recent_posts(self, user_id: str = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """Load recent posts from JSON file (the given user's, if saved), most recent first."""
+        return self._post_index(user_id).recent(limit)
+
+    @_instrumented("select_posts")
+    def select_posts(self, user_id: str = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Pick the user's best example posts for the prompt.
+
+        Posts are scored on recency and engagement in one vectorized pass and
+        picked with a penalty for topics already shown (see post_index).
+
+        Args:
+            user_id: User whose posts to rank (optional, the last saved posts)
+            limit: Number of posts
+
+        Returns:
+            Posts in pick order
+        """
+        return self._post_index(user_id).select(limit)
+
+    @_instrumented("get_topic_rollups")
+    def get_topic_rollups(self, user_id: str = None) -> Dict[str, Any]:
+        """
+        Load a user's topic and platform rollups.
 
+        Rollups are maintained on every post write, so this reads one small
+        file; they are computed from the posts only the first time for posts
+        saved before rollups existed.
+
+        Args:
+            user_id: User whose rollups to load (optional, defaults to settings.default_user_id)
+
+        Returns:
+            Dict with 'posts', 'topics' and 'platforms' stats and the posts 'version'
+        """
+        user_id = user_id or settings.default_user_id
+        path = self._user_file(user_id, "topic_rollups.json")
+        try:
+            rollups = self._read_json(path, None)
+        except json.JSONDecodeError:
+            rollups = None
+        if rollups is not None:
+            return rollups
+
+        with self._user_lock(user_id, "recent_posts.json"):
+            posts = self._previous_document(user_id, "recent_posts.json")
+            rollups = build_rollups(user_id, (posts or {}).get("posts", []), (posts or {}).get("version", 0))
+            if posts is not None:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                self._write_json(path, rollups)
+        return rollups
+
+    @_instrumented("save_recent_posts")
     def save_recent_posts(self, data: Dict[str, Any]) -> None:
         """Save recent posts to JSON file."""
         try:
-            posts_file = self.data_dir / "recent_posts.json"
-            with open(posts_file, 'w') as f:
-                json.dump(data, f, indent=2)
+            previous, saved = self._save_document(_normalize_posts(data), "recent_posts.json")
         except Exception as e:
             raise ValueError(f"Failed to save recent posts: {str(e)}")
+        change_events.emit(posts_event(data.get("user_id"), previous, saved))
+
+    @_instrumented("patch_recent_posts")
+    def patch_recent_posts(self, user_id: str, ops: List[Dict[str, Any]], base_version: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Apply add/remove/update operations to a user's posts.
+
+        Only the operations are written (appended to the user's log), so a
+        single-post edit does not rewrite a long post history.
+
+        Args:
+            user_id: User whose posts to change
+            ops: Operations keyed by post id (see apply_patch_ops)
+            base_version: Version the client last read (optional)
+
+        Returns:
+            The patched posts document, with its new version
+
+        Raises:
+            VersionConflictError: If base_version is not the current version
+            ValueError: If an operation is invalid
+        """
+        previous, patched = self._patch_document(user_id, "recent_posts.json", _normalize_post_ops(ops), base_version)
+        change_events.emit(posts_event(user_id, previous, patched))
+        return patched
 
+    @_instrumented("get_brainstorm_results")
     def get_brainstorm_results(self, user_id: str = None) -> Dict[str, Any]:
         """Load brainstorming results from JSON file."""
         try:
@@ -120,55 +521,531 @@ class FileDataService:
         except json.JSONDecodeError:
             raise ValueError("Invalid JSON format in brainstorm results file")
 
+    def get_brainstorm_sessions_after(self, user_id: str, timestamp: Optional[str]) -> List[Dict[str, Any]]:
+        """
+        Get a user's sessions with a timestamp after the given one.
+
+        Args:
+            user_id: User identifier
+            timestamp: ISO timestamp (optional, None returns all the user's sessions)
+
+        Returns:
+            Sessions in the order they were saved
+        """
+        return [
+            session for session in self.get_brainstorm_results()["sessions"]
+            if session.get("user_id") == user_id
+            and (timestamp is None or (session.get("timestamp") or "") > timestamp)
+        ]
+
+    @_instrumented("save_brainstorm_results")
     def save_brainstorm_results(self, user_id: str, results: Dict[str, Any]) -> None:
         """Save brainstorming results to JSON file."""
         try:
             results_file = self.data_dir / "brainstorm_results.json"
+            # Before locking: building the index reads the sessions under the same lock
+            suggestion_index = self.suggestion_index()
 
-            # Load existing results or create new structure
-            if results_file.exists():
-                with open(results_file, 'r') as f:
-                    all_results = json.load(f)
-            else:
-                all_results = {"sessions": []}
-
-            # Add new session with structured data
-            session = {
-                "user_id": user_id,
-                "timestamp": results.get("timestamp"),
-                "suggestions": results.get("suggestions", []),  # List of ContentSuggestion dicts
-                "trending_context_summary": results.get("trending_context_summary", "")
-            }
+            with self._locked(results_file.name):
+                # Load existing results or create new structure
+                if results_file.exists():
+                    with open(results_file, 'r') as f:
+                        all_results = json.load(f)
+                else:
+                    all_results = {"sessions": []}
 
-            all_results["sessions"].append(session)
+                # Add new session with structured data
+                session = {
+                    "user_id": user_id,
+                    "timestamp": results.get("timestamp"),
+                    "suggestions": results.get("suggestions", []),  # List of ContentSuggestion dicts
+                    "trending_context_summary": results.get("trending_context_summary", "")
+                }
+                if results.get("partial"):
+                    session.update(partial=True, stop_reason=results.get("stop_reason"))
 
-            # Save updated results
-            with open(results_file, 'w') as f:
-                json.dump(all_results, f, indent=2)
+                all_results["sessions"].append(session)
+
+                # Save updated results
+                self._write_json(results_file, all_results)
+                suggestion_index.add(user_id, session["suggestions"], session["timestamp"])
 
         except Exception as e:
             raise ValueError(f"Failed to save brainstorm results: {str(e)}")
 
+    def suggestion_index(self) -> SuggestionIndex:
+        """The near-duplicate index of saved suggestions, built from the saved sessions on first use."""
+        with self._suggestion_index_lock:
+            if self._suggestion_index is None:
+                index = SuggestionIndex(self.data_dir / "suggestion_index.db")
+                with self._locked("brainstorm_results.json"):
+                    if index.is_empty():
+                        index.add_sessions(self._read_json(self.data_dir / "brainstorm_results.json", {}).get("sessions", []))
+                self._suggestion_index = index
+            return self._suggestion_index
+
+    @_instrumented("find_duplicate_suggestions")
+    def find_duplicate_suggestions(self, user_id: str, suggestions: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Find near-duplicates of new suggestions among the user's earlier ones.
+
+        Args:
+            user_id: User identifier
+            suggestions: Parsed suggestions ('title' and 'description')
+
+        Returns:
+            Per suggestion, None or the closest match: {'title', 'timestamp', 'similarity'}
+        """
+        return self.suggestion_index().find_duplicates(user_id, suggestions)
+
+    @_instrumented("recent_suggestion_titles")
+    def recent_suggestion_titles(self, user_id: str, limit: int = 20) -> List[str]:
+        """Get the titles of the user's latest suggestions, newest first."""
+        return self.suggestion_index().recent_titles(user_id, limit)
+
+    def context_index(self) -> ContextIndex:
+        """The embedding index of knowledge and past content (under data/context_index)."""
+        with self._context_index_lock:
+            if self._context_index is None:
+                self._context_index = ContextIndex(self.data_dir / "context_index")
+            return self._context_index
+
+    @_instrumented("search_context")
+    def search_context(self, user_id: str, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Find the snippets most relevant to a query among the knowledge files
+        and the user's past posts and suggestions.
+
+        Brings the index up to date first, embedding only what changed since
+        the last search (only sessions newer than the last indexed one are read).
+
+        Args:
+            user_id: User identifier
+            query: Text to match (e.g. the user's interests)
+            limit: Maximum number of snippets
+
+        Returns:
+            Snippets, best first: {'source', 'text', 'score'}
+        """
+        index = self.context_index()
+        sync_knowledge(index)
+        sync_user_content(
+            index, user_id,
+            self.get_recent_posts(user_id, limit=settings.context_max_posts),
+            self.get_brainstorm_sessions_after(user_id, suggestion_cursor(index, user_id))
+        )
+        return index.search(query, limit, user_id)
+
+    @_instrumented("claim_idempotency_key")
+    def claim_idempotency_key(self, key: str, fingerprint: str, ttl_seconds: float) -> Optional[Dict[str, Any]]:
+        """
+        Reserve an idempotency key for a new request.
+
+        Args:
+            key: Idempotency key (already scoped to the endpoint)
+            fingerprint: Hash of the request body
+            ttl_seconds: How long the reservation lives if never completed
+
+        Returns:
+            None if the key was reserved for this request, otherwise the live
+            record holding it ("state" is "pending" or "completed")
+        """
+        keys_file = self.data_dir / "idempotency_keys.json"
+        with self._locked(keys_file.name):
+            now = time.time()
+            records = self._read_json(keys_file, {})
+            # Expired keys are purged on every reservation
+            records = {k: record for k, record in records.items() if record["expires_at"] > now}
+            if key in records:
+                return records[key]
+            records[key] = {"fingerprint": fingerprint, "state": "pending", "expires_at": now + ttl_seconds}
+            self._write_json(keys_file, records)
+        return None
+
+    @_instrumented("complete_idempotency_key")
+    def complete_idempotency_key(self, key: str, status_code: int, body: Any, ttl_seconds: float) -> None:
+        """Store the response for a reserved idempotency key for ttl_seconds."""
+        keys_file = self.data_dir / "idempotency_keys.json"
+        with self._locked(keys_file.name):
+            records = self._read_json(keys_file, {})
+            if key in records:
+                records[key].update(
+                    state="completed", status_code=status_code, body=body, expires_at=time.time() + ttl_seconds
+                )
+                self._write_json(keys_file, records)
+
+    @_instrumented("release_idempotency_key")
+    def release_idempotency_key(self, key: str) -> None:
+        """Drop a reserved idempotency key so the request can be retried."""
+        keys_file = self.data_dir / "idempotency_keys.json"
+        with self._locked(keys_file.name):
+            records = self._read_json(keys_file, {})
+            if records.pop(key, None) is not None:
+                self._write_json(keys_file, records)
+
 
 class DatabaseDataService:
-    """Future database-based data service. Placeholder for cloud migration."""
+    """
+    SQLite-backed data service, safe to share between worker processes.
+
+    Mirrors FileDataService: user interests and recent posts are stored as
+    documents and brainstorm sessions are appended to their own table. The
+    connection is opened lazily (one per thread), in WAL mode so readers do
+    not block the writer.
+    """
 
     def __init__(self, connection_string: str):
         self.connection_string = connection_string
-        # TODO: Initialize database connection
-        pass
+        self._local = threading.local()
+        self._schema_ready = False
+        self._post_indexes = PostIndexCache()
+        self._suggestion_index: Optional[SuggestionIndex] = None
+        self._suggestion_index_lock = threading.Lock()
+        self._context_index: Optional[ContextIndex] = None
+        self._context_index_lock = threading.Lock()
 
-    def get_user_interests(self, user_id: str) -> Dict[str, Any]:
-        # TODO: Implement database query
-        raise NotImplementedError("Database service not yet implemented")
+    @property
+    def path(self) -> str:
+        """Database file path (accepts plain paths and sqlite:/// URLs)."""
+        return self.connection_string.split("sqlite:///", 1)[-1]
 
-    def get_recent_posts(self, user_id: str, limit: int = 10) -> List[Dict[str, Any]]:
-        # TODO: Implement database query
-        raise NotImplementedError("Database service not yet implemented")
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        if not self._schema_ready:
+            with conn:
+                conn.execute("CREATE TABLE IF NOT EXISTS documents (name TEXT PRIMARY KEY, data TEXT NOT NULL)")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS document_ops ("
+                    "name TEXT NOT NULL, version INTEGER NOT NULL, ops TEXT NOT NULL, PRIMARY KEY (name, version))"
+                )
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS brainstorm_sessions ("
+                    "id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT, data TEXT NOT NULL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_user ON brainstorm_sessions (user_id)")
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_sessions_user_timestamp "
+                    f"ON brainstorm_sessions (user_id, {_SESSION_TIMESTAMP})"
+                )
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS idempotency_keys ("
+                    "key TEXT PRIMARY KEY, data TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+            self._schema_ready = True
+        return conn
+
+    def _get_document(self, name: str, conn: Optional[sqlite3.Connection] = None) -> Any:
+        """Read a document with its logged PATCH operations applied."""
+        conn = conn or self._connect()
+        row = conn.execute("SELECT data FROM documents WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return None
+        document = json.loads(row[0])
+        base = name.split(":", 1)[0]
+        if base in _PATCHABLE:
+            logged = conn.execute(
+                "SELECT version, ops FROM document_ops WHERE name = ? AND version > ? ORDER BY version",
+                (name, document.get("version", 0))
+            )
+            for version, ops in logged:
+                document = {**apply_patch_ops(document, base, json.loads(ops)), "version": version}
+        return document
+
+    @staticmethod
+    def _upsert(conn: sqlite3.Connection, name: str, data: Dict[str, Any]) -> None:
+        conn.execute(
+            "INSERT INTO documents (name, data) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET data = excluded.data",
+            (name, json.dumps(data))
+        )
+        # The new snapshot supersedes every logged operation
+        conn.execute("DELETE FROM document_ops WHERE name = ?", (name,))
 
+    def _load_document(
+        self, user_id: Optional[str], name: str, conn: Optional[sqlite3.Connection] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Load a user's document, falling back to the global one."""
+        if user_id:
+            data = self._get_document(f"{name}:{_user_key(user_id)}", conn)
+            if data is not None:
+                return data
+        data = self._get_document(name, conn)
+        # The global document belongs to whichever user saved last
+        if data is not None and user_id and data.get("user_id") and data.get("user_id") != user_id:
+            return None
+        if data is not None and not user_id and data.get("user_id"):
+            # That user's document is authoritative: PATCHes only update it
+            return self._get_document(f"{name}:{_user_key(data['user_id'])}", conn) or data
+        return data
+
+    def _save_document(self, name: str, data: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+        """Store a whole document, globally and under its user, as its next version."""
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            previous = self._load_document(data.get("user_id"), name, conn)
+            saved = {**data, "version": (previous or {}).get("version", 0) + 1}
+            self._upsert(conn, name, saved)
+            if data.get("user_id"):
+                self._upsert(conn, f"{name}:{_user_key(data['user_id'])}", saved)
+                if name == "recent_posts":
+                    self._roll_up(conn, data["user_id"], previous, saved)
+        return previous, saved
+
+    def _patch_document(
+        self, user_id: str, name: str, ops: List[Dict[str, Any]], base_version: Optional[int]
+    ) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+        """Log operations against a user's document (rewritten only on compaction)."""
+        user_name = f"{name}:{_user_key(user_id)}"
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            exists = conn.execute("SELECT 1 FROM documents WHERE name = ?", (user_name,)).fetchone()
+            previous = self._load_document(user_id, name, conn)
+            current = previous or {"user_id": user_id, _PATCHABLE[name][0]: [], "version": 0}
+            _check_version(current, base_version)
+            patched = {**apply_patch_ops(current, name, ops), "version": current.get("version", 0) + 1}
+
+            logged = conn.execute("SELECT COUNT(*) FROM document_ops WHERE name = ?", (user_name,)).fetchone()[0]
+            if not exists or logged + 1 >= settings.patch_compact_ops:
+                # First document for this user, or the log is long enough to fold in
+                self._upsert(conn, user_name, patched)
+            else:
+                conn.execute(
+                    "INSERT INTO document_ops (name, version, ops) VALUES (?, ?, ?)",
+                    (user_name, patched["version"], json.dumps(ops))
+                )
+            if name == "recent_posts":
+                self._roll_up(conn, user_id, previous, patched)
+        return previous, patched
+
+    def _roll_up(
+        self, conn: sqlite3.Connection, user_id: str, previous: Optional[Dict[str, Any]], posts: Dict[str, Any]
+    ) -> None:
+        """Update a user's topic rollups in the transaction of a post write."""
+        name = f"topic_rollups:{_user_key(user_id)}"
+        self._upsert(conn, name, update_rollups(self._get_document(name, conn), previous, posts))
+
+    @_instrumented("get_user_interests")
+    def get_user_interests(self, user_id: str = None) -> Dict[str, Any]:
+        """Load user interests (the given user's, if saved)."""
+        data = self._load_document(user_id, "user_interests")
+        if data is None:
+            return {"user_id": user_id or "default_user", "interests": []}
+        return data
+
+    @_instrumented("save_user_interests")
+    def save_user_interests(self, data: Dict[str, Any]) -> None:
+        """Save user interests."""
+        try:
+            previous, saved = self._save_document("user_interests", data)
+        except sqlite3.Error as e:
+            raise ValueError(f"Failed to save user interests: {str(e)}")
+        change_events.emit(interests_event(data.get("user_id"), previous, saved))
+
+    @_instrumented("patch_user_interests")
+    def patch_user_interests(self, user_id: str, ops: List[Dict[str, Any]], base_version: Optional[int] = None) -> Dict[str, Any]:
+        """Apply add/remove/update operations to a user's interests (see FileDataService)."""
+        previous, patched = self._patch_document(user_id, "user_interests", ops, base_version)
+        change_events.emit(interests_event(user_id, previous, patched))
+        return patched
+
+    def _post_index(self, user_id: Optional[str]) -> PostIndex:
+        """The user's post index, rebuilt only when their posts' version changed."""
+        def load() -> List[Dict[str, Any]]:
+            return (self._load_document(user_id, "recent_posts") or {}).get("posts", [])
+
+        if not user_id:
+            return PostIndex(load())
+        user_name = f"recent_posts:{_user_key(user_id)}"
+        conn = self._connect()
+        versions = conn.execute(
+            "SELECT name, json_extract(data, '$.version') FROM documents WHERE name IN (?, ?) ORDER BY name",
+            ("recent_posts", user_name)
+        ).fetchall()
+        logged = conn.execute("SELECT MAX(version) FROM document_ops WHERE name = ?", (user_name,)).fetchone()
+        return self._post_indexes.get(user_id, (tuple(versions), logged[0]), load)
+
+    @_instrumented("get_recent_posts")
+    def get_recent_posts(self, user_id: str = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """Load recent posts (the given user's, if saved), most recent first."""
+        return self._post_index(user_id).recent(limit)
+
+    @_instrumented("select_posts")
+    def select_posts(self, user_id: str = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """Pick the user's best example posts for the prompt (see FileDataService)."""
+        return self._post_index(user_id).select(limit)
+
+    @_instrumented("get_topic_rollups")
+    def get_topic_rollups(self, user_id: str = None) -> Dict[str, Any]:
+        """Load a user's topic and platform rollups (see FileDataService)."""
+        user_id = user_id or settings.default_user_id
+        name = f"topic_rollups:{_user_key(user_id)}"
+        rollups = self._get_document(name)
+        if rollups is not None:
+            return rollups
+
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            posts = self._load_document(user_id, "recent_posts", conn)
+            rollups = build_rollups(user_id, (posts or {}).get("posts", []), (posts or {}).get("version", 0))
+            if posts is not None:
+                self._upsert(conn, name, rollups)
+        return rollups
+
+    @_instrumented("save_recent_posts")
+    def save_recent_posts(self, data: Dict[str, Any]) -> None:
+        """Save recent posts."""
+        try:
+            previous, saved = self._save_document("recent_posts", _normalize_posts(data))
+        except sqlite3.Error as e:
+            raise ValueError(f"Failed to save recent posts: {str(e)}")
+        change_events.emit(posts_event(data.get("user_id"), previous, saved))
+
+    @_instrumented("patch_recent_posts")
+    def patch_recent_posts(self, user_id: str, ops: List[Dict[str, Any]], base_version: Optional[int] = None) -> Dict[str, Any]:
+        """Apply add/remove/update operations to a user's posts (see FileDataService)."""
+        previous, patched = self._patch_document(user_id, "recent_posts", _normalize_post_ops(ops), base_version)
+        change_events.emit(posts_event(user_id, previous, patched))
+        return patched
+
+    @_instrumented("get_brainstorm_results")
+    def get_brainstorm_results(self, user_id: str = None) -> Dict[str, Any]:
+        """Load brainstorming sessions in the order they were saved."""
+        conn = self._connect()
+        if user_id:
+            rows = conn.execute(
+                "SELECT data FROM brainstorm_sessions WHERE user_id = ? ORDER BY id", (user_id,)
+            ).fetchall()
+        else:
+            rows = conn.execute("SELECT data FROM brainstorm_sessions ORDER BY id").fetchall()
+        return {"sessions": [json.loads(row[0]) for row in rows]}
+
+    def get_brainstorm_sessions_after(self, user_id: str, timestamp: Optional[str]) -> List[Dict[str, Any]]:
+        """Get a user's sessions with a timestamp after the given one (see FileDataService)."""
+        if timestamp is None:
+            return self.get_brainstorm_results(user_id)["sessions"]
+        rows = self._connect().execute(
+            f"SELECT data FROM brainstorm_sessions WHERE user_id = ? AND {_SESSION_TIMESTAMP} > ? ORDER BY id",
+            (user_id, timestamp)
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    @_instrumented("save_brainstorm_results")
     def save_brainstorm_results(self, user_id: str, results: Dict[str, Any]) -> None:
-        # TODO: Implement database insert
-        raise NotImplementedError("Database service not yet implemented")
+        """Append a brainstorming session."""
+        session = {
+            "user_id": user_id,
+            "timestamp": results.get("timestamp"),
+            "suggestions": results.get("suggestions", []),
+            "trending_context_summary": results.get("trending_context_summary", "")
+        }
+        if results.get("partial"):
+            session.update(partial=True, stop_reason=results.get("stop_reason"))
+        try:
+            suggestion_index = self.suggestion_index()
+            conn = self._connect()
+            # One transaction: a saved session is always visible to dedup
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute(
+                    "INSERT INTO brainstorm_sessions (user_id, data) VALUES (?, ?)",
+                    (user_id, json.dumps(session))
+                )
+                suggestion_index.add(user_id, session["suggestions"], session["timestamp"], conn=conn)
+        except sqlite3.Error as e:
+            raise ValueError(f"Failed to save brainstorm results: {str(e)}")
+
+    def suggestion_index(self) -> SuggestionIndex:
+        """The near-duplicate index of saved suggestions (in this database), built from the sessions on first use."""
+        with self._suggestion_index_lock:
+            if self._suggestion_index is None:
+                index = SuggestionIndex(self.path)
+                conn = self._connect()
+                with conn:
+                    # Checked under the write lock, so only one process backfills
+                    conn.execute("BEGIN IMMEDIATE")
+                    index.create_schema(conn)
+                    if index.is_empty(conn):
+                        rows = conn.execute("SELECT data FROM brainstorm_sessions ORDER BY id").fetchall()
+                        index.add_sessions((json.loads(row[0]) for row in rows), conn=conn)
+                self._suggestion_index = index
+            return self._suggestion_index
+
+    @_instrumented("find_duplicate_suggestions")
+    def find_duplicate_suggestions(self, user_id: str, suggestions: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """Find near-duplicates of new suggestions among the user's earlier ones (see FileDataService)."""
+        return self.suggestion_index().find_duplicates(user_id, suggestions)
+
+    @_instrumented("recent_suggestion_titles")
+    def recent_suggestion_titles(self, user_id: str, limit: int = 20) -> List[str]:
+        """Get the titles of the user's latest suggestions, newest first."""
+        return self.suggestion_index().recent_titles(user_id, limit)
+
+    def context_index(self) -> ContextIndex:
+        """The embedding index of knowledge and past content (in a directory next to the database)."""
+        with self._context_index_lock:
+            if self._context_index is None:
+                self._context_index = ContextIndex(Path(self.path).with_suffix(".context"))
+            return self._context_index
+
+    @_instrumented("search_context")
+    def search_context(self, user_id: str, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Find the knowledge and past content snippets most relevant to a query (see FileDataService)."""
+        index = self.context_index()
+        sync_knowledge(index)
+        sync_user_content(
+            index, user_id,
+            self.get_recent_posts(user_id, limit=settings.context_max_posts),
+            self.get_brainstorm_sessions_after(user_id, suggestion_cursor(index, user_id))
+        )
+        return index.search(query, limit, user_id)
+
+    @_instrumented("claim_idempotency_key")
+    def claim_idempotency_key(self, key: str, fingerprint: str, ttl_seconds: float) -> Optional[Dict[str, Any]]:
+        """Reserve an idempotency key, or return the live record already holding it."""
+        now = time.time()
+        record = {"fingerprint": fingerprint, "state": "pending", "expires_at": now + ttl_seconds}
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM idempotency_keys WHERE expires_at <= ?", (now,))
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO idempotency_keys (key, data, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(record), record["expires_at"])
+            )
+            if cursor.rowcount == 1:
+                return None
+            row = conn.execute("SELECT data FROM idempotency_keys WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0])
+
+    @_instrumented("complete_idempotency_key")
+    def complete_idempotency_key(self, key: str, status_code: int, body: Any, ttl_seconds: float) -> None:
+        """Store the response for a reserved idempotency key for ttl_seconds."""
+        conn = self._connect()
+        with conn:
+            row = conn.execute("SELECT data FROM idempotency_keys WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return
+            record = json.loads(row[0])
+            expires_at = time.time() + ttl_seconds
+            record.update(state="completed", status_code=status_code, body=body, expires_at=expires_at)
+            conn.execute(
+                "UPDATE idempotency_keys SET data = ?, expires_at = ? WHERE key = ?",
+                (json.dumps(record), expires_at, key)
+            )
+
+    @_instrumented("release_idempotency_key")
+    def release_idempotency_key(self, key: str) -> None:
+        """Drop a reserved idempotency key so the request can be retried."""
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM idempotency_keys WHERE key = ?", (key,))
 
 
 # Factory function for creating data service instances
@@ -185,5 +1062,8 @@ def create_data_service(service_type: str = "file", **kwargs) -> DataServiceProt
         raise ValueError(f"Unknown service type: {service_type}")
 
 
-# Default instance for the application
-data_service = create_data_service("file")
\ No newline at end of file
+# Default instance for the application (DATA_BACKEND=file or database)
+data_service = create_data_service(settings.data_backend, connection_string=settings.database_url)
+
+# Writes of interests and posts invalidate caches and prefetch research precisely
+register_subscribers()
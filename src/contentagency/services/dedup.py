@@ -0,0 +1,217 @@
+"""
+Near-duplicate detection for brainstorm suggestions.
+
+Each suggestion's title and description are reduced to a MinHash signature
+(settings.dedup_num_perm hashes of its word unigrams and bigrams). The
+signature is split into settings.dedup_bands bands, and each band is stored
+as an LSH bucket row in SQLite, indexed by (user_id, bucket). Finding the
+earlier suggestions similar to a new one is then an index lookup of its
+bucket keys followed by comparing the signatures of the few candidates, so
+the cost does not grow with the user's history. Candidates whose estimated
+Jaccard similarity reaches settings.dedup_threshold are near-duplicates.
+
+The data services keep one index next to their data, fill it from the
+saved sessions the first time it is used, and add every new session's
+suggestions to it. The database backend keeps the index in its own database
+and passes its connection, so sessions and their signatures are written in
+one transaction.
+"""
+import hashlib
+import re
+import sqlite3
+import threading
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from contentagency.config import settings
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+_SEED = 1
+
+# Too common in suggestions to tell two ideas apart
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from how in into is it its of on or that the this to what why with your you".split()
+)
+
+
+def suggestion_text(suggestion: Dict[str, Any]) -> str:
+    """The text a suggestion is compared by."""
+    return f"{suggestion.get('title', '')} {suggestion.get('description', '')}"
+
+
+def _shingles(text: str) -> List[str]:
+    words = [word for word in re.findall(r"[a-z0-9]+", text.lower()) if word not in _STOPWORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class MinHasher:
+    """Computes MinHash signatures with a fixed set of hash permutations."""
+
+    def __init__(self, num_perm: int, seed: int = _SEED):
+        rng = np.random.default_rng(seed)
+        # a, b < 2^32 and 32-bit shingle hashes keep a * h + b within uint64
+        self._a = rng.integers(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.num_perm = num_perm
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature of a text (uint32, length num_perm)."""
+        shingles = set(_shingles(text))
+        if not shingles:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint32)
+        hashes = np.array(
+            [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in shingles],
+            dtype=np.uint64
+        )
+        permuted = (hashes[:, None] * self._a + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+
+class SuggestionIndex:
+    """Persistent MinHash/LSH index of a user's past suggestions."""
+
+    def __init__(self, path: str, num_perm: Optional[int] = None, bands: Optional[int] = None):
+        self.path = str(path)
+        self.num_perm = num_perm or settings.dedup_num_perm
+        self.bands = bands or settings.dedup_bands
+        if self.num_perm % self.bands:
+            raise ValueError(f"dedup_num_perm ({self.num_perm}) must be a multiple of dedup_bands ({self.bands})")
+        self._hasher: Optional[MinHasher] = None
+        self._local = threading.local()
+        self._schema_ready = False
+
+    @property
+    def hasher(self) -> MinHasher:
+        if self._hasher is None:
+            self._hasher = MinHasher(self.num_perm)
+        return self._hasher
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        if not self._schema_ready:
+            with conn:
+                self.create_schema(conn)
+            self._schema_ready = True
+        return conn
+
+    @staticmethod
+    def create_schema(conn: sqlite3.Connection) -> None:
+        """Create the index tables (in the caller's transaction)."""
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS suggestion_signatures ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT NOT NULL, title TEXT NOT NULL, "
+            "timestamp TEXT, signature BLOB NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_signatures_user ON suggestion_signatures (user_id, id)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS suggestion_buckets ("
+            "user_id TEXT NOT NULL, bucket INTEGER NOT NULL, signature_id INTEGER NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_buckets_lookup ON suggestion_buckets (user_id, bucket)")
+
+    def _buckets(self, signature: np.ndarray) -> List[int]:
+        """One LSH bucket key per band (band number included, as a signed 64-bit int)."""
+        rows = self.num_perm // self.bands
+        return [
+            int.from_bytes(
+                hashlib.blake2b(band.to_bytes(2, "little") + signature[band * rows:(band + 1) * rows].tobytes(),
+                                digest_size=8).digest(),
+                "little", signed=True
+            )
+            for band in range(self.bands)
+        ]
+
+    def add(
+        self,
+        user_id: str,
+        suggestions: Iterable[Dict[str, Any]],
+        timestamp: Optional[str] = None,
+        conn: Optional[sqlite3.Connection] = None
+    ) -> None:
+        """Index a session's suggestions (in the caller's transaction when conn is given)."""
+        own = conn is None
+        conn = conn or self._connect()
+        with conn if own else nullcontext():
+            for suggestion in suggestions:
+                signature = self.hasher.signature(suggestion_text(suggestion))
+                cursor = conn.execute(
+                    "INSERT INTO suggestion_signatures (user_id, title, timestamp, signature) VALUES (?, ?, ?, ?)",
+                    (user_id, suggestion.get("title", ""), timestamp, signature.tobytes())
+                )
+                conn.executemany(
+                    "INSERT INTO suggestion_buckets (user_id, bucket, signature_id) VALUES (?, ?, ?)",
+                    [(user_id, bucket, cursor.lastrowid) for bucket in self._buckets(signature)]
+                )
+
+    def find_duplicates(
+        self, user_id: str, suggestions: List[Dict[str, Any]], threshold: Optional[float] = None
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Find the closest earlier suggestion for each new one.
+
+        New suggestions are also compared with the ones before them in the
+        same list, so a session cannot repeat itself either.
+
+        Args:
+            user_id: Whose history to search
+            suggestions: New suggestions
+            threshold: Minimum estimated Jaccard similarity (optional, defaults
+                to settings.dedup_threshold)
+
+        Returns:
+            Per suggestion, None or the match: {'title', 'timestamp', 'similarity'}
+        """
+        threshold = settings.dedup_threshold if threshold is None else threshold
+        conn = self._connect()
+        signatures = [self.hasher.signature(suggestion_text(s)) for s in suggestions]
+        matches: List[Optional[Dict[str, Any]]] = []
+        for position, signature in enumerate(signatures):
+            best: Optional[Dict[str, Any]] = None
+            buckets = self._buckets(signature)
+            rows = conn.execute(
+                "SELECT title, timestamp, signature FROM suggestion_signatures WHERE id IN ("
+                f"SELECT signature_id FROM suggestion_buckets WHERE user_id = ? AND bucket IN ({','.join('?' * len(buckets))}))",
+                (user_id, *buckets)
+            ).fetchall()
+            candidates = [(title, timestamp, np.frombuffer(blob, dtype=np.uint32)) for title, timestamp, blob in rows]
+            candidates += [(suggestions[i].get("title", ""), None, signatures[i]) for i in range(position)]
+            if candidates:
+                scores = (np.stack([c[2] for c in candidates]) == signature).mean(axis=1)
+                top = int(np.argmax(scores))
+                if scores[top] >= threshold:
+                    best = {
+                        "title": candidates[top][0], "timestamp": candidates[top][1],
+                        "similarity": round(float(scores[top]), 3)
+                    }
+            matches.append(best)
+        return matches
+
+    def is_empty(self, conn: Optional[sqlite3.Connection] = None) -> bool:
+        conn = conn or self._connect()
+        return conn.execute("SELECT 1 FROM suggestion_signatures LIMIT 1").fetchone() is None
+
+    def add_sessions(self, sessions: Iterable[Dict[str, Any]], conn: Optional[sqlite3.Connection] = None) -> None:
+        """Index saved brainstorm sessions (e.g. those saved before the index existed)."""
+        for session in sessions:
+            self.add(session.get("user_id") or "", session.get("suggestions", []), session.get("timestamp"), conn=conn)
+
+    def recent_titles(self, user_id: str, limit: int) -> List[str]:
+        """Titles of the user's latest suggestions, newest first and without repeats."""
+        rows = self._connect().execute(
+            "SELECT title FROM suggestion_signatures WHERE user_id = ? ORDER BY id DESC LIMIT ?",
+            (user_id, limit * 2)
+        ).fetchall()
+        titles: List[str] = []
+        for (title,) in rows:
+            if title and title not in titles:
+                titles.append(title)
+        return titles[:limit]
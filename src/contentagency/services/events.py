@@ -0,0 +1,101 @@
+"""
+Change events for user data.
+
+After each successful write of a user's interests or posts, the data service
+emits an interests_changed or posts_changed event carrying a diff against
+the user's previous version. Caches subscribe to invalidate exactly what the
+change affects, and prefetchers to start work for what was added, instead
+of flushing everything on every write (see services/invalidation.py).
+
+Events are delivered synchronously, in-process, on the writing thread. A
+failing subscriber is reported but never fails the write.
+"""
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+INTERESTS_CHANGED = "interests_changed"
+POSTS_CHANGED = "posts_changed"
+
+Handler = Callable[[Dict[str, Any]], None]
+
+
+class ChangeEventBus:
+    """Synchronous publish/subscribe for data change events."""
+
+    def __init__(self):
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, event_type: str, handler: Handler) -> Handler:
+        """Call handler with every event of this type (subscribing twice is a no-op)."""
+        with self._lock:
+            handlers = self._handlers.setdefault(event_type, [])
+            if handler not in handlers:
+                handlers.append(handler)
+        return handler
+
+    def unsubscribe(self, event_type: str, handler: Handler) -> None:
+        with self._lock:
+            if handler in self._handlers.get(event_type, []):
+                self._handlers[event_type].remove(handler)
+
+    def emit(self, event: Optional[Dict[str, Any]]) -> None:
+        """Deliver an event to its subscribers (None, for an unchanged write, is ignored)."""
+        if event is None:
+            return
+        with self._lock:
+            handlers = list(self._handlers.get(event["type"], []))
+        for handler in handlers:
+            try:
+                handler(event)
+            except Exception as e:
+                print(f"⚠️  {event['type']} subscriber {getattr(handler, '__name__', handler)} failed: {e}")
+
+
+def _topic_key(interest: Dict[str, Any]) -> str:
+    return str(interest.get("topic", "")).strip().lower()
+
+
+def interests_event(user_id: Optional[str], previous: Optional[Dict[str, Any]], current: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Build an interests_changed event from two versions of a user's interests.
+
+    Topics are compared case-insensitively.
+
+    Returns:
+        Event with 'added' and 'removed' interests, or None if the topics are unchanged
+    """
+    old = {_topic_key(i): i for i in (previous or {}).get("interests", [])}
+    new = {_topic_key(i): i for i in current.get("interests", [])}
+    added = [interest for key, interest in new.items() if key not in old]
+    removed = [interest for key, interest in old.items() if key not in new]
+    if not added and not removed:
+        return None
+    return {
+        "type": INTERESTS_CHANGED, "user_id": user_id, "added": added, "removed": removed,
+        "previous": previous, "current": current
+    }
+
+
+def posts_event(user_id: Optional[str], previous: Optional[Dict[str, Any]], current: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Build a posts_changed event from two versions of a user's posts.
+
+    Returns:
+        Event with 'added', 'removed' and 'updated' post ids, or None if nothing changed
+    """
+    old = {str(p.get("id")): p for p in (previous or {}).get("posts", [])}
+    new = {str(p.get("id")): p for p in current.get("posts", [])}
+    added = [post_id for post_id in new if post_id not in old]
+    removed = [post_id for post_id in old if post_id not in new]
+    updated = [post_id for post_id in new if post_id in old and new[post_id] != old[post_id]]
+    if not added and not removed and not updated:
+        return None
+    return {
+        "type": POSTS_CHANGED, "user_id": user_id, "added": added, "removed": removed, "updated": updated,
+        "previous": previous, "current": current
+    }
+
+
+# Default bus for the application
+change_events = ChangeEventBus()
@@ -0,0 +1,59 @@
+"""
+Cache invalidation and prefetch driven by data change events.
+
+Task checkpoints are content-addressed (see services/checkpoints.py): new
+interests or posts produce new keys, so a write never needs a flush, and a
+posts change leaves the day's research checkpoints valid. What a change does
+affect is handled here, per event:
+
+- The latest research checkpoint, which replay (from_task) reuses for the
+  steps before from_task, is dropped when it was made for the interests the
+  user just replaced; research for other users' interests is kept.
+- Newly added topics have no research yet. In queue mode a prefetch-priority
+  research job is enqueued for them (and only them), so the next brainstorm
+  starts at the brainstorming step.
+"""
+from typing import Any, Dict
+
+from contentagency.config import settings
+from contentagency.services import checkpoints
+from contentagency.services.events import INTERESTS_CHANGED, ChangeEventBus, change_events
+from contentagency.services.metrics import CACHE_INVALIDATIONS
+from contentagency.services.prompts import research_checkpoint_key
+
+
+def invalidate_replay_research(event: Dict[str, Any]) -> None:
+    """Drop the latest research checkpoint if it covers the user's previous interests."""
+    previous = event.get("previous")
+    if not previous or not previous.get("interests"):
+        return
+    if checkpoints.checkpoint_store.discard_latest("trend_research_task", research_checkpoint_key(previous)):
+        CACHE_INVALIDATIONS.inc(cache="checkpoint")
+
+
+def prefetch_added_topics(event: Dict[str, Any]) -> None:
+    """Enqueue low-priority research for topics the user just added."""
+    if not event["added"] or not settings.prefetch_on_change or settings.brainstorm_mode != "queue":
+        return
+    if not settings.task_checkpoints_enabled:
+        return
+
+    if settings.crew_process == "pipelined":
+        units = [{"interests": [interest]} for interest in event["added"]]
+    else:
+        # A sequential run researches the whole (new) interest set at once
+        units = [{"interests": event["current"]["interests"]}]
+    cold = [
+        unit for unit in units
+        if checkpoints.checkpoint_store.get("trend_research_task", research_checkpoint_key(unit)) is None
+    ]
+    if cold:
+        from contentagency.services.job_queue import get_job_queue
+        from contentagency.services.prewarm import enqueue_research
+        enqueue_research(cold, get_job_queue())
+
+
+def register_subscribers(bus: ChangeEventBus = change_events) -> None:
+    """Subscribe the invalidation and prefetch handlers to a change event bus."""
+    bus.subscribe(INTERESTS_CHANGED, invalidate_replay_research)
+    bus.subscribe(INTERESTS_CHANGED, prefetch_added_topics)
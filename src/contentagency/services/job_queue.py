@@ -0,0 +1,458 @@
+"""
+Durable job queue for crew runs.
+
+The API enqueues brainstorm jobs and worker processes (``brainstorm_worker``)
+claim them. A claim is a lease: the worker must heartbeat before the lease
+expires, otherwise the job is handed to another worker. Failed jobs are
+retried with exponential backoff up to ``max_attempts``.
+
+Jobs carry a priority class (interactive, batch, prefetch). Claims are
+scheduled with weighted fair queuing: classes share the workers in
+proportion to ``job_class_weights`` and, within a class, users take turns
+(weighted by ``job_user_weights``), so one user's burst or a background
+refresh cannot starve interactive requests from everyone else.
+
+The SQLite backend works for every process on one box (or on a shared
+volume).
+"""
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from contentagency.config import settings
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed", "cancelled")
+FINISHED_STATUSES = ("succeeded", "failed", "cancelled")
+# Listed from most to least urgent; the order breaks scheduling ties
+PRIORITY_CLASSES = ("interactive", "batch", "prefetch")
+
+# Column name -> SQL type; columns missing from an existing database are added
+_COLUMNS = {
+    "id": "TEXT PRIMARY KEY",
+    "kind": "TEXT NOT NULL",
+    "user_id": "TEXT",
+    "payload": "TEXT NOT NULL",
+    "status": "TEXT NOT NULL",
+    "priority_class": "TEXT NOT NULL DEFAULT 'interactive'",
+    "attempts": "INTEGER NOT NULL DEFAULT 0",
+    "max_attempts": "INTEGER NOT NULL DEFAULT 3",
+    "lease_owner": "TEXT",
+    "lease_expires_at": "REAL",
+    "available_at": "REAL NOT NULL",
+    "created_at": "REAL NOT NULL",
+    "started_at": "REAL",
+    "finished_at": "REAL",
+    "result": "TEXT",
+    "error": "TEXT",
+    "trace_context": "TEXT",
+    "cancel_requested": "INTEGER NOT NULL DEFAULT 0",
+}
+_JSON_COLUMNS = ("payload", "result", "trace_context")
+
+
+class JobNotFoundError(Exception):
+    """Raised when a job id does not exist."""
+    pass
+
+
+class FairScheduler:
+    """
+    Weighted fair queuing over priority classes and users.
+
+    Each class (and each user within a class) has a virtual finish time
+    ("pass") that advances by 1/weight whenever one of its jobs is claimed;
+    the backlogged class and user with the lowest pass go next. A class or
+    user that was idle starts at the current virtual time, so it is served
+    promptly but cannot bank credit while idle. Passes are persisted with
+    the queue, so every worker process follows the same schedule.
+    """
+
+    def __init__(self, passes: Dict[str, float], class_weights: Dict[str, float], user_weights: Dict[str, float]):
+        self.passes = dict(passes)
+        self._loaded = dict(passes)
+        self.class_weights = class_weights
+        self.user_weights = user_weights
+
+    def _pass(self, key: str, clock: str) -> float:
+        return max(self.passes.get(key, 0.0), self.passes.get(clock, 0.0))
+
+    def _advance(self, key: str, clock: str, weight: float) -> None:
+        current = self._pass(key, clock)
+        self.passes[clock] = current
+        self.passes[key] = current + 1.0 / max(weight, 1e-6)
+
+    def pick(self, heads: Dict[str, Dict[str, str]]) -> str:
+        """
+        Return the next job id, advancing the winner's passes.
+
+        Args:
+            heads: class -> user -> id of the user's oldest queued job in that
+                class (users ordered by that job's age), non-empty
+        """
+        priority = min(
+            heads,
+            key=lambda c: (self._pass(f"class:{c}", "clock"), PRIORITY_CLASSES.index(c))
+        )
+        users = heads[priority]
+        clock = f"clock:{priority}"
+        user = min(users, key=lambda u: self._pass(f"user:{priority}:{u}", clock))
+
+        self._advance(f"class:{priority}", "clock", self.class_weights.get(priority, 1.0))
+        self._advance(f"user:{priority}:{user}", clock, self.user_weights.get(user, 1.0))
+        return users[user]
+
+    def changed(self) -> Dict[str, float]:
+        """Passes that moved since they were loaded."""
+        return {key: value for key, value in self.passes.items() if self._loaded.get(key) != value}
+
+
+class SQLiteJobQueue:
+    """Job queue stored in a SQLite database (WAL mode)."""
+
+    def __init__(self, path: str, retry_backoff_seconds: float = 5.0):
+        self.path = Path(path)
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self._local = threading.local()
+        self._schema_ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        if not self._schema_ready:
+            self._migrate(conn)
+            self._schema_ready = True
+        return conn
+
+    def _migrate(self, conn: sqlite3.Connection) -> None:
+        columns = ", ".join(f"{name} {sql_type}" for name, sql_type in _COLUMNS.items())
+        conn.execute(f"CREATE TABLE IF NOT EXISTS jobs ({columns})")
+        existing = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+        for name, sql_type in _COLUMNS.items():
+            if name not in existing:
+                conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {sql_type.replace('PRIMARY KEY', '')}")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, available_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_class ON jobs (status, priority_class, created_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_heads ON jobs (status, priority_class, user_id, created_at)")
+        conn.execute("CREATE TABLE IF NOT EXISTS scheduler_passes (key TEXT PRIMARY KEY, value REAL NOT NULL)")
+
+    def _transaction(self):
+        conn = self._connect()
+
+        class _Transaction:
+            def __enter__(self_inner):
+                # IMMEDIATE takes the write lock up front so two workers never claim the same job
+                conn.execute("BEGIN IMMEDIATE")
+                return conn
+
+            def __exit__(self_inner, exc_type, exc, tb):
+                conn.execute("ROLLBACK" if exc_type else "COMMIT")
+                return False
+
+        return _Transaction()
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["cancel_requested"] = bool(job.get("cancel_requested"))
+        for column in _JSON_COLUMNS:
+            if job.get(column) is not None:
+                job[column] = json.loads(job[column])
+        return job
+
+    def enqueue(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        user_id: Optional[str] = None,
+        max_attempts: int = None,
+        trace_context: Optional[Dict[str, str]] = None,
+        priority: str = "interactive"
+    ) -> Dict[str, Any]:
+        """
+        Add a job to the queue.
+
+        Args:
+            kind: Job type understood by the workers (e.g. "brainstorm")
+            payload: JSON-serializable job input
+            user_id: Owner of the job (optional)
+            max_attempts: Attempts before the job fails for good
+            trace_context: Trace carrier so the worker continues the caller's trace
+            priority: Priority class, one of PRIORITY_CLASSES
+
+        Returns:
+            The stored job
+
+        Raises:
+            ValueError: If the priority class is unknown
+        """
+        if priority not in PRIORITY_CLASSES:
+            raise ValueError(f"Unknown priority class '{priority}'. Choose one of: {', '.join(PRIORITY_CLASSES)}")
+
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, user_id, payload, status, priority_class, attempts, max_attempts, "
+                "available_at, created_at, trace_context) VALUES (?, ?, ?, ?, 'queued', ?, 0, ?, ?, ?, ?)",
+                (
+                    job_id, kind, user_id, json.dumps(payload), priority,
+                    max_attempts or settings.job_max_attempts, now, now,
+                    json.dumps(trace_context or {})
+                )
+            )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Dict[str, Any]:
+        """Return a job by id."""
+        row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            raise JobNotFoundError(f"Job not found: {job_id}")
+        return self._to_dict(row)
+
+    def queue_position(self, job_id: str) -> Optional[int]:
+        """
+        Return a queued job's approximate place in line (1 = next in its class).
+
+        Counts the queued jobs of the same priority class that were enqueued
+        earlier. Jobs of other classes and users' turns within the class are
+        ignored, so this is cheap enough for clients polling job status.
+
+        Returns:
+            The 1-based position, or None if the job is not queued
+        """
+        conn = self._connect()
+        row = conn.execute("SELECT status, priority_class, created_at FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None or row["status"] != "queued":
+            return None
+        ahead = conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND priority_class = ? AND created_at < ?",
+            (row["priority_class"], row["created_at"])
+        ).fetchone()[0]
+        return ahead + 1
+
+    def list(self, status: Optional[str] = None, user_id: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Return the most recent jobs, optionally filtered by status and user."""
+        query, params = "SELECT * FROM jobs WHERE 1 = 1", []
+        if status:
+            query += " AND status = ?"
+            params.append(status)
+        if user_id:
+            query += " AND user_id = ?"
+            params.append(user_id)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        return [self._to_dict(row) for row in self._connect().execute(query, params)]
+
+    def counts(self) -> Dict[str, int]:
+        """Return the number of jobs per status."""
+        rows = self._connect().execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        counts = {status: 0 for status in JOB_STATUSES}
+        counts.update({row["status"]: row["n"] for row in rows})
+        return counts
+
+    def _expire_leases(self, conn: sqlite3.Connection, now: float) -> None:
+        # Jobs whose worker stopped heartbeating go back to the queue (or fail)
+        conn.execute(
+            "UPDATE jobs SET status = 'cancelled', finished_at = ?, lease_owner = NULL "
+            "WHERE status = 'running' AND lease_expires_at < ? AND cancel_requested = 1",
+            (now, now)
+        )
+        conn.execute(
+            "UPDATE jobs SET status = 'failed', error = 'Lease expired after final attempt', "
+            "finished_at = ?, lease_owner = NULL "
+            "WHERE status = 'running' AND lease_expires_at < ? AND attempts >= max_attempts",
+            (now, now)
+        )
+        conn.execute(
+            "UPDATE jobs SET status = 'queued', lease_owner = NULL, available_at = ? "
+            "WHERE status = 'running' AND lease_expires_at < ?",
+            (now, now)
+        )
+
+    def _scheduler(
+        self,
+        conn: sqlite3.Connection,
+        now: float,
+        kinds: Optional[List[str]] = None
+    ) -> Tuple[Dict[str, Dict[str, str]], FairScheduler]:
+        """Load the oldest available job of each class and user, and the scheduler's passes."""
+        query, params = (
+            "SELECT priority_class, user_id, id, MIN(created_at) AS head_created_at FROM jobs "
+            "WHERE status = 'queued' AND available_at <= ?", [now]
+        )
+        if kinds:
+            query += f" AND kind IN ({', '.join('?' for _ in kinds)})"
+            params.extend(kinds)
+        # SQLite returns the id of the row holding MIN(created_at) for each group
+        query += " GROUP BY priority_class, user_id ORDER BY head_created_at"
+
+        heads: Dict[str, Dict[str, str]] = {}
+        for row in conn.execute(query, params):
+            heads.setdefault(row["priority_class"], {})[row["user_id"] or ""] = row["id"]
+
+        passes = {row["key"]: row["value"] for row in conn.execute("SELECT key, value FROM scheduler_passes")}
+        return heads, FairScheduler(passes, settings.job_class_weights, settings.job_user_weights)
+
+    def claim(self, worker_id: str, lease_seconds: float = None, kinds: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Lease the next job, chosen by the fair scheduler, to a worker.
+
+        Returns:
+            The claimed job, or None when nothing is available
+        """
+        lease_seconds = lease_seconds or settings.job_lease_seconds
+        now = time.time()
+        with self._transaction() as conn:
+            self._expire_leases(conn, now)
+            heads, scheduler = self._scheduler(conn, now, kinds)
+            if not heads:
+                return None
+
+            job_id = scheduler.pick(heads)
+            conn.executemany(
+                "INSERT OR REPLACE INTO scheduler_passes (key, value) VALUES (?, ?)",
+                list(scheduler.changed().items())
+            )
+            conn.execute(
+                "UPDATE jobs SET status = 'running', lease_owner = ?, lease_expires_at = ?, "
+                "attempts = attempts + 1, started_at = COALESCE(started_at, ?), error = NULL WHERE id = ?",
+                (worker_id, now + lease_seconds, now, job_id)
+            )
+        return self.get(job_id)
+
+    def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float = None) -> bool:
+        """
+        Extend a job's lease.
+
+        Returns:
+            False when the worker no longer owns the job
+        """
+        lease_seconds = lease_seconds or settings.job_lease_seconds
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires_at = ? WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                (time.time() + lease_seconds, job_id, worker_id)
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id: str, worker_id: str, result: Any) -> bool:
+        """Mark a job as succeeded with its result; False if the lease was lost."""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'succeeded', result = ?, finished_at = ?, lease_owner = NULL "
+                "WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                (json.dumps(result), time.time(), job_id, worker_id)
+            )
+        return cursor.rowcount == 1
+
+    def cancel(self, job_id: str) -> Dict[str, Any]:
+        """
+        Cancel a job.
+
+        A queued job is cancelled immediately. A running job is flagged; its
+        worker notices within job_cancel_poll_seconds, stops the crew at the
+        next LLM call and records the job as cancelled with any partial result.
+
+        Returns:
+            The updated job
+
+        Raises:
+            JobNotFoundError: If the job does not exist
+            ValueError: If the job already finished
+        """
+        with self._transaction() as conn:
+            row = conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                raise JobNotFoundError(f"Job not found: {job_id}")
+            if row["status"] in FINISHED_STATUSES:
+                raise ValueError(f"Job {job_id} already {row['status']}")
+            if row["status"] == "queued":
+                conn.execute(
+                    "UPDATE jobs SET status = 'cancelled', cancel_requested = 1, finished_at = ? WHERE id = ?",
+                    (time.time(), job_id)
+                )
+            else:
+                conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ?", (job_id,))
+        return self.get(job_id)
+
+    def cancel_requested(self, job_id: str) -> bool:
+        """Whether cancellation of a job was requested."""
+        row = self._connect().execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row["cancel_requested"])
+
+    def finish_cancelled(self, job_id: str, worker_id: str, result: Any = None) -> bool:
+        """Record that a worker stopped a cancelled job, keeping its partial result."""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'cancelled', result = ?, finished_at = ?, lease_owner = NULL "
+                "WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                (json.dumps(result) if result is not None else None, time.time(), job_id, worker_id)
+            )
+        return cursor.rowcount == 1
+
+    def fail(self, job_id: str, worker_id: str, error: str, retry: bool = True) -> Optional[str]:
+        """
+        Record a failed attempt.
+
+        The job is re-queued with exponential backoff while attempts remain
+        and retry is True, otherwise it fails for good.
+
+        Returns:
+            The job's new status, or None if the lease was lost
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                (job_id, worker_id)
+            ).fetchone()
+            if row is None:
+                return None
+            if retry and row["attempts"] < row["max_attempts"]:
+                delay = self.retry_backoff_seconds * (2 ** (row["attempts"] - 1))
+                conn.execute(
+                    "UPDATE jobs SET status = 'queued', error = ?, lease_owner = NULL, available_at = ? WHERE id = ?",
+                    (error, now + delay, job_id)
+                )
+                return "queued"
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, lease_owner = NULL, finished_at = ? WHERE id = ?",
+                (error, now, job_id)
+            )
+            return "failed"
+
+
+def create_job_queue(backend: str = "sqlite", **kwargs):
+    """Factory for job queue backends (currently only "sqlite")."""
+    if backend == "sqlite":
+        return SQLiteJobQueue(kwargs.get("path") or settings.job_queue_path)
+    raise ValueError(f"Unknown job queue backend: {backend}")
+
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """Return the process-wide job queue configured in settings."""
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = create_job_queue(settings.job_queue_backend)
+        return _job_queue
+
+
+def reset_job_queue() -> None:
+    """Drop the cached queue so the next call re-reads settings."""
+    global _job_queue
+    with _job_queue_lock:
+        _job_queue = None
@@ -0,0 +1,216 @@
+"""
+Gateway for the crew's external calls.
+
+Every LLM completion, Serper search and article fetch made by the crew goes through the
+wrappers in this module, which gives a single place to add cross-cutting
+behavior (record/replay cassettes, rate-limit governance, run budgets,
+per-task model routing) without touching crewAI internals.
+"""
+import copy
+from typing import Any, Dict, List, Optional, Union
+
+from crewai import LLM
+from crewai_tools import SerperDevTool
+from litellm.integrations.custom_logger import CustomLogger
+
+from contentagency.services.budgets import charge_budget, check_budget
+from contentagency.services.cassette import get_active_cassette
+from contentagency.services.metrics import LLM_CALL_SECONDS, LLM_CALLS, LLM_COST, LLM_TOKENS
+from contentagency.services.model_routing import DEFAULT_ROUTE, estimate_cost, resolve_model
+from contentagency.services.rate_limit import estimate_tokens, get_governor
+from contentagency.services.tracing import set_attributes, span
+from contentagency.tools.custom_tool import ArticleFetchTool
+
+
+class UsageCapture(CustomLogger):
+    """Per-call litellm callback that records the completion's token usage."""
+
+    FIELDS = ("prompt_tokens", "completion_tokens", "total_tokens")
+
+    def __init__(self):
+        super().__init__()
+        self.prompt_tokens: Optional[int] = None
+        self.completion_tokens: Optional[int] = None
+        self.total_tokens: Optional[int] = None
+
+    def log_success_event(self, kwargs, response_obj, start_time, end_time):
+        # crewAI reports usage directly; litellm may later report it again
+        # through its global callbacks, so keep the first value seen
+        if self.total_tokens is not None:
+            return
+        usage = response_obj.get("usage") if isinstance(response_obj, dict) else getattr(response_obj, "usage", None)
+        for field in self.FIELDS:
+            value = usage.get(field) if isinstance(usage, dict) else getattr(usage, field, None)
+            setattr(self, field, value)
+
+    def to_dict(self) -> Dict[str, Optional[int]]:
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Optional[int]]) -> "UsageCapture":
+        usage = cls()
+        for field in cls.FIELDS:
+            setattr(usage, field, data.get(field))
+        return usage
+
+    def record(self, model: str, route: str) -> float:
+        """Add the captured usage to the LLM token and cost counters and return the cost."""
+        if self.prompt_tokens:
+            LLM_TOKENS.inc(self.prompt_tokens, route=route, model=model, type="prompt")
+        if self.completion_tokens:
+            LLM_TOKENS.inc(self.completion_tokens, route=route, model=model, type="completion")
+        cost = estimate_cost(model, self.prompt_tokens, self.completion_tokens)
+        if cost:
+            LLM_COST.inc(cost, route=route, model=model)
+        return cost
+
+
+class GatewayLLM(LLM):
+    """crewAI LLM whose calls are routed through the gateway."""
+
+    def _routed(self, model: str) -> "GatewayLLM":
+        # One LLM per routed model, reused across the agent's calls. It keeps this
+        # LLM's settings (temperature, stop words, endpoint, ...) and swaps the model
+        routed = self.__dict__.setdefault("_routed_llms", {})
+        if model not in routed:
+            llm = copy.copy(self)
+            del llm.__dict__["_routed_llms"]
+            llm.model = model
+            llm.is_anthropic = self._is_anthropic_model(model)
+            llm.context_window_size = 0
+            routed[model] = llm
+        return routed[model]
+
+    def call(
+        self,
+        messages: Union[str, List[Dict[str, str]]],
+        tools: Optional[List[dict]] = None,
+        callbacks: Optional[List[Any]] = None,
+        available_functions: Optional[Dict[str, Any]] = None,
+        from_task: Optional[Any] = None,
+        from_agent: Optional[Any] = None,
+    ) -> Union[str, Any]:
+        task_name = getattr(from_task, "name", None)
+        model = resolve_model(task_name) if task_name else self.model
+        if model != self.model:
+            return self._routed(model).call(
+                messages,
+                tools=tools,
+                callbacks=callbacks,
+                available_functions=available_functions,
+                from_task=from_task,
+                from_agent=from_agent,
+            )
+        route = task_name or DEFAULT_ROUTE
+        details: Dict[str, Any] = {}
+
+        def real_call():
+            usage = UsageCapture()
+
+            def complete():
+                return super(GatewayLLM, self).call(
+                    messages,
+                    tools=tools,
+                    callbacks=[*(callbacks or []), usage],
+                    available_functions=available_functions,
+                    from_task=from_task,
+                    from_agent=from_agent,
+                )
+
+            governor = get_governor("openai")
+            if governor is None:
+                result = complete()
+            else:
+                result = governor.call(
+                    complete,
+                    estimated_tokens=estimate_tokens(messages),
+                    actual_tokens=lambda: usage.total_tokens
+                )
+            details["usage"] = usage.to_dict()
+            return result
+
+        # Stop here if the run was cancelled or its budget is spent
+        check_budget(from_task)
+
+        cassette = get_active_cassette()
+        source = "replay" if cassette is not None and cassette.mode == "replay" else "live"
+        LLM_CALLS.inc(model=self.model, source=source)
+
+        with span("llm.call", model=self.model, source=source, task=task_name) as llm_span, \
+                LLM_CALL_SECONDS.time(route=route, model=self.model):
+            if cassette is None:
+                result = real_call()
+            else:
+                request = {"model": self.model, "messages": messages, "tools": tools}
+                result = cassette.play("llm", request, real_call, details=details)
+
+            # Replays account for the usage recorded with the response (none in cassettes recorded without it)
+            usage = UsageCapture.from_dict(details.get("usage") or {})
+            cost = usage.record(self.model, route)
+            charge_budget(usage.total_tokens, from_task)
+            set_attributes(
+                llm_span,
+                prompt_tokens=usage.prompt_tokens,
+                completion_tokens=usage.completion_tokens,
+                cost_usd=round(cost, 6),
+                response_chars=len(str(result))
+            )
+            return result
+
+
+class GatewaySerperDevTool(SerperDevTool):
+    """SerperDevTool whose searches are routed through the gateway."""
+
+    def _run(self, **kwargs: Any) -> Any:
+        check_budget()
+
+        def real_call():
+            governor = get_governor("serper")
+            if governor is None:
+                return super(GatewaySerperDevTool, self)._run(**kwargs)
+            return governor.call(lambda: super(GatewaySerperDevTool, self)._run(**kwargs))
+
+        cassette = get_active_cassette()
+        with span("tool.serper", query=kwargs.get("search_query"), search_type=self.search_type):
+            if cassette is None:
+                return real_call()
+
+            request = {"search_type": self.search_type, "n_results": self.n_results, **kwargs}
+            return cassette.play("serper", request, real_call)
+
+
+class GatewayArticleFetchTool(ArticleFetchTool):
+    """ArticleFetchTool whose fetches are routed through the gateway."""
+
+    def _run(self, url: str) -> str:
+        check_budget()
+
+        def real_call():
+            return super(GatewayArticleFetchTool, self)._run(url)
+
+        cassette = get_active_cassette()
+        with span("tool.fetch_article", url=url):
+            if cassette is None:
+                return real_call()
+            return cassette.play("article", {"url": url}, real_call)
+
+
+def build_llm(agent_name: Optional[str] = None) -> GatewayLLM:
+    """
+    Create the LLM used by a crew agent.
+
+    Args:
+        agent_name: Agent name from agents.yaml (optional); its model route
+            applies, and calls made for a task switch to the task's route
+    """
+    return GatewayLLM(model=resolve_model(agent_name=agent_name))
+
+
+def build_search_tool() -> GatewaySerperDevTool:
+    """Create the web search tool used by the trend researcher."""
+    return GatewaySerperDevTool()
+
+
+def build_article_tool() -> GatewayArticleFetchTool:
+    """Create the article reading tool used by the trend researcher."""
+    return GatewayArticleFetchTool()
@@ -0,0 +1,321 @@
+"""
+In-process metrics exposed in the Prometheus text format.
+
+A small dependency-free registry of counters, gauges and histograms. Every
+update is a dict lookup plus a short locked section, cheap enough to leave
+on in production. ``instrument_app`` adds per-route latency histograms and a
+``/metrics`` endpoint to a FastAPI app.
+"""
+import bisect
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from contentagency.config import settings
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Crew phases run from seconds to many minutes
+PHASE_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1200.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        if not self.labelnames:
+            # Unlabelled series are exported from the start, as 0
+            self._values[()] = 0.0
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._function: Optional[Callable[[], float]] = None
+
+    def set_function(self, fn: Optional[Callable[[], float]]) -> None:
+        """Read the (unlabelled) value from fn each time the gauge is rendered."""
+        self._function = fn
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    @contextmanager
+    def track(self, **labels: str) -> Iterator[None]:
+        """Increment while the block runs."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def _samples(self) -> List[str]:
+        if self._function is not None:
+            try:
+                self.set(self._function())
+            except Exception:
+                # A failing source keeps the last value rather than breaking the scrape
+                pass
+        return super()._samples()
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram of observed values."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [bucket counts..., +Inf count], sum
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the duration of the block in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> int:
+        entry = self._values.get(self._key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(counts), total[0])) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> Any:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Default registry and the application's metrics
+registry = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "contentagency_http_request_duration_seconds", "HTTP request latency by route.",
+    ("app", "method", "route", "status")
+)
+CREW_PHASE_SECONDS = registry.histogram(
+    "contentagency_crew_phase_duration_seconds",
+    "Duration of brainstorm run phases (setup, research, brainstorm, parse, save).",
+    ("phase",), buckets=PHASE_BUCKETS
+)
+DATA_SERVICE_SECONDS = registry.histogram(
+    "contentagency_data_service_duration_seconds", "Data service operation latency.", ("operation",)
+)
+CACHE_REQUESTS = registry.counter(
+    "contentagency_cache_requests_total", "Cache lookups by cache and result (hit or miss).", ("cache", "result")
+)
+CACHE_INVALIDATIONS = registry.counter(
+    "contentagency_cache_invalidations_total", "Cache entries invalidated by data changes.", ("cache",)
+)
+CREW_RUNS = registry.counter("contentagency_crew_runs_total", "Brainstorm runs by outcome.", ("status",))
+CREW_RUNS_ACTIVE = registry.gauge("contentagency_crew_runs_active", "Brainstorm runs currently executing.")
+CREW_RUNS_QUEUED = registry.gauge("contentagency_crew_runs_queued", "Brainstorm runs waiting to start.")
+JOB_WAIT_SECONDS = registry.histogram(
+    "contentagency_job_wait_seconds", "Time queued jobs waited for a worker, by priority class.",
+    ("priority",), buckets=PHASE_BUCKETS
+)
+RESEARCH_PREWARMS = registry.counter(
+    "contentagency_research_prewarms_total",
+    "Pre-warmed research units by result (researched, cached, queued, failed).", ("result",)
+)
+LLM_CALLS = registry.counter("contentagency_llm_calls_total", "LLM calls by model and source.", ("model", "source"))
+LLM_TOKENS = registry.counter(
+    "contentagency_llm_tokens_total", "LLM tokens by route (task), model and type (prompt or completion).",
+    ("route", "model", "type")
+)
+LLM_CALL_SECONDS = registry.histogram(
+    "contentagency_llm_call_duration_seconds", "LLM call latency by route (task) and model.",
+    ("route", "model"), buckets=PHASE_BUCKETS
+)
+LLM_COST = registry.counter(
+    "contentagency_llm_cost_usd_total", "Estimated LLM spend in US dollars by route (task) and model.",
+    ("route", "model")
+)
+
+# Crew phase name for each task
+TASK_PHASES = {"trend_research_task": "research", "brainstorming_task": "brainstorm"}
+
+
+def observe_task(task: Any) -> None:
+    """Record a finished crewAI task's execution time as its crew phase."""
+    phase = TASK_PHASES.get(getattr(task, "name", None) or "")
+    duration = getattr(task, "execution_duration", None)
+    if phase and duration is not None:
+        CREW_PHASE_SECONDS.observe(duration, phase=phase)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Count a cache lookup."""
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def timed_operation(operation: str) -> Callable:
+    """Decorator observing a function's latency in DATA_SERVICE_SECONDS."""
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with DATA_SERVICE_SECONDS.time(operation=operation):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def instrument_app(app: Any, app_name: str, path: str = "/metrics") -> None:
+    """
+    Add route latency metrics and a metrics endpoint to a FastAPI app.
+
+    Routes are labelled by their path template (e.g. ``/api/v1/results``), not
+    the raw URL, to keep label cardinality bounded.
+    """
+    from fastapi import Response
+
+    if not settings.metrics_enabled:
+        return
+
+    @app.middleware("http")
+    async def record_request_latency(request, call_next):
+        started = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            route = request.scope.get("route")
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                app=app_name,
+                method=request.method,
+                route=getattr(route, "path", "unmatched"),
+                status=str(status)
+            )
+
+    @app.get(path, include_in_schema=False)
+    async def metrics() -> Response:
+        return Response(content=registry.render(), media_type=CONTENT_TYPE)
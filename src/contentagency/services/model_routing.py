@@ -0,0 +1,77 @@
+"""
+Per-task and per-agent model routing for the crew's LLM calls.
+
+A call made for a task uses the first model set by, in order:
+settings.model_routes[task], the task's `model` in tasks.yaml,
+settings.model_routes[agent], the agent's `model` in agents.yaml, and
+finally settings.model. The shipped tasks.yaml routes the trend research
+task (searching and summarizing results) to a cheaper, faster model and
+leaves brainstorming on settings.model.
+
+Each call's latency and estimated cost are recorded per route (the task
+name) in the LLM metrics, so the savings of a route can be checked.
+"""
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import yaml
+
+from contentagency.config import settings
+
+CONFIG_DIR = Path(__file__).parent.parent / "config"
+
+# Route label of calls made outside a task
+DEFAULT_ROUTE = "default"
+
+
+@lru_cache(maxsize=None)
+def load_crew_config(name: str) -> Dict[str, Any]:
+    """Load agents.yaml or tasks.yaml (cached)."""
+    with open(CONFIG_DIR / f"{name}.yaml", 'r') as f:
+        return yaml.safe_load(f) or {}
+
+
+def resolve_model(task_name: Optional[str] = None, agent_name: Optional[str] = None) -> str:
+    """
+    Return the model for a task or agent.
+
+    Args:
+        task_name: Task name from tasks.yaml (optional)
+        agent_name: Agent name from agents.yaml (optional, defaults to the task's agent)
+
+    Returns:
+        Model name
+    """
+    task_config = (load_crew_config("tasks").get(task_name) or {}) if task_name else {}
+    agent_name = agent_name or task_config.get("agent")
+    agent_config = (load_crew_config("agents").get(agent_name) or {}) if agent_name else {}
+
+    routes = settings.model_routes
+    for model in (routes.get(task_name), task_config.get("model"), routes.get(agent_name), agent_config.get("model")):
+        if model:
+            return model
+    return settings.model
+
+
+def estimate_cost(model: str, prompt_tokens: Optional[int], completion_tokens: Optional[int]) -> float:
+    """
+    Estimate the cost of an LLM call in US dollars.
+
+    Prices come from settings.model_prices (USD per million prompt and
+    completion tokens) or else litellm's price list; unknown models cost 0.
+    """
+    prompt_tokens, completion_tokens = prompt_tokens or 0, completion_tokens or 0
+    prices = settings.model_prices.get(model)
+    if prices:
+        return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1_000_000
+
+    # Imported here: litellm is slow to import and only needed once a call was made
+    import litellm
+    try:
+        prompt_cost, completion_cost = litellm.cost_per_token(
+            model=model, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens
+        )
+    except Exception:
+        return 0.0
+    return prompt_cost + completion_cost
@@ -0,0 +1,285 @@
+"""
+Pipelined crew execution.
+
+Instead of one sequential crew where brainstorming waits for the full trend
+research report, each interest gets its own research -> brainstorm path and
+the paths run concurrently. Brainstorming for the first researched topic
+starts while research on the other topics is still running, and a final
+lightweight (non-LLM) merge de-duplicates and ranks the ideas. End-to-end
+latency is roughly the slowest single path instead of the sum of all work.
+"""
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from crewai import Crew, Process
+from crewai.tasks.task_output import TaskOutput
+
+from contentagency.config import settings
+from contentagency.crew import Contentagency
+from contentagency.services.budgets import RunInterruptedError
+from contentagency.services.checkpoints import TASK_ORDER, checkpoint_store, task_checkpoint_key
+from contentagency.services.crew_runner import crew_phase, format_interests_for_prompt, parse_brainstorm_markdown
+from contentagency.services.metrics import observe_task
+from contentagency.services.tracing import bind_context, span
+
+ENGAGEMENT_SCORES = {"high": 3, "moderate": 2, "medium": 2, "low": 1}
+DUPLICATE_THRESHOLD = 0.6
+
+
+def _kickoff_single(agent, task, inputs: Dict[str, Any], context: Optional[List[Any]] = None) -> str:
+    """Run a one-task crew and return its raw output."""
+    # Paths run concurrently, so tasks must not share the default output files
+    task.output_file = None
+    if context is not None:
+        task.context = context
+
+    crew = Crew(agents=[agent], tasks=[task], process=Process.sequential, verbose=True)
+    result = str(crew.kickoff(inputs=inputs))
+    observe_task(task)
+    return result
+
+
+def _checkpointed(task_name: str, key: str, force: bool, run: Callable[[], str]) -> str:
+    """Serve a task output from its checkpoint or run and checkpoint it."""
+    if settings.task_checkpoints_enabled and not force:
+        checkpoint = checkpoint_store.get(task_name, key)
+        if checkpoint is not None:
+            return checkpoint["output"]
+
+    output = run()
+    if settings.task_checkpoints_enabled:
+        checkpoint_store.put(task_name, key, output)
+    return output
+
+
+def topic_path_inputs(interest: Dict[str, Any], inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """Crew inputs for one interest's path (the interests narrowed to that topic)."""
+    return {**inputs, "user_interests": format_interests_for_prompt({"interests": [interest]})}
+
+
+def research_topic(interest: Dict[str, Any], inputs: Dict[str, Any], force: bool = False,
+                   crew_instance: Optional[Contentagency] = None,
+                   research_task: Any = None) -> str:
+    """
+    Research one interest, serving the day's checkpoint when there is one.
+
+    The research inputs are only the topic and the date, so the checkpoint is
+    shared by every user with that interest (see services/batch.py).
+
+    Args:
+        interest: Single interest dict (with 'topic')
+        inputs: Crew inputs for the whole run
+        force: Re-run the research even if it is checkpointed
+        crew_instance: Crew to take the agent from (optional, a new one by default)
+        research_task: Task object to run (optional, from crew_instance by default)
+
+    Returns:
+        Trend research markdown for the topic
+    """
+    topic_inputs = topic_path_inputs(interest, inputs)
+    if crew_instance is None:
+        with crew_phase("setup", topic=interest.get("topic")):
+            crew_instance = Contentagency()
+    if research_task is None:
+        research_task = crew_instance.trend_research_task()
+
+    return _checkpointed(
+        "trend_research_task",
+        task_checkpoint_key("trend_research_task", topic_inputs),
+        force=force,
+        run=lambda: _kickoff_single(crew_instance.trend_researcher(), research_task, topic_inputs)
+    )
+
+
+def run_topic_path(interest: Dict[str, Any], inputs: Dict[str, Any], from_task: Optional[str] = None) -> Dict[str, str]:
+    """
+    Research one interest and brainstorm ideas from that research.
+
+    Args:
+        interest: Single interest dict (with 'topic')
+        inputs: Crew inputs for the whole run
+        from_task: Force re-execution from this task onwards (optional)
+
+    Returns:
+        Dict with 'topic', 'research' and 'brainstorm' outputs
+
+    Raises:
+        RunInterruptedError: If the run is stopped; partial_output holds the
+            research when it finished
+    """
+    start_index = TASK_ORDER.index(from_task) if from_task else len(TASK_ORDER)
+    topic_inputs = topic_path_inputs(interest, inputs)
+    with crew_phase("setup", topic=interest.get("topic")):
+        crew_instance = Contentagency()
+
+    research_task = crew_instance.trend_research_task()
+    research = research_topic(
+        interest, inputs,
+        force=start_index <= TASK_ORDER.index("trend_research_task"),
+        crew_instance=crew_instance,
+        research_task=research_task
+    )
+    # Expose the research (fresh or checkpointed) as brainstorming context
+    research_task.output = TaskOutput(
+        name="trend_research_task",
+        description=f"Trend research for {interest.get('topic', 'Untitled Topic')}",
+        raw=research,
+        agent="Trend Research and Analysis Specialist"
+    )
+
+    try:
+        brainstorm = _checkpointed(
+            "brainstorming_task",
+            task_checkpoint_key("brainstorming_task", topic_inputs, upstream=[research]),
+            force=start_index <= TASK_ORDER.index("brainstorming_task"),
+            run=lambda: _kickoff_single(
+                crew_instance.brainstorming_strategist(), crew_instance.brainstorming_task(), topic_inputs,
+                context=[research_task]
+            )
+        )
+    except RunInterruptedError as e:
+        # The research is checkpointed and still useful to the merged result
+        raise RunInterruptedError(e.reason, partial_output=research) from e
+
+    return {"topic": interest.get("topic", "Untitled Topic"), "research": research, "brainstorm": brainstorm}
+
+
+def _traced_topic_path(interest: Dict[str, Any], inputs: Dict[str, Any], from_task: Optional[str]) -> Dict[str, str]:
+    with span("crew.topic_path", topic=interest.get("topic")):
+        return run_topic_path(interest, inputs, from_task)
+
+
+def _title_tokens(title: str) -> set:
+    return set(re.findall(r"[a-z0-9]+", title.lower()))
+
+
+def _is_duplicate(tokens: set, kept: List[set]) -> bool:
+    for other in kept:
+        union = tokens | other
+        if union and len(tokens & other) / len(union) >= DUPLICATE_THRESHOLD:
+            return True
+    return False
+
+
+def merge_suggestions(per_topic: List[Dict[str, Any]], limit: int) -> List[Dict[str, Any]]:
+    """
+    De-duplicate and rank suggestions from several topic paths.
+
+    Ranking round-robins across topics (so every interest is represented) and
+    orders each round by engagement potential and number of resource links.
+    Near-identical titles are dropped.
+
+    Args:
+        per_topic: Parsed brainstorm results, one per topic, in interest order
+        limit: Maximum number of suggestions to keep
+
+    Returns:
+        Ranked, renumbered suggestions
+    """
+    candidates = []
+    for topic_index, parsed in enumerate(per_topic):
+        for position, suggestion in enumerate(parsed.get("suggestions", [])):
+            engagement = ENGAGEMENT_SCORES.get(suggestion.get("engagement_potential", "").lower(), 0)
+            rank = (position, -engagement, -len(suggestion.get("resource_links", [])), topic_index)
+            candidates.append((rank, suggestion))
+
+    merged = []
+    kept_tokens: List[set] = []
+    for _, suggestion in sorted(candidates, key=lambda item: item[0]):
+        tokens = _title_tokens(suggestion.get("title", ""))
+        if _is_duplicate(tokens, kept_tokens):
+            continue
+        kept_tokens.append(tokens)
+        merged.append({**suggestion, "id": f"suggestion_{len(merged) + 1}"})
+        if len(merged) >= limit:
+            break
+
+    return merged
+
+
+def render_brainstorm_markdown(suggestions: List[Dict[str, Any]], trending_context_summary: str) -> str:
+    """Render suggestions back to the crew's markdown format."""
+    lines = ["**Content Topic Suggestions:**", ""]
+    for index, suggestion in enumerate(suggestions, start=1):
+        lines.append(f'{index}. **Topic Title**: "{suggestion["title"]}"')
+        lines.append(f'   - **Description**: {suggestion.get("description", "")}')
+        lines.append(f'   - **Platform Fit**: {", ".join(suggestion.get("platform_fit", []))}')
+        lines.append(f'   - **Interest Alignment**: {suggestion.get("interest_alignment", "")}')
+        lines.append(f'   - **Trend Connection**: {suggestion.get("trend_connection", "")}')
+        if suggestion.get("resource_links"):
+            lines.append("   - **Resource Links**:")
+            for link in suggestion["resource_links"]:
+                published = f' - Published: {link["published_date"]}' if link.get("published_date") else ""
+                lines.append(f'     - [{link["title"]}]({link["url"]}){published}')
+        engagement = suggestion.get("engagement_potential", "Moderate")
+        reason = suggestion.get("engagement_reason", "")
+        lines.append(f"   - **Engagement Potential**: {engagement}" + (f", due to {reason}" if reason else ""))
+        lines.append("")
+
+    lines.append("## Trending Context Summary")
+    lines.append(trending_context_summary)
+    return "\n".join(lines) + "\n"
+
+
+def _write_output(filename: str, content: str) -> None:
+    output_path = Path(settings.output_dir) / filename
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(content)
+
+
+def run_pipelined_crew(user_interests: Dict[str, Any], inputs: Dict[str, Any], from_task: Optional[str] = None) -> str:
+    """
+    Run research and brainstorming per interest concurrently, then merge.
+
+    Args:
+        user_interests: Validated user interests dictionary
+        inputs: Crew inputs (formatted interests, posts and dates)
+        from_task: Force re-execution from this task onwards (optional)
+
+    Returns:
+        Merged brainstorm markdown, in the same format as a sequential run
+
+    Raises:
+        RunInterruptedError: If the run is stopped; partial_output holds the
+            merged markdown of the paths that finished
+    """
+    interests = user_interests.get("interests", [])
+    workers = max(1, min(settings.pipeline_max_workers, len(interests)))
+
+    paths = []
+    interrupted: Optional[RunInterruptedError] = None
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="topic-path") as executor:
+        # Topic paths run on pool threads; carry the run's trace context (and budget) over
+        run_path = bind_context(lambda interest: _traced_topic_path(interest, inputs, from_task))
+        futures = [executor.submit(run_path, interest) for interest in interests]
+        for interest, future in zip(interests, futures):
+            try:
+                paths.append(future.result())
+            except RunInterruptedError as e:
+                # Keep the paths that finished; the others stop at their next LLM call
+                interrupted = interrupted or e
+                paths.append({
+                    "topic": interest.get("topic", "Untitled Topic"), "research": e.partial_output, "brainstorm": ""
+                })
+
+    per_topic = [parse_brainstorm_markdown(path["brainstorm"]) for path in paths]
+    with span("crew.merge", topics=len(per_topic)):
+        suggestions = merge_suggestions(per_topic, settings.pipeline_max_suggestions)
+    summaries = []
+    for path, parsed in zip(paths, per_topic):
+        # Paths stopped before brainstorming contribute their research instead
+        text = parsed.get("trending_context_summary") or ("" if path["brainstorm"] else path["research"])
+        if text:
+            summaries.append(f"**{path['topic']}**: {text}")
+    summary = "\n\n".join(summaries)
+
+    research_report = "\n\n".join(f"# {path['topic']}\n\n{path['research']}" for path in paths)
+    result = render_brainstorm_markdown(suggestions, summary)
+    _write_output(settings.trend_research_file, research_report)
+    _write_output(settings.brainstorm_file, result)
+
+    if interrupted is not None:
+        raise RunInterruptedError(interrupted.reason, partial_output=result)
+    return result
@@ -0,0 +1,182 @@
+"""
+Ranking a user's post history for the prompt.
+
+Posts are stored with their published_date parsed into published_ts (Unix
+seconds) and may carry engagement counts (likes, comments, shares,
+impressions). A PostIndex is built once per version of a user's posts and
+cached by the data service: it keeps the posts ordered by recency, so the
+latest k are a slice, and scores the whole history in one NumPy pass for
+prompt selection.
+
+Selection blends recency (exponential decay with
+settings.post_recency_half_life_days) with engagement
+(settings.post_engagement_weight), then picks greedily from the best
+candidates, penalizing posts whose topics were already picked
+(settings.post_diversity_weight), so the examples show different
+successful patterns rather than five posts on one topic.
+"""
+import math
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+import numpy as np
+
+from contentagency.config import settings
+
+ENGAGEMENT_FIELDS = ("likes", "comments", "shares", "impressions")
+
+# Interactions that take more effort count more
+_ENGAGEMENT_WEIGHTS = {"likes": 1.0, "comments": 2.0, "shares": 3.0}
+
+# Diversity is decided among the best candidates by base score only
+_MIN_CANDIDATES = 100
+_CANDIDATES_PER_PICK = 20
+
+
+def parse_timestamp(value: Any) -> Optional[float]:
+    """
+    Parse a published date into Unix seconds.
+
+    Accepts ISO dates and datetimes (naive ones are taken as UTC) and
+    numbers of seconds. Returns None for anything else.
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        parsed = datetime.fromisoformat(str(value).strip())
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def normalize_post(post: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a post with published_ts derived from its published_date (if it has one)."""
+    if "published_date" not in post:
+        return post
+    return {**post, "published_ts": parse_timestamp(post.get("published_date"))}
+
+
+def engagement_score(post: Dict[str, Any]) -> float:
+    """Weighted interaction count of a post (0 without engagement data)."""
+    return sum(weight * float(post.get(field) or 0) for field, weight in _ENGAGEMENT_WEIGHTS.items())
+
+
+def post_timestamp(post: Dict[str, Any]) -> Optional[float]:
+    # Posts saved before timestamps were parsed on write only have the date
+    if post.get("published_ts") is not None:
+        return post["published_ts"]
+    return parse_timestamp(post.get("published_date"))
+
+
+class PostIndex:
+    """Read-only ranking structure over one version of a user's posts."""
+
+    def __init__(self, posts: List[Dict[str, Any]]):
+        self.posts = posts
+        timestamps = [post_timestamp(post) for post in posts]
+        self.timestamps = np.array([np.nan if ts is None else ts for ts in timestamps], dtype=np.float64)
+        self.engagement = np.array([engagement_score(post) for post in posts], dtype=np.float64)
+        # Newest first; undated posts last, in saved order
+        self._by_recency = np.argsort(-np.nan_to_num(self.timestamps, nan=-np.inf), kind="stable")
+
+    def __len__(self) -> int:
+        return len(self.posts)
+
+    def recent(self, k: int) -> List[Dict[str, Any]]:
+        """The k most recent posts."""
+        # Copies: the index is shared between callers
+        return [dict(self.posts[i]) for i in self._by_recency[:max(0, k)]]
+
+    def scores(self, now: Optional[float] = None) -> np.ndarray:
+        """Base score of every post: decayed recency blended with relative engagement."""
+        now = datetime.now(timezone.utc).timestamp() if now is None else now
+        age_days = np.clip((now - self.timestamps) / 86400.0, 0.0, None)
+        recency = np.nan_to_num(np.exp2(-age_days / settings.post_recency_half_life_days), nan=0.0)
+
+        engagement = np.log1p(self.engagement)
+        top = engagement.max() if len(engagement) else 0.0
+        if top > 0:
+            engagement = engagement / top
+
+        weight = settings.post_engagement_weight
+        return (1.0 - weight) * recency + weight * engagement
+
+    def select(self, k: int, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Pick k posts for the prompt: high scoring, with diverse topics.
+
+        Args:
+            k: Number of posts
+            now: Current time in Unix seconds (optional, for tests)
+
+        Returns:
+            Posts in pick order
+        """
+        n = len(self.posts)
+        k = min(max(0, k), n)
+        if k == 0:
+            return []
+
+        base = self.scores(now)
+        size = min(n, max(_MIN_CANDIDATES, k * _CANDIDATES_PER_PICK))
+        candidates = np.argpartition(-base, size - 1)[:size] if size < n else np.arange(n)
+
+        vocabulary: Dict[str, int] = {}
+        rows, columns = [], []
+        for row, i in enumerate(candidates):
+            for topic in self.posts[i].get("topics") or []:
+                rows.append(row)
+                columns.append(vocabulary.setdefault(str(topic).strip().lower(), len(vocabulary)))
+        incidence = np.zeros((size, len(vocabulary)), dtype=np.float64)
+        incidence[rows, columns] = 1.0
+        topic_counts = np.maximum(incidence.sum(axis=1), 1.0)
+
+        covered = np.zeros(len(vocabulary), dtype=np.float64)
+        available = base[candidates].copy()
+        picked = []
+        for _ in range(k):
+            # Share of each candidate's topics that earlier picks already show
+            overlap = (incidence @ covered) / topic_counts
+            best = int(np.argmax(available - settings.post_diversity_weight * overlap))
+            picked.append(best)
+            available[best] = -math.inf
+            covered = np.maximum(covered, incidence[best])
+        return [dict(self.posts[candidates[row]]) for row in picked]
+
+
+class PostIndexCache:
+    """Small LRU of post indexes, rebuilt when a user's posts change."""
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, stamp: Hashable, load: Callable[[], List[Dict[str, Any]]]) -> PostIndex:
+        """
+        Return the index for key, building it from load() unless cached for stamp.
+
+        Args:
+            key: Whose posts (e.g. the user id)
+            stamp: Changes whenever the stored posts change (e.g. their version)
+            load: Returns the current posts
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        index = PostIndex(load())
+        with self._lock:
+            self._entries[key] = (stamp, index)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return index
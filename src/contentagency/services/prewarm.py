@@ -0,0 +1,230 @@
+"""
+Off-peak pre-warming of trend research.
+
+Trend research is the slow half of a brainstorm, and it depends only on a
+user's interests and the date. A scheduler collects the interests of users
+with a recent brainstorm, researches them at settings.prewarm_times (e.g.
+early morning) with bounded concurrency, and stores the results as
+trend_research_task checkpoints, so the day's interactive brainstorms start
+at the brainstorming step.
+
+Research is warmed per distinct topic when crews run pipelined, and per
+distinct interest set when they run sequentially. In queue mode each unit
+becomes a prefetch-priority "research" job for the crew workers instead.
+"""
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory file locks
+    fcntl = None
+
+from contentagency.config import settings
+from contentagency.services import checkpoints
+from contentagency.services.data_service import data_service
+from contentagency.services.metrics import RESEARCH_PREWARMS
+from contentagency.services.prompts import research_checkpoint_key
+from contentagency.services.tracing import bind_context, span
+
+
+def active_user_ids(active_days: Optional[float] = None, now: Optional[datetime] = None) -> List[str]:
+    """
+    Return the users with a brainstorm session in the last active_days.
+
+    Args:
+        active_days: Look-back window (optional, defaults to settings.prewarm_active_days)
+        now: Current time (optional, for tests)
+
+    Returns:
+        User ids, most recently active first
+    """
+    active_days = settings.prewarm_active_days if active_days is None else active_days
+    cutoff = ((now or datetime.now()) - timedelta(days=active_days)).isoformat()
+    sessions = data_service.get_brainstorm_results().get("sessions", [])
+
+    users: Dict[str, str] = {}
+    for session in sessions:
+        user_id, timestamp = session.get("user_id"), session.get("timestamp", "")
+        if user_id and timestamp >= cutoff and timestamp > users.get(user_id, ""):
+            users[user_id] = timestamp
+    return sorted(users, key=users.get, reverse=True)
+
+
+def research_units(user_ids: List[str], process: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Collect the distinct research each user's next brainstorm will need.
+
+    Args:
+        user_ids: Users whose interests to warm
+        process: "sequential" or "pipelined" (optional, defaults to settings.crew_process)
+
+    Returns:
+        Interests dictionaries to research, one per distinct topic (pipelined)
+        or distinct interest set (sequential)
+    """
+    process = process or settings.crew_process
+    units: Dict[str, Dict[str, Any]] = {}
+    for user_id in user_ids:
+        interests = data_service.get_user_interests(user_id).get("interests", [])
+        groups = [[interest] for interest in interests] if process == "pipelined" else [interests]
+        for group in groups:
+            if group:
+                units.setdefault(json.dumps(group, sort_keys=True, default=str), {"interests": group})
+    return list(units.values())
+
+
+def warm_research(unit: Dict[str, Any]) -> bool:
+    """
+    Research one unit into the checkpoint store unless today's research exists.
+
+    Returns:
+        True if the research ran, False if it was already checkpointed
+    """
+    from contentagency.services.crew_runner import research_interests
+
+    if checkpoints.checkpoint_store.get("trend_research_task", research_checkpoint_key(unit)) is not None:
+        return False
+    with span("prewarm.research", topics=len(unit["interests"])):
+        research_interests(unit, force=True)
+    return True
+
+
+def enqueue_research(units: List[Dict[str, Any]], job_queue: Any) -> int:
+    """Enqueue prefetch research jobs, skipping units already queued or running."""
+    pending = set()
+    for status in ("queued", "running"):
+        for job in job_queue.list(status=status, limit=10_000):
+            if job["kind"] == "research":
+                pending.add(json.dumps(job["payload"]["user_interests"]["interests"], sort_keys=True, default=str))
+
+    queued = 0
+    for unit in units:
+        if json.dumps(unit["interests"], sort_keys=True, default=str) in pending:
+            continue
+        job_queue.enqueue("research", {"user_interests": unit}, priority="prefetch")
+        queued += 1
+    return queued
+
+
+@contextmanager
+def _single_round() -> Iterator[bool]:
+    """Yield whether this process holds the pre-warm lock (other API workers skip the round)."""
+    lock_path = Path(settings.checkpoint_dir) / ".prewarm.lock"
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "a") as lock_file:
+        if fcntl is None:
+            yield True
+            return
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def prewarm_once(max_parallel: Optional[int] = None, job_queue: Any = None) -> Dict[str, int]:
+    """
+    Warm the trend research of all recently active users.
+
+    Args:
+        max_parallel: Concurrent research runs (optional, defaults to settings.prewarm_max_parallel)
+        job_queue: Enqueue research jobs here instead of running them (optional)
+
+    Returns:
+        Number of units per outcome: researched, cached, queued and failed
+    """
+    counts = {"researched": 0, "cached": 0, "queued": 0, "failed": 0}
+    if not settings.task_checkpoints_enabled:
+        print("⏭️  Task checkpoints are disabled; pre-warmed research could not be reused")
+        return counts
+    with _single_round() as acquired:
+        if not acquired:
+            print("⏭️  Research pre-warm already running in another process")
+            return counts
+
+        users = active_user_ids()
+        units = research_units(users)
+        print(f"🔥 Pre-warming research: {len(units)} units for {len(users)} active users")
+        with span("prewarm.run", users=len(users), units=len(units)):
+            if job_queue is not None:
+                counts["queued"] = enqueue_research(units, job_queue)
+            elif units:
+                workers = max(1, min(max_parallel or settings.prewarm_max_parallel, len(units)))
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prewarm") as executor:
+                    futures = [executor.submit(bind_context(warm_research), unit) for unit in units]
+                    for future in futures:
+                        try:
+                            counts["researched" if future.result() else "cached"] += 1
+                        except Exception as e:
+                            print(f"⚠️  Research pre-warm failed: {e}")
+                            counts["failed"] += 1
+
+    for result, count in counts.items():
+        if count:
+            RESEARCH_PREWARMS.inc(count, result=result)
+    return counts
+
+
+def next_run_time(now: datetime, times: Optional[List[str]] = None) -> datetime:
+    """
+    Return the next scheduled pre-warm after now.
+
+    Args:
+        now: Current local time
+        times: "HH:MM" local times (optional, defaults to settings.prewarm_times)
+    """
+    candidates = []
+    for value in times or settings.prewarm_times:
+        hour, minute = (int(part) for part in value.split(":"))
+        at = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        candidates.append(at if at > now else at + timedelta(days=1))
+    return min(candidates)
+
+
+class PrewarmScheduler:
+    """Runs prewarm_once at settings.prewarm_times on a background thread."""
+
+    def __init__(self, job_queue_factory: Optional[Any] = None):
+        # Called each round; returns the job queue in queue mode, else None
+        self.job_queue_factory = job_queue_factory or prewarm_job_queue
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "PrewarmScheduler":
+        self._thread = threading.Thread(target=self._loop, name="research-prewarm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            delay = (next_run_time(datetime.now()) - datetime.now()).total_seconds()
+            if self._stop.wait(max(0.0, delay)):
+                return
+            try:
+                prewarm_once(job_queue=self.job_queue_factory())
+            except Exception as e:
+                # A failed round must not stop tomorrow's
+                print(f"⚠️  Research pre-warm failed: {e}")
+
+
+def prewarm_job_queue() -> Any:
+    """Return the job queue in queue mode (research goes to the workers), else None."""
+    if settings.brainstorm_mode != "queue":
+        return None
+    from contentagency.services.job_queue import get_job_queue
+    return get_job_queue()
@@ -0,0 +1,212 @@
+"""
+On-demand profiling of single requests and crew runs.
+
+Profiles are written to ``settings.profiling_dir`` (``output/profiles/``):
+
+- ``cprofile`` engine: ``<id>.prof`` (pstats; open with snakeviz, flameprof or
+  gprof2dot) and ``<id>.txt`` with the top functions by cumulative time
+- ``sampling`` engine: ``<id>.folded`` collapsed stacks, one line per unique
+  stack with its sample count, ready for flamegraph.pl or speedscope
+
+Each profile also gets ``<id>.json`` metadata, used by the listing endpoint.
+Profiling is triggered by ``settings.profiling_target`` (every request or
+every crew run) or per request with the ``X-Profile-Token`` admin header.
+"""
+import contextvars
+import cProfile
+import io
+import json
+import pstats
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from contentagency.config import settings
+
+PROFILE_HEADER = "X-Profile-Token"
+PROFILING_ENGINES = ("cprofile", "sampling")
+
+# Only one profiler runs per call stack; nested requests for a profile are ignored
+_profiling: contextvars.ContextVar[bool] = contextvars.ContextVar("profiling", default=False)
+# cProfile hooks the interpreter, so at most one runs per process
+_cprofile_lock = threading.Lock()
+
+
+class SamplingProfiler:
+    """
+    Wall-clock stack sampler covering every thread of the process.
+
+    A background thread snapshots all thread stacks every ``interval`` seconds,
+    so pipelined topic paths running on pool threads are captured as well.
+    Stacks are rooted at the thread name.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _frame_label(frame) -> str:
+        code = frame.f_code
+        module = frame.f_globals.get("__name__", Path(code.co_filename).stem)
+        return f"{code.co_name} ({module}:{code.co_firstlineno})"
+
+    def _sample(self) -> None:
+        own_ident = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_label(frame))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            self.samples[";".join(reversed(stack))] += 1
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._loop, name="profile-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def folded(self) -> str:
+        """Render samples in the collapsed-stack format."""
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.samples.items()))
+
+
+def _profile_id(label: str) -> str:
+    slug = re.sub(r"[^a-zA-Z0-9]+", "-", label).strip("-").lower()[:60] or "profile"
+    return f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{slug}-{uuid.uuid4().hex[:6]}"
+
+
+def is_profiling() -> bool:
+    """Whether the current call stack is already being profiled."""
+    return _profiling.get()
+
+
+@contextmanager
+def profile_run(label: str, engine: str = None) -> Iterator[Dict[str, Any]]:
+    """
+    Profile the block and store the result under settings.profiling_dir.
+
+    Yields a dict that receives the profile's metadata ('id', 'files', ...)
+    once the block finishes. If a profile is already running for this call
+    stack the block runs unprofiled and the dict stays empty.
+    """
+    info: Dict[str, Any] = {}
+    engine = engine or settings.profiling_engine
+    if engine not in PROFILING_ENGINES:
+        raise ValueError(f"Unknown profiling engine: {engine}")
+
+    if _profiling.get() or (engine == "cprofile" and not _cprofile_lock.acquire(blocking=False)):
+        yield info
+        return
+
+    if engine == "cprofile":
+        profiler = cProfile.Profile()
+        start, stop = profiler.enable, profiler.disable
+    else:
+        profiler = SamplingProfiler(settings.profiling_sample_interval)
+        start, stop = profiler.start, profiler.stop
+
+    token = _profiling.set(True)
+    started = time.perf_counter()
+    start()
+    try:
+        yield info
+    finally:
+        stop()
+        duration = time.perf_counter() - started
+        _profiling.reset(token)
+        if engine == "cprofile":
+            _cprofile_lock.release()
+        info.update(save_profile(profiler, label, engine, duration))
+
+
+def save_profile(profiler: Any, label: str, engine: str, duration: float) -> Dict[str, Any]:
+    """Write a finished profiler's output files and metadata."""
+    profile_dir = Path(settings.profiling_dir)
+    profile_dir.mkdir(parents=True, exist_ok=True)
+    profile_id = _profile_id(label)
+
+    files: List[str] = []
+    if engine == "cprofile":
+        profiler.dump_stats(str(profile_dir / f"{profile_id}.prof"))
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(40)
+        (profile_dir / f"{profile_id}.txt").write_text(summary.getvalue())
+        files += [f"{profile_id}.prof", f"{profile_id}.txt"]
+    else:
+        (profile_dir / f"{profile_id}.folded").write_text(profiler.folded())
+        files.append(f"{profile_id}.folded")
+
+    metadata = {
+        "id": profile_id,
+        "label": label,
+        "engine": engine,
+        "duration_seconds": round(duration, 4),
+        "created_at": datetime.now().isoformat(),
+        "files": files,
+    }
+    with open(profile_dir / f"{profile_id}.json", 'w') as f:
+        json.dump(metadata, f, indent=2)
+    return metadata
+
+
+def list_profiles(limit: int = 50) -> List[Dict[str, Any]]:
+    """Return stored profile metadata, newest first."""
+    profile_dir = Path(settings.profiling_dir)
+    if not profile_dir.exists():
+        return []
+
+    profiles = []
+    for path in sorted(profile_dir.glob("*.json"), reverse=True)[:limit]:
+        try:
+            with open(path, 'r') as f:
+                profiles.append(json.load(f))
+        except (OSError, json.JSONDecodeError):
+            continue
+    return profiles
+
+
+def request_wants_profile(headers: Any) -> bool:
+    """Whether a request enables profiling by setting or valid admin header."""
+    if settings.profiling_target == "requests":
+        return True
+    token = settings.profiling_admin_token
+    return bool(token) and headers.get(PROFILE_HEADER) == token
+
+
+def profile_requests(app: Any) -> None:
+    """
+    Profile requests to a FastAPI app when enabled (see request_wants_profile).
+
+    The profile id is returned in the ``X-Profile-Id`` response header.
+    """
+    @app.middleware("http")
+    async def profile_request(request, call_next):
+        if not request_wants_profile(request.headers):
+            return await call_next(request)
+
+        with profile_run(f"{request.method} {request.url.path}") as info:
+            response = await call_next(request)
+        if info.get("id"):
+            response.headers["X-Profile-Id"] = info["id"]
+        return response
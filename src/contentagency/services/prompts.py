@@ -0,0 +1,165 @@
+"""
+Prompt inputs for the crew's task templates.
+
+Formatting user data into task inputs is kept apart from the crew runner so
+that light processes (the API, data change subscribers) can compute
+checkpoint keys without importing crewAI.
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from contentagency.services.checkpoints import task_checkpoint_key
+from contentagency.services.post_index import ENGAGEMENT_FIELDS
+
+
+def format_interests_for_prompt(user_interests: dict) -> str:
+    """Format user interests for the prompt."""
+    if not user_interests or 'interests' not in user_interests:
+        return "No specific interests provided."
+
+    formatted = "**User Interest Areas:**\n"
+    for interest in user_interests['interests']:
+        # Handle missing 'topic' field safely
+        topic = interest.get('topic', 'Untitled Topic')
+        formatted += f"- **{topic}**\n"
+
+    return formatted
+
+
+def format_posts_for_prompt(recent_posts: list) -> str:
+    """Format recent posts for the prompt."""
+    if not recent_posts:
+        return "No recent posts available for analysis."
+
+    formatted = "**Recent Post Performance:**\n"
+    for post in recent_posts:
+        # Handle missing required fields safely
+        post_id = post.get('id', 'unknown')
+        platform = post.get('platform', 'unknown')
+        content = post.get('content', '')
+
+        formatted += f"\n**Post ID {post_id}** ({platform})\n"
+        if post.get('title'):
+            formatted += f"Title: {post['title']}\n"
+        formatted += f"Content: {content[:150]}{'...' if len(content) > 150 else ''}\n"
+        formatted += f"Topics: {', '.join(post.get('topics') or [])}\n"
+        if post.get('published_date'):
+            formatted += f"Published: {post['published_date']}\n"
+        engagement = [f"{post[field]} {field}" for field in ENGAGEMENT_FIELDS if post.get(field) is not None]
+        if engagement:
+            formatted += f"Engagement: {', '.join(engagement)}\n"
+
+    return formatted
+
+
+def _previous_month(month: str) -> str:
+    year, number = (int(part) for part in month.split("-"))
+    return f"{year - 1}-12" if number == 1 else f"{year}-{number - 1:02d}"
+
+
+def _posts(count: int) -> str:
+    return f"{count} post" if count == 1 else f"{count} posts"
+
+
+def _average(stats: Dict[str, Any]) -> float:
+    return stats["engagement"] / stats["posts"] if stats.get("posts") else 0.0
+
+
+def format_performance_for_prompt(topic_rollups: Optional[Dict[str, Any]], max_topics: int = 5) -> str:
+    """
+    Summarize a user's topic rollups for the prompt.
+
+    Reads only the aggregates (see services/rollups.py), so the cost does not
+    grow with the post history.
+    """
+    if not topic_rollups or not topic_rollups.get("posts"):
+        return "No post performance history available."
+
+    with_engagement = any(stats.get("engagement") for stats in topic_rollups["platforms"].values())
+    platforms = sorted(topic_rollups["platforms"].items(), key=lambda item: item[1]["posts"], reverse=True)
+    formatted = f"**Performance by Topic** ({_posts(topic_rollups['posts'])}; "
+    formatted += "; ".join(
+        f"{platform}: {_posts(stats['posts'])}" + (f", avg engagement {_average(stats):.0f}" if with_engagement else "")
+        for platform, stats in platforms
+    ) + ")\n"
+
+    months = [month for topic in topic_rollups["topics"].values() for month in topic["months"]]
+    latest = max(months) if months else None
+    before = _previous_month(latest) if latest else None
+    topics = sorted(
+        topic_rollups["topics"].values(), key=lambda topic: (topic["engagement"], topic["posts"]), reverse=True
+    )
+    for topic in topics[:max_topics]:
+        line = f"- {topic['topic']}: {_posts(topic['posts'])}"
+        if with_engagement:
+            line += f", avg engagement {_average(topic):.0f}"
+            best = max(topic["platforms"].items(), key=lambda item: _average(item[1]), default=None)
+            if best is not None and len(topic["platforms"]) > 1:
+                line += f", best on {best[0]}"
+            current, previous = topic["months"].get(latest), topic["months"].get(before)
+            if current and previous and _average(previous):
+                change = (_average(current) / _average(previous) - 1) * 100
+                line += f", {'up' if change >= 0 else 'down'} {abs(change):.0f}% in {latest} vs the month before"
+        formatted += line + "\n"
+    if len(topics) > max_topics:
+        formatted += f"- ...and {len(topics) - max_topics} more topics\n"
+    return formatted
+
+
+def format_context_for_prompt(snippets: Optional[List[Dict[str, Any]]]) -> str:
+    """List retrieved knowledge and past content snippets, labeled by source."""
+    if not isinstance(snippets, list) or not snippets:
+        return "No additional background available."
+    return "\n".join(f"- ({snippet['source']}) {snippet['text']}" for snippet in snippets)
+
+
+def format_avoid_for_prompt(recent_titles: Optional[List[str]]) -> str:
+    """List the user's recently suggested titles, which new ideas should not repeat."""
+    titles = [title for title in recent_titles or [] if isinstance(title, str) and title]
+    if not titles:
+        return "None yet."
+    return "\n".join(f"- {title}" for title in titles)
+
+
+def build_crew_inputs(
+    user_interests: Dict[str, Any],
+    recent_posts: List[Dict[str, Any]],
+    topic_rollups: Optional[Dict[str, Any]] = None,
+    avoid_titles: Optional[List[str]] = None,
+    context_snippets: Optional[List[Dict[str, Any]]] = None
+) -> Dict[str, str]:
+    """
+    Format user data into the crew's task inputs.
+
+    Args:
+        user_interests: User interests dictionary
+        recent_posts: List of recent posts with engagement data
+        topic_rollups: The user's topic performance rollups (optional)
+        avoid_titles: Recently suggested titles not to repeat (optional)
+        context_snippets: Retrieved knowledge and past content (optional)
+
+    Returns:
+        Inputs for the task templates (interests, posts, post performance,
+        titles to avoid, background context and today's date)
+    """
+    current_datetime = datetime.now()
+    return {
+        'user_interests': format_interests_for_prompt(user_interests),
+        'recent_posts': format_posts_for_prompt(recent_posts),
+        'post_performance': format_performance_for_prompt(topic_rollups),
+        'avoid_suggestions': format_avoid_for_prompt(avoid_titles),
+        'relevant_context': format_context_for_prompt(context_snippets),
+        'current_year': str(current_datetime.year),
+        'current_date': current_datetime.strftime("%B %d, %Y")
+    }
+
+
+def research_checkpoint_key(user_interests: Dict[str, Any]) -> str:
+    """
+    Checkpoint key of today's trend research for a set of interests.
+
+    Research depends only on the interests and the date, so the key is the
+    same for every user with these interests; with a single interest it is
+    also the key of that topic's path in a pipelined run.
+    """
+    return task_checkpoint_key("trend_research_task", build_crew_inputs(user_interests, []))
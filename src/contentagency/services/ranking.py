@@ -0,0 +1,196 @@
+"""
+Post-processing of parsed suggestions: stale links and card order.
+
+The crew writes resource dates as free text ("Published: October 5, 2025")
+and lists suggestions in whatever order the model chose. After parsing,
+rank_suggestions drops links published more than settings.link_max_age_days
+ago (the research task's 60-90 day rule) and sorts the cards by a blend of:
+
+- relevance: TF-IDF cosine similarity between each suggestion and the
+  user's interests,
+- recency: exponential decay of the suggestion's freshest link, with
+  settings.post_recency_half_life_days,
+- engagement: the model's High/Moderate/Low label.
+
+Everything after tokenizing runs as flat NumPy operations over all
+suggestions and links of a batch, so thousands of suggestions rank in
+milliseconds. Parsed dates are cached, since runs repeat the same strings.
+"""
+import calendar
+import itertools
+import re
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from contentagency.config import settings
+from contentagency.services.post_index import parse_timestamp
+
+# Day-first formats are tried before month-only ones
+_DATE_FORMATS = ("%B %d %Y", "%b %d %Y", "%d %B %Y", "%d %b %Y", "%m/%d/%Y", "%Y/%m/%d")
+_MONTH_FORMATS = ("%B %Y", "%b %Y", "%Y-%m")
+
+_ENGAGEMENT_LABELS = {"high": 1.0, "medium": 0.5, "moderate": 0.5, "low": 0.0}
+
+
+@lru_cache(maxsize=4096)
+def parse_link_date(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a resource link's free-text publication date into Unix seconds (UTC).
+
+    Accepts ISO dates and common written forms ("October 5, 2025",
+    "5 Oct 2025", "10/05/2025"). A month without a day ("September 2025")
+    counts as the month's last day, so it is not dropped as stale too early.
+
+    Returns:
+        Unix seconds, or None if the text is not a recognizable date
+    """
+    if not value:
+        return None
+    text = re.sub(r"(\d)(st|nd|rd|th)\b", r"\1", value.strip().strip("*_()[].;"))
+    parsed = parse_timestamp(text)
+    if parsed is not None:
+        return parsed
+
+    text = re.sub(r"\s+", " ", text.replace(",", " ").replace("Sept ", "Sep ")).strip()
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).replace(tzinfo=timezone.utc).timestamp()
+        except ValueError:
+            continue
+    for fmt in _MONTH_FORMATS:
+        try:
+            month = datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+        last_day = calendar.monthrange(month.year, month.month)[1]
+        return month.replace(day=last_day, tzinfo=timezone.utc).timestamp()
+    return None
+
+
+def _link_timestamp(link: Dict[str, Any]) -> Optional[float]:
+    # The parser stores published_ts; links saved before that only have the text
+    if "published_ts" in link:
+        return link["published_ts"]
+    return parse_link_date(link.get("published_date"))
+
+
+# Bytes translation table: keeps lowercase ASCII letters, digits and the
+# document separator, turns everything else into spaces
+_SEPARATOR = b"\x00"
+_TOKEN_BYTES = bytes(c if chr(c) in "abcdefghijklmnopqrstuvwxyz0123456789\x00" else 32 for c in range(256))
+
+
+def _tokens(text: str) -> List[str]:
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+def _suggestion_text(suggestion: Dict[str, Any]) -> str:
+    return " ".join(
+        str(suggestion.get(field) or "")
+        for field in ("title", "description", "interest_alignment", "trend_connection")
+    ).replace("\x00", " ")
+
+
+def relevance_scores(suggestions: List[Dict[str, Any]], interest_topics: List[str]) -> np.ndarray:
+    """
+    TF-IDF cosine similarity of each suggestion to the user's interests.
+
+    Document frequencies come from the batch itself, and the term matrix is
+    kept as flat (document, term) arrays.
+    """
+    n = len(suggestions)
+    # One pass over the whole batch: translate to ASCII tokens and split
+    text = " \x00 ".join(_suggestion_text(s) for s in suggestions).lower()
+    tokens = text.encode("utf-8").translate(_TOKEN_BYTES).split()
+    # A term's id is the position of its first occurrence
+    first: Dict[bytes, int] = {}
+    ids = np.fromiter(map(first.setdefault, tokens, itertools.count()), dtype=np.int64, count=len(tokens))
+    size = max(len(tokens), 1)
+    separators = ids == first.get(_SEPARATOR, -1)
+    documents, terms = np.cumsum(separators)[~separators], ids[~separators]
+    topic_tokens = {token.encode() for topic in interest_topics for token in _tokens(topic)}
+    query = np.array([first[token] for token in topic_tokens if token in first], dtype=np.int64)
+    if query.size == 0:
+        return np.zeros(n)
+
+    # Term frequency per (document, term) pair
+    pairs, tf = np.unique(documents * size + terms, return_counts=True)
+    pair_documents, pair_terms = np.divmod(pairs, size)
+    df = np.bincount(pair_terms, minlength=size)
+    idf = np.log((n + 1) / (df + 1)) + 1.0
+    weights = tf * idf[pair_terms]
+
+    query_weights = np.zeros(size)
+    query_weights[query] = idf[query]
+    dot = np.bincount(pair_documents, weights=weights * query_weights[pair_terms], minlength=n)
+    norms = np.sqrt(np.bincount(pair_documents, weights=weights ** 2, minlength=n)) * np.linalg.norm(query_weights)
+    return np.divide(dot, norms, out=np.zeros(n), where=norms > 0)
+
+
+def rank_suggestions(
+    suggestions: List[Dict[str, Any]],
+    user_interests: Optional[Dict[str, Any]] = None,
+    now: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    """
+    Drop stale resource links and order suggestions by relevance, recency and engagement.
+
+    Links keep their published_ts (None when the date is missing or
+    unreadable); undated links are kept. Each suggestion gets its blended
+    score, and suggestions flagged as near-duplicates (duplicate_of) go last.
+
+    Args:
+        suggestions: Parsed suggestions
+        user_interests: Interests dictionary ('interests' list) to match against (optional)
+        now: Current time in Unix seconds (optional, for tests)
+
+    Returns:
+        New suggestion dicts, best first
+    """
+    n = len(suggestions)
+    if n == 0:
+        return []
+    now = datetime.now(timezone.utc).timestamp() if now is None else now
+    max_age = settings.link_max_age_days * 86400.0
+
+    # Flatten all links of the batch into one array per field
+    links = [link for suggestion in suggestions for link in suggestion.get("resource_links") or []]
+    counts = [len(suggestion.get("resource_links") or []) for suggestion in suggestions]
+    owners = np.repeat(np.arange(n), counts)
+    timestamps = np.array([_link_timestamp(link) for link in links], dtype=np.float64)
+    ages = now - timestamps
+    keep = ~(ages > max_age)
+
+    freshness = np.exp2(-np.clip(ages, 0.0, None) / 86400.0 / settings.post_recency_half_life_days)
+    recency = np.zeros(n)
+    dated = keep & ~np.isnan(timestamps)
+    np.maximum.at(recency, owners[dated], freshness[dated])
+
+    topics = [str(interest.get("topic", "")) for interest in (user_interests or {}).get("interests") or []]
+    relevance = relevance_scores(suggestions, topics)
+    engagement = np.array([
+        _ENGAGEMENT_LABELS.get(str(s.get("engagement_potential") or "").strip().lower(), 0.5) for s in suggestions
+    ])
+
+    scores = (
+        settings.rank_relevance_weight * relevance
+        + settings.rank_recency_weight * recency
+        + settings.rank_engagement_weight * engagement
+    )
+    duplicates = np.array([bool(s.get("duplicate_of")) for s in suggestions])
+    # lexsort's last key is the primary one; ties keep the model's order
+    order = np.lexsort((np.arange(n), -scores, duplicates))
+
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+    ranked = []
+    for i in order:
+        suggestion = suggestions[i]
+        kept_links = [
+            {**links[j], "published_ts": None if np.isnan(timestamps[j]) else float(timestamps[j])}
+            for j in range(offsets[i], offsets[i + 1]) if keep[j]
+        ]
+        ranked.append({**suggestion, "resource_links": kept_links, "score": round(float(scores[i]), 4)})
+    return ranked
@@ -0,0 +1,397 @@
+"""
+Rate-limit governor for calls to external providers (OpenAI, Serper).
+
+Each provider gets one governor shared by every crew in the process. It
+combines:
+
+- token buckets for requests per minute and tokens per minute, so callers
+  wait for capacity instead of hitting the provider's limit;
+- an AIMD concurrency limit that grows additively while calls succeed
+  quickly and halves when the provider answers 429 or latency degrades;
+- a shared cooldown: one 429 pauses every caller for the provider's
+  retry-after window, instead of each run retrying on its own.
+
+When ``settings.governor_state_path`` is set, bucket levels and cooldowns are
+kept in a SQLite file so that all worker processes on the box draw from the
+same budget. The concurrency limit is always per process.
+"""
+import math
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from contentagency.config import settings
+
+
+class RateLimitedError(Exception):
+    """Raised when a provider keeps rate limiting after all retries."""
+    pass
+
+
+def is_rate_limit_error(exc: Exception) -> bool:
+    """Detect provider 429s from litellm/OpenAI and requests exceptions."""
+    status = getattr(exc, "status_code", None)
+    response = getattr(exc, "response", None)
+    if status is None and response is not None:
+        status = getattr(response, "status_code", None)
+    return status == 429 or type(exc).__name__ == "RateLimitError"
+
+
+def retry_after_seconds(exc: Exception) -> Optional[float]:
+    """Read a Retry-After hint from an exception's HTTP response, if any."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        value = headers.get("retry-after") or headers.get("Retry-After")
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """In-process token bucket refilled continuously up to its capacity."""
+
+    def __init__(self, capacity: float, refill_per_second: float, clock: Callable[[], float] = time.monotonic):
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self._clock = clock
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+
+    def try_acquire(self, amount: float) -> float:
+        """
+        Take amount tokens if available.
+
+        Returns:
+            0.0 when acquired, otherwise the seconds to wait before retrying
+        """
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill()
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return 0.0
+            return (amount - self._tokens) / self.refill_per_second
+
+    def adjust(self, delta: float) -> None:
+        """Return (positive) or charge (negative) tokens after the fact."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + delta)
+
+    @property
+    def available(self) -> float:
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+
+class SharedState:
+    """SQLite-backed bucket levels and cooldowns shared by worker processes."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL, updated REAL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS cooldowns (name TEXT PRIMARY KEY, until REAL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def get_cooldown(self, name: str) -> float:
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT until FROM cooldowns WHERE name = ?", (name,)).fetchone()
+            return row[0] if row else 0.0
+        finally:
+            conn.close()
+
+    def set_cooldown(self, name: str, until: float) -> None:
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT INTO cooldowns (name, until) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET until = MAX(until, excluded.until)",
+                (name, until)
+            )
+
+
+class SharedTokenBucket(TokenBucket):
+    """Token bucket whose level lives in SharedState (wall-clock based)."""
+
+    def __init__(self, state: SharedState, name: str, capacity: float, refill_per_second: float):
+        super().__init__(capacity, refill_per_second, clock=time.time)
+        self.state = state
+        self.name = name
+
+    def _update(self, fn: Callable[[float], float]) -> float:
+        with self.state.transaction() as conn:
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (self.name,)).fetchone()
+            now = self._clock()
+            tokens = self.capacity if row is None else min(
+                self.capacity, row[0] + (now - row[1]) * self.refill_per_second
+            )
+            tokens, result = fn(tokens)
+            conn.execute(
+                "INSERT INTO buckets (name, tokens, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                (self.name, tokens, now)
+            )
+            return result
+
+    def try_acquire(self, amount: float) -> float:
+        amount = min(amount, self.capacity)
+
+        def take(tokens):
+            if tokens >= amount:
+                return tokens - amount, 0.0
+            return tokens, (amount - tokens) / self.refill_per_second
+
+        return self._update(take)
+
+    def adjust(self, delta: float) -> None:
+        self._update(lambda tokens: (min(self.capacity, tokens + delta), None))
+
+    @property
+    def available(self) -> float:
+        return self._update(lambda tokens: (tokens, tokens))
+
+
+class AIMDLimiter:
+    """
+    Adaptive concurrency limit (additive increase, multiplicative decrease).
+
+    The limit grows by roughly one slot per limit-worth of fast successes and
+    is cut by ``decrease_factor`` on a 429 or when latency exceeds the target.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: int = 1,
+        maximum: int = 64,
+        decrease_factor: float = 0.5,
+        latency_target: float = 0.0
+    ):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease_factor = decrease_factor
+        self.latency_target = latency_target
+        self._limit = float(max(minimum, min(initial, maximum)))
+        self._in_flight = 0
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Wait for a free slot; returns False if timeout expires first."""
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._in_flight < int(self._limit), timeout=timeout):
+                return False
+            self._in_flight += 1
+            return True
+
+    def release(self) -> None:
+        with self._condition:
+            self._in_flight = max(0, self._in_flight - 1)
+            self._condition.notify_all()
+
+    def on_success(self, latency: float) -> None:
+        with self._condition:
+            if self.latency_target and latency > self.latency_target:
+                self._limit = max(self.minimum, self._limit * (1 - (1 - self.decrease_factor) / 2))
+            else:
+                self._limit = min(self.maximum, self._limit + 1.0 / self._limit)
+            self._condition.notify_all()
+
+    def on_rate_limited(self) -> None:
+        with self._condition:
+            self._limit = max(self.minimum, self._limit * self.decrease_factor)
+
+
+class ProviderGovernor:
+    """Coordinates every call to one provider within (and across) processes."""
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: int,
+        tokens_per_minute: int = 0,
+        initial_concurrency: int = 4,
+        max_concurrency: int = 32,
+        latency_target: float = 0.0,
+        max_retries: int = 5,
+        state: Optional[SharedState] = None
+    ):
+        self.name = name
+        self.max_retries = max_retries
+        self.state = state
+
+        def bucket(kind: str, per_minute: int) -> Optional[TokenBucket]:
+            if per_minute <= 0:
+                return None
+            if state is not None:
+                return SharedTokenBucket(state, f"{name}:{kind}", per_minute, per_minute / 60.0)
+            return TokenBucket(per_minute, per_minute / 60.0)
+
+        self.requests = bucket("rpm", requests_per_minute)
+        self.tokens = bucket("tpm", tokens_per_minute)
+        self.limiter = AIMDLimiter(initial_concurrency, maximum=max_concurrency, latency_target=latency_target)
+        self._cooldown_until = 0.0
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"calls": 0, "rate_limited": 0, "retries": 0}
+
+    def _count(self, stat: str) -> None:
+        with self._lock:
+            self.stats[stat] += 1
+
+    def _cooldown_remaining(self) -> float:
+        until = self.state.get_cooldown(self.name) if self.state else self._cooldown_until
+        return max(0.0, until - time.time())
+
+    def _start_cooldown(self, seconds: float) -> None:
+        until = time.time() + seconds
+        if self.state is not None:
+            self.state.set_cooldown(self.name, until)
+        with self._lock:
+            self._cooldown_until = max(self._cooldown_until, until)
+
+    def _wait_for_capacity(self, estimated_tokens: int) -> None:
+        while True:
+            wait = self._cooldown_remaining()
+            if not wait and self.requests is not None:
+                wait = self.requests.try_acquire(1)
+            if not wait and self.tokens is not None and estimated_tokens:
+                wait = self.tokens.try_acquire(estimated_tokens)
+                if wait and self.requests is not None:
+                    self.requests.adjust(1)
+            if not wait:
+                return
+            time.sleep(min(wait, 5.0))
+
+    def call(self, fn: Callable[[], Any], estimated_tokens: int = 0,
+             actual_tokens: Optional[Callable[[], Optional[int]]] = None) -> Any:
+        """
+        Run fn under the provider's rate and concurrency limits.
+
+        Args:
+            fn: Zero-argument callable performing the provider request
+            estimated_tokens: Tokens to reserve from the TPM bucket up front
+            actual_tokens: Optional callable returning the real token usage
+                after fn completes, used to reconcile the reservation
+
+        Returns:
+            fn's result
+
+        Raises:
+            RateLimitedError: If the provider still rate limits after max_retries
+        """
+        backoff = 1.0
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            try:
+                self._wait_for_capacity(estimated_tokens)
+                started = time.monotonic()
+                try:
+                    result = fn()
+                except Exception as e:
+                    if not is_rate_limit_error(e):
+                        raise
+                    self._count("rate_limited")
+                    self.limiter.on_rate_limited()
+                    retry_after = retry_after_seconds(e)
+                    self._start_cooldown(backoff if retry_after is None else retry_after)
+                    backoff = min(backoff * 2, 60.0)
+                    if attempt == self.max_retries:
+                        raise RateLimitedError(f"{self.name} rate limited after {attempt + 1} attempts") from e
+                    self._count("retries")
+                    continue
+
+                self._count("calls")
+                self.limiter.on_success(time.monotonic() - started)
+                if self.tokens is not None and actual_tokens is not None:
+                    used = actual_tokens()
+                    if used is not None:
+                        self.tokens.adjust(estimated_tokens - used)
+                return result
+            finally:
+                self.limiter.release()
+
+
+def estimate_tokens(text: Any) -> int:
+    """Rough token estimate (~4 characters per token) for TPM reservations."""
+    return int(math.ceil(len(str(text)) / 4))
+
+
+_governors: Dict[str, ProviderGovernor] = {}
+_governors_lock = threading.Lock()
+
+
+def get_governor(provider: str) -> Optional[ProviderGovernor]:
+    """
+    Return the process-wide governor for a provider ("openai" or "serper").
+
+    Returns None when the governor is disabled in settings.
+    """
+    if not settings.governor_enabled:
+        return None
+
+    with _governors_lock:
+        if provider not in _governors:
+            state = SharedState(settings.governor_state_path) if settings.governor_state_path else None
+            limits = {
+                "openai": (settings.openai_rpm, settings.openai_tpm),
+                "serper": (settings.serper_rpm, 0),
+            }
+            if provider not in limits:
+                raise ValueError(f"Unknown provider: {provider}")
+            rpm, tpm = limits[provider]
+            _governors[provider] = ProviderGovernor(
+                provider,
+                requests_per_minute=rpm,
+                tokens_per_minute=tpm,
+                initial_concurrency=settings.governor_initial_concurrency,
+                max_concurrency=settings.governor_max_concurrency,
+                latency_target=settings.governor_latency_target_seconds,
+                max_retries=settings.governor_max_retries,
+                state=state
+            )
+        return _governors[provider]
+
+
+def reset_governors() -> None:
+    """Drop cached governors so the next call re-reads settings."""
+    with _governors_lock:
+        _governors.clear()
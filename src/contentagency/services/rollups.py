@@ -0,0 +1,135 @@
+"""
+Per-user performance rollups of the post history.
+
+For each topic and platform a rollup keeps the number of posts, engagement
+totals (likes, comments, shares, impressions and the weighted engagement
+score) and monthly buckets for trends. The data services update a user's
+rollups on every post write by subtracting the replaced versions of changed
+posts and adding the new ones, so reading them (e.g. for the prompt) never
+scans the post history.
+
+Rollups record the posts version they reflect. A write that finds them out
+of step (missing, or a crash between the two writes) rebuilds them from the
+posts instead.
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from contentagency.services.post_index import ENGAGEMENT_FIELDS, engagement_score, post_timestamp
+
+
+def empty_rollups(user_id: Optional[str], version: int = 0) -> Dict[str, Any]:
+    return {"user_id": user_id, "version": version, "posts": 0, "topics": {}, "platforms": {}}
+
+
+def _bump(stats: Dict[str, Any], post: Dict[str, Any], sign: int) -> None:
+    stats["posts"] = stats.get("posts", 0) + sign
+    for field in ENGAGEMENT_FIELDS:
+        stats[field] = stats.get(field, 0) + sign * int(post.get(field) or 0)
+    stats["engagement"] = stats.get("engagement", 0.0) + sign * engagement_score(post)
+
+
+def _month(post: Dict[str, Any]) -> Optional[str]:
+    ts = post_timestamp(post)
+    return None if ts is None else datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m")
+
+
+def _apply(rollups: Dict[str, Any], post: Dict[str, Any], sign: int) -> None:
+    """Add (sign=1) or subtract (sign=-1) one post's contribution."""
+    rollups["posts"] += sign
+    platform = str(post.get("platform") or "unknown").lower()
+    month = _month(post)
+    targets = [rollups["platforms"].setdefault(platform, {})]
+
+    topics = {str(topic).strip().lower(): str(topic).strip() for topic in post.get("topics") or [] if str(topic).strip()}
+    for key, name in topics.items():
+        topic = rollups["topics"].setdefault(key, {"topic": name, "platforms": {}, "months": {}})
+        targets.append(topic)
+        targets.append(topic["platforms"].setdefault(platform, {}))
+        if month:
+            targets.append(topic["months"].setdefault(month, {}))
+
+    for stats in targets:
+        _bump(stats, post, sign)
+
+    # Drop what no longer has posts, so removed topics disappear
+    for key in topics:
+        topic = rollups["topics"][key]
+        topic["platforms"] = {p: s for p, s in topic["platforms"].items() if s["posts"] > 0}
+        topic["months"] = {m: s for m, s in topic["months"].items() if s["posts"] > 0}
+        if topic["posts"] <= 0:
+            del rollups["topics"][key]
+    if rollups["platforms"][platform]["posts"] <= 0:
+        del rollups["platforms"][platform]
+
+
+def build_rollups(user_id: Optional[str], posts: List[Dict[str, Any]], version: int) -> Dict[str, Any]:
+    """Compute rollups from a full post history."""
+    rollups = empty_rollups(user_id, version)
+    for post in posts:
+        _apply(rollups, post, 1)
+    return rollups
+
+
+def _by_id(posts: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    grouped: Dict[str, List[Dict[str, Any]]] = {}
+    for post in posts:
+        grouped.setdefault(str(post.get("id")), []).append(post)
+    return grouped
+
+
+def changed_posts(
+    previous: List[Dict[str, Any]], current: List[Dict[str, Any]]
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Diff two versions of a post list by post id.
+
+    Posts sharing an id are compared as a multiset, so a list with repeated
+    ids (e.g. a saved history with duplicates) diffs to exactly the copies
+    that were removed, edited or added.
+
+    Returns:
+        (old versions of removed or edited posts, new versions of added or edited posts)
+    """
+    old, new = _by_id(previous), _by_id(current)
+    removed: List[Dict[str, Any]] = []
+    added: List[Dict[str, Any]] = []
+    for post_id in list(old) + [post_id for post_id in new if post_id not in old]:
+        unmatched = list(new.get(post_id, []))
+        for post in old.get(post_id, []):
+            if post in unmatched:
+                unmatched.remove(post)
+            else:
+                removed.append(post)
+        added.extend(unmatched)
+    return removed, added
+
+
+def update_rollups(
+    rollups: Optional[Dict[str, Any]],
+    previous: Optional[Dict[str, Any]],
+    current: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Roll a post write into a user's rollups.
+
+    Args:
+        rollups: Stored rollups (None if there are none yet)
+        previous: Posts document the write replaced (None if there was none)
+        current: Posts document after the write
+
+    Returns:
+        Rollups for current, updated from the changed posts only when they
+        were in step with previous, otherwise rebuilt
+    """
+    previous_version = (previous or {}).get("version", 0)
+    if rollups is None or rollups.get("version") != previous_version:
+        return build_rollups(current.get("user_id"), current.get("posts", []), current.get("version", 0))
+
+    removed, added = changed_posts((previous or {}).get("posts", []), current.get("posts", []))
+    for post in removed:
+        _apply(rollups, post, -1)
+    for post in added:
+        _apply(rollups, post, 1)
+    rollups["version"] = current.get("version", 0)
+    return rollups
@@ -0,0 +1,114 @@
+"""
+Serving helpers for running the API and web UI with several worker processes.
+
+With ``workers > 1`` uvicorn's supervisor forks that many processes sharing
+the listening socket, so request throughput scales with the cores on the box.
+Workers share no memory: persistent data goes through the data service, which
+locks its files across processes (or uses the SQLite database backend).
+
+Crew runs grow a worker's memory (crewAI, litellm and model clients are
+loaded on the first run), so a worker can be recycled after a number of crew
+runs or above a memory threshold. Recycling sends the worker SIGTERM: uvicorn
+finishes in-flight requests, exits, and the supervisor starts a fresh worker.
+"""
+import os
+import resource
+import signal
+import sys
+import threading
+from typing import Any, Optional
+
+import uvicorn
+
+from contentagency.config import settings
+
+# Set by serve() for the uvicorn workers it forks; other processes reading the
+# same .env (e.g. brainstorm_worker) have no supervisor to restart them
+SUPERVISED_WORKER_ENV = "CONTENTAGENCY_SUPERVISED_WORKER"
+
+
+def current_rss_mb() -> float:
+    """Resident memory of this process in MB."""
+    try:
+        with open("/proc/self/statm", 'r') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        # Not Linux: fall back to peak RSS (KB on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class WorkerRecycler:
+    """Decides when a supervised worker should restart itself."""
+
+    def __init__(self, max_crew_runs: int = 0, max_memory_mb: int = 0):
+        self.max_crew_runs = max_crew_runs
+        self.max_memory_mb = max_memory_mb
+        self.crew_runs = 0
+        self.recycling = False
+        self._lock = threading.Lock()
+
+    def recycle_reason(self) -> Optional[str]:
+        """Return why this worker should be recycled, or None."""
+        if self.max_crew_runs and self.crew_runs >= self.max_crew_runs:
+            return f"served {self.crew_runs} crew runs"
+        if self.max_memory_mb:
+            rss = current_rss_mb()
+            if rss >= self.max_memory_mb:
+                return f"resident memory {rss:.0f} MB >= {self.max_memory_mb} MB"
+        return None
+
+    def after_crew_run(self) -> None:
+        """Count a finished crew run and recycle the worker if a limit is hit."""
+        with self._lock:
+            self.crew_runs += 1
+            if self.recycling:
+                return
+            reason = self.recycle_reason()
+            if reason is None:
+                return
+            self.recycling = True
+
+        print(f"♻️  Recycling worker {os.getpid()}: {reason}")
+        # Graceful: uvicorn stops accepting, drains in-flight requests, then exits
+        os.kill(os.getpid(), signal.SIGTERM)
+
+
+_recycler: Optional[WorkerRecycler] = None
+
+
+def get_recycler() -> Optional[WorkerRecycler]:
+    """
+    Return this process's recycler.
+
+    Returns None unless the process is a uvicorn worker started by serve()
+    with several workers and a crew run or memory limit is set; any other
+    process has nobody to restart it.
+    """
+    global _recycler
+    if not os.environ.get(SUPERVISED_WORKER_ENV) or not (settings.worker_max_crew_runs or settings.worker_max_memory_mb):
+        return None
+    if _recycler is None:
+        _recycler = WorkerRecycler(settings.worker_max_crew_runs, settings.worker_max_memory_mb)
+    return _recycler
+
+
+def serve(app: Any, import_string: str, host: str, port: int, workers: int = 1) -> None:
+    """
+    Run an ASGI app with one or more worker processes.
+
+    Args:
+        app: The app object, used for a single in-process server
+        import_string: "module:attribute" of the app, required by uvicorn for workers
+        host: Bind address
+        port: Bind port
+        workers: Number of worker processes
+    """
+    if workers > 1:
+        # Workers inherit the environment, so they see the same settings
+        os.environ["API_WORKERS"] = str(workers)
+        os.environ[SUPERVISED_WORKER_ENV] = "1"
+        uvicorn.run(import_string, host=host, port=port, workers=workers)
+    else:
+        uvicorn.run(app, host=host, port=port)
@@ -0,0 +1,278 @@
+"""
+OpenTelemetry tracing for brainstorm requests.
+
+Spans cover the whole path of a request: the HTTP root span, the crew run
+phases, each crewAI task, every LLM call and tool invocation, and data
+service operations. ``settings.tracing_exporter`` selects where spans go:
+
+- ``none``: tracing off (the helpers below become no-ops)
+- ``console``: print spans to stdout
+- ``file``: append one JSON object per span to ``settings.tracing_file``
+- ``otlp``: send to an OTLP/HTTP collector (``OTEL_EXPORTER_OTLP_ENDPOINT``)
+
+The application uses its own TracerProvider rather than the global one,
+which crewAI's telemetry may claim. Context crosses thread pools through
+``bind_context`` and process boundaries through ``inject_context`` /
+``use_context`` (W3C traceparent carriers).
+"""
+import contextvars
+import functools
+import json
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from contentagency.config import settings
+
+try:
+    from opentelemetry import context as otel_context
+    from opentelemetry import trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import (
+        BatchSpanProcessor,
+        ConsoleSpanExporter,
+        SimpleSpanProcessor,
+        SpanExporter,
+        SpanExportResult,
+    )
+    from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
+    OTEL_AVAILABLE = True
+except ImportError:
+    SpanExporter = object
+    OTEL_AVAILABLE = False
+
+TRACING_EXPORTERS = ("none", "console", "file", "otlp")
+
+
+class JsonlFileSpanExporter(SpanExporter):
+    """Span exporter appending one JSON line per finished span."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def export(self, spans) -> "SpanExportResult":
+        lines = []
+        for span in spans:
+            context = span.get_span_context()
+            lines.append(json.dumps({
+                "name": span.name,
+                "trace_id": format(context.trace_id, "032x"),
+                "span_id": format(context.span_id, "016x"),
+                "parent_id": format(span.parent.span_id, "016x") if span.parent else None,
+                "start_time": span.start_time,
+                "end_time": span.end_time,
+                "duration_ms": round((span.end_time - span.start_time) / 1e6, 3),
+                "status": span.status.status_code.name,
+                "attributes": dict(span.attributes or {}),
+            }, default=str))
+
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a') as f:
+                f.write("\n".join(lines) + "\n")
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        pass
+
+
+_provider = None
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def _build_provider(exporter: str):
+    if exporter not in TRACING_EXPORTERS:
+        raise ValueError(f"Unknown tracing exporter: {exporter}")
+
+    provider = TracerProvider(resource=Resource.create({"service.name": settings.tracing_service_name}))
+    if exporter == "console":
+        provider.add_span_processor(SimpleSpanProcessor(ConsoleSpanExporter()))
+    elif exporter == "file":
+        provider.add_span_processor(SimpleSpanProcessor(JsonlFileSpanExporter(settings.tracing_file)))
+    else:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    return provider
+
+
+def get_tracer():
+    """
+    Return the application tracer configured in settings.
+
+    Returns None when tracing is off or OpenTelemetry is not installed.
+    """
+    global _provider, _tracer
+
+    if settings.tracing_exporter == "none" or not OTEL_AVAILABLE:
+        return None
+
+    with _tracer_lock:
+        if _tracer is None:
+            _provider = _build_provider(settings.tracing_exporter)
+            _tracer = _provider.get_tracer("contentagency")
+        return _tracer
+
+
+def reset_tracing() -> None:
+    """Flush and drop the tracer so the next call re-reads settings."""
+    global _provider, _tracer
+    with _tracer_lock:
+        if _provider is not None:
+            _provider.shutdown()
+        _provider = None
+        _tracer = None
+
+
+def _clean_attributes(attributes: Dict[str, Any]) -> Dict[str, Any]:
+    # OpenTelemetry only accepts primitive attribute values
+    return {
+        key: value if isinstance(value, (str, bool, int, float)) else str(value)
+        for key, value in attributes.items() if value is not None
+    }
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Any]:
+    """
+    Run the block inside a child span of the current context.
+
+    Yields the span (None when tracing is off) so callers can add attributes.
+    """
+    tracer = get_tracer()
+    if tracer is None:
+        yield None
+        return
+
+    with tracer.start_as_current_span(name, attributes=_clean_attributes(attributes)) as current:
+        yield current
+
+
+def set_attributes(current: Any, **attributes: Any) -> None:
+    """Add attributes to a span yielded by span(); no-op when tracing is off."""
+    if current is not None:
+        current.set_attributes(_clean_attributes(attributes))
+
+
+def traced(name: str) -> Callable:
+    """Decorator running a function inside a span."""
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def bind_context(fn: Callable) -> Callable:
+    """Wrap fn so it runs in the caller's context when invoked on another thread."""
+    context = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        # Each call gets its own copy: a Context cannot be entered twice at once
+        return context.copy().run(fn, *args, **kwargs)
+    return wrapper
+
+
+def inject_context() -> Dict[str, str]:
+    """Serialize the current trace context into a carrier dict (traceparent)."""
+    carrier: Dict[str, str] = {}
+    if OTEL_AVAILABLE and get_tracer() is not None:
+        TraceContextTextMapPropagator().inject(carrier)
+    return carrier
+
+
+@contextmanager
+def use_context(carrier: Optional[Dict[str, str]]) -> Iterator[None]:
+    """Make a carrier from inject_context (or HTTP headers) the current context."""
+    if not carrier or not OTEL_AVAILABLE or get_tracer() is None:
+        yield
+        return
+
+    token = otel_context.attach(TraceContextTextMapPropagator().extract(carrier))
+    try:
+        yield
+    finally:
+        otel_context.detach(token)
+
+
+_task_spans: Dict[int, Any] = {}
+_task_spans_lock = threading.Lock()
+_listeners_registered = False
+
+
+def register_task_listeners() -> None:
+    """
+    Open a span per crewAI task from the crew's task lifecycle events.
+
+    Called by the crew runner when the crew stack is loaded, so the tracer
+    itself never imports crewAI; the listeners do nothing while tracing is off.
+    """
+    global _listeners_registered
+    if _listeners_registered or not OTEL_AVAILABLE:
+        return
+    _listeners_registered = True
+
+    from crewai.events import crewai_event_bus
+    from crewai.events.types.task_events import TaskCompletedEvent, TaskFailedEvent, TaskStartedEvent
+
+    # Events are emitted synchronously on the thread running the task, so
+    # attaching the span here makes LLM and tool spans its children
+    @crewai_event_bus.on(TaskStartedEvent)
+    def _on_task_started(source, event):
+        tracer = get_tracer()
+        if tracer is None or event.task is None:
+            return
+        agent = getattr(event.task, "agent", None)
+        task_span = tracer.start_span(
+            f"crew.task {event.task.name or 'task'}",
+            attributes=_clean_attributes({"crewai.task": event.task.name, "crewai.agent": getattr(agent, "role", None)})
+        )
+        token = otel_context.attach(trace.set_span_in_context(task_span))
+        with _task_spans_lock:
+            _task_spans[id(event.task)] = (task_span, token)
+
+    def _finish(task, error: Optional[str] = None):
+        with _task_spans_lock:
+            entry = _task_spans.pop(id(task), None)
+        if entry is None:
+            return
+        task_span, token = entry
+        if error is not None:
+            task_span.set_status(trace.Status(trace.StatusCode.ERROR, error))
+        otel_context.detach(token)
+        task_span.end()
+
+    @crewai_event_bus.on(TaskCompletedEvent)
+    def _on_task_completed(source, event):
+        _finish(event.task)
+
+    @crewai_event_bus.on(TaskFailedEvent)
+    def _on_task_failed(source, event):
+        _finish(event.task, error=event.error)
+
+
+def trace_app(app: Any, app_name: str) -> None:
+    """
+    Open a root span for every HTTP request to a FastAPI app.
+
+    An incoming ``traceparent`` header is honored, so callers can continue
+    their own traces. Spans are named after the route template.
+    """
+    @app.middleware("http")
+    async def trace_request(request, call_next):
+        if get_tracer() is None:
+            return await call_next(request)
+
+        with use_context(dict(request.headers)):
+            with span(f"HTTP {request.method}", **{"http.method": request.method, "app": app_name}) as current:
+                response = await call_next(request)
+                route = getattr(request.scope.get("route"), "path", "unmatched")
+                current.update_name(f"HTTP {request.method} {route}")
+                set_attributes(current, **{"http.route": route, "http.status_code": response.status_code})
+                return response
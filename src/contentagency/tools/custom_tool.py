@@ -1,19 +1,30 @@
 from crewai.tools import BaseTool
-from typing import Type
+from typing import Any, Type
 from pydantic import BaseModel, Field
 
+from contentagency.services.articles import fetch_article, format_article
 
-class MyCustomToolInput(BaseModel):
-    """Input schema for MyCustomTool."""
-    argument: str = Field(..., description="Description of the argument.")
 
-class MyCustomTool(BaseTool):
-    name: str = "Name of my tool"
+class ArticleFetchToolInput(BaseModel):
+    """Input schema for ArticleFetchTool."""
+    url: str = Field(..., description="Full http(s) URL of the article to read.")
+
+
+class ArticleFetchTool(BaseTool):
+    name: str = "Read article"
     description: str = (
-        "Clear description for what this tool is useful for, your agent will need this information to use it."
+        "Fetch an article by URL and return its title, publication date and a short extractive summary. "
+        "Use it to check what a search result actually says and when it was published, instead of relying "
+        "on the search snippet. Results are cached, so reading the same URL again is free."
     )
-    args_schema: Type[BaseModel] = MyCustomToolInput
+    args_schema: Type[BaseModel] = ArticleFetchToolInput
+    # HTTP transport and article store (None: urllib and the shared store)
+    transport: Any = None
+    store: Any = None
 
-    def _run(self, argument: str) -> str:
-        # Implementation goes here
-        return "this is an example of a tool output, ignore it and move along."
+    def _run(self, url: str) -> str:
+        try:
+            return format_article(fetch_article(url, transport=self.transport, store=self.store))
+        except ValueError as e:
+            # The agent gets the reason and can move on to another source
+            return str(e)
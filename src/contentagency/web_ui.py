@@ -5,14 +5,21 @@ Simple web UI for testing the research agent locally.
 from fastapi import FastAPI, Request
 from fastapi.responses import HTMLResponse, JSONResponse
 from fastapi.templating import Jinja2Templates
-import uvicorn
 from pathlib import Path
 
+from contentagency.config import settings
 from contentagency.services.data_service import data_service
-from contentagency.services.crew_runner import run_brainstorm_crew
+from contentagency.services.crew_loader import run_brainstorm_session
+from contentagency.services.metrics import instrument_app
+from contentagency.services.profiling import profile_requests
+from contentagency.services.serving import serve
+from contentagency.services.tracing import trace_app
 from contentagency.exceptions import ValidationError
 
 app = FastAPI(title="ContentAgency Research UI")
+instrument_app(app, "web_ui")
+trace_app(app, "web_ui")
+profile_requests(app)
 
 # Setup templates directory
 templates_dir = Path(__file__).parent / "templates"
@@ -77,24 +84,29 @@ async def update_posts(request: Request):
 
 
 @app.post("/api/run-brainstorm")
-async def run_brainstorm_endpoint():
+def run_brainstorm_endpoint():
     """Run the brainstorming crew. Web API wrapper around shared crew runner logic."""
     try:
         # Load user data
         user_interests = data_service.get_user_interests()
-        recent_posts = data_service.get_recent_posts(limit=5)
+        recent_posts = data_service.select_posts(limit=5)
 
-        # Run the shared crew logic
-        run_brainstorm_crew(user_interests, recent_posts)
+        # Run the shared crew logic and return the session it produced
+        session = run_brainstorm_session(user_interests, recent_posts)["session"]
 
-        # Retrieve the latest saved results for returning to client
-        brainstorm_results = data_service.get_brainstorm_results()
-        latest_result = brainstorm_results["sessions"][-1] if brainstorm_results.get("sessions") else None
+        # A run stopped before producing anything saved no session
+        if session.get("partial") and not session["suggestions"] and not session["trending_context_summary"]:
+            return {
+                "status": "stopped",
+                "message": f"Brainstorming stopped early without results: {session['stop_reason']}",
+                "result": None
+            }
 
         return {
             "status": "success",
-            "message": "Brainstorming complete!",
-            "result": latest_result
+            "message": f"Brainstorming stopped early: {session['stop_reason']}" if session.get("partial")
+            else "Brainstorming complete!",
+            "result": session
         }
 
     except ValidationError as e:
@@ -113,10 +125,11 @@ async def run_brainstorm_endpoint():
         )
 
 
-def start_server(host: str = "127.0.0.1", port: int = 8000):
+def start_server(host: str = "127.0.0.1", port: int = 8000, workers: int = None):
     """Start the web server."""
+    workers = workers or settings.api_workers
     print(f"🚀 Starting ContentAgency Web UI at http://{host}:{port}")
-    uvicorn.run(app, host=host, port=port)
+    serve(app, "contentagency.web_ui:app", host=host, port=port, workers=workers)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,207 @@
+"""
+Crew worker process (``brainstorm_worker``).
+
+Claims brainstorm jobs from the job queue and runs them, so crew runs no
+longer compete with API requests for CPU, memory or the event loop. Run as
+many workers as the LLM rate limits allow; they coordinate through the queue
+(leases) and write results through the data service.
+"""
+import argparse
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from contentagency.config import settings
+from contentagency.services.budgets import RunBudget, use_budget
+from contentagency.services.crew_loader import preload_crew_stack, run_brainstorm_session
+from contentagency.services.job_queue import get_job_queue
+from contentagency.services.metrics import CREW_RUNS_QUEUED, JOB_WAIT_SECONDS
+from contentagency.services.prewarm import warm_research
+from contentagency.services.tracing import span, use_context
+from contentagency.exceptions import ValidationError
+
+
+def _run_brainstorm_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Run a brainstorm job and return the saved session."""
+    return run_brainstorm_session(
+        payload["user_interests"],
+        payload.get("recent_posts", []),
+        user_id=payload.get("user_id"),
+        from_task=payload.get("from_task"),
+        process=payload.get("process")
+    )["session"]
+
+
+def _run_research_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Warm the trend research checkpoint for a set of interests."""
+    return {"researched": warm_research(payload["user_interests"])}
+
+
+JOB_HANDLERS: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+    "brainstorm": _run_brainstorm_job,
+    "research": _run_research_job,
+}
+
+
+class _Heartbeat:
+    """
+    Watches a running job on a background thread.
+
+    Renews the job's lease every third of the lease and polls for a
+    cancellation request every job_cancel_poll_seconds; a cancellation stops
+    the crew at its next LLM call through the run budget.
+    """
+
+    def __init__(self, queue, job_id: str, worker_id: str, lease_seconds: float, budget: RunBudget):
+        self.queue = queue
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.budget = budget
+        self.lost = threading.Event()
+        self.cancelled = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._beat, name=f"heartbeat-{job_id[:8]}", daemon=True)
+
+    def _beat(self) -> None:
+        interval = min(self.lease_seconds / 3, settings.job_cancel_poll_seconds)
+        last_renewal = time.monotonic()
+        while not self._stop.wait(interval):
+            if not self.cancelled.is_set() and self.queue.cancel_requested(self.job_id):
+                self.cancelled.set()
+                self.budget.cancel("Job cancelled")
+            if time.monotonic() - last_renewal >= self.lease_seconds / 3:
+                if not self.queue.heartbeat(self.job_id, self.worker_id, self.lease_seconds):
+                    self.lost.set()
+                    self.budget.cancel("Job lease lost")
+                    return
+                last_renewal = time.monotonic()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+
+class BrainstormWorker:
+    """Claims jobs from the queue and executes them until stopped."""
+
+    def __init__(
+        self,
+        queue=None,
+        worker_id: Optional[str] = None,
+        lease_seconds: Optional[float] = None,
+        poll_interval: Optional[float] = None,
+        kinds: Optional[List[str]] = None
+    ):
+        self.queue = queue or get_job_queue()
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = lease_seconds or settings.job_lease_seconds
+        self.poll_interval = poll_interval if poll_interval is not None else settings.worker_poll_interval
+        self.kinds = kinds or list(JOB_HANDLERS)
+        self.stopping = threading.Event()
+
+    def run_job(self, job: Dict[str, Any]) -> str:
+        """
+        Execute a claimed job and record the outcome in the queue.
+
+        Returns:
+            The job's resulting status
+        """
+        handler = JOB_HANDLERS[job["kind"]]
+        budget = RunBudget.from_settings()
+        with use_context(job.get("trace_context")), \
+                span("job.execute", job_id=job["id"], kind=job["kind"], attempt=job["attempts"]), \
+                _Heartbeat(self.queue, job["id"], self.worker_id, self.lease_seconds, budget) as heartbeat, \
+                use_budget(budget):
+            try:
+                result = handler(job["payload"])
+            except Exception as e:
+                if heartbeat.lost.is_set():
+                    return "lost"
+                if heartbeat.cancelled.is_set():
+                    return "cancelled" if self.queue.finish_cancelled(job["id"], self.worker_id) else "lost"
+                # Bad input fails the same way on every attempt
+                retry = not isinstance(e, ValidationError)
+                error = str(e) if not retry else f"{type(e).__name__}: {e}"
+                return self.queue.fail(job["id"], self.worker_id, error, retry=retry) or "lost"
+
+        if heartbeat.lost.is_set():
+            # Another worker took over after our lease expired; its result wins
+            return "lost"
+        if heartbeat.cancelled.is_set():
+            return "cancelled" if self.queue.finish_cancelled(job["id"], self.worker_id, result) else "lost"
+        return "succeeded" if self.queue.complete(job["id"], self.worker_id, result) else "lost"
+
+    def run_once(self) -> Optional[str]:
+        """Claim and run one job. Returns its status, or None if the queue was empty."""
+        job = self.queue.claim(self.worker_id, self.lease_seconds, kinds=self.kinds)
+        CREW_RUNS_QUEUED.set(self.queue.counts()["queued"])
+        if job is None:
+            return None
+        if job["attempts"] == 1:
+            JOB_WAIT_SECONDS.observe(job["started_at"] - job["created_at"], priority=job["priority_class"])
+
+        print(
+            f"⚙️  Worker {self.worker_id} running {job['priority_class']} {job['kind']} job {job['id']} "
+            f"(attempt {job['attempts']})"
+        )
+        status = self.run_job(job)
+        print(f"{'✅' if status == 'succeeded' else '⚠️ '} Job {job['id']}: {status}")
+        return status
+
+    def run(self, max_jobs: int = 0) -> int:
+        """
+        Process jobs until stop() is called (or max_jobs have run).
+
+        Returns:
+            The number of jobs processed
+        """
+        processed = 0
+        while not self.stopping.is_set():
+            if self.run_once() is None:
+                self.stopping.wait(self.poll_interval)
+                continue
+            processed += 1
+            if max_jobs and processed >= max_jobs:
+                break
+        return processed
+
+    def stop(self) -> None:
+        """Finish the current job, then exit the run loop."""
+        self.stopping.set()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """CLI entry point for the crew worker."""
+    parser = argparse.ArgumentParser(description="ContentAgency crew worker")
+    parser.add_argument("--worker-id", default=None, help="identifier recorded on claimed jobs")
+    parser.add_argument("--max-jobs", type=int, default=0, help="exit after this many jobs (0 = run forever)")
+    parser.add_argument("--once", action="store_true", help="process at most one job, then exit")
+    args = parser.parse_args(argv if argv is not None else sys.argv[1:])
+
+    worker = BrainstormWorker(worker_id=args.worker_id)
+    # Workers exist to run crews, so pay the import cost up front
+    preload_crew_stack(background=False)
+    signal.signal(signal.SIGTERM, lambda signum, frame: worker.stop())
+
+    print(f"👷 Worker {worker.worker_id} polling {settings.job_queue_backend} queue ({settings.job_queue_path})")
+    if args.once:
+        return 0 if worker.run_once() in (None, "succeeded") else 1
+    try:
+        worker.run(max_jobs=args.max_jobs)
+    except KeyboardInterrupt:
+        worker.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,14 @@
+"""
+Shared test fixtures.
+"""
+import pytest
+
+from contentagency.services.data_service import DatabaseDataService, FileDataService
+
+
+@pytest.fixture(params=["file", "database"])
+def backend_service(request, tmp_path):
+    """Each data service backend, in a temporary directory."""
+    if request.param == "file":
+        return FileDataService(data_dir=str(tmp_path / "data"))
+    return DatabaseDataService(str(tmp_path / "data.db"))
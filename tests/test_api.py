@@ -1,6 +1,7 @@
 """
 Test suite for API endpoints.
 """
+import threading
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import Mock, patch, MagicMock
@@ -29,7 +30,7 @@ def mock_data_service():
 @pytest.fixture
 def mock_crew_runner():
     """Mock crew runner."""
-    with patch('contentagency.api.main.run_brainstorm_crew') as mock:
+    with patch('contentagency.api.main.run_brainstorm_session') as mock:
         yield mock
 
 
@@ -144,25 +145,23 @@ class TestRunBrainstorm:
             "user_id": "test_user",
             "interests": [{"topic": "AI"}]
         }
-        mock_data_service.get_recent_posts.return_value = []
-        mock_data_service.get_brainstorm_results.return_value = {
-            "sessions": [{
-                "user_id": "test_user",
-                "timestamp": "2025-10-04T10:00:00",
-                "suggestions": [{
-                    "id": "suggestion_1",
-                    "title": "Test Topic",
-                    "description": "Test description",
-                    "platform_fit": ["LinkedIn"],
-                    "interest_alignment": "Aligns with AI",
-                    "trend_connection": "Current trend",
-                    "resource_links": [],
-                    "engagement_potential": "High",
-                    "engagement_reason": "Timely"
-                }],
-                "trending_context_summary": "Test summary"
-            }]
-        }
+        mock_data_service.select_posts.return_value = []
+        mock_crew_runner.return_value = {"result": "md", "session": {
+            "user_id": "test_user",
+            "timestamp": "2025-10-04T10:00:00",
+            "suggestions": [{
+                "id": "suggestion_1",
+                "title": "Test Topic",
+                "description": "Test description",
+                "platform_fit": ["LinkedIn"],
+                "interest_alignment": "Aligns with AI",
+                "trend_connection": "Current trend",
+                "resource_links": [],
+                "engagement_potential": "High",
+                "engagement_reason": "Timely"
+            }],
+            "trending_context_summary": "Test summary"
+        }}
 
         request_data = {"user_id": "test_user"}
 
@@ -176,8 +175,6 @@ class TestRunBrainstorm:
 
     def test_brainstorm_with_override(self, client, mock_crew_runner, mock_data_service):
         """Should use override interests when provided."""
-        mock_data_service.get_brainstorm_results.return_value = {"sessions": []}
-
         request_data = {
             "user_id": "test_user",
             "interests": {
@@ -204,6 +201,111 @@ class TestRunBrainstorm:
 
         assert response.status_code == 400
 
+    def test_brainstorm_does_not_block_the_event_loop(self, mock_data_service, mock_crew_runner):
+        """Should keep serving other requests while a crew runs."""
+        started, release, finished = threading.Event(), threading.Event(), threading.Event()
+
+        def run(*args, **kwargs):
+            started.set()
+            release.wait(5)
+            finished.set()
+            raise RuntimeError("stop")
+
+        mock_crew_runner.side_effect = run
+        with TestClient(app) as client:
+            thread = threading.Thread(target=client.post, args=("/api/v1/brainstorm",), kwargs={"json": {}})
+            thread.start()
+            assert started.wait(5)
+
+            assert client.get("/health").status_code == 200
+            assert not finished.is_set()
+            release.set()
+            thread.join()
+
+
+class TestInlineBrainstormSession:
+    """Test the inline brainstorm response against a real data service."""
+
+    MARKDOWN = """
+1. **Topic Title**: "AI in Healthcare"
+   - **Description**: How hospitals adopt AI
+   - **Platform Fit**: LinkedIn
+   - **Interest Alignment**: Aligns with AI
+   - **Trend Connection**: Recent studies
+   - **Engagement Potential**: High
+
+## Trending Context Summary
+AI adoption in healthcare is growing.
+"""
+
+    @pytest.fixture
+    def service(self, tmp_path, monkeypatch):
+        from contentagency.config import settings
+        from contentagency.services import crew_runner
+        from contentagency.services.data_service import FileDataService
+
+        monkeypatch.setattr(settings, "crew_process", "sequential")
+        service = FileDataService(data_dir=str(tmp_path))
+        with patch('contentagency.api.main.data_service', service), \
+                patch.object(crew_runner, "data_service", service), \
+                patch.object(crew_runner, "Contentagency"):
+            yield service
+
+    def test_returns_the_session_of_this_run(self, client, service):
+        """Should return this run's session even if another user saved one since."""
+        from contentagency.services import crew_runner
+        save = service.save_brainstorm_results
+
+        def save_then_other_user(user_id, results):
+            save(user_id, results)
+            save("other_user", {"timestamp": "2030-01-01T00:00:00", "suggestions": []})
+
+        with patch.object(crew_runner, "_run_sequential_crew", return_value=self.MARKDOWN), \
+                patch.object(service, "save_brainstorm_results", side_effect=save_then_other_user):
+            response = client.post("/api/v1/brainstorm", json={
+                "user_id": "test_user",
+                "interests": {"user_id": "test_user", "interests": [{"topic": "AI"}]}
+            })
+
+        assert response.status_code == 200
+        result = response.json()["result"]
+        assert result["user_id"] == "test_user"
+        assert [s["title"] for s in result["suggestions"]] == ["AI in Healthcare"]
+        assert "growing" in result["trending_context_summary"]
+
+    def test_uses_the_requesting_users_data(self, client, service):
+        """Should load the requesting user's interests and posts, not the last saved ones."""
+        for user_id, topic in (("test_user", "AI"), ("other_user", "Cooking")):
+            service.save_user_interests({"user_id": user_id, "interests": [{"topic": topic}]})
+            service.save_recent_posts({"user_id": user_id, "posts": [
+                {"id": f"{user_id}_post", "platform": "linkedin", "content": f"About {topic}"}
+            ]})
+
+        with patch('contentagency.api.main.run_brainstorm_session', side_effect=RuntimeError("stop")) as mock_run:
+            client.post("/api/v1/brainstorm", json={"user_id": "test_user"})
+
+        user_interests, recent_posts = mock_run.call_args.args
+        assert user_interests["interests"] == [{"topic": "AI"}]
+        assert [post["id"] for post in recent_posts] == ["test_user_post"]
+
+    def test_run_stopped_before_any_output(self, client, service):
+        """Should say the run stopped instead of returning an older session."""
+        from contentagency.services import crew_runner
+        from contentagency.services.budgets import RunInterruptedError
+        service.save_brainstorm_results("test_user", {"timestamp": "2025-01-01T00:00:00", "suggestions": []})
+
+        with patch.object(crew_runner, "_run_sequential_crew", side_effect=RunInterruptedError("Job cancelled")):
+            response = client.post("/api/v1/brainstorm", json={
+                "user_id": "test_user",
+                "interests": {"user_id": "test_user", "interests": [{"topic": "AI"}]}
+            })
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "stopped"
+        assert "Job cancelled" in data["message"]
+        assert data["result"] is None
+
 
 class TestGetResults:
     """Test get results endpoint."""
@@ -256,3 +358,47 @@ class TestGetResults:
         data = response.json()
         assert data["count"] == 0
         assert data["sessions"] == []
+
+
+class TestPatchEndpoints:
+    """Test PATCH /interests and /posts."""
+
+    @pytest.fixture
+    def service(self, tmp_path):
+        from contentagency.services.data_service import FileDataService
+        service = FileDataService(data_dir=str(tmp_path))
+        service.save_user_interests({"user_id": "u1", "interests": [{"topic": "AI"}]})
+        with patch('contentagency.api.main.data_service', service):
+            yield service
+
+    def test_patch_interests(self, client, service):
+        response = client.patch("/api/v1/interests", json={
+            "user_id": "u1", "base_version": 1, "add": [{"topic": " Data "}],
+            "update": [{"topic": "ai", "new_topic": "ML"}]
+        })
+
+        assert response.status_code == 200
+        assert response.json()["version"] == 2
+        assert response.json()["count"] == 2
+        assert service.get_user_interests("u1")["interests"] == [{"topic": "ML"}, {"topic": "Data"}]
+
+    def test_version_conflict_is_409(self, client, service):
+        response = client.patch("/api/v1/interests", json={"user_id": "u1", "base_version": 7, "remove": ["AI"]})
+        assert response.status_code == 409
+
+    def test_unknown_item_is_422(self, client, service):
+        response = client.patch("/api/v1/posts", json={"user_id": "u1", "update": [{"id": "nope", "content": "x"}]})
+        assert response.status_code == 422
+
+    def test_empty_patch_is_rejected(self, client, service):
+        assert client.patch("/api/v1/posts", json={"user_id": "u1"}).status_code == 422
+
+    def test_patch_posts_edits_only_given_fields(self, client, service):
+        client.patch("/api/v1/posts", json={
+            "user_id": "u1", "add": [{"id": "p1", "platform": "linkedin", "content": "draft"}]
+        })
+        response = client.patch("/api/v1/posts", json={"user_id": "u1", "update": [{"id": "p1", "content": "final"}]})
+
+        assert response.json()["version"] == 2
+        post = service.get_recent_posts("u1")[0]
+        assert (post["platform"], post["content"], post["topics"]) == ("linkedin", "final", [])
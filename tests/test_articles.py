@@ -0,0 +1,227 @@
+"""
+Test suite for the article fetch tool and its content-addressed cache.
+"""
+import threading
+import urllib.error
+import urllib.request
+import pytest
+from unittest.mock import patch
+
+from contentagency.config import settings
+from contentagency.services import articles
+from contentagency.services.articles import (
+    ArticleStore,
+    HttpResponse,
+    extract_article,
+    fetch_article,
+    normalize_url,
+    summarize,
+    url_key,
+)
+from contentagency.tools.custom_tool import ArticleFetchTool
+
+PAGE = """
+<html><head>
+  <title>Agents in production | Example News</title>
+  <meta property="article:published_time" content="2025-10-02T08:00:00Z">
+  <script>var tracking = "ignore me";</script>
+</head><body>
+  <nav>Home | About | Subscribe</nav>
+  <article>
+    <h1>Agents in production</h1>
+    <p>Teams shipping AI agents to production report that evaluation is the hardest part of the work.</p>
+    <p>Most teams now run evaluation suites on every change, much like unit tests for regular code.</p>
+    <p>Evaluation of AI agents in production also needs tracing, since failures span many steps.</p>
+    <p>The weather in the city was pleasant during the conference where the survey was presented.</p>
+  </article>
+  <footer>Copyright Example News</footer>
+</body></html>
+"""
+
+
+class StubTransport:
+    """Serves canned pages and counts requests."""
+
+    def __init__(self, pages=None, status=200, content_type="text/html"):
+        self.pages = pages or {}
+        self.status = status
+        self.content_type = content_type
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def get(self, url, timeout, max_bytes):
+        with self._lock:
+            self.requests.append(url)
+        return HttpResponse(status=self.status, body=self.pages.get(url, PAGE), content_type=self.content_type, url=url)
+
+
+# Test hosts resolve without DNS: IP literals to themselves, *.internal to a private
+# address and anything else to a public one
+def fake_resolve(host, port):
+    if host.replace(".", "").isdigit() or ":" in host:
+        return [host]
+    return ["10.0.0.7"] if host.endswith(".internal") else ["93.184.215.14"]
+
+
+@pytest.fixture(autouse=True)
+def resolver():
+    with patch.object(articles, "resolve_host", side_effect=fake_resolve):
+        yield
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArticleStore(str(tmp_path / "articles"))
+
+
+class TestNormalizeUrl:
+    """Test content addresses."""
+
+    def test_equivalent_urls_share_a_key(self):
+        assert normalize_url("HTTPS://Example.com:443/a/?utm_source=x&b=2&a=1#top") == "https://example.com/a?a=1&b=2"
+        assert url_key("https://example.com/a?utm_campaign=y") == url_key("https://EXAMPLE.com/a/")
+        assert url_key("https://example.com/a") != url_key("https://example.com/b")
+
+
+class TestExtraction:
+    """Test text extraction and summaries."""
+
+    def test_extracts_article_text(self):
+        article = extract_article(PAGE)
+
+        assert article["title"] == "Agents in production | Example News"
+        assert article["published"] == "2025-10-02T08:00:00Z"
+        assert "evaluation is the hardest part" in article["text"]
+        assert "ignore me" not in article["text"] and "Subscribe" not in article["text"]
+        assert "Copyright" not in article["text"]
+
+    def test_content_types(self):
+        assert extract_article("Plain notes on agents.", "text/plain")["text"] == "Plain notes on agents."
+        assert "evaluation" in extract_article(PAGE, "application/xhtml+xml")["text"]
+        for content_type in ("application/pdf", "image/png", "application/octet-stream"):
+            with pytest.raises(ValueError, match="Unsupported content type"):
+                extract_article("%PDF-1.7 \ufffd\ufffd", content_type)
+
+    def test_summary_is_bounded_and_keeps_order(self):
+        text = extract_article(PAGE)["text"]
+        summary = summarize(text, max_chars=200)
+
+        assert len(summary) <= 200
+        assert summary.startswith("Teams shipping AI agents")
+        assert "weather" not in summarize(text, max_chars=300)
+
+
+class TestFetchArticle:
+    """Test caching and deduplication."""
+
+    def test_fetches_once_across_urls_and_calls(self, store):
+        transport = StubTransport()
+        first = fetch_article("https://example.com/agents?utm_source=feed", transport, store)
+        second = fetch_article("https://example.com/agents/", transport, store)
+
+        assert transport.requests == ["https://example.com/agents?utm_source=feed"]
+        assert (first["cached"], second["cached"]) == (False, True)
+        assert second["summary"] == first["summary"]
+        assert len(first["summary"]) <= settings.article_summary_chars
+
+    def test_concurrent_fetches_share_one_request(self, store):
+        transport = StubTransport()
+        threads = [
+            threading.Thread(target=fetch_article, args=("https://example.com/agents", transport, store))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(transport.requests) == 1
+
+    def test_expired_entries_are_refetched(self, store):
+        transport = StubTransport()
+        fetch_article("https://example.com/agents", transport, store)
+        with patch.object(settings, "article_cache_ttl_hours", 0):
+            fetch_article("https://example.com/agents", transport, store)
+
+        assert len(transport.requests) == 2
+
+    def test_binary_responses_are_not_cached(self, store):
+        transport = StubTransport(content_type="application/pdf")
+        with pytest.raises(ValueError, match="Could not read https://example.com/paper.pdf: Unsupported content type"):
+            fetch_article("https://example.com/paper.pdf", transport, store)
+        assert store.get("https://example.com/paper.pdf") is None
+
+    def test_errors(self, store):
+        with pytest.raises(ValueError, match="HTTP 404"):
+            fetch_article("https://example.com/missing", StubTransport(status=404), store)
+        with pytest.raises(ValueError, match="Not an http"):
+            fetch_article("file:///etc/passwd", StubTransport(), store)
+
+
+class TestPublicAddresses:
+    """Test that the researcher cannot reach internal addresses (SSRF)."""
+
+    @pytest.mark.parametrize("url", [
+        "http://127.0.0.1:8000/api/v1/results",
+        "http://169.254.169.254/latest/meta-data/",
+        "http://192.168.1.1/",
+        "http://[::1]/",
+        "http://[::ffff:10.0.0.1]/",
+        "https://db.internal/export",
+    ])
+    def test_internal_hosts_are_refused(self, store, url):
+        transport = StubTransport()
+        with pytest.raises(ValueError, match="not a public address"):
+            fetch_article(url, transport, store)
+        assert transport.requests == []
+
+    def test_tool_reports_refusal(self, store):
+        tool = ArticleFetchTool(transport=StubTransport(), store=store)
+        assert "Refusing to fetch http://169.254.169.254/" in tool.run(url="http://169.254.169.254/")
+
+    def test_redirects_to_internal_hosts_are_refused(self):
+        handler = articles._PublicRedirectHandler()
+        request = urllib.request.Request("https://example.com/agents")
+
+        with pytest.raises(ValueError, match="not a public address"):
+            handler.redirect_request(request, None, 302, "Found", {}, "http://169.254.169.254/latest/meta-data/")
+        assert handler.redirect_request(request, None, 302, "Found", {}, "https://example.org/agents") is not None
+
+    @pytest.mark.parametrize("url, port", [("http://news.example/agents", 80), ("https://news.example/agents", 443)])
+    def test_connects_to_the_checked_address(self, monkeypatch, url, port):
+        connections = []
+
+        def create_connection(address, *args):
+            connections.append(address)
+            raise OSError("no network in tests")
+
+        monkeypatch.setattr(articles.socket, "create_connection", create_connection)
+        with pytest.raises(urllib.error.URLError):
+            articles.UrllibTransport().get(url, timeout=1, max_bytes=1000)
+        assert connections == [("93.184.215.14", port)]
+
+    def test_rebinding_after_the_check_is_refused(self, monkeypatch, store):
+        connections = []
+        monkeypatch.setattr(articles.socket, "create_connection", lambda address, *args: connections.append(address))
+        answers = iter([["93.184.215.14"], ["10.0.0.7"]])
+
+        with patch.object(articles, "resolve_host", side_effect=lambda host, port: next(answers)):
+            with pytest.raises(ValueError, match="not a public address"):
+                fetch_article("http://rebind.example/agents", store=store)
+        assert connections == []
+
+
+class TestArticleFetchTool:
+    """Test the crew tool."""
+
+    def test_tool_output(self, store):
+        tool = ArticleFetchTool(transport=StubTransport(), store=store)
+
+        output = tool.run(url="https://example.com/agents")
+        assert output.startswith("Title: Agents in production | Example News")
+        assert "Published: 2025-10-02T08:00:00Z" in output
+        assert "Summary (extractive" in output
+
+    def test_failures_are_reported_to_the_agent(self, store):
+        tool = ArticleFetchTool(transport=StubTransport(status=500), store=store)
+        assert tool.run(url="https://example.com/down") == "Could not fetch https://example.com/down: HTTP 500"
@@ -0,0 +1,184 @@
+"""
+Test suite for batch brainstorming.
+"""
+import json
+import threading
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+
+from contentagency.api.main import app
+from contentagency.config import settings
+from contentagency.main import brainstorm_batch
+from contentagency.services import batch
+from contentagency.services.data_service import FileDataService
+from contentagency.services.job_queue import SQLiteJobQueue
+
+
+def _session(user_id):
+    return {"user_id": user_id, "timestamp": "t", "suggestions": [], "trending_context_summary": ""}
+
+
+@pytest.fixture
+def service(tmp_path):
+    """A file data service with saved data for two users."""
+    service = FileDataService(data_dir=str(tmp_path))
+    service.save_user_interests({"user_id": "u1", "interests": [{"topic": "AI"}, {"topic": "Data"}]})
+    service.save_user_interests({"user_id": "u2", "interests": [{"topic": "AI"}]})
+    service.save_recent_posts({"user_id": "u1", "posts": [{"id": "p1"}]})
+    with patch.object(batch, "data_service", service):
+        yield service
+
+
+@pytest.fixture
+def crew(monkeypatch):
+    """Record shared research and user runs instead of running the crew."""
+    monkeypatch.setattr(settings, "task_checkpoints_enabled", True)
+    calls = {"research": [], "runs": []}
+    lock = threading.Lock()
+
+    def research(interest):
+        with lock:
+            calls["research"].append(interest["topic"])
+
+    def run(user_interests, recent_posts, user_id=None, process=None):
+        with lock:
+            # Every topic of the user is researched before the run starts
+            assert all(i["topic"] in calls["research"] for i in user_interests["interests"])
+            calls["runs"].append((user_id, process, recent_posts))
+        if user_id == "broken":
+            raise RuntimeError("LLM down")
+        return {"result": "", "session": _session(user_id)}
+
+    with patch.object(batch, "_research_shared_topic", side_effect=research), \
+            patch.object(batch, "run_brainstorm_session", side_effect=run):
+        yield calls
+
+
+class TestParseBatchNdjson:
+    """Test reading batch files."""
+
+    def test_objects_and_bare_user_ids(self):
+        items = batch.parse_batch_ndjson(['{"user_id": "u1", "interests": [{"topic": "AI"}]}', "", '"u2"'])
+        assert items == [{"user_id": "u1", "interests": [{"topic": "AI"}]}, {"user_id": "u2"}]
+
+    def test_errors_name_the_line(self):
+        with pytest.raises(ValueError, match="Line 2"):
+            batch.parse_batch_ndjson(['"u1"', "{not json"])
+        with pytest.raises(ValueError, match="Line 1: expected an object with a user_id"):
+            batch.parse_batch_ndjson(['{"interests": []}'])
+
+
+class TestRunBatch:
+    """Test bounded, research-sharing batch runs."""
+
+    def test_shared_topics_are_researched_once(self, service, crew):
+        results = list(batch.run_batch([{"user_id": "u1"}, {"user_id": "u2"}], max_parallel=2))
+
+        assert sorted(crew["research"]) == ["AI", "Data"]
+        assert sorted(result["user_id"] for result in results) == ["u1", "u2"]
+        assert all(result["status"] == "success" for result in results)
+        # Runs use the pipelined process so their topic paths hit the shared research
+        assert {process for _, process, _ in crew["runs"]} == {"pipelined"}
+
+    def test_users_use_their_saved_data(self, service, crew):
+        list(batch.run_batch([{"user_id": "u1"}]))
+        assert crew["runs"] == [("u1", "pipelined", [{"id": "p1"}])]
+
+    def test_inline_interests_and_posts(self, service, crew):
+        item = {"user_id": "u9", "interests": [{"topic": "Climate"}], "posts": [{"id": "x"}]}
+        results = list(batch.run_batch([item]))
+
+        assert results[0]["status"] == "success"
+        assert crew["research"] == ["Climate"]
+        assert crew["runs"] == [("u9", "pipelined", [{"id": "x"}])]
+
+    def test_failures_are_reported_per_user(self, service, crew):
+        items = [{"user_id": "nobody"}, {"user_id": "broken", "interests": [{"topic": "AI"}]}, {"user_id": "u2"}]
+        results = {result["user_id"]: result for result in batch.run_batch(items)}
+
+        assert results["nobody"]["status"] == "error"
+        assert "at least one user interest" in results["nobody"]["error"]
+        assert results["broken"] == {**results["broken"], "status": "error", "error": "LLM down"}
+        assert results["u2"]["status"] == "success"
+
+    def test_no_shared_research_without_checkpoints(self, service, crew, monkeypatch):
+        monkeypatch.setattr(settings, "task_checkpoints_enabled", False)
+        with patch.object(batch, "run_brainstorm_session", return_value={"result": "", "session": _session("u2")}):
+            results = list(batch.run_batch([{"user_id": "u2"}]))
+
+        assert crew["research"] == []
+        assert results[0]["status"] == "success"
+
+
+class TestRunBatchQueued:
+    """Test batches handed to the crew workers."""
+
+    def test_jobs_are_batch_priority_and_reported_when_finished(self, service, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "worker_poll_interval", 0.01)
+        queue = SQLiteJobQueue(str(tmp_path / "jobs.db"))
+        results = batch.run_batch_queued([{"user_id": "u1"}, {"user_id": "u2"}], queue)
+
+        claimed = []
+
+        # Enqueue happens on the first pull; finish the jobs from a "worker" meanwhile
+        def work():
+            while len(claimed) < 2:
+                job = queue.claim("w1")
+                if job is not None:
+                    claimed.append(job)
+                    queue.complete(job["id"], "w1", _session(job["user_id"]))
+
+        worker = threading.Thread(target=work)
+        worker.start()
+        finished = list(results)
+        worker.join()
+
+        assert {job["priority_class"] for job in claimed} == {"batch"}
+        assert {job["payload"]["process"] for job in claimed} == {"pipelined"}
+        assert sorted(result["user_id"] for result in finished) == ["u1", "u2"]
+        assert all(result["status"] == "success" and result["job_id"] for result in finished)
+
+
+class TestBatchEndpoint:
+    """Test POST /brainstorm/batch."""
+
+    def test_streams_ndjson_per_user(self, service, crew):
+        response = TestClient(app).post("/api/v1/brainstorm/batch", json={"user_ids": ["u1", "u2"], "max_parallel": 2})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert sorted(line["user_id"] for line in lines) == ["u1", "u2"]
+        assert lines[0]["session"]["user_id"] == lines[0]["user_id"]
+
+    def test_accepts_ndjson_file(self, service, crew):
+        body = '{"user_id": "u9", "interests": [{"topic": "Climate"}]}\n"u2"\n'
+        response = TestClient(app).post(
+            "/api/v1/brainstorm/batch", content=body, headers={"Content-Type": "application/x-ndjson"}
+        )
+
+        assert sorted(json.loads(line)["user_id"] for line in response.text.splitlines()) == ["u2", "u9"]
+
+    def test_empty_and_invalid_batches(self, service, crew):
+        client = TestClient(app)
+        assert client.post("/api/v1/brainstorm/batch", json={}).status_code == 400
+        bad = client.post(
+            "/api/v1/brainstorm/batch", content="{oops", headers={"Content-Type": "application/x-ndjson"}
+        )
+        assert bad.status_code == 422
+
+
+class TestBatchCli:
+    """Test the brainstorm_batch entry point."""
+
+    def test_writes_ndjson_results(self, service, crew, tmp_path, capsys):
+        users_file = tmp_path / "users.ndjson"
+        users_file.write_text('"u2"\n')
+        output = tmp_path / "results.ndjson"
+
+        statuses = brainstorm_batch(["u1", "--file", str(users_file), "--output", str(output)])
+
+        assert statuses == {"success": 2}
+        assert sorted(json.loads(line)["user_id"] for line in output.read_text().splitlines()) == ["u1", "u2"]
+        assert "Batch complete" in capsys.readouterr().err
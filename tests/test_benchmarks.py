@@ -0,0 +1,93 @@
+"""
+Test suite for the benchmark package.
+Runs the cheap suites at quick sizes to keep the harness from rotting.
+"""
+import json
+import pytest
+
+from contentagency.benchmarks.common import make_brainstorm_markdown, summarize
+from contentagency.benchmarks.import_bench import TRACING_CASE, measure_import, parse_importtime
+from contentagency.benchmarks.runner import compare_reports, main, run_benchmarks
+from contentagency.services.crew_runner import parse_brainstorm_markdown
+
+
+class TestCommon:
+    """Test timing helpers and generators."""
+
+    def test_summarize(self):
+        """Should report millisecond statistics."""
+        stats = summarize([0.001, 0.002, 0.003])
+        assert stats["runs"] == 3
+        assert stats["min_ms"] == 1.0
+        assert stats["p50_ms"] == 2.0
+        assert stats["max_ms"] == 3.0
+
+    def test_generated_markdown_parses(self):
+        """Synthetic crew output should round-trip through the parser."""
+        result = parse_brainstorm_markdown(make_brainstorm_markdown(12))
+        assert len(result["suggestions"]) == 12
+        assert len(result["suggestions"][0]["resource_links"]) == 2
+
+
+class TestRunner:
+    """Test running and comparing benchmark reports."""
+
+    def test_quick_run_selected_suites(self):
+        """Should produce per-suite results for the selected suites."""
+        report = run_benchmarks(only=["parser", "data_service"], quick=True)
+
+        assert set(report["results"]) == {"parser", "data_service"}
+        assert "suggestions_5" in report["results"]["parser"]
+        assert "save_brainstorm_results" in report["results"]["data_service"]["sessions_10"]
+
+    def test_unknown_suite(self):
+        """Should reject unknown suite names."""
+        with pytest.raises(ValueError, match="Unknown benchmark suite"):
+            run_benchmarks(only=["nope"])
+
+    def test_main_writes_json(self, tmp_path):
+        """Should write a machine-readable report."""
+        output = tmp_path / "report.json"
+        main(["--quick", "--only", "parser", "--output", str(output)])
+
+        with open(output) as f:
+            report = json.load(f)
+        assert "parser" in report["results"]
+
+    def test_compare_reports(self):
+        """Should flag slower latency and lower throughput."""
+        baseline = {"results": {"api": {"c1": {"p50_ms": 10.0, "throughput_rps": 100.0}}}}
+        current = {"results": {"api": {"c1": {"p50_ms": 15.0, "throughput_rps": 70.0}}}}
+
+        regressions = compare_reports(current, baseline, threshold=0.2)
+
+        assert len(regressions) == 2
+        assert compare_reports(baseline, baseline) == []
+
+
+class TestImportBench:
+    """Test cold-start import measurements."""
+
+    def test_parse_importtime(self):
+        """Should read self/cumulative times and nesting depth."""
+        stderr = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       100 |        100 |     json.decoder\n"
+            "import time:       250 |        350 |   json\n"
+            "import time:        50 |        400 | contentagency.api.main\n"
+        )
+        entries = parse_importtime(stderr)
+        assert [entry["module"] for entry in entries] == ["json.decoder", "json", "contentagency.api.main"]
+        assert entries[1] == {"module": "json", "self_us": 250, "cumulative_us": 350, "depth": 1}
+        assert entries[2]["depth"] == 0
+
+    def test_api_does_not_import_crew_stack(self):
+        """The API must start without importing crewAI."""
+        stats = measure_import("contentagency.api.main", repeat=1)
+        assert stats["crew_stack_loaded"] is False
+        assert stats["p50_ms"] > 0
+
+    def test_tracing_does_not_import_crew_stack(self):
+        """Building the tracer on the first request must not import crewAI either."""
+        stats = measure_import(TRACING_CASE["module"], repeat=1, env=TRACING_CASE["env"], setup=TRACING_CASE["setup"])
+        assert stats["crew_stack_loaded"] is False
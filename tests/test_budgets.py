@@ -0,0 +1,157 @@
+"""
+Test suite for crew run cancellation and budgets.
+"""
+import time
+import pytest
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+from contentagency.config import settings
+from contentagency.services import crew_runner
+from contentagency.services.budgets import (
+    RunBudget,
+    RunInterruptedError,
+    charge_budget,
+    check_budget,
+    current_budget,
+    use_budget,
+)
+from contentagency.services.checkpoints import TaskCheckpointStore
+
+
+RESEARCH = "Agents are trending this week."
+
+
+class TestRunBudget:
+    """Test budget checks."""
+
+    def test_unlimited_by_default(self):
+        budget = RunBudget()
+        budget.charge(10_000)
+        budget.check()
+
+    def test_cancel(self):
+        budget = RunBudget()
+        budget.cancel("Job cancelled")
+        with pytest.raises(RunInterruptedError, match="Job cancelled"):
+            budget.check()
+
+    def test_run_token_budget(self):
+        budget = RunBudget(max_tokens=100)
+        budget.charge(60)
+        budget.check()
+        budget.charge(60)
+        with pytest.raises(RunInterruptedError, match="Run token budget of 100"):
+            budget.check()
+
+    def test_run_time_budget(self):
+        budget = RunBudget(max_seconds=0.01)
+        time.sleep(0.02)
+        with pytest.raises(RunInterruptedError, match="Run time budget"):
+            budget.check()
+
+    def test_task_budgets_are_per_task(self):
+        budget = RunBudget(task_max_tokens=50)
+        research = SimpleNamespace(name="trend_research_task")
+        brainstorm = SimpleNamespace(name="brainstorming_task")
+
+        budget.charge(80, research)
+        with pytest.raises(RunInterruptedError, match="in trend_research_task"):
+            budget.check(research)
+        budget.check(brainstorm)
+
+    def test_task_time_budget_starts_at_first_check(self):
+        budget = RunBudget(task_max_seconds=0.05)
+        task = SimpleNamespace(name="brainstorming_task")
+        time.sleep(0.06)
+        budget.check(task)
+        time.sleep(0.06)
+        with pytest.raises(RunInterruptedError, match="Time budget"):
+            budget.check(task)
+
+    def test_helpers_are_noops_without_budget(self):
+        assert current_budget() is None
+        check_budget()
+        charge_budget(100)
+
+    def test_interruption_is_not_retried_by_crewai(self):
+        # crewAI agents re-raise TimeoutError instead of retrying the task
+        assert issubclass(RunInterruptedError, TimeoutError)
+
+
+class TestGatewayBudget:
+    """Test that the gateway stops calls once a run must stop."""
+
+    def test_llm_call_raises_before_calling_provider(self):
+        from contentagency.services.llm_gateway import GatewayLLM
+
+        llm = GatewayLLM(model="gpt-4o")
+        budget = RunBudget()
+        budget.cancel("Job cancelled")
+        with patch("crewai.LLM.call") as mock_call, use_budget(budget):
+            with pytest.raises(RunInterruptedError):
+                llm.call("hello")
+
+        mock_call.assert_not_called()
+
+
+class TestPartialResults:
+    """Test that interrupted runs keep what finished."""
+
+    @pytest.fixture
+    def store(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "crew_process", "sequential")
+        store = TaskCheckpointStore(checkpoint_dir=str(tmp_path / "checkpoints"))
+        with patch.object(crew_runner, "checkpoint_store", store):
+            yield store
+
+    def test_sequential_run_keeps_research(self, store):
+        def make_crew(agents, tasks, **kwargs):
+            research_task = tasks[0]
+
+            def kickoff(inputs):
+                # Research finished, then the budget ran out during brainstorming
+                research_task.output = SimpleNamespace(raw=RESEARCH)
+                raise RunInterruptedError("Run token budget of 100 exhausted")
+
+            return Mock(kickoff=Mock(side_effect=kickoff))
+
+        with patch.object(crew_runner, "Contentagency") as MockCrew, \
+                patch.object(crew_runner, "Crew", side_effect=make_crew), \
+                patch.object(crew_runner, "data_service") as mock_data_service:
+            MockCrew.return_value.trend_research_task.return_value = SimpleNamespace(output=None)
+            outcome = crew_runner.run_brainstorm_session({"interests": [{"topic": "AI"}]}, [], user_id="u1")
+
+        session = outcome["session"]
+        assert session["partial"] is True
+        assert session["stop_reason"] == "Run token budget of 100 exhausted"
+        assert session["suggestions"] == []
+        assert session["trending_context_summary"] == RESEARCH
+        mock_data_service.save_brainstorm_results.assert_called_once()
+        # The finished research is checkpointed for the next run
+        assert store.latest("trend_research_task")["output"] == RESEARCH
+
+    def test_nothing_finished_saves_nothing(self, store):
+        with patch.object(crew_runner, "Contentagency"), \
+                patch.object(crew_runner, "_run_sequential_crew", side_effect=RunInterruptedError("Job cancelled")), \
+                patch.object(crew_runner, "data_service") as mock_data_service:
+            outcome = crew_runner.run_brainstorm_session({"interests": [{"topic": "AI"}]}, [])
+
+        assert outcome["session"]["partial"] is True
+        mock_data_service.save_brainstorm_results.assert_not_called()
+
+    def test_run_uses_settings_budget(self, store, monkeypatch):
+        monkeypatch.setattr(settings, "run_max_tokens", 500)
+        seen = {}
+
+        def run(crew_instance, inputs, from_task=None):
+            seen["budget"] = current_budget()
+            return "no suggestions"
+
+        with patch.object(crew_runner, "Contentagency"), \
+                patch.object(crew_runner, "_run_sequential_crew", side_effect=run), \
+                patch.object(crew_runner, "data_service"):
+            crew_runner.run_brainstorm_session({"interests": [{"topic": "AI"}]}, [])
+
+        assert seen["budget"].max_tokens == 500
+        assert current_budget() is None
@@ -0,0 +1,185 @@
+"""
+Test suite for record/replay cassettes.
+"""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import pytest
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+from contentagency.config import settings
+from contentagency.services.cassette import (
+    Cassette,
+    CassetteMissError,
+    LatencyModel,
+    get_active_cassette,
+    reset_active_cassette,
+)
+
+
+DEMO_CASSETTE = Path(__file__).parent.parent / "cassettes" / "demo.json"
+
+
+@pytest.fixture
+def cassette_path(tmp_path):
+    """Path for a temporary cassette file."""
+    return str(tmp_path / "cassettes" / "test.json")
+
+
+@pytest.fixture
+def replay_settings(monkeypatch, tmp_path):
+    """Configure settings for replaying the demo cassette."""
+    shutil.copy(DEMO_CASSETTE, tmp_path / "demo.json")
+    monkeypatch.setattr(settings, "cassette_mode", "replay")
+    monkeypatch.setattr(settings, "cassette_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "cassette_name", "demo")
+    monkeypatch.setattr(settings, "cassette_latency", "")
+    reset_active_cassette()
+    yield
+    reset_active_cassette()
+
+
+class TestCassette:
+    """Test recording and replaying interactions."""
+
+    def test_record_then_replay(self, cassette_path):
+        """Should serve recorded responses without calling the real function."""
+        recorder = Cassette(cassette_path, mode="record")
+        assert recorder.play("llm", {"prompt": "hi"}, lambda: "hello") == "hello"
+
+        player = Cassette(cassette_path, mode="replay")
+        real_call = Mock()
+        assert player.play("llm", {"prompt": "hi"}, real_call) == "hello"
+        assert not real_call.called
+
+    def test_record_writes_json(self, cassette_path):
+        """Should persist interactions as JSON."""
+        Cassette(cassette_path, mode="record").play("serper", {"q": "ai"}, lambda: {"organic": []})
+
+        with open(cassette_path) as f:
+            data = json.load(f)
+
+        assert data["interactions"][0]["kind"] == "serper"
+        assert data["interactions"][0]["response"] == {"organic": []}
+
+    def test_replay_fallback_serves_in_order(self, cassette_path):
+        """Should fall back to recorded order when the request hash differs."""
+        recorder = Cassette(cassette_path, mode="record")
+        recorder.play("llm", {"prompt": "first"}, lambda: "one")
+        recorder.play("llm", {"prompt": "second"}, lambda: "two")
+
+        player = Cassette(cassette_path, mode="replay")
+        assert player.play("llm", {"prompt": "changed"}, Mock()) == "one"
+        assert player.play("llm", {"prompt": "changed again"}, Mock()) == "two"
+
+    def test_replay_miss_without_fallback(self, cassette_path):
+        """Should raise when strict matching finds no interaction."""
+        Cassette(cassette_path, mode="record").play("llm", {"prompt": "a"}, lambda: "x")
+
+        player = Cassette(cassette_path, mode="replay", allow_fallback=False)
+        with pytest.raises(CassetteMissError):
+            player.play("llm", {"prompt": "b"}, Mock())
+
+    def test_replay_missing_file(self, cassette_path):
+        """Should raise when the cassette does not exist."""
+        with pytest.raises(CassetteMissError, match="not found"):
+            Cassette(cassette_path, mode="replay")
+
+    def test_invalid_mode(self, cassette_path):
+        """Should reject unknown modes."""
+        with pytest.raises(ValueError, match="Unknown cassette mode"):
+            Cassette(cassette_path, mode="rewind")
+
+
+class TestLatencyModel:
+    """Test injected latency distributions."""
+
+    def test_none(self):
+        """Should not delay by default."""
+        assert LatencyModel("").sample(3.0) == 0.0
+
+    def test_recorded_with_scale(self):
+        """Should scale recorded durations."""
+        assert LatencyModel("recorded*0.5").sample(3.0) == 1.5
+
+    def test_uniform_is_seeded(self):
+        """Should be deterministic for a given seed."""
+        first = [LatencyModel("uniform:0.1,0.2", seed=7).sample() for _ in range(3)]
+        second = [LatencyModel("uniform:0.1,0.2", seed=7).sample() for _ in range(3)]
+        assert first == second
+        assert all(0.1 <= value <= 0.2 for value in first)
+
+    def test_invalid_spec(self):
+        """Should reject unknown distributions and wrong parameter counts."""
+        with pytest.raises(ValueError):
+            LatencyModel("poisson:1")
+        with pytest.raises(ValueError):
+            LatencyModel("uniform:1")
+
+
+class TestActiveCassette:
+    """Test settings-driven cassette selection."""
+
+    def test_off_by_default(self, monkeypatch):
+        """Should return None when cassette mode is off."""
+        monkeypatch.setattr(settings, "cassette_mode", "off")
+        reset_active_cassette()
+        assert get_active_cassette() is None
+
+
+class TestReplayTelemetry:
+    """Test that replays turn crewAI telemetry off before crewAI is imported."""
+
+    def test_settings_load(self, tmp_path):
+        env = {key: value for key, value in os.environ.items()
+               if key not in ("CREWAI_DISABLE_TELEMETRY", "OTEL_SDK_DISABLED")}
+        code = (
+            "import os, sys\n"
+            "import contentagency.config\n"
+            "assert 'crewai' not in sys.modules\n"
+            "from crewai.telemetry import Telemetry\n"
+            "print(os.environ['CREWAI_DISABLE_TELEMETRY'], os.environ['OTEL_SDK_DISABLED'], Telemetry().ready)\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], env={**env, "CASSETTE_MODE": "replay"},
+            cwd=tmp_path, capture_output=True, text=True, timeout=120
+        )
+
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.split() == ["true", "true", "False"]
+
+    def test_replay_flag(self, monkeypatch):
+        from contentagency.main import _apply_cassette_args
+        monkeypatch.setattr(settings, "cassette_mode", "off")
+        monkeypatch.setattr(settings, "cassette_name", "default")
+        monkeypatch.setattr(settings, "tracing_exporter", "none")
+
+        with patch.dict(os.environ):
+            os.environ.pop("CREWAI_DISABLE_TELEMETRY", None)
+            os.environ.pop("OTEL_SDK_DISABLED", None)
+            _apply_cassette_args(["--replay", "demo"])
+
+            assert settings.cassette_mode == "replay"
+            assert os.environ["CREWAI_DISABLE_TELEMETRY"] == "true"
+            assert os.environ["OTEL_SDK_DISABLED"] == "true"
+
+
+class TestOfflineCrewRun:
+    """Run the real crew end-to-end against the demo cassette."""
+
+    def test_run_brainstorm_crew_offline(self, replay_settings, monkeypatch, tmp_path):
+        """Should complete a full crew run with no network access."""
+        monkeypatch.setenv("CREWAI_TESTING", "true")
+        monkeypatch.chdir(tmp_path)
+
+        from contentagency.services.crew_runner import run_brainstorm_crew
+
+        with patch('contentagency.services.crew_runner.data_service') as mock_data_service:
+            result = run_brainstorm_crew({"interests": [{"topic": "AI"}]}, [], user_id="offline_user")
+
+        assert "Why Small Models Are Winning On-Device AI" in result
+        saved = mock_data_service.save_brainstorm_results.call_args.args[1]
+        assert len(saved["suggestions"]) == 2
@@ -0,0 +1,129 @@
+"""
+Test suite for task-level checkpointing and partial re-execution.
+"""
+import pytest
+from unittest.mock import Mock, patch
+
+from contentagency.services.checkpoints import TaskCheckpointStore, task_checkpoint_key
+from contentagency.services.crew_runner import run_brainstorm_crew
+from contentagency.exceptions import ValidationError
+
+
+INPUTS = {
+    "user_interests": "**User Interest Areas:**\n- **AI**\n",
+    "recent_posts": "No recent posts available for analysis.",
+    "current_year": "2025",
+    "current_date": "October 04, 2025",
+}
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Checkpoint store in a temporary directory."""
+    return TaskCheckpointStore(checkpoint_dir=str(tmp_path / "checkpoints"))
+
+
+class TestTaskCheckpointKey:
+    """Test checkpoint key derivation."""
+
+    def test_research_key_ignores_recent_posts(self):
+        """Research does not reference recent posts, so they must not change its key."""
+        changed = {**INPUTS, "recent_posts": "**Recent Post Performance:** ..."}
+        assert task_checkpoint_key("trend_research_task", INPUTS) == task_checkpoint_key("trend_research_task", changed)
+
+    def test_research_key_depends_on_interests_and_date(self):
+        """Interests and date are research inputs."""
+        base = task_checkpoint_key("trend_research_task", INPUTS)
+        assert base != task_checkpoint_key("trend_research_task", {**INPUTS, "user_interests": "- **ML**"})
+        assert base != task_checkpoint_key("trend_research_task", {**INPUTS, "current_date": "October 05, 2025"})
+
+    def test_brainstorm_key_depends_on_posts_and_upstream(self):
+        """Brainstorming depends on recent posts and the research output."""
+        base = task_checkpoint_key("brainstorming_task", INPUTS, upstream=["research A"])
+        assert base != task_checkpoint_key("brainstorming_task", {**INPUTS, "recent_posts": "new"}, upstream=["research A"])
+        assert base != task_checkpoint_key("brainstorming_task", INPUTS, upstream=["research B"])
+
+    def test_unknown_task(self):
+        """Should reject tasks missing from tasks.yaml."""
+        with pytest.raises(ValueError, match="Unknown task"):
+            task_checkpoint_key("missing_task", INPUTS)
+
+
+class TestTaskCheckpointStore:
+    """Test checkpoint persistence."""
+
+    def test_put_get_latest(self, store):
+        """Should persist outputs by key and track the latest one."""
+        store.put("trend_research_task", "abc", "research output")
+
+        assert store.get("trend_research_task", "abc")["output"] == "research output"
+        assert store.get("trend_research_task", "other") is None
+        assert store.latest("trend_research_task")["key"] == "abc"
+
+    def test_corrupt_checkpoint_is_a_miss(self, store):
+        """Should treat unreadable checkpoints as missing."""
+        store.put("trend_research_task", "abc", "x")
+        (store.root / "trend_research_task" / "abc.json").write_text("{broken")
+
+        assert store.get("trend_research_task", "abc") is None
+
+
+def _crew_result(*outputs):
+    result = Mock()
+    result.tasks_output = [Mock(raw=output) for output in outputs]
+    result.__str__ = Mock(return_value=outputs[-1])
+    return result
+
+
+class TestPartialReExecution:
+    """Test that reruns start at the first changed task."""
+
+    @pytest.fixture
+    def crew_mocks(self, store, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        with patch('contentagency.services.crew_runner.Contentagency'), \
+             patch('contentagency.services.crew_runner.Crew') as MockCrewClass, \
+             patch('contentagency.services.crew_runner.data_service'), \
+             patch('contentagency.services.crew_runner.checkpoint_store', store):
+            yield MockCrewClass
+
+    def test_posts_change_reuses_research(self, crew_mocks):
+        """Changing only recent posts should rerun brainstorming alone."""
+        interests = {"interests": [{"topic": "AI"}]}
+        crew_mocks.return_value.kickoff.return_value = _crew_result("research", "ideas v1")
+        run_brainstorm_crew(interests, [])
+
+        crew_mocks.return_value.kickoff.return_value = _crew_result("ideas v2")
+        result = run_brainstorm_crew(interests, [{"id": "p1", "platform": "linkedin", "content": "new"}])
+
+        assert result == "ideas v2"
+        assert len(crew_mocks.call_args.kwargs["tasks"]) == 1
+
+    def test_identical_rerun_skips_crew(self, crew_mocks):
+        """An unchanged rerun should be served entirely from checkpoints."""
+        interests = {"interests": [{"topic": "AI"}]}
+        crew_mocks.return_value.kickoff.return_value = _crew_result("research", "ideas")
+        run_brainstorm_crew(interests, [])
+        crew_mocks.return_value.kickoff.reset_mock()
+
+        result = run_brainstorm_crew(interests, [])
+
+        assert result == "ideas"
+        assert not crew_mocks.return_value.kickoff.called
+
+    def test_from_task_forces_rerun(self, crew_mocks):
+        """Replaying from brainstorming_task should rerun it despite a checkpoint hit."""
+        interests = {"interests": [{"topic": "AI"}]}
+        crew_mocks.return_value.kickoff.return_value = _crew_result("research", "ideas")
+        run_brainstorm_crew(interests, [])
+
+        crew_mocks.return_value.kickoff.return_value = _crew_result("fresh ideas")
+        result = run_brainstorm_crew(interests, [], from_task="brainstorming_task")
+
+        assert result == "fresh ideas"
+        assert len(crew_mocks.call_args.kwargs["tasks"]) == 1
+
+    def test_unknown_from_task(self):
+        """Should reject task names that are not part of the crew."""
+        with pytest.raises(ValidationError, match="Unknown task"):
+            run_brainstorm_crew({"interests": [{"topic": "AI"}]}, [], from_task="task_123")
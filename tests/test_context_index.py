@@ -0,0 +1,154 @@
+"""
+Test suite for the knowledge and past content retrieval index.
+"""
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+from contentagency.config import settings
+from contentagency.services.context_index import ContextIndex, chunk_text, embed, sync_knowledge, sync_user_content
+from contentagency.services.prompts import build_crew_inputs
+
+POSTS = [
+    {"id": "1", "content": "Shipping LLM agents to production taught me to write evals first", "topics": ["AI Agents"]},
+    {"id": "2", "content": "My weekend sourdough recipe", "topics": ["Baking"]},
+]
+
+
+@pytest.fixture
+def knowledge(tmp_path):
+    directory = tmp_path / "knowledge"
+    directory.mkdir()
+    (directory / "user_preference.txt").write_text("User is an AI Engineer.\nUser is interested in AI Agents.")
+    with patch.object(settings, "knowledge_dir", str(directory)):
+        yield directory
+
+
+class TestEmbedding:
+    """Test hashing embeddings and chunking."""
+
+    def test_similar_texts_are_closer(self):
+        a, b, c = embed(["AI agents in production", "production AI agents", "sourdough baking"], 256)
+        assert np.isclose(np.linalg.norm(a), 1.0)
+        assert a @ b > 0.5 > a @ c
+
+    def test_chunks(self):
+        assert chunk_text("one two three\n\nfour", max_chars=8) == ["one two", "three", "four"]
+
+
+class TestContextIndex:
+    """Test incremental syncs and searches."""
+
+    def test_sync_is_incremental(self, tmp_path):
+        index = ContextIndex(tmp_path / "index")
+        assert index.sync("post", "u1", ["AI agents in production", "sourdough baking"]) == 2
+        assert index.sync("post", "u1", ["AI agents in production", "evals for agents"]) == 1
+
+        texts = [hit["text"] for hit in index.search("agents", 5, "u1", min_score=0.0)]
+        assert "sourdough baking" not in texts
+        assert set(texts) == {"AI agents in production", "evals for agents"}
+
+    def test_users_only_see_their_snippets_and_shared_ones(self, tmp_path):
+        index = ContextIndex(tmp_path / "index")
+        index.sync("post", "u1", ["AI agents in production"])
+        index.sync("knowledge", "", ["Shared notes on AI agents"])
+
+        assert [hit["source"] for hit in index.search("AI agents", 5, "u2")] == ["knowledge"]
+        assert len(index.search("AI agents", 5, "u1")) == 2
+        assert index.search("AI agents", 1, "u1")[0]["score"] >= index.search("AI agents", 2, "u1")[1]["score"]
+
+    def test_grows_and_persists(self, tmp_path):
+        texts = [f"note {i} about topic{i}" for i in range(1500)]
+        ContextIndex(tmp_path / "index").sync("post", "u1", texts)
+
+        hits = ContextIndex(tmp_path / "index").search("note 1234 about topic1234", 1, "u1")
+        assert hits[0]["text"] == "note 1234 about topic1234"
+
+    def test_embedding_size_must_match(self, tmp_path):
+        ContextIndex(tmp_path / "index", dim=64).sync("post", "u1", ["AI agents"])
+        with pytest.raises(ValueError, match="64-dimensional"):
+            ContextIndex(tmp_path / "index", dim=128).search("AI agents", 1, "u1")
+
+    def test_inverted_file(self, tmp_path):
+        rng = np.random.default_rng(0)
+        words = [f"w{i}" for i in range(500)]
+        texts = [" ".join(rng.choice(words, size=12, replace=False)) for _ in range(400)]
+        index = ContextIndex(tmp_path / "index")
+        with patch.object(settings, "context_ann_min_rows", 100):
+            index.sync("post", "u1", texts)
+            assert index.centroids_path.exists()
+            assert index.search(texts[7], 1, "u1")[0]["text"] == texts[7]
+
+            index.sync("post", "u1", texts + ["AI agents in production"], replace=False)
+            assert index.search("AI agents in production", 1, "u1")[0]["text"] == "AI agents in production"
+
+    def test_knowledge_resyncs_on_change(self, tmp_path, knowledge):
+        index = ContextIndex(tmp_path / "index")
+        assert sync_knowledge(index) == 1
+        assert sync_knowledge(index) == 0
+
+        (knowledge / "user_preference.txt").write_text("User writes about climate tech.")
+        assert sync_knowledge(index) == 1
+        assert [hit["text"] for hit in index.search("climate tech AI agents", 5, "u1")] == ["User writes about climate tech."]
+
+
+class TestSyncUserContent:
+    """Test the suggestion cursor."""
+
+    def test_new_sessions_are_indexed_after_trimming(self, tmp_path):
+        index = ContextIndex(tmp_path / "index")
+        first = {"timestamp": "2025-10-01T09:00:00", "suggestions": [{"title": "Evals for agents", "description": "x"}]}
+        second = {"timestamp": "2025-10-02T09:00:00", "suggestions": [{"title": "Agent tracing", "description": "y"}]}
+        third = {"timestamp": "2025-10-03T09:00:00", "suggestions": [{"title": "Agent memory", "description": "z"}]}
+
+        assert sync_user_content(index, "u1", [], [first, second]) == 2
+        assert sync_user_content(index, "u1", [], [first, second]) == 0
+        # Oldest session trimmed and a new one saved: same count, new content
+        assert sync_user_content(index, "u1", [], [second, third]) == 1
+
+
+class TestSearchContext:
+    """Test retrieval through the data services."""
+
+    def test_knowledge_posts_and_suggestions(self, knowledge, backend_service):
+        backend_service.save_recent_posts({"user_id": "u1", "posts": POSTS})
+        backend_service.save_brainstorm_results("u1", {
+            "timestamp": "2025-10-01T09:00:00",
+            "suggestions": [{"title": "Evals for AI agents", "description": "How teams test agents"}],
+        })
+
+        hits = backend_service.search_context("u1", "AI Agents", 5)
+
+        assert {hit["source"] for hit in hits} == {"knowledge", "post", "suggestion"}
+        assert all("sourdough" not in hit["text"] for hit in hits)
+
+    def test_only_sessions_after_the_cursor_are_read(self, knowledge, backend_service):
+        for user_id, timestamp, title in (
+            ("u1", "2025-10-01T09:00:00", "Evals for AI agents"),
+            ("u2", "2025-10-02T09:00:00", "Sourdough starters"),
+        ):
+            backend_service.save_brainstorm_results(user_id, {
+                "timestamp": timestamp, "suggestions": [{"title": title, "description": ""}]
+            })
+        backend_service.search_context("u1", "AI Agents", 5)
+        backend_service.save_brainstorm_results("u1", {
+            "timestamp": "2025-10-03T09:00:00", "suggestions": [{"title": "Tracing AI agents", "description": ""}]
+        })
+
+        assert [s["timestamp"] for s in backend_service.get_brainstorm_sessions_after("u1", None)] == [
+            "2025-10-01T09:00:00", "2025-10-03T09:00:00"
+        ]
+        assert [s["timestamp"] for s in backend_service.get_brainstorm_sessions_after("u1", "2025-10-01T09:00:00")] == [
+            "2025-10-03T09:00:00"
+        ]
+        with patch("contentagency.services.data_service.sync_user_content", wraps=sync_user_content) as sync:
+            hits = backend_service.search_context("u1", "Tracing AI agents", 5)
+
+        assert [s["timestamp"] for s in sync.call_args.args[3]] == ["2025-10-03T09:00:00"]
+
+        assert "Tracing AI agents: " in [hit["text"] for hit in hits]
+
+    def test_prompt_input(self):
+        inputs = build_crew_inputs({"interests": []}, [], context_snippets=[{"source": "post", "text": "Agents", "score": 0.5}])
+        assert inputs["relevant_context"] == "- (post) Agents"
+        assert build_crew_inputs({"interests": []}, [])["relevant_context"] == "No additional background available."
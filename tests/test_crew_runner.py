@@ -124,6 +124,13 @@ class TestFormatPostsForPrompt:
         assert "Test content" in result
         assert "AI, ML" in result
 
+    def test_engagement_and_date(self):
+        """Should include engagement counts and the publication date when known."""
+        posts = [{"id": "p1", "content": "x", "published_date": "2025-10-01", "likes": 120, "comments": 0}]
+        result = format_posts_for_prompt(posts)
+        assert "Published: 2025-10-01" in result
+        assert "Engagement: 120 likes, 0 comments" in result
+
 
 class TestRunBrainstormCrew:
     """Test crew execution with validation."""
@@ -348,3 +355,25 @@ Current trends show increased interest in AI healthcare applications.
         result = parse_brainstorm_markdown(markdown)
         assert "LinkedIn" in result["suggestions"][0]["platform_fit"]
         assert "Twitter" in result["suggestions"][0]["platform_fit"]
+
+
+class TestCrewLoader:
+    """Test lazy loading of the crew stack."""
+
+    def test_run_brainstorm_crew_delegates(self):
+        """Should forward to crew_runner.run_brainstorm_crew."""
+        from contentagency.services import crew_loader
+
+        with patch('contentagency.services.crew_runner.run_brainstorm_crew', return_value="done") as mock_run:
+            result = crew_loader.run_brainstorm_crew({"interests": []}, [], user_id="u1")
+
+        assert result == "done"
+        mock_run.assert_called_once_with({"interests": []}, [], user_id="u1", from_task=None)
+
+    def test_preload_in_background(self):
+        """Should import the crew runner on a background thread."""
+        from contentagency.services import crew_loader
+
+        thread = crew_loader.preload_crew_stack()
+        thread.join()
+        assert crew_loader.crew_stack_loaded()
@@ -3,10 +3,13 @@ Test suite for data service layer.
 """
 import pytest
 import json
+import multiprocessing
 import tempfile
 from pathlib import Path
 
-from contentagency.services.data_service import FileDataService, create_data_service
+from contentagency.config import settings
+from contentagency.exceptions import VersionConflictError
+from contentagency.services.data_service import DatabaseDataService, FileDataService, create_data_service
 
 
 @pytest.fixture
@@ -196,6 +199,182 @@ class TestFileDataService:
             data_service.get_user_interests()
 
 
+def _append_sessions(data_dir: str, worker: int, count: int) -> None:
+    service = FileDataService(data_dir=data_dir)
+    for index in range(count):
+        service.save_brainstorm_results(f"user_{worker}", {"timestamp": str(index), "suggestions": []})
+
+
+class TestConcurrentWriters:
+    """Test file writes shared by several worker processes."""
+
+    def test_no_lost_sessions_across_processes(self, temp_data_dir):
+        """Concurrent appends from separate processes must all be kept."""
+        context = multiprocessing.get_context("fork")
+        processes = [
+            context.Process(target=_append_sessions, args=(temp_data_dir, worker, 20)) for worker in range(4)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        sessions = FileDataService(data_dir=temp_data_dir).get_brainstorm_results()["sessions"]
+        assert len(sessions) == 80
+
+    def test_writes_leave_no_temp_files(self, data_service, temp_data_dir):
+        """Atomic writes should clean up after themselves."""
+        data_service.save_user_interests({"user_id": "u1", "interests": [{"topic": "AI"}]})
+        assert not list(Path(temp_data_dir).glob("*.tmp"))
+
+
+class TestDatabaseDataService:
+    """Test the SQLite data service."""
+
+    @pytest.fixture
+    def db_service(self, temp_data_dir):
+        return DatabaseDataService(f"sqlite:///{temp_data_dir}/app.db")
+
+    def test_connection_is_lazy(self, temp_data_dir):
+        """Creating the service must not touch the database."""
+        DatabaseDataService(f"{temp_data_dir}/lazy.db")
+        assert not Path(temp_data_dir, "lazy.db").exists()
+
+    def test_interests_round_trip(self, db_service):
+        assert db_service.get_user_interests("u1") == {"user_id": "u1", "interests": []}
+        db_service.save_user_interests({"user_id": "u1", "interests": [{"topic": "AI"}]})
+        assert db_service.get_user_interests()["interests"] == [{"topic": "AI"}]
+
+    def test_recent_posts_sorted_and_limited(self, db_service):
+        db_service.save_recent_posts({"user_id": "u1", "posts": [
+            {"id": "1", "published_date": "2025-01-01"},
+            {"id": "2", "published_date": "2025-03-01"},
+            {"id": "3", "published_date": "2025-02-01"},
+        ]})
+        assert [post["id"] for post in db_service.get_recent_posts(limit=2)] == ["2", "3"]
+        assert db_service.get_recent_posts(user_id="other") == []
+
+    def test_sessions_append_and_filter(self, db_service):
+        db_service.save_brainstorm_results("u1", {"timestamp": "t1", "suggestions": [{"id": "s1"}]})
+        db_service.save_brainstorm_results("u2", {"timestamp": "t2"})
+
+        sessions = db_service.get_brainstorm_results()["sessions"]
+        assert [session["user_id"] for session in sessions] == ["u1", "u2"]
+        assert db_service.get_brainstorm_results("u2")["sessions"][0]["timestamp"] == "t2"
+        assert sessions[0]["suggestions"] == [{"id": "s1"}]
+
+    def test_sessions_after_a_timestamp_use_the_index(self, db_service):
+        db_service.save_brainstorm_results("u1", {"timestamp": "t1"})
+        plan = db_service._connect().execute(
+            "EXPLAIN QUERY PLAN SELECT data FROM brainstorm_sessions "
+            "WHERE user_id = ? AND json_extract(data, '$.timestamp') > ? ORDER BY id", ("u1", "t0")
+        ).fetchall()
+        assert any("idx_sessions_user_timestamp" in row[-1] for row in plan)
+
+
+class TestPerUserData:
+    """Test that several users' interests and posts coexist."""
+
+    def test_each_user_keeps_their_interests(self, backend_service):
+        backend_service.save_user_interests({"user_id": "u1", "interests": [{"topic": "AI"}]})
+        backend_service.save_user_interests({"user_id": "u2", "interests": [{"topic": "Cooking"}]})
+
+        assert backend_service.get_user_interests("u1")["interests"] == [{"topic": "AI"}]
+        assert backend_service.get_user_interests("u2")["interests"] == [{"topic": "Cooking"}]
+        # Without a user id, the last saved document is returned as before
+        assert backend_service.get_user_interests()["user_id"] == "u2"
+        assert backend_service.get_user_interests("u3")["interests"] == []
+
+    def test_each_user_keeps_their_posts(self, backend_service):
+        backend_service.save_recent_posts({"user_id": "u1", "posts": [{"id": "1"}]})
+        backend_service.save_recent_posts({"user_id": "u2", "posts": [{"id": "2"}]})
+
+        assert backend_service.get_recent_posts("u1") == [{"id": "1"}]
+        assert backend_service.get_recent_posts("u2") == [{"id": "2"}]
+        assert backend_service.get_recent_posts("u3") == []
+
+
+class TestPatchUpdates:
+    """Test incremental, versioned updates in both backends."""
+
+    def test_add_remove_update_interests(self, backend_service):
+        backend_service.save_user_interests({"user_id": "u1", "interests": [{"topic": "AI"}, {"topic": "Data"}]})
+
+        patched = backend_service.patch_user_interests("u1", [
+            {"op": "add", "item": {"topic": "Climate"}},
+            {"op": "remove", "key": "data"},
+            {"op": "update", "key": "AI", "item": {"topic": "Generative AI"}},
+        ])
+
+        assert patched["version"] == 2
+        assert backend_service.get_user_interests("u1") == patched
+        assert [i["topic"] for i in patched["interests"]] == ["Generative AI", "Climate"]
+
+    def test_post_edit_keeps_other_fields(self, backend_service):
+        backend_service.save_recent_posts({"user_id": "u1", "posts": [
+            {"id": "1", "content": "old", "published_date": "2025-10-01"},
+            {"id": "2", "content": "x", "published_date": "2025-10-02"},
+        ]})
+
+        backend_service.patch_recent_posts("u1", [{"op": "update", "key": "1", "item": {"content": "new"}}])
+
+        assert backend_service.get_recent_posts("u1")[1] == {
+            "id": "1", "content": "new", "published_date": "2025-10-01", "published_ts": 1759276800.0
+        }
+
+    def test_patch_without_saved_document(self, backend_service):
+        patched = backend_service.patch_recent_posts("u1", [{"op": "add", "item": {"id": "1"}}])
+        assert patched == {"user_id": "u1", "posts": [{"id": "1"}], "version": 1}
+
+    def test_stale_base_version_is_rejected(self, backend_service):
+        backend_service.save_user_interests({"user_id": "u1", "interests": [{"topic": "AI"}]})
+        backend_service.patch_user_interests("u1", [{"op": "add", "item": {"topic": "Data"}}], base_version=1)
+
+        with pytest.raises(VersionConflictError) as conflict:
+            backend_service.patch_user_interests("u1", [{"op": "remove", "key": "AI"}], base_version=1)
+
+        assert conflict.value.current_version == 2
+        assert len(backend_service.get_user_interests("u1")["interests"]) == 2
+
+    def test_updating_a_missing_item_fails(self, backend_service):
+        backend_service.save_user_interests({"user_id": "u1", "interests": [{"topic": "AI"}]})
+        with pytest.raises(ValueError, match="not found"):
+            backend_service.patch_user_interests("u1", [{"op": "update", "key": "Data", "item": {"topic": "x"}}])
+
+    def test_full_save_continues_the_version(self, backend_service):
+        backend_service.save_user_interests({"user_id": "u1", "interests": [{"topic": "AI"}]})
+        backend_service.patch_user_interests("u1", [{"op": "add", "item": {"topic": "Data"}}])
+        backend_service.save_user_interests({"user_id": "u1", "interests": [{"topic": "Cooking"}]})
+
+        assert backend_service.get_user_interests("u1") == {
+            "user_id": "u1", "interests": [{"topic": "Cooking"}], "version": 3
+        }
+        # Without a user id, the last saver's patched document is returned
+        backend_service.patch_user_interests("u1", [{"op": "add", "item": {"topic": "Data"}}])
+        assert backend_service.get_user_interests()["version"] == 4
+
+    def test_log_is_compacted(self, backend_service, monkeypatch):
+        monkeypatch.setattr(settings, "patch_compact_ops", 3)
+        backend_service.save_recent_posts({"user_id": "u1", "posts": []})
+        for i in range(7):
+            backend_service.patch_recent_posts("u1", [{"op": "add", "item": {"id": str(i)}}])
+
+        assert backend_service.get_recent_posts("u1", limit=100) == [{"id": str(i)} for i in range(7)]
+        assert backend_service.get_user_interests("u1")["interests"] == []
+
+    def test_file_patch_appends_instead_of_rewriting(self, temp_data_dir):
+        store = FileDataService(data_dir=temp_data_dir)
+        store.save_recent_posts({"user_id": "u1", "posts": [{"id": str(i)} for i in range(1000)]})
+        copy = Path(temp_data_dir) / "users" / "u1" / "recent_posts.json"
+        snapshot = copy.read_text()
+
+        store.patch_recent_posts("u1", [{"op": "update", "key": "5", "item": {"content": "edited"}}])
+
+        assert copy.read_text() == snapshot
+        assert len(copy.with_suffix(".ops.jsonl").read_text().splitlines()) == 1
+        assert store.get_recent_posts("u1", limit=1000)[5]["content"] == "edited"
+
+
 class TestCreateDataService:
     """Test data service factory."""
 
@@ -0,0 +1,150 @@
+"""
+Test suite for near-duplicate suggestion detection.
+"""
+import json
+import sqlite3
+import pytest
+from unittest.mock import MagicMock, patch
+
+from contentagency.config import settings
+from contentagency.services.crew_runner import handle_duplicate_suggestions
+from contentagency.services.data_service import DatabaseDataService, FileDataService
+from contentagency.services.dedup import MinHasher, SuggestionIndex
+from contentagency.services.prompts import build_crew_inputs
+
+AGENTS = {
+    "title": "Why AI agents fail in production",
+    "description": "Common failure modes of LLM agents in production systems and how teams fix them"
+}
+AGENTS_REWORDED = {
+    "title": "Why AI agents fail in production systems",
+    "description": "Common failure modes of LLM agents in production and how teams fix them"
+}
+CLIMATE = {
+    "title": "Carbon accounting for small businesses",
+    "description": "A practical guide to measuring emissions without a sustainability team"
+}
+
+
+def _session(*suggestions, timestamp="2025-10-01T09:00:00"):
+    return {"timestamp": timestamp, "suggestions": [dict(s) for s in suggestions], "trending_context_summary": ""}
+
+
+class TestMinHash:
+    """Test signature similarity estimates."""
+
+    def test_similar_texts_share_most_hashes(self):
+        hasher = MinHasher(128)
+        a = hasher.signature(f"{AGENTS['title']} {AGENTS['description']}")
+        b = hasher.signature(f"{AGENTS_REWORDED['title']} {AGENTS_REWORDED['description']}")
+        c = hasher.signature(f"{CLIMATE['title']} {CLIMATE['description']}")
+
+        assert (a == b).mean() > 0.6
+        assert (a == c).mean() < 0.1
+
+    def test_signatures_are_stable(self):
+        assert (MinHasher(64).signature("agents in production") == MinHasher(64).signature("agents in production")).all()
+
+
+class TestSuggestionIndex:
+    """Test the persistent LSH index."""
+
+    def test_finds_near_duplicates_per_user(self, tmp_path):
+        index = SuggestionIndex(tmp_path / "index.db")
+        index.add("u1", [AGENTS, CLIMATE], "2025-10-01T09:00:00")
+
+        matches = index.find_duplicates("u1", [AGENTS_REWORDED, {"title": "Rust for data engineers"}])
+        assert matches[0]["title"] == AGENTS["title"]
+        assert matches[0]["timestamp"] == "2025-10-01T09:00:00"
+        assert matches[0]["similarity"] >= settings.dedup_threshold
+        assert matches[1] is None
+        assert index.find_duplicates("u2", [AGENTS_REWORDED]) == [None]
+
+    def test_repeats_within_a_batch(self, tmp_path):
+        matches = SuggestionIndex(tmp_path / "index.db").find_duplicates("u1", [AGENTS, CLIMATE, AGENTS_REWORDED])
+
+        assert matches[:2] == [None, None]
+        assert matches[2]["title"] == AGENTS["title"] and matches[2]["timestamp"] is None
+
+    def test_persists_and_lists_recent_titles(self, tmp_path):
+        SuggestionIndex(tmp_path / "index.db").add("u1", [AGENTS, CLIMATE, AGENTS])
+
+        reopened = SuggestionIndex(tmp_path / "index.db")
+        assert reopened.recent_titles("u1", 5) == [AGENTS["title"], CLIMATE["title"]]
+        assert reopened.recent_titles("u1", 1) == [AGENTS["title"]]
+
+    def test_bands_must_divide_signature(self, tmp_path):
+        with pytest.raises(ValueError, match="multiple"):
+            SuggestionIndex(tmp_path / "index.db", num_perm=100, bands=32)
+
+
+class TestDataServiceIndex:
+    """Test that saved sessions feed the index on both backends."""
+
+    def test_saved_sessions_are_indexed(self, backend_service):
+        backend_service.save_brainstorm_results("u1", _session(AGENTS, CLIMATE))
+
+        assert backend_service.find_duplicate_suggestions("u1", [AGENTS_REWORDED])[0]["title"] == AGENTS["title"]
+        assert backend_service.recent_suggestion_titles("u1", 10) == [CLIMATE["title"], AGENTS["title"]]
+
+    def test_earlier_sessions_are_backfilled(self, tmp_path):
+        FileDataService(data_dir=str(tmp_path)).save_brainstorm_results("u1", _session(AGENTS))
+        (tmp_path / "suggestion_index.db").unlink()
+
+        store = FileDataService(data_dir=str(tmp_path))
+        assert store.find_duplicate_suggestions("u1", [AGENTS_REWORDED])[0]["title"] == AGENTS["title"]
+
+
+class TestDatabaseIndexTransactions:
+    """Test that the database backend keeps sessions and signatures consistent."""
+
+    def test_session_and_signatures_commit_together(self, tmp_path):
+        store = DatabaseDataService(str(tmp_path / "data.db"))
+        store.save_brainstorm_results("u1", _session(AGENTS))
+
+        with patch.object(SuggestionIndex, "add", side_effect=sqlite3.OperationalError("disk I/O error")):
+            with pytest.raises(ValueError, match="Failed to save"):
+                store.save_brainstorm_results("u1", _session(CLIMATE))
+
+        assert len(store.get_brainstorm_results("u1")["sessions"]) == 1
+
+    def test_backfill_runs_once_across_instances(self, tmp_path):
+        path = str(tmp_path / "data.db")
+        conn = DatabaseDataService(path)._connect()
+        with conn:
+            conn.execute(
+                "INSERT INTO brainstorm_sessions (user_id, data) VALUES (?, ?)",
+                ("u1", json.dumps({"user_id": "u1", **_session(AGENTS, CLIMATE)}))
+            )
+
+        first, second = DatabaseDataService(path), DatabaseDataService(path)
+        first.suggestion_index()
+        second.suggestion_index()
+
+        count = conn.execute("SELECT COUNT(*) FROM suggestion_signatures").fetchone()[0]
+        assert count == 2
+        assert second.find_duplicate_suggestions("u1", [AGENTS_REWORDED])[0]["title"] == AGENTS["title"]
+
+
+class TestHandleDuplicates:
+    """Test flag and filter modes after parsing."""
+
+    def test_modes(self, backend_service):
+        backend_service.save_brainstorm_results("u1", _session(AGENTS))
+        with patch("contentagency.services.crew_runner.data_service", backend_service):
+            with patch.object(settings, "dedup_mode", "flag"):
+                flagged = handle_duplicate_suggestions("u1", [dict(AGENTS_REWORDED), dict(CLIMATE)])
+            with patch.object(settings, "dedup_mode", "filter"):
+                kept = handle_duplicate_suggestions("u1", [dict(AGENTS_REWORDED), dict(CLIMATE)])
+            with patch.object(settings, "dedup_mode", "off"):
+                untouched = handle_duplicate_suggestions("u1", [dict(AGENTS_REWORDED)])
+
+        assert flagged[0]["duplicate_of"]["title"] == AGENTS["title"]
+        assert "duplicate_of" not in flagged[1]
+        assert [s["title"] for s in kept] == [CLIMATE["title"]]
+        assert untouched == [AGENTS_REWORDED]
+
+    def test_avoid_hints_in_prompt(self):
+        inputs = build_crew_inputs({"interests": []}, [], avoid_titles=[AGENTS["title"]])
+        assert inputs["avoid_suggestions"] == f"- {AGENTS['title']}"
+        assert build_crew_inputs({"interests": []}, [], avoid_titles=MagicMock())["avoid_suggestions"] == "None yet."
@@ -0,0 +1,151 @@
+"""
+Test suite for data change events, invalidation and prefetch.
+"""
+import pytest
+from unittest.mock import patch
+
+from contentagency.config import settings
+from contentagency.services import checkpoints
+from contentagency.services.checkpoints import TaskCheckpointStore
+from contentagency.services.events import (
+    INTERESTS_CHANGED,
+    POSTS_CHANGED,
+    ChangeEventBus,
+    change_events,
+    interests_event,
+    posts_event,
+)
+from contentagency.services.job_queue import SQLiteJobQueue
+from contentagency.services.prompts import research_checkpoint_key
+
+
+AI = {"user_id": "u1", "interests": [{"topic": "AI"}]}
+AI_AND_DATA = {"user_id": "u1", "interests": [{"topic": "ai"}, {"topic": "Data"}]}
+
+
+@pytest.fixture
+def events():
+    """Record the events emitted on the application bus."""
+    received = []
+    for event_type in (INTERESTS_CHANGED, POSTS_CHANGED):
+        change_events.subscribe(event_type, received.append)
+    yield received
+    for event_type in (INTERESTS_CHANGED, POSTS_CHANGED):
+        change_events.unsubscribe(event_type, received.append)
+
+
+@pytest.fixture
+def checkpoint_store(tmp_path):
+    store = TaskCheckpointStore(checkpoint_dir=str(tmp_path / "checkpoints"))
+    with patch.object(checkpoints, "checkpoint_store", store):
+        yield store
+
+
+class TestDiffs:
+    """Test change diffs."""
+
+    def test_interests_diff_ignores_case(self):
+        event = interests_event("u1", AI, AI_AND_DATA)
+        assert event["added"] == [{"topic": "Data"}]
+        assert event["removed"] == []
+        assert interests_event("u1", AI, {"interests": [{"topic": " ai "}]}) is None
+
+    def test_posts_diff(self):
+        previous = {"posts": [{"id": "1", "content": "a"}, {"id": "2", "content": "b"}]}
+        current = {"posts": [{"id": "1", "content": "edited"}, {"id": "3", "content": "c"}]}
+        event = posts_event("u1", previous, current)
+
+        assert (event["added"], event["removed"], event["updated"]) == (["3"], ["2"], ["1"])
+        assert posts_event("u1", current, current) is None
+
+    def test_failing_subscriber_does_not_break_others(self):
+        bus = ChangeEventBus()
+        received = []
+        bus.subscribe(POSTS_CHANGED, lambda event: 1 / 0)
+        bus.subscribe(POSTS_CHANGED, received.append)
+
+        bus.emit({"type": POSTS_CHANGED})
+        assert len(received) == 1
+
+
+class TestDataServiceEvents:
+    """Test that writes emit events with diffs."""
+
+    def test_interests_changes(self, backend_service, events):
+        backend_service.save_user_interests(AI)
+        backend_service.save_user_interests(AI_AND_DATA)
+        backend_service.save_user_interests(AI_AND_DATA)
+
+        assert [event["added"] for event in events] == [[{"topic": "AI"}], [{"topic": "Data"}]]
+        assert events[1]["previous"] == {**AI, "version": 1}
+
+    def test_diffs_are_per_user(self, backend_service, events):
+        backend_service.save_user_interests(AI)
+        backend_service.save_user_interests({"user_id": "u2", "interests": [{"topic": "AI"}]})
+
+        assert events[1]["user_id"] == "u2"
+        assert events[1]["added"] == [{"topic": "AI"}]
+
+    def test_posts_changes(self, backend_service, events):
+        backend_service.save_recent_posts({"user_id": "u1", "posts": [{"id": "1"}]})
+        backend_service.save_recent_posts({"user_id": "u1", "posts": [{"id": "1"}, {"id": "2"}]})
+
+        assert [event["type"] for event in events] == [POSTS_CHANGED, POSTS_CHANGED]
+        assert events[1]["added"] == ["2"]
+
+
+class TestInvalidation:
+    """Test precise invalidation of the replay research checkpoint."""
+
+    def test_latest_research_for_old_interests_is_dropped(self, backend_service, checkpoint_store):
+        backend_service.save_user_interests(AI)
+        checkpoint_store.put("trend_research_task", research_checkpoint_key(AI), "AI research")
+
+        backend_service.save_user_interests(AI_AND_DATA)
+        assert checkpoint_store.latest("trend_research_task") is None
+        # The research itself stays available to anyone with those interests
+        assert checkpoint_store.get("trend_research_task", research_checkpoint_key(AI)) is not None
+
+    def test_other_research_and_post_changes_are_kept(self, backend_service, checkpoint_store):
+        backend_service.save_user_interests(AI)
+        other = {"interests": [{"topic": "Cooking"}]}
+        checkpoint_store.put("trend_research_task", research_checkpoint_key(other), "Cooking research")
+
+        backend_service.save_user_interests(AI_AND_DATA)
+        backend_service.save_recent_posts({"user_id": "u1", "posts": [{"id": "1"}]})
+        assert checkpoint_store.latest("trend_research_task")["output"] == "Cooking research"
+
+
+class TestPrefetch:
+    """Test research prefetch for newly added topics."""
+
+    @pytest.fixture
+    def queue(self, tmp_path, monkeypatch, checkpoint_store):
+        monkeypatch.setattr(settings, "brainstorm_mode", "queue")
+        monkeypatch.setattr(settings, "crew_process", "pipelined")
+        queue = SQLiteJobQueue(str(tmp_path / "jobs.db"))
+        with patch("contentagency.services.job_queue.get_job_queue", return_value=queue):
+            yield queue
+
+    def _research_topics(self, queue):
+        return [job["payload"]["user_interests"]["interests"][0]["topic"] for job in queue.list(status="queued")]
+
+    def test_only_added_topics_are_researched(self, backend_service, queue):
+        backend_service.save_user_interests(AI)
+        queue.claim("w1")
+        backend_service.save_user_interests(AI_AND_DATA)
+
+        assert self._research_topics(queue) == ["Data"]
+        assert queue.list(status="queued")[0]["priority_class"] == "prefetch"
+
+    def test_removals_and_warm_topics_enqueue_nothing(self, backend_service, queue, checkpoint_store):
+        checkpoint_store.put("trend_research_task", research_checkpoint_key({"interests": [{"topic": "Data"}]}), "warm")
+        backend_service.save_user_interests({"user_id": "u1", "interests": [{"topic": "Data"}]})
+        backend_service.save_user_interests({"user_id": "u1", "interests": []})
+
+        assert self._research_topics(queue) == []
+
+    def test_inline_mode_does_not_prefetch(self, backend_service, queue, monkeypatch):
+        monkeypatch.setattr(settings, "brainstorm_mode", "inline")
+        backend_service.save_user_interests(AI)
+        assert self._research_topics(queue) == []
@@ -0,0 +1,132 @@
+"""
+Test suite for Idempotency-Key handling.
+"""
+import time
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+
+from contentagency.api.idempotency import REPLAYED_HEADER, request_fingerprint
+from contentagency.api.main import app
+from contentagency.config import settings
+from contentagency.services import job_queue
+from contentagency.services.data_service import FileDataService
+
+
+INTERESTS = {"user_id": "user_1", "interests": [{"topic": "AI"}]}
+BRAINSTORM = {"interests": INTERESTS, "posts": {"user_id": "user_1", "posts": []}}
+
+
+@pytest.fixture
+def service(tmp_path):
+    """A file data service shared by the API and the idempotency store."""
+    service = FileDataService(data_dir=str(tmp_path))
+    with patch("contentagency.api.main.data_service", service), \
+            patch("contentagency.api.idempotency.data_service", service):
+        yield service
+
+
+class TestIdempotencyStore:
+    """Test key reservation in both data backends."""
+
+    def test_claim_then_replay(self, backend_service):
+        assert backend_service.claim_idempotency_key("posts:k1", "fp", 60) is None
+        assert backend_service.claim_idempotency_key("posts:k1", "fp", 60)["state"] == "pending"
+
+        backend_service.complete_idempotency_key("posts:k1", 200, {"status": "success"}, 60)
+        record = backend_service.claim_idempotency_key("posts:k1", "fp", 60)
+        assert record["state"] == "completed"
+        assert record["status_code"] == 200
+        assert record["body"] == {"status": "success"}
+
+    def test_release_allows_retry(self, backend_service):
+        backend_service.claim_idempotency_key("posts:k1", "fp", 60)
+        backend_service.release_idempotency_key("posts:k1")
+        assert backend_service.claim_idempotency_key("posts:k1", "fp", 60) is None
+
+    def test_expired_keys_are_reusable(self, backend_service):
+        backend_service.claim_idempotency_key("posts:k1", "fp", 60)
+        backend_service.complete_idempotency_key("posts:k1", 200, {}, 0.01)
+        time.sleep(0.02)
+        assert backend_service.claim_idempotency_key("posts:k1", "fp", 60) is None
+
+    def test_fingerprint_ignores_key_order(self):
+        assert request_fingerprint({"a": 1, "b": 2}) == request_fingerprint({"b": 2, "a": 1})
+
+
+class TestIdempotentEndpoints:
+    """Test replays through the API."""
+
+    def test_interests_write_applied_once(self, service):
+        client = TestClient(app)
+        headers = {"Idempotency-Key": "retry-1"}
+
+        with patch.object(service, "save_user_interests", wraps=service.save_user_interests) as mock_save:
+            first = client.post("/api/v1/interests", json=INTERESTS, headers=headers)
+            second = client.post("/api/v1/interests", json=INTERESTS, headers=headers)
+
+        assert first.status_code == second.status_code == 200
+        assert second.json() == first.json()
+        assert second.headers[REPLAYED_HEADER] == "true"
+        assert mock_save.call_count == 1
+
+    def test_inline_brainstorm_runs_once(self, service):
+        client = TestClient(app)
+        headers = {"Idempotency-Key": "retry-2"}
+
+        def run(user_interests, recent_posts, user_id=None):
+            session = {"timestamp": "t", "suggestions": [], "trending_context_summary": ""}
+            service.save_brainstorm_results(user_id, session)
+            return {"result": "", "session": {"user_id": user_id, **session}}
+
+        with patch("contentagency.api.main.run_brainstorm_session", side_effect=run) as mock_run:
+            first = client.post("/api/v1/brainstorm", json=BRAINSTORM, headers=headers)
+            second = client.post("/api/v1/brainstorm", json=BRAINSTORM, headers=headers)
+
+        assert mock_run.call_count == 1
+        assert second.json() == first.json()
+        assert len(service.get_brainstorm_results()["sessions"]) == 1
+
+    def test_queued_brainstorm_returns_original_job(self, service, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "brainstorm_mode", "queue")
+        monkeypatch.setattr(settings, "job_queue_path", str(tmp_path / "jobs.db"))
+        job_queue.reset_job_queue()
+        client = TestClient(app)
+        headers = {"Idempotency-Key": "retry-3"}
+
+        first = client.post("/api/v1/brainstorm", json=BRAINSTORM, headers=headers).json()
+        job_queue.get_job_queue().claim("w1")
+        second = client.post("/api/v1/brainstorm", json=BRAINSTORM, headers=headers)
+
+        assert second.status_code == 202
+        assert second.json()["job_id"] == first["job_id"]
+        # The replay reports the job's current status
+        assert second.json()["status"] == "running"
+        assert job_queue.get_job_queue().counts()["queued"] == 0
+        job_queue.reset_job_queue()
+
+    def test_key_reused_with_different_body(self, service):
+        client = TestClient(app)
+        headers = {"Idempotency-Key": "retry-4"}
+        client.post("/api/v1/interests", json=INTERESTS, headers=headers)
+
+        other = {"user_id": "user_1", "interests": [{"topic": "Cooking"}]}
+        assert client.post("/api/v1/interests", json=other, headers=headers).status_code == 422
+
+    def test_retry_while_in_flight(self, service):
+        client = TestClient(app)
+        service.claim_idempotency_key("posts:retry-5", request_fingerprint({"user_id": "u", "posts": []}), 60)
+
+        response = client.post("/api/v1/posts", json={"user_id": "u", "posts": []}, headers={"Idempotency-Key": "retry-5"})
+        assert response.status_code == 409
+
+    def test_failed_request_can_be_retried(self, service):
+        client = TestClient(app)
+        headers = {"Idempotency-Key": "retry-6"}
+
+        with patch("contentagency.api.main.run_brainstorm_session", side_effect=RuntimeError("LLM down")):
+            assert client.post("/api/v1/brainstorm", json=BRAINSTORM, headers=headers).status_code == 500
+        with patch("contentagency.api.main.run_brainstorm_session") as mock_run:
+            client.post("/api/v1/brainstorm", json=BRAINSTORM, headers=headers)
+
+        assert mock_run.called
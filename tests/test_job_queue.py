@@ -0,0 +1,368 @@
+"""
+Test suite for the job queue and crew workers.
+"""
+import time
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+
+from contentagency import worker as worker_module
+from contentagency.api.main import app
+from contentagency.config import settings
+from contentagency.services import job_queue
+from contentagency.services.budgets import RunInterruptedError, current_budget
+from contentagency.services.job_queue import JobNotFoundError, SQLiteJobQueue, create_job_queue
+from contentagency.worker import BrainstormWorker
+from contentagency.exceptions import ValidationError
+
+
+SESSION = {
+    "user_id": "user_1",
+    "timestamp": "2025-01-01T00:00:00",
+    "suggestions": [],
+    "trending_context_summary": "Quiet week"
+}
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    """A queue in a temporary database, also used by the API."""
+    monkeypatch.setattr(settings, "job_queue_path", str(tmp_path / "jobs.db"))
+    job_queue.reset_job_queue()
+    queue = job_queue.get_job_queue()
+    queue.retry_backoff_seconds = 0
+    yield queue
+    job_queue.reset_job_queue()
+
+
+class TestSQLiteJobQueue:
+    """Test leases, heartbeats and retries."""
+
+    def test_enqueue_and_claim(self, queue):
+        job = queue.enqueue("brainstorm", {"x": 1}, user_id="user_1")
+        assert job["status"] == "queued"
+        assert job["payload"] == {"x": 1}
+
+        claimed = queue.claim("w1", lease_seconds=30)
+        assert claimed["id"] == job["id"]
+        assert claimed["status"] == "running"
+        assert claimed["attempts"] == 1
+        assert claimed["lease_owner"] == "w1"
+
+        # Nothing left for a second worker
+        assert queue.claim("w2") is None
+
+    def test_claims_in_fifo_order(self, queue):
+        first = queue.enqueue("brainstorm", {})
+        second = queue.enqueue("brainstorm", {})
+        assert queue.claim("w1")["id"] == first["id"]
+        assert queue.claim("w1")["id"] == second["id"]
+
+    def test_complete_stores_result(self, queue):
+        job = queue.enqueue("brainstorm", {})
+        queue.claim("w1")
+        assert queue.complete(job["id"], "w1", SESSION)
+        stored = queue.get(job["id"])
+        assert stored["status"] == "succeeded"
+        assert stored["result"] == SESSION
+        assert stored["finished_at"] is not None
+
+    def test_fail_retries_then_gives_up(self, queue):
+        job = queue.enqueue("brainstorm", {}, max_attempts=2)
+        queue.claim("w1")
+        assert queue.fail(job["id"], "w1", "boom") == "queued"
+        queue.claim("w1")
+        assert queue.fail(job["id"], "w1", "boom again") == "failed"
+        assert queue.get(job["id"])["error"] == "boom again"
+
+    def test_retry_backoff_delays_next_claim(self, queue):
+        queue.retry_backoff_seconds = 60
+        job = queue.enqueue("brainstorm", {})
+        queue.claim("w1")
+        queue.fail(job["id"], "w1", "boom")
+        assert queue.claim("w1") is None
+
+    def test_expired_lease_is_reclaimed(self, queue):
+        job = queue.enqueue("brainstorm", {})
+        queue.claim("w1", lease_seconds=0.01)
+        time.sleep(0.02)
+
+        reclaimed = queue.claim("w2")
+        assert reclaimed["id"] == job["id"]
+        assert reclaimed["attempts"] == 2
+        # The first worker lost the job and can no longer finish it
+        assert not queue.heartbeat(job["id"], "w1")
+        assert not queue.complete(job["id"], "w1", {})
+        assert queue.complete(job["id"], "w2", {})
+
+    def test_heartbeat_extends_lease(self, queue):
+        job = queue.enqueue("brainstorm", {})
+        queue.claim("w1", lease_seconds=0.05)
+        assert queue.heartbeat(job["id"], "w1", lease_seconds=30)
+        time.sleep(0.06)
+        assert queue.claim("w2") is None
+
+    def test_counts_and_list(self, queue):
+        queue.enqueue("brainstorm", {}, user_id="a")
+        queue.enqueue("brainstorm", {}, user_id="b")
+        queue.claim("w1")
+        assert queue.counts()["queued"] == 1
+        assert queue.counts()["running"] == 1
+        assert [job["user_id"] for job in queue.list(user_id="b")] == ["b"]
+
+    def test_get_unknown_job(self, queue):
+        with pytest.raises(JobNotFoundError):
+            queue.get("missing")
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError, match="Unknown job queue backend"):
+            create_job_queue("kafka")
+
+    def test_shared_between_queue_instances(self, queue):
+        job = queue.enqueue("brainstorm", {})
+        other = SQLiteJobQueue(str(queue.path))
+        assert other.claim("w2")["id"] == job["id"]
+
+
+class TestFairScheduling:
+    """Test priority classes, per-user fairness and queue positions."""
+
+    def test_interactive_jumps_batch_backlog(self, queue):
+        for _ in range(10):
+            queue.enqueue("brainstorm", {}, user_id="bulk", priority="batch")
+        queue.claim("w1")
+        interactive = queue.enqueue("brainstorm", {}, user_id="user_1")
+
+        assert queue.queue_position(interactive["id"]) == 1
+        assert queue.claim("w1")["id"] == interactive["id"]
+
+    def test_users_take_turns_within_a_class(self, queue):
+        for _ in range(4):
+            queue.enqueue("brainstorm", {}, user_id="heavy")
+        queue.enqueue("brainstorm", {}, user_id="light")
+
+        claimed = [queue.claim("w1")["user_id"] for _ in range(3)]
+        assert claimed == ["heavy", "light", "heavy"]
+
+    def test_claim_loads_only_each_users_oldest_job(self, queue):
+        heavy = [queue.enqueue("brainstorm", {}, user_id="heavy")["id"] for _ in range(50)]
+        light = queue.enqueue("brainstorm", {}, user_id="light")["id"]
+        bulk = queue.enqueue("brainstorm", {}, user_id="heavy", priority="batch")["id"]
+
+        with queue._transaction() as conn:
+            heads, _ = queue._scheduler(conn, time.time())
+
+        assert heads == {"interactive": {"heavy": heavy[0], "light": light}, "batch": {"heavy": bulk}}
+        assert queue.claim("w1")["id"] == heavy[0]
+
+    def test_user_weights(self, queue, monkeypatch):
+        monkeypatch.setattr(settings, "job_user_weights", {"premium": 2.0})
+        for _ in range(4):
+            queue.enqueue("brainstorm", {}, user_id="premium")
+            queue.enqueue("brainstorm", {}, user_id="free")
+
+        claimed = [queue.claim("w1")["user_id"] for _ in range(6)]
+        assert claimed.count("premium") == 4
+
+    def test_prefetch_is_not_starved(self, queue, monkeypatch):
+        monkeypatch.setattr(settings, "job_class_weights", {"interactive": 4.0, "batch": 2.0, "prefetch": 1.0})
+        for _ in range(10):
+            queue.enqueue("brainstorm", {}, user_id="a", priority="interactive")
+            queue.enqueue("brainstorm", {}, user_id="b", priority="batch")
+        queue.enqueue("brainstorm", {}, user_id="c", priority="prefetch")
+
+        claimed = [queue.claim("w1")["priority_class"] for _ in range(7)]
+        assert claimed.count("interactive") == 4
+        assert claimed.count("batch") == 2
+        assert claimed.count("prefetch") == 1
+
+    def test_queue_position_counts_earlier_jobs_in_class(self, queue):
+        jobs = [
+            queue.enqueue("brainstorm", {}, user_id=user, priority=priority)
+            for user, priority in [("a", "batch"), ("a", "batch"), ("b", "batch"), ("c", "prefetch"), ("a", "interactive")]
+        ]
+        assert [queue.queue_position(job["id"]) for job in jobs] == [1, 2, 3, 1, 1]
+
+        claimed = queue.claim("w1")
+        assert claimed["id"] == jobs[4]["id"]
+        assert queue.queue_position(claimed["id"]) is None
+        assert queue.queue_position(jobs[2]["id"]) == 3
+
+    def test_unknown_priority(self, queue):
+        with pytest.raises(ValueError, match="Unknown priority class"):
+            queue.enqueue("brainstorm", {}, priority="urgent")
+
+
+class TestCancellation:
+    """Test cancelling queued and running jobs."""
+
+    def test_cancel_queued_job(self, queue):
+        job = queue.enqueue("brainstorm", {})
+        cancelled = queue.cancel(job["id"])
+        assert cancelled["status"] == "cancelled"
+        assert queue.claim("w1") is None
+
+    def test_cancel_running_job_flags_it(self, queue):
+        job = queue.enqueue("brainstorm", {})
+        queue.claim("w1")
+        assert queue.cancel(job["id"])["status"] == "running"
+        assert queue.cancel_requested(job["id"])
+        assert queue.finish_cancelled(job["id"], "w1", {"partial": True})
+        assert queue.get(job["id"])["status"] == "cancelled"
+
+    def test_cancel_finished_job(self, queue):
+        job = queue.enqueue("brainstorm", {})
+        queue.claim("w1")
+        queue.complete(job["id"], "w1", SESSION)
+        with pytest.raises(ValueError, match="already succeeded"):
+            queue.cancel(job["id"])
+
+    def test_cancelled_job_with_dead_worker_is_not_retried(self, queue):
+        job = queue.enqueue("brainstorm", {})
+        queue.claim("w1", lease_seconds=0.01)
+        queue.cancel(job["id"])
+        time.sleep(0.02)
+        assert queue.claim("w2") is None
+        assert queue.get(job["id"])["status"] == "cancelled"
+
+    def test_worker_stops_running_crew(self, queue, monkeypatch):
+        monkeypatch.setattr(settings, "job_cancel_poll_seconds", 0.01)
+        job = queue.enqueue("brainstorm", {"user_interests": {"interests": [{"topic": "AI"}]}})
+
+        def run_session(*args, **kwargs):
+            # Stand-in for a crew making LLM calls until the budget says stop
+            budget = current_budget()
+            queue.cancel(job["id"])
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline:
+                try:
+                    budget.check()
+                except RunInterruptedError as e:
+                    return {"result": "", "session": {**SESSION, "partial": True, "stop_reason": e.reason}}
+                time.sleep(0.005)
+            raise AssertionError("run was not cancelled")
+
+        started = time.monotonic()
+        with patch.object(worker_module, "run_brainstorm_session", side_effect=run_session):
+            status = BrainstormWorker(queue, worker_id="w1").run_once()
+
+        assert status == "cancelled"
+        assert time.monotonic() - started < 1
+        stored = queue.get(job["id"])
+        assert stored["status"] == "cancelled"
+        assert stored["result"]["stop_reason"] == "Job cancelled"
+
+
+class TestBrainstormWorker:
+    """Test job execution by the worker."""
+
+    def test_runs_job_and_stores_session(self, queue):
+        job = queue.enqueue("brainstorm", {"user_id": "user_1", "user_interests": {"interests": [{"topic": "AI"}]}})
+        with patch.object(worker_module, "run_brainstorm_session", return_value={"result": "md", "session": SESSION}) as mock_run:
+            status = BrainstormWorker(queue, worker_id="w1").run_once()
+
+        assert status == "succeeded"
+        assert queue.get(job["id"])["result"] == SESSION
+        mock_run.assert_called_once_with(
+            {"interests": [{"topic": "AI"}]}, [], user_id="user_1", from_task=None, process=None
+        )
+
+    def test_failure_is_retried(self, queue):
+        job = queue.enqueue("brainstorm", {"user_interests": {}})
+        with patch.object(worker_module, "run_brainstorm_session", side_effect=RuntimeError("LLM down")):
+            assert BrainstormWorker(queue, worker_id="w1").run_once() == "queued"
+
+        assert queue.get(job["id"])["error"] == "RuntimeError: LLM down"
+
+    def test_validation_error_is_not_retried(self, queue):
+        job = queue.enqueue("brainstorm", {"user_interests": {}})
+        with patch.object(worker_module, "run_brainstorm_session", side_effect=ValidationError("no interests")):
+            assert BrainstormWorker(queue, worker_id="w1").run_once() == "failed"
+
+        assert queue.get(job["id"])["attempts"] == 1
+
+    def test_empty_queue(self, queue):
+        assert BrainstormWorker(queue, worker_id="w1").run_once() is None
+
+
+class TestJobsAPI:
+    """Test queue mode in the REST API."""
+
+    def test_queue_mode_enqueues_brainstorm(self, queue, monkeypatch):
+        monkeypatch.setattr(settings, "brainstorm_mode", "queue")
+        client = TestClient(app)
+
+        with patch("contentagency.api.main.run_brainstorm_session") as mock_run:
+            response = client.post("/api/v1/brainstorm", json={
+                "user_id": "user_1",
+                "interests": {"user_id": "user_1", "interests": [{"topic": "AI"}]},
+                "posts": {"user_id": "user_1", "posts": []}
+            })
+
+        assert response.status_code == 202
+        mock_run.assert_not_called()
+        body = response.json()
+        assert body["status"] == "queued"
+        assert body["priority"] == "interactive"
+        assert body["queue_position"] == 1
+
+        job = queue.get(body["job_id"])
+        assert job["payload"]["user_interests"]["interests"] == [{"topic": "AI"}]
+
+    def test_job_status_and_result(self, queue):
+        client = TestClient(app)
+        job = queue.enqueue("brainstorm", {}, user_id="user_1")
+        queue.claim("w1")
+        queue.complete(job["id"], "w1", SESSION)
+
+        response = client.get(f"/api/v1/jobs/{job['id']}")
+        assert response.status_code == 200
+        assert response.json()["status"] == "succeeded"
+        assert response.json()["result"]["trending_context_summary"] == "Quiet week"
+
+        listing = client.get("/api/v1/jobs").json()
+        assert listing["count"] == 1
+        assert listing["counts"]["succeeded"] == 1
+
+    def test_batch_priority_and_position(self, queue):
+        client = TestClient(app)
+        request = {"interests": {"user_id": "u", "interests": [{"topic": "AI"}]}, "priority": "batch"}
+        first = client.post("/api/v1/jobs", json=request).json()
+        second = client.post("/api/v1/jobs", json=request).json()
+
+        assert first["priority"] == "batch"
+        assert client.get(f"/api/v1/jobs/{second['job_id']}").json()["queue_position"] == 2
+        assert client.post("/api/v1/jobs", json={**request, "priority": "urgent"}).status_code == 422
+
+    def test_delete_cancels_job(self, queue):
+        client = TestClient(app)
+        job = queue.enqueue("brainstorm", {}, user_id="user_1")
+
+        response = client.delete(f"/api/v1/jobs/{job['id']}")
+        assert response.status_code == 202
+        assert response.json()["status"] == "cancelled"
+        assert client.delete(f"/api/v1/jobs/{job['id']}").status_code == 409
+        assert client.delete("/api/v1/jobs/missing").status_code == 404
+
+    def test_metrics_report_current_queue_depth(self, queue):
+        client = TestClient(app)
+        queue.enqueue("brainstorm", {}, user_id="user_1")
+        queue.enqueue("brainstorm", {}, user_id="user_2")
+        assert "contentagency_crew_runs_queued 2" in client.get("/metrics").text
+
+        # Claimed by a worker in another process: the API still reports the live depth
+        SQLiteJobQueue(settings.job_queue_path).claim("w1")
+        assert "contentagency_crew_runs_queued 1" in client.get("/metrics").text
+
+    def test_unknown_job_returns_404(self, queue):
+        client = TestClient(app)
+        assert client.get("/api/v1/jobs/missing").status_code == 404
+
+    def test_enqueue_requires_interests(self, queue):
+        client = TestClient(app)
+        # Falls back to the data service; with no stored interests the request is rejected
+        with patch("contentagency.api.main.data_service") as mock_data:
+            mock_data.get_user_interests.return_value = {"interests": []}
+            mock_data.select_posts.return_value = []
+            response = client.post("/api/v1/jobs", json={})
+        assert response.status_code == 400
@@ -0,0 +1,101 @@
+"""
+Test suite for the metrics registry and /metrics endpoints.
+"""
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from contentagency.api.main import app
+from contentagency.services.checkpoints import TaskCheckpointStore
+from contentagency.services.data_service import FileDataService
+from contentagency.services.metrics import (
+    CACHE_REQUESTS,
+    CREW_PHASE_SECONDS,
+    DATA_SERVICE_SECONDS,
+    MetricsRegistry,
+    observe_task,
+)
+
+
+@pytest.fixture
+def local_registry():
+    """Fresh registry, independent of the application's metrics."""
+    return MetricsRegistry()
+
+
+class TestRegistry:
+    """Test metric types and text rendering."""
+
+    def test_counter_and_gauge(self, local_registry):
+        counter = local_registry.counter("jobs_total", "Jobs.", ("status",))
+        gauge = local_registry.gauge("jobs_active", "Active jobs.")
+        counter.inc(status="ok")
+        counter.inc(2, status="ok")
+        with gauge.track():
+            assert gauge.value() == 1
+        assert gauge.value() == 0
+
+        text = local_registry.render()
+        assert "# TYPE jobs_total counter" in text
+        assert 'jobs_total{status="ok"} 3' in text
+        assert "jobs_active 0" in text
+
+    def test_histogram_buckets_are_cumulative(self, local_registry):
+        histogram = local_registry.histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+        histogram.observe(0.05, route="/a")
+        histogram.observe(0.5, route="/a")
+        histogram.observe(5.0, route="/a")
+
+        text = local_registry.render()
+        assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{route="/a",le="1"} 2' in text
+        assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in text
+        assert 'latency_seconds_count{route="/a"} 3' in text
+
+    def test_label_mismatch(self, local_registry):
+        counter = local_registry.counter("calls_total", "Calls.", ("model",))
+        with pytest.raises(ValueError):
+            counter.inc(provider="openai")
+
+    def test_duplicate_name(self, local_registry):
+        local_registry.counter("calls_total", "Calls.")
+        with pytest.raises(ValueError, match="already registered"):
+            local_registry.counter("calls_total", "Calls.")
+
+
+class TestInstrumentation:
+    """Test metrics recorded by the application."""
+
+    def test_metrics_endpoint_records_route_template(self):
+        client = TestClient(app)
+        client.get("/health")
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert 'route="/health",status="200"' in response.text
+        assert "contentagency_crew_runs_active" in response.text
+
+    def test_data_service_operations_are_timed(self, tmp_path):
+        before = DATA_SERVICE_SECONDS.count(operation="get_brainstorm_results")
+        FileDataService(data_dir=str(tmp_path)).get_brainstorm_results()
+        assert DATA_SERVICE_SECONDS.count(operation="get_brainstorm_results") == before + 1
+
+    def test_checkpoint_hits_and_misses(self, tmp_path):
+        store = TaskCheckpointStore(checkpoint_dir=str(tmp_path))
+        hits = CACHE_REQUESTS.value(cache="checkpoint", result="hit")
+        misses = CACHE_REQUESTS.value(cache="checkpoint", result="miss")
+
+        store.get("trend_research_task", "abc")
+        store.put("trend_research_task", "abc", "output")
+        store.get("trend_research_task", "abc")
+
+        assert CACHE_REQUESTS.value(cache="checkpoint", result="hit") == hits + 1
+        assert CACHE_REQUESTS.value(cache="checkpoint", result="miss") == misses + 1
+
+    def test_observe_task_maps_tasks_to_phases(self):
+        before = CREW_PHASE_SECONDS.count(phase="research")
+        observe_task(SimpleNamespace(name=None, execution_duration=12.5))
+        observe_task(SimpleNamespace(name="trend_research_task", execution_duration=12.5))
+        assert CREW_PHASE_SECONDS.count(phase="research") == before + 1
@@ -0,0 +1,136 @@
+"""
+Test suite for per-task model routing and per-route usage accounting.
+"""
+import json
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from crewai import LLM
+
+from contentagency.config import settings
+from contentagency.services.cassette import reset_active_cassette
+from contentagency.services.checkpoints import task_checkpoint_key
+from contentagency.services.llm_gateway import GatewayLLM, build_llm
+from contentagency.services.metrics import LLM_CALL_SECONDS, LLM_COST, LLM_TOKENS
+from contentagency.services.model_routing import estimate_cost, resolve_model
+
+RESEARCH = SimpleNamespace(name="trend_research_task")
+BRAINSTORM = SimpleNamespace(name="brainstorming_task")
+
+
+@pytest.fixture(autouse=True)
+def routes(monkeypatch):
+    monkeypatch.setattr(settings, "model", "gpt-4o")
+    monkeypatch.setattr(settings, "model_routes", {})
+    monkeypatch.setattr(settings, "model_prices", {})
+
+
+def fake_completion(self, messages, callbacks=None, **kwargs):
+    """Stand-in for crewAI's LLM.call that reports token usage like litellm."""
+    usage = {"usage": {"prompt_tokens": 1000, "completion_tokens": 200, "total_tokens": 1200}}
+    for callback in callbacks or []:
+        callback.log_success_event({}, usage, None, None)
+    return f"answer from {self.model}"
+
+
+class TestResolveModel:
+    """Test the routing rules."""
+
+    def test_research_uses_the_cheaper_model(self):
+        assert resolve_model("trend_research_task") == "gpt-4o-mini"
+        assert resolve_model("brainstorming_task") == "gpt-4o"
+        assert resolve_model() == "gpt-4o"
+
+    def test_settings_override_yaml(self, monkeypatch):
+        monkeypatch.setattr(settings, "model_routes", {
+            "trend_research_task": "gpt-4.1-mini", "brainstorming_strategist": "o3"
+        })
+
+        assert resolve_model("trend_research_task") == "gpt-4.1-mini"
+        # Agent routes apply to the agent's tasks that set no model
+        assert resolve_model("brainstorming_task") == "o3"
+        assert build_llm("brainstorming_strategist").model == "o3"
+
+    def test_checkpoints_follow_the_route(self, monkeypatch):
+        key = task_checkpoint_key("trend_research_task", {})
+        monkeypatch.setattr(settings, "model", "gpt-4.1")
+        assert task_checkpoint_key("trend_research_task", {}) == key
+
+        monkeypatch.setattr(settings, "model_routes", {"trend_research_task": "gpt-4.1-nano"})
+        assert task_checkpoint_key("trend_research_task", {}) != key
+
+
+class TestCost:
+    """Test cost estimates."""
+
+    def test_prices(self, monkeypatch):
+        assert 0 < estimate_cost("gpt-4o-mini", 1000, 200) < estimate_cost("gpt-4o", 1000, 200)
+        assert estimate_cost("no-such-model", 1000, 200) == 0.0
+
+        monkeypatch.setattr(settings, "model_prices", {"local-llama": [1.0, 2.0]})
+        assert estimate_cost("local-llama", 1_000_000, 500_000) == pytest.approx(2.0)
+
+
+class TestGatewayRouting:
+    """Test that gateway calls switch models per task and are accounted per route."""
+
+    def test_calls_switch_to_the_task_model(self):
+        llm = build_llm("trend_researcher")
+        with patch.object(LLM, "call", autospec=True, side_effect=fake_completion):
+            assert llm.call("hi", from_task=RESEARCH) == "answer from gpt-4o-mini"
+            assert llm.call("hi", from_task=BRAINSTORM) == "answer from gpt-4o"
+            assert llm.call("hi") == "answer from gpt-4o"
+
+    def test_latency_tokens_and_cost_per_route(self):
+        llm = GatewayLLM(model="gpt-4o")
+        calls = LLM_CALL_SECONDS.count(route="trend_research_task", model="gpt-4o-mini")
+        tokens = LLM_TOKENS.value(route="trend_research_task", model="gpt-4o-mini", type="prompt")
+        cost = LLM_COST.value(route="trend_research_task", model="gpt-4o-mini")
+
+        with patch.object(LLM, "call", autospec=True, side_effect=fake_completion):
+            llm.call("hi", from_task=RESEARCH)
+
+        assert LLM_CALL_SECONDS.count(route="trend_research_task", model="gpt-4o-mini") == calls + 1
+        assert LLM_TOKENS.value(route="trend_research_task", model="gpt-4o-mini", type="prompt") == tokens + 1000
+        assert LLM_COST.value(route="trend_research_task", model="gpt-4o-mini") - cost == pytest.approx(
+            estimate_cost("gpt-4o-mini", 1000, 200)
+        )
+
+    def test_routed_calls_keep_the_llm_settings(self):
+        llm = GatewayLLM(model="gpt-4o", temperature=0.2, stop=["Observation:"], base_url="http://llm.local")
+        seen = {}
+
+        def completion(self, messages, callbacks=None, **kwargs):
+            seen.update(model=self.model, temperature=self.temperature, stop=self.stop, base_url=self.base_url)
+            return fake_completion(self, messages, callbacks)
+
+        with patch.object(LLM, "call", autospec=True, side_effect=completion):
+            llm.call("hi", from_task=RESEARCH)
+
+        assert seen == {
+            "model": "gpt-4o-mini", "temperature": 0.2, "stop": ["Observation:"], "base_url": "http://llm.local"
+        }
+        assert llm.model == "gpt-4o"
+
+    def test_replayed_calls_record_their_usage(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(settings, "cassette_dir", str(tmp_path))
+        monkeypatch.setattr(settings, "cassette_name", "usage")
+        monkeypatch.setattr(settings, "cassette_latency", "")
+        llm = GatewayLLM(model="gpt-4o")
+
+        monkeypatch.setattr(settings, "cassette_mode", "record")
+        reset_active_cassette()
+        with patch.object(LLM, "call", autospec=True, side_effect=fake_completion):
+            llm.call("hi")
+        recorded = json.loads((tmp_path / "usage.json").read_text())["interactions"][0]
+        assert recorded["details"]["usage"]["prompt_tokens"] == 1000
+
+        monkeypatch.setattr(settings, "cassette_mode", "replay")
+        reset_active_cassette()
+        tokens = LLM_TOKENS.value(route="default", model="gpt-4o", type="prompt")
+        with patch.object(LLM, "call", autospec=True, side_effect=AssertionError("replay made a live call")):
+            assert llm.call("hi") == "answer from gpt-4o"
+        reset_active_cassette()
+
+        assert LLM_TOKENS.value(route="default", model="gpt-4o", type="prompt") == tokens + 1000
@@ -0,0 +1,201 @@
+"""
+Test suite for pipelined crew execution.
+"""
+import threading
+import time
+import pytest
+from unittest.mock import Mock, patch
+
+from contentagency.config import settings
+from contentagency.services.budgets import RunInterruptedError
+from contentagency.services.checkpoints import TaskCheckpointStore
+from contentagency.services.crew_runner import parse_brainstorm_markdown
+from contentagency.services.pipeline import (
+    merge_suggestions,
+    render_brainstorm_markdown,
+    research_topic,
+    run_pipelined_crew,
+)
+
+
+def _suggestion(title, engagement="Moderate", links=0):
+    return {
+        "id": "suggestion_1",
+        "title": title,
+        "description": f"About {title}",
+        "platform_fit": ["LinkedIn"],
+        "interest_alignment": "Aligned",
+        "trend_connection": "Trending",
+        "resource_links": [
+            {"title": f"Link {i}", "url": f"https://example.com/{i}", "published_date": "September 2025"}
+            for i in range(links)
+        ],
+        "engagement_potential": engagement,
+        "engagement_reason": "timely relevance",
+    }
+
+
+def _markdown(topic, count=2):
+    suggestions = [_suggestion(f"{topic} idea {i}", links=1) for i in range(1, count + 1)]
+    return render_brainstorm_markdown(suggestions, f"{topic} trends")
+
+
+class TestMergeSuggestions:
+    """Test de-duplication and ranking of per-topic ideas."""
+
+    def test_round_robin_across_topics(self):
+        """Every topic should be represented before second-round ideas."""
+        per_topic = [
+            {"suggestions": [_suggestion("AI agents"), _suggestion("AI evals")]},
+            {"suggestions": [_suggestion("Data contracts"), _suggestion("Lakehouse costs")]},
+        ]
+        merged = merge_suggestions(per_topic, limit=3)
+
+        assert [s["title"] for s in merged] == ["AI agents", "Data contracts", "AI evals"]
+        assert [s["id"] for s in merged] == ["suggestion_1", "suggestion_2", "suggestion_3"]
+
+    def test_engagement_orders_each_round(self):
+        """Higher engagement should come first within a round."""
+        per_topic = [
+            {"suggestions": [_suggestion("Low idea", engagement="Low")]},
+            {"suggestions": [_suggestion("High idea", engagement="High")]},
+        ]
+        merged = merge_suggestions(per_topic, limit=10)
+
+        assert merged[0]["title"] == "High idea"
+
+    def test_near_duplicates_dropped(self):
+        """Titles with mostly the same words should be merged."""
+        per_topic = [
+            {"suggestions": [_suggestion("Why small models are winning")]},
+            {"suggestions": [_suggestion("Why Small Models Are Winning!")]},
+        ]
+        assert len(merge_suggestions(per_topic, limit=10)) == 1
+
+
+class TestRenderBrainstormMarkdown:
+    """Test rendering merged ideas back to crew markdown."""
+
+    def test_round_trips_through_parser(self):
+        """Rendered markdown should parse back to the same suggestions."""
+        original = [_suggestion("Round trip", engagement="High", links=2)]
+        parsed = parse_brainstorm_markdown(render_brainstorm_markdown(original, "Summary text"))
+
+        suggestion = parsed["suggestions"][0]
+        assert suggestion["title"] == "Round trip"
+        assert suggestion["engagement_potential"] == "High"
+        assert suggestion["engagement_reason"] == "timely relevance"
+        assert len(suggestion["resource_links"]) == 2
+        assert parsed["trending_context_summary"] == "Summary text"
+
+
+class TestRunPipelinedCrew:
+    """Test concurrent per-topic execution."""
+
+    @pytest.fixture
+    def pipeline_env(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(settings, "pipeline_max_workers", 4)
+        store = TaskCheckpointStore(checkpoint_dir=str(tmp_path / "checkpoints"))
+        with patch('contentagency.services.pipeline.Contentagency') as MockCrew, \
+             patch('contentagency.services.pipeline.Crew') as MockCrewClass, \
+             patch('contentagency.services.pipeline.checkpoint_store', store):
+            yield MockCrew, MockCrewClass
+
+    def test_brainstorm_starts_before_all_research_finishes(self, pipeline_env):
+        """A fast topic's brainstorm should overlap a slow topic's research."""
+        MockCrew, MockCrewClass = pipeline_env
+        research_task = MockCrew.return_value.trend_research_task.return_value
+        events = []
+        lock = threading.Lock()
+
+        def make_crew(agents, tasks, **kwargs):
+            crew = Mock()
+
+            def kickoff(inputs):
+                topic = "Slow" if "Slow" in inputs["user_interests"] else "Fast"
+                phase = "research" if tasks[0] is research_task else "brainstorm"
+                with lock:
+                    events.append((f"{phase}_start", topic, time.perf_counter()))
+                if phase == "research" and topic == "Slow":
+                    time.sleep(0.3)
+                with lock:
+                    events.append((f"{phase}_end", topic, time.perf_counter()))
+                return f"research for {topic}" if phase == "research" else _markdown(topic)
+
+            crew.kickoff.side_effect = kickoff
+            return crew
+
+        MockCrewClass.side_effect = make_crew
+        inputs = {"user_interests": "", "recent_posts": "", "current_year": "2025", "current_date": "October 04, 2025"}
+
+        result = run_pipelined_crew({"interests": [{"topic": "Fast"}, {"topic": "Slow"}]}, inputs)
+
+        times = {(name, topic): at for name, topic, at in events}
+        assert times[("brainstorm_start", "Fast")] < times[("research_end", "Slow")]
+        parsed = parse_brainstorm_markdown(result)
+        assert len(parsed["suggestions"]) == 4
+        assert "Fast" in parsed["trending_context_summary"]
+
+    def test_rerun_uses_topic_checkpoints(self, pipeline_env):
+        """Topics already researched and brainstormed should not rerun."""
+        MockCrew, MockCrewClass = pipeline_env
+        MockCrewClass.return_value.kickoff.side_effect = lambda inputs: _markdown("AI")
+        inputs = {"user_interests": "", "recent_posts": "", "current_year": "2025", "current_date": "October 04, 2025"}
+
+        run_pipelined_crew({"interests": [{"topic": "AI"}]}, inputs)
+        MockCrewClass.return_value.kickoff.reset_mock()
+        run_pipelined_crew({"interests": [{"topic": "AI"}]}, inputs)
+
+        assert not MockCrewClass.return_value.kickoff.called
+
+    def test_research_is_shared_across_users(self, pipeline_env):
+        """Research depends on the topic and date only, not on a user's posts."""
+        MockCrew, MockCrewClass = pipeline_env
+        research_task = MockCrew.return_value.trend_research_task.return_value
+        researched = []
+
+        def make_crew(agents, tasks, **kwargs):
+            def kickoff(inputs):
+                if tasks[0] is research_task:
+                    researched.append(inputs["user_interests"])
+                    return "AI research"
+                return _markdown("AI")
+            return Mock(kickoff=Mock(side_effect=kickoff))
+
+        MockCrewClass.side_effect = make_crew
+        base = {"user_interests": "", "current_year": "2025", "current_date": "October 04, 2025"}
+
+        research_topic({"topic": "AI"}, {**base, "recent_posts": "user 1 posts"})
+        run_pipelined_crew({"interests": [{"topic": "AI"}]}, {**base, "recent_posts": "user 2 posts"})
+
+        assert len(researched) == 1
+
+    def test_interrupted_topic_keeps_finished_paths(self, pipeline_env):
+        """A stopped run returns the merged ideas of the paths that finished."""
+        MockCrew, MockCrewClass = pipeline_env
+        research_task = MockCrew.return_value.trend_research_task.return_value
+
+        def make_crew(agents, tasks, **kwargs):
+            crew = Mock()
+
+            def kickoff(inputs):
+                topic = "Slow" if "Slow" in inputs["user_interests"] else "Fast"
+                if tasks[0] is research_task:
+                    return f"research for {topic}"
+                if topic == "Slow":
+                    raise RunInterruptedError("Run time budget of 60s exhausted")
+                return _markdown(topic)
+
+            crew.kickoff.side_effect = kickoff
+            return crew
+
+        MockCrewClass.side_effect = make_crew
+        inputs = {"user_interests": "", "recent_posts": "", "current_year": "2025", "current_date": "October 04, 2025"}
+
+        with pytest.raises(RunInterruptedError) as excinfo:
+            run_pipelined_crew({"interests": [{"topic": "Fast"}, {"topic": "Slow"}]}, inputs)
+
+        parsed = parse_brainstorm_markdown(excinfo.value.partial_output)
+        assert [s["title"] for s in parsed["suggestions"]] == ["Fast idea 1", "Fast idea 2"]
+        assert "research for Slow" in parsed["trending_context_summary"]
@@ -0,0 +1,113 @@
+"""
+Test suite for post ranking.
+"""
+import time
+import pytest
+
+from contentagency.config import settings
+from contentagency.services.post_index import PostIndex, PostIndexCache, parse_timestamp
+
+DAY = 86400.0
+NOW = parse_timestamp("2025-10-06")
+
+
+def _post(post_id, days_ago, topics=(), **engagement):
+    return {"id": post_id, "published_ts": NOW - days_ago * DAY, "topics": list(topics), **engagement}
+
+
+class TestParseTimestamp:
+    """Test publication date parsing."""
+
+    def test_dates_and_datetimes(self):
+        assert parse_timestamp("2025-10-06") == NOW
+        assert parse_timestamp("2025-10-06T02:00:00+02:00") == NOW
+        assert parse_timestamp(NOW) == NOW
+
+    def test_unparseable(self):
+        assert parse_timestamp("last Tuesday") is None
+        assert parse_timestamp(None) is None
+
+
+class TestPostIndex:
+    """Test recency order and prompt selection."""
+
+    def test_recent_is_newest_first_with_undated_last(self):
+        index = PostIndex([{"id": "undated"}, _post("old", 9), {"id": "d", "published_date": "2025-10-05"}])
+        assert [post["id"] for post in index.recent(3)] == ["d", "old", "undated"]
+
+    def test_engagement_outweighs_small_recency_gaps(self):
+        index = PostIndex([_post("new", 0), _post("viral", 2, likes=5000, shares=300)])
+        assert [post["id"] for post in index.select(1, now=NOW)] == ["viral"]
+
+    def test_recency_only_without_engagement(self, monkeypatch):
+        monkeypatch.setattr(settings, "post_engagement_weight", 0.0)
+        index = PostIndex([_post("old", 30, likes=10), _post("new", 1)])
+        assert [post["id"] for post in index.select(2, now=NOW)] == ["new", "old"]
+
+    def test_topics_are_diversified(self):
+        index = PostIndex([
+            _post("ai-1", 0, ["AI"], likes=100), _post("ai-2", 0, ["AI"], likes=90), _post("data", 0, ["Data"], likes=80)
+        ])
+        assert [post["id"] for post in index.select(2, now=NOW)] == ["ai-1", "data"]
+
+    def test_select_more_than_available(self):
+        assert len(PostIndex([_post("a", 1)]).select(5, now=NOW)) == 1
+        assert PostIndex([]).select(5) == []
+
+    def test_large_history_is_fast(self):
+        posts = [_post(str(i), i % 365, [f"t{i % 40}"], likes=i % 97) for i in range(50_000)]
+        index = PostIndex(posts)
+
+        started = time.perf_counter()
+        picked = index.select(5, now=NOW)
+        elapsed = time.perf_counter() - started
+
+        assert len({post["id"] for post in picked}) == 5
+        assert elapsed < 0.5
+
+
+class TestPostIndexCache:
+    """Test that indexes are rebuilt only when posts change."""
+
+    def test_reused_until_stamp_changes(self):
+        cache, loads = PostIndexCache(), []
+
+        def load():
+            loads.append(1)
+            return [_post("a", 1)]
+
+        first = cache.get("u1", 1, load)
+        assert cache.get("u1", 1, load) is first
+        assert cache.get("u1", 2, load) is not first
+        assert len(loads) == 2
+
+    def test_least_recently_used_is_evicted(self):
+        cache = PostIndexCache(max_entries=1)
+        first = cache.get("u1", 1, list)
+        cache.get("u2", 1, list)
+        assert cache.get("u1", 1, list) is not first
+
+
+class TestDataServiceSelection:
+    """Test post storage and selection through the data services."""
+
+    def test_timestamps_are_parsed_on_write(self, backend_service):
+        backend_service.save_recent_posts({"user_id": "u1", "posts": [{"id": "1", "published_date": "2025-10-06"}]})
+        backend_service.patch_recent_posts("u1", [{"op": "add", "item": {"id": "2", "published_date": "2025-10-07"}}])
+
+        assert [post["published_ts"] for post in backend_service.get_recent_posts("u1")] == [NOW + DAY, NOW]
+
+    def test_index_follows_saves_and_patches(self, backend_service):
+        backend_service.save_recent_posts({"user_id": "u1", "posts": [{"id": "1", "published_date": "2025-10-01"}]})
+        assert [post["id"] for post in backend_service.select_posts("u1")] == ["1"]
+
+        backend_service.patch_recent_posts("u1", [{"op": "add", "item": {"id": "2", "published_date": "2025-10-02"}}])
+        assert [post["id"] for post in backend_service.get_recent_posts("u1")] == ["2", "1"]
+
+        backend_service.save_recent_posts({"user_id": "u1", "posts": [{"id": "3"}]})
+        assert [post["id"] for post in backend_service.select_posts("u1")] == ["3"]
+
+    def test_returned_posts_do_not_alias_the_index(self, backend_service):
+        backend_service.save_recent_posts({"user_id": "u1", "posts": [{"id": "1"}]})
+        backend_service.get_recent_posts("u1")[0]["id"] = "changed"
+        assert backend_service.get_recent_posts("u1")[0]["id"] == "1"
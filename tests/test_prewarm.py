@@ -0,0 +1,120 @@
+"""
+Test suite for research pre-warming.
+"""
+from datetime import datetime
+from types import SimpleNamespace
+import pytest
+from unittest.mock import Mock, patch
+
+from contentagency.config import settings
+from contentagency.services import crew_runner, prewarm
+from contentagency.services.checkpoints import TaskCheckpointStore
+from contentagency.services.data_service import FileDataService
+from contentagency.services.job_queue import SQLiteJobQueue
+from contentagency.worker import BrainstormWorker
+
+
+NOW = datetime(2025, 10, 6, 5, 30)
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    """Three users: two active this week with a shared topic, one inactive."""
+    monkeypatch.setattr(settings, "checkpoint_dir", str(tmp_path / "checkpoints"))
+    service = FileDataService(data_dir=str(tmp_path / "data"))
+    service.save_user_interests({"user_id": "u1", "interests": [{"topic": "AI"}, {"topic": "Data"}]})
+    service.save_user_interests({"user_id": "u2", "interests": [{"topic": "AI"}]})
+    service.save_user_interests({"user_id": "old", "interests": [{"topic": "Fax machines"}]})
+    service.save_brainstorm_results("old", {"timestamp": "2025-08-01T09:00:00"})
+    service.save_brainstorm_results("u1", {"timestamp": "2025-10-04T09:00:00"})
+    service.save_brainstorm_results("u2", {"timestamp": "2025-10-05T09:00:00"})
+    with patch.object(prewarm, "data_service", service):
+        yield service
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = TaskCheckpointStore(checkpoint_dir=str(tmp_path / "checkpoints"))
+    with patch.object(crew_runner, "checkpoint_store", store), \
+            patch("contentagency.services.checkpoints.checkpoint_store", store):
+        yield store
+
+
+class TestCollectUnits:
+    """Test which research gets warmed."""
+
+    def test_active_users_most_recent_first(self, service):
+        assert prewarm.active_user_ids(active_days=7, now=NOW) == ["u2", "u1"]
+
+    def test_pipelined_units_are_distinct_topics(self, service):
+        units = prewarm.research_units(["u2", "u1"], process="pipelined")
+        assert units == [{"interests": [{"topic": "AI"}]}, {"interests": [{"topic": "Data"}]}]
+
+    def test_sequential_units_are_interest_sets(self, service):
+        units = prewarm.research_units(["u2", "u1"], process="sequential")
+        assert units == [{"interests": [{"topic": "AI"}]}, {"interests": [{"topic": "AI"}, {"topic": "Data"}]}]
+
+    def test_next_run_time(self):
+        assert prewarm.next_run_time(NOW, ["05:30", "13:00"]) == datetime(2025, 10, 6, 13, 0)
+        assert prewarm.next_run_time(NOW, ["05:00"]) == datetime(2025, 10, 7, 5, 0)
+
+
+class TestPrewarmOnce:
+    """Test pre-warm rounds."""
+
+    def test_researches_each_unit_once(self, service, store, monkeypatch):
+        monkeypatch.setattr(settings, "crew_process", "pipelined")
+        monkeypatch.setattr(prewarm, "active_user_ids", lambda: ["u1", "u2"])
+
+        with patch.object(crew_runner, "Contentagency"), patch.object(crew_runner, "Crew") as MockCrew:
+            MockCrew.return_value.kickoff.return_value = "research"
+            first = prewarm.prewarm_once()
+            second = prewarm.prewarm_once()
+
+        assert first["researched"] == 2
+        assert second == {"researched": 0, "cached": 2, "queued": 0, "failed": 0}
+        assert MockCrew.return_value.kickoff.call_count == 2
+
+    def test_warm_research_skips_research_in_next_brainstorm(self, store, monkeypatch):
+        monkeypatch.setattr(settings, "crew_process", "sequential")
+        interests = {"user_id": "u1", "interests": [{"topic": "AI"}]}
+
+        with patch.object(crew_runner, "Contentagency"), patch.object(crew_runner, "Crew") as MockCrew:
+            MockCrew.return_value.kickoff.return_value = "AI research"
+            assert prewarm.warm_research({"interests": interests["interests"]}) is True
+
+        crews = []
+
+        def make_crew(agents, tasks, **kwargs):
+            crews.append(len(tasks))
+            return Mock(kickoff=Mock(return_value=SimpleNamespace(tasks_output=[])))
+
+        with patch.object(crew_runner, "Contentagency"), \
+                patch.object(crew_runner, "Crew", side_effect=make_crew), \
+                patch.object(crew_runner, "data_service"):
+            crew_runner.run_brainstorm_session(interests, [{"id": "p1"}])
+
+        # Only the brainstorming task ran; the research came from the pre-warm
+        assert crews == [1]
+
+    def test_queue_mode_enqueues_prefetch_jobs_once(self, service, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "crew_process", "pipelined")
+        monkeypatch.setattr(prewarm, "active_user_ids", lambda: ["u1", "u2"])
+        queue = SQLiteJobQueue(str(tmp_path / "jobs.db"))
+
+        assert prewarm.prewarm_once(job_queue=queue)["queued"] == 2
+        assert prewarm.prewarm_once(job_queue=queue)["queued"] == 0
+
+        jobs = queue.list(status="queued")
+        assert {job["kind"] for job in jobs} == {"research"}
+        assert {job["priority_class"] for job in jobs} == {"prefetch"}
+
+        with patch("contentagency.worker.warm_research", return_value=True) as mock_warm:
+            assert BrainstormWorker(queue, worker_id="w1").run_once() == "succeeded"
+        mock_warm.assert_called_once()
+
+    def test_disabled_checkpoints_skip_the_round(self, service, monkeypatch):
+        monkeypatch.setattr(settings, "task_checkpoints_enabled", False)
+        with patch.object(prewarm, "research_units") as mock_units:
+            assert prewarm.prewarm_once()["researched"] == 0
+        mock_units.assert_not_called()
@@ -0,0 +1,104 @@
+"""
+Test suite for on-demand profiling.
+"""
+import time
+import pytest
+from pathlib import Path
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+
+from contentagency.api.main import app
+from contentagency.config import settings
+from contentagency.services.crew_runner import parse_brainstorm_markdown
+from contentagency.services.profiling import PROFILE_HEADER, is_profiling, list_profiles, profile_run
+
+
+@pytest.fixture
+def profile_dir(monkeypatch, tmp_path):
+    """Store profiles in a temporary directory."""
+    path = tmp_path / "profiles"
+    monkeypatch.setattr(settings, "profiling_dir", str(path))
+    monkeypatch.setattr(settings, "profiling_target", "off")
+    monkeypatch.setattr(settings, "profiling_admin_token", "")
+    return path
+
+
+class TestProfileRun:
+    """Test the profiling context manager."""
+
+    def test_cprofile_writes_stats_and_summary(self, profile_dir):
+        with profile_run("parser", engine="cprofile") as info:
+            parse_brainstorm_markdown('\n1. **Topic Title**: "A"\n   - **Description**: d\n')
+
+        assert info["engine"] == "cprofile"
+        assert sorted(Path(name).suffix for name in info["files"]) == [".prof", ".txt"]
+        summary = (profile_dir / f"{info['id']}.txt").read_text()
+        assert "parse_brainstorm_markdown" in summary
+
+    def test_sampling_writes_folded_stacks(self, profile_dir, monkeypatch):
+        monkeypatch.setattr(settings, "profiling_sample_interval", 0.001)
+
+        def busy_wait():
+            deadline = time.perf_counter() + 0.05
+            while time.perf_counter() < deadline:
+                pass
+
+        with profile_run("busy", engine="sampling") as info:
+            busy_wait()
+
+        folded = (profile_dir / f"{info['id']}.folded").read_text().splitlines()
+        assert folded
+        assert any("busy_wait" in line for line in folded)
+        stack, count = folded[0].rsplit(" ", 1)
+        assert int(count) > 0
+
+    def test_nested_profiles_are_ignored(self, profile_dir):
+        with profile_run("outer") as outer:
+            assert is_profiling()
+            with profile_run("inner") as inner:
+                pass
+
+        assert inner == {}
+        assert [profile["id"] for profile in list_profiles()] == [outer["id"]]
+
+    def test_unknown_engine(self, profile_dir):
+        with pytest.raises(ValueError, match="Unknown profiling engine"):
+            with profile_run("x", engine="perf"):
+                pass
+
+
+class TestRequestProfiling:
+    """Test header-triggered request profiling and the listing endpoint."""
+
+    def test_admin_header_profiles_request(self, profile_dir, monkeypatch):
+        monkeypatch.setattr(settings, "profiling_admin_token", "secret")
+        client = TestClient(app)
+
+        response = client.get("/health", headers={PROFILE_HEADER: "secret"})
+        assert response.status_code == 200
+        profile_id = response.headers["X-Profile-Id"]
+
+        listing = client.get("/api/v1/profiles", headers={PROFILE_HEADER: "secret"})
+        assert listing.status_code == 200
+        assert listing.json()["profiles"][0]["id"] == profile_id
+        assert listing.json()["profiles"][0]["label"] == "GET /health"
+
+    def test_wrong_token_is_not_profiled(self, profile_dir, monkeypatch):
+        monkeypatch.setattr(settings, "profiling_admin_token", "secret")
+        client = TestClient(app)
+
+        response = client.get("/health", headers={PROFILE_HEADER: "guess"})
+        assert "X-Profile-Id" not in response.headers
+        assert client.get("/api/v1/profiles").status_code == 403
+
+    def test_crew_runs_setting(self, profile_dir, monkeypatch):
+        from contentagency.services import crew_runner
+
+        monkeypatch.setattr(settings, "profiling_target", "crew_runs")
+        monkeypatch.setattr(settings, "crew_process", "sequential")
+        with patch.object(crew_runner, "Contentagency"), \
+                patch.object(crew_runner, "_run_sequential_crew", return_value="no suggestions"), \
+                patch.object(crew_runner, "data_service"):
+            crew_runner.run_brainstorm_crew({"interests": [{"topic": "AI"}]}, [])
+
+        assert [profile["label"] for profile in list_profiles()] == ["crew_run"]
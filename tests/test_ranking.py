@@ -0,0 +1,101 @@
+"""
+Test suite for suggestion ranking and stale link filtering.
+"""
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from contentagency.config import settings
+from contentagency.services.crew_runner import _extract_resource_links
+from contentagency.services.ranking import parse_link_date, rank_suggestions, relevance_scores
+
+NOW = datetime(2025, 10, 15, tzinfo=timezone.utc).timestamp()
+INTERESTS = {"interests": [{"topic": "AI"}, {"topic": "Climate Tech"}]}
+
+
+def _ts(*args):
+    return datetime(*args, tzinfo=timezone.utc).timestamp()
+
+
+def _suggestion(title, description="", potential="Moderate", dates=()):
+    return {
+        "title": title,
+        "description": description,
+        "engagement_potential": potential,
+        "resource_links": [{"title": f"Link {d}", "url": "https://example.com", "published_date": d} for d in dates],
+    }
+
+
+class TestParseLinkDate:
+    """Test parsing of free-text publication dates."""
+
+    def test_formats(self):
+        assert parse_link_date("2025-10-05") == _ts(2025, 10, 5)
+        assert parse_link_date("October 5, 2025") == _ts(2025, 10, 5)
+        assert parse_link_date("Oct 5th, 2025") == _ts(2025, 10, 5)
+        assert parse_link_date("5 October 2025") == _ts(2025, 10, 5)
+        assert parse_link_date("Sept 5, 2025") == _ts(2025, 9, 5)
+
+    def test_month_only_counts_as_last_day(self):
+        assert parse_link_date("September 2025") == _ts(2025, 9, 30)
+        assert parse_link_date("Feb 2024") == _ts(2024, 2, 29)
+
+    def test_unreadable(self):
+        assert parse_link_date(None) is None
+        assert parse_link_date("recently") is None
+
+    def test_parser_stores_timestamp(self):
+        links = _extract_resource_links("- [Study](https://example.com/s) - Published: October 5, 2025\n")
+        assert links[0]["published_ts"] == _ts(2025, 10, 5)
+
+
+class TestRelevance:
+    """Test TF-IDF interest matching."""
+
+    def test_matching_suggestions_score_higher(self):
+        scores = relevance_scores(
+            [_suggestion("AI for climate modeling"), _suggestion("Sourdough baking tips"), _suggestion("AI agents")],
+            ["AI", "Climate Tech"]
+        )
+        assert scores[1] == 0.0
+        assert scores[0] > scores[2] > 0.0
+
+    def test_no_interests(self):
+        assert list(relevance_scores([_suggestion("AI agents")], [])) == [0.0]
+
+
+class TestRankSuggestions:
+    """Test link filtering and card order."""
+
+    def test_drops_stale_links_and_keeps_undated(self):
+        ranked = rank_suggestions(
+            [_suggestion("AI", dates=["October 1, 2025", "March 2025", None])], INTERESTS, now=NOW
+        )
+        links = ranked[0]["resource_links"]
+        assert [link["published_date"] for link in links] == ["October 1, 2025", None]
+        assert links[0]["published_ts"] == _ts(2025, 10, 1)
+
+    def test_order(self):
+        suggestions = [
+            _suggestion("Sourdough baking", potential="Low", dates=["May 2025"]),
+            _suggestion("AI in climate tech", potential="High", dates=["October 10, 2025"]),
+            _suggestion("AI in climate tech policy", potential="High", dates=["October 10, 2025"]),
+            _suggestion("AI roundup", potential="High", dates=["August 1, 2025"]),
+        ]
+        suggestions[1]["duplicate_of"] = {"title": "AI in climate", "timestamp": None, "similarity": 0.9}
+
+        ranked = rank_suggestions(suggestions, INTERESTS, now=NOW)
+
+        assert [s["title"] for s in ranked] == [
+            "AI in climate tech policy", "AI roundup", "Sourdough baking", "AI in climate tech"
+        ]
+        assert ranked[0]["score"] > ranked[1]["score"] > ranked[2]["score"]
+        assert "score" not in suggestions[0]
+
+    def test_max_age_setting(self):
+        with patch.object(settings, "link_max_age_days", 10):
+            ranked = rank_suggestions([_suggestion("AI", dates=["October 1, 2025"])], INTERESTS, now=NOW)
+        assert ranked[0]["resource_links"] == []
+
+    def test_empty(self):
+        assert rank_suggestions([], INTERESTS) == []
+        assert rank_suggestions([_suggestion("AI")])[0]["title"] == "AI"
@@ -0,0 +1,187 @@
+"""
+Test suite for the provider rate-limit governor.
+"""
+import threading
+
+import pytest
+from unittest.mock import Mock, patch
+
+from contentagency.config import settings
+from contentagency.services.rate_limit import (
+    AIMDLimiter,
+    ProviderGovernor,
+    RateLimitedError,
+    SharedState,
+    SharedTokenBucket,
+    TokenBucket,
+    get_governor,
+    is_rate_limit_error,
+    reset_governors,
+)
+
+
+class FakeRateLimitError(Exception):
+    """Mimics a provider 429 with a Retry-After header."""
+
+    def __init__(self, retry_after="0"):
+        super().__init__("429 Too Many Requests")
+        self.status_code = 429
+        self.response = Mock(status_code=429, headers={"retry-after": retry_after})
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucket:
+    """Test the in-process token bucket."""
+
+    def test_acquire_until_empty_then_wait(self):
+        """Should hand out capacity, then report the refill wait."""
+        clock = FakeClock()
+        bucket = TokenBucket(capacity=2, refill_per_second=1.0, clock=clock)
+
+        assert bucket.try_acquire(1) == 0.0
+        assert bucket.try_acquire(1) == 0.0
+        assert bucket.try_acquire(1) == pytest.approx(1.0)
+
+        clock.now = 1.0
+        assert bucket.try_acquire(1) == 0.0
+
+    def test_adjust_returns_unused_tokens(self):
+        """Over-reserved tokens should flow back, capped at capacity."""
+        clock = FakeClock()
+        bucket = TokenBucket(capacity=100, refill_per_second=1.0, clock=clock)
+        bucket.try_acquire(80)
+        bucket.adjust(50)
+        assert bucket.available == 70
+        bucket.adjust(500)
+        assert bucket.available == 100
+
+    def test_shared_bucket_across_instances(self, tmp_path):
+        """Two buckets on the same state file should draw from one budget."""
+        state = SharedState(str(tmp_path / "governor.db"))
+        first = SharedTokenBucket(state, "openai:rpm", capacity=2, refill_per_second=0.001)
+        second = SharedTokenBucket(state, "openai:rpm", capacity=2, refill_per_second=0.001)
+
+        assert first.try_acquire(1) == 0.0
+        assert second.try_acquire(1) == 0.0
+        assert first.try_acquire(1) > 0
+
+
+class TestAIMDLimiter:
+    """Test the adaptive concurrency limit."""
+
+    def test_additive_increase_and_multiplicative_decrease(self):
+        limiter = AIMDLimiter(initial=4, maximum=8)
+        # Roughly one extra slot per limit-worth of fast successes
+        for _ in range(5):
+            limiter.on_success(0.1)
+        assert limiter.limit == 5
+
+        limiter.on_rate_limited()
+        assert limiter.limit == 2
+
+    def test_slow_calls_shrink_limit(self):
+        limiter = AIMDLimiter(initial=8, latency_target=1.0)
+        limiter.on_success(5.0)
+        assert limiter.limit < 8
+
+    def test_acquire_times_out_when_full(self):
+        limiter = AIMDLimiter(initial=1)
+        assert limiter.acquire(timeout=0.01)
+        assert not limiter.acquire(timeout=0.01)
+        limiter.release()
+        assert limiter.acquire(timeout=0.01)
+
+
+class TestProviderGovernor:
+    """Test governed provider calls."""
+
+    def test_detects_rate_limit_errors(self):
+        assert is_rate_limit_error(FakeRateLimitError())
+        assert not is_rate_limit_error(ValueError("boom"))
+
+    def test_retries_after_rate_limit(self):
+        """A 429 should cool down, shrink concurrency and retry."""
+        governor = ProviderGovernor("openai", requests_per_minute=600, initial_concurrency=4)
+        fn = Mock(side_effect=[FakeRateLimitError(), "ok"])
+
+        assert governor.call(fn) == "ok"
+        assert fn.call_count == 2
+        assert governor.stats == {"calls": 1, "rate_limited": 1, "retries": 1}
+        assert governor.limiter.limit == 2
+
+    def test_gives_up_after_max_retries(self):
+        governor = ProviderGovernor("openai", requests_per_minute=600, max_retries=1)
+        fn = Mock(side_effect=FakeRateLimitError())
+
+        with pytest.raises(RateLimitedError):
+            governor.call(fn)
+        assert fn.call_count == 2
+
+    def test_other_errors_propagate(self):
+        governor = ProviderGovernor("openai", requests_per_minute=600)
+        with pytest.raises(ValueError):
+            governor.call(Mock(side_effect=ValueError("bad request")))
+        assert governor.limiter.in_flight == 0
+
+    def test_reconciles_token_reservation(self):
+        """Actual usage should replace the up-front estimate."""
+        governor = ProviderGovernor("openai", requests_per_minute=600, tokens_per_minute=1000)
+        governor.call(lambda: "ok", estimated_tokens=400, actual_tokens=lambda: 100)
+        assert governor.tokens.available == pytest.approx(900, abs=1)
+
+    def test_concurrency_never_exceeds_limit(self):
+        governor = ProviderGovernor("serper", requests_per_minute=6000, initial_concurrency=2, max_concurrency=2)
+        lock = threading.Lock()
+        active = {"now": 0, "peak": 0}
+        release = threading.Event()
+
+        def fn():
+            with lock:
+                active["now"] += 1
+                active["peak"] = max(active["peak"], active["now"])
+            release.wait(0.05)
+            with lock:
+                active["now"] -= 1
+
+        threads = [threading.Thread(target=governor.call, args=(fn,)) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert active["peak"] <= 2
+
+    def test_shared_cooldown(self, tmp_path):
+        """A 429 seen by one governor should pause another sharing the state."""
+        state = SharedState(str(tmp_path / "governor.db"))
+        first = ProviderGovernor("openai", requests_per_minute=600, state=state)
+        second = ProviderGovernor("openai", requests_per_minute=600, state=state)
+
+        first._start_cooldown(30)
+        assert second._cooldown_remaining() > 25
+
+
+class TestGetGovernor:
+    """Test the process-wide governor registry."""
+
+    def teardown_method(self):
+        reset_governors()
+
+    def test_disabled_returns_none(self):
+        with patch.object(settings, "governor_enabled", False):
+            assert get_governor("openai") is None
+
+    def test_returns_shared_instance(self):
+        reset_governors()
+        assert get_governor("openai") is get_governor("openai")
+        assert get_governor("serper").tokens is None
+
+    def test_unknown_provider(self):
+        with pytest.raises(ValueError, match="Unknown provider"):
+            get_governor("anthropic")
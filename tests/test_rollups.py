@@ -0,0 +1,132 @@
+"""
+Test suite for topic performance rollups.
+"""
+import json
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+
+from contentagency.api.main import app
+from contentagency.services.data_service import FileDataService
+from contentagency.services.prompts import build_crew_inputs, format_performance_for_prompt
+from contentagency.services.rollups import build_rollups
+
+POSTS = [
+    {"id": "1", "platform": "linkedin", "topics": ["AI"], "likes": 100, "published_date": "2025-09-10"},
+    {"id": "2", "platform": "twitter", "topics": ["AI", "Data"], "likes": 10, "published_date": "2025-10-02"},
+    {"id": "3", "platform": "linkedin", "topics": ["ai"], "likes": 300, "comments": 10, "published_date": "2025-10-05"},
+]
+
+
+def _without_version(rollups):
+    return {key: value for key, value in rollups.items() if key != "version"}
+
+
+class TestBuildRollups:
+    """Test rollup contents."""
+
+    def test_topics_and_platforms(self):
+        rollups = build_rollups("u1", POSTS, version=1)
+
+        ai = rollups["topics"]["ai"]
+        assert (ai["topic"], ai["posts"], ai["likes"], ai["comments"]) == ("AI", 3, 410, 10)
+        assert ai["platforms"]["linkedin"]["posts"] == 2
+        assert ai["months"]["2025-10"]["posts"] == 2
+        assert rollups["topics"]["data"]["posts"] == 1
+        assert rollups["platforms"]["twitter"]["engagement"] == 10.0
+        assert rollups["posts"] == 3
+
+
+class TestIncrementalRollups:
+    """Test that writes keep rollups equal to a full recomputation."""
+
+    def test_saves_and_patches(self, backend_service):
+        backend_service.save_recent_posts({"user_id": "u1", "posts": POSTS[:2]})
+        backend_service.patch_recent_posts("u1", [
+            {"op": "add", "item": POSTS[2]},
+            {"op": "update", "key": "2", "item": {"likes": 50, "topics": ["Data"]}},
+            {"op": "remove", "key": "1"},
+        ])
+        posts = backend_service.get_recent_posts("u1") + [{"id": "4", "topics": ["Climate"]}]
+        backend_service.save_recent_posts({"user_id": "u1", "posts": posts})
+
+        posts = backend_service.get_recent_posts("u1", limit=100)
+        rollups = backend_service.get_topic_rollups("u1")
+        assert _without_version(rollups) == _without_version(build_rollups("u1", posts, version=0))
+        assert rollups["version"] == 3
+        assert set(rollups["topics"]) == {"ai", "data", "climate"}
+
+    def test_duplicate_post_ids(self, backend_service):
+        duplicate = {**POSTS[0], "likes": 5}
+        backend_service.save_recent_posts({"user_id": "u1", "posts": POSTS[:2] + [duplicate]})
+        backend_service.save_recent_posts({"user_id": "u1", "posts": [POSTS[1], duplicate, {**POSTS[0], "likes": 7}]})
+        backend_service.save_recent_posts({"user_id": "u1", "posts": [POSTS[1], duplicate, duplicate]})
+
+        posts = backend_service.get_recent_posts("u1", limit=100)
+        rollups = backend_service.get_topic_rollups("u1")
+        assert len(posts) == 3
+        assert _without_version(rollups) == _without_version(build_rollups("u1", posts, version=0))
+
+    def test_users_are_separate(self, backend_service):
+        backend_service.save_recent_posts({"user_id": "u1", "posts": POSTS})
+        backend_service.save_recent_posts({"user_id": "u2", "posts": [{"id": "9", "topics": ["Cooking"]}]})
+
+        assert set(backend_service.get_topic_rollups("u1")["topics"]) == {"ai", "data"}
+        assert set(backend_service.get_topic_rollups("u2")["topics"]) == {"cooking"}
+        assert backend_service.get_topic_rollups("u3")["posts"] == 0
+
+    def test_out_of_step_rollups_are_rebuilt(self, tmp_path):
+        store = FileDataService(data_dir=str(tmp_path))
+        store.save_recent_posts({"user_id": "u1", "posts": POSTS[:1]})
+        # e.g. a crash between the posts write and the rollups write
+        (tmp_path / "users" / "u1" / "topic_rollups.json").write_text(json.dumps({"version": 0, "posts": 99}))
+
+        store.patch_recent_posts("u1", [{"op": "add", "item": POSTS[1]}])
+
+        assert store.get_topic_rollups("u1")["posts"] == 2
+
+    def test_computed_once_for_posts_saved_before_rollups(self, tmp_path):
+        store = FileDataService(data_dir=str(tmp_path))
+        (tmp_path / "recent_posts.json").write_text(json.dumps({"user_id": "u1", "posts": POSTS}))
+
+        assert store.get_topic_rollups("u1")["posts"] == 3
+        assert (tmp_path / "users" / "u1" / "topic_rollups.json").exists()
+
+
+class TestPerformancePrompt:
+    """Test the rollup summary in the prompt."""
+
+    def test_summary(self):
+        summary = format_performance_for_prompt(build_rollups("u1", POSTS, version=1))
+
+        assert "3 posts" in summary
+        assert "- AI: 3 posts, avg engagement 143, best on linkedin, up 65% in 2025-10 vs the month before" in summary
+        assert summary.index("- AI") < summary.index("- Data")
+
+    def test_without_engagement_or_posts(self):
+        summary = format_performance_for_prompt(build_rollups("u1", [{"id": "1", "topics": ["AI"]}], version=1))
+        assert "- AI: 1 post\n" in summary
+        assert format_performance_for_prompt(None) == "No post performance history available."
+
+    def test_topics_are_capped(self):
+        posts = [{"id": str(i), "topics": [f"t{i}"]} for i in range(8)]
+        summary = format_performance_for_prompt(build_rollups("u1", posts, version=1), max_topics=5)
+        assert "...and 3 more topics" in summary
+
+    def test_crew_inputs_include_summary(self):
+        inputs = build_crew_inputs({"interests": [{"topic": "AI"}]}, [], build_rollups("u1", POSTS, version=1))
+        assert inputs["post_performance"].startswith("**Performance by Topic**")
+
+
+class TestRollupsEndpoint:
+    """Test GET /posts/rollups."""
+
+    def test_returns_user_rollups(self, tmp_path):
+        service = FileDataService(data_dir=str(tmp_path))
+        service.save_recent_posts({"user_id": "u1", "posts": POSTS})
+
+        with patch("contentagency.api.main.data_service", service):
+            response = TestClient(app).get("/api/v1/posts/rollups", params={"user_id": "u1"})
+
+        assert response.status_code == 200
+        assert response.json()["rollups"]["topics"]["ai"]["posts"] == 3
@@ -0,0 +1,79 @@
+"""
+Test suite for multi-worker serving and worker recycling.
+"""
+import signal
+import pytest
+from unittest.mock import patch
+
+from contentagency.config import settings
+from contentagency.services import serving
+from contentagency.services.serving import WorkerRecycler, current_rss_mb, get_recycler, serve
+
+
+class TestWorkerRecycler:
+    """Test recycling decisions."""
+
+    def test_recycles_after_max_crew_runs(self):
+        recycler = WorkerRecycler(max_crew_runs=2)
+        with patch.object(serving.os, "kill") as mock_kill:
+            recycler.after_crew_run()
+            mock_kill.assert_not_called()
+            recycler.after_crew_run()
+            recycler.after_crew_run()
+
+        # Only one SIGTERM, however many runs finish while shutting down
+        mock_kill.assert_called_once_with(serving.os.getpid(), signal.SIGTERM)
+
+    def test_recycles_above_memory_threshold(self):
+        recycler = WorkerRecycler(max_memory_mb=1)
+        assert "resident memory" in recycler.recycle_reason()
+
+    def test_no_limits_never_recycles(self):
+        recycler = WorkerRecycler()
+        recycler.crew_runs = 1000
+        assert recycler.recycle_reason() is None
+
+    def test_current_rss(self):
+        assert current_rss_mb() > 1
+
+
+class TestGetRecycler:
+    """Recycling needs a supervisor to restart the worker."""
+
+    def test_single_process_has_no_recycler(self, monkeypatch):
+        monkeypatch.delenv(serving.SUPERVISED_WORKER_ENV, raising=False)
+        monkeypatch.setattr(settings, "api_workers", 1)
+        monkeypatch.setattr(settings, "worker_max_crew_runs", 5)
+        assert get_recycler() is None
+
+    def test_unsupervised_process_sharing_the_env_has_no_recycler(self, monkeypatch):
+        # e.g. brainstorm_worker reading an .env with API_WORKERS=4
+        monkeypatch.delenv(serving.SUPERVISED_WORKER_ENV, raising=False)
+        monkeypatch.setattr(settings, "api_workers", 4)
+        monkeypatch.setattr(settings, "worker_max_crew_runs", 5)
+        assert get_recycler() is None
+
+    def test_supervised_worker_gets_recycler(self, monkeypatch):
+        monkeypatch.setenv(serving.SUPERVISED_WORKER_ENV, "1")
+        monkeypatch.setattr(settings, "worker_max_crew_runs", 5)
+        monkeypatch.setattr(serving, "_recycler", None)
+        assert get_recycler().max_crew_runs == 5
+
+
+class TestServe:
+    """Test uvicorn invocation."""
+
+    def test_single_worker_runs_app_object(self):
+        app = object()
+        with patch.object(serving.uvicorn, "run") as mock_run:
+            serve(app, "contentagency.api.main:app", "127.0.0.1", 8000, workers=1)
+        mock_run.assert_called_once_with(app, host="127.0.0.1", port=8000)
+
+    def test_multiple_workers_use_import_string(self, monkeypatch):
+        monkeypatch.setenv("API_WORKERS", "1")
+        monkeypatch.delenv(serving.SUPERVISED_WORKER_ENV, raising=False)
+        with patch.object(serving.uvicorn, "run") as mock_run:
+            serve(object(), "contentagency.api.main:app", "127.0.0.1", 8000, workers=4)
+        mock_run.assert_called_once_with("contentagency.api.main:app", host="127.0.0.1", port=8000, workers=4)
+        assert serving.os.environ["API_WORKERS"] == "4"
+        assert serving.os.environ[serving.SUPERVISED_WORKER_ENV] == "1"
@@ -0,0 +1,145 @@
+"""
+Test suite for OpenTelemetry tracing.
+"""
+import json
+import shutil
+import threading
+import pytest
+from pathlib import Path
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+
+from contentagency.config import settings
+from contentagency.services.cassette import reset_active_cassette
+from contentagency.services.tracing import (
+    bind_context,
+    get_tracer,
+    inject_context,
+    reset_tracing,
+    span,
+    traced,
+    use_context,
+)
+
+
+DEMO_CASSETTE = Path(__file__).parent.parent / "cassettes" / "demo.json"
+
+
+@pytest.fixture
+def trace_file(monkeypatch, tmp_path):
+    """Export spans as JSON lines to a temporary file."""
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(settings, "tracing_exporter", "file")
+    monkeypatch.setattr(settings, "tracing_file", str(path))
+    reset_tracing()
+    yield path
+    reset_tracing()
+
+
+def read_spans(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+class TestTracingDisabled:
+    """Tracing is off by default and must cost nothing."""
+
+    def test_helpers_are_no_ops(self, monkeypatch):
+        monkeypatch.setattr(settings, "tracing_exporter", "none")
+        reset_tracing()
+        assert get_tracer() is None
+        with span("noop") as current:
+            assert current is None
+        assert inject_context() == {}
+
+
+class TestSpans:
+    """Test span nesting and context propagation."""
+
+    def test_nested_spans_share_trace(self, trace_file):
+        @traced("inner")
+        def inner():
+            return 42
+
+        with span("outer", user_id="u1"):
+            assert inner() == 42
+
+        spans = {s["name"]: s for s in read_spans(trace_file)}
+        assert spans["inner"]["parent_id"] == spans["outer"]["span_id"]
+        assert spans["inner"]["trace_id"] == spans["outer"]["trace_id"]
+        assert spans["outer"]["attributes"] == {"user_id": "u1"}
+
+    def test_bind_context_crosses_threads(self, trace_file):
+        def child():
+            with span("thread_child"):
+                pass
+
+        with span("parent"):
+            worker = threading.Thread(target=bind_context(child))
+            worker.start()
+            worker.join()
+
+        spans = {s["name"]: s for s in read_spans(trace_file)}
+        assert spans["thread_child"]["parent_id"] == spans["parent"]["span_id"]
+
+    def test_carrier_propagation(self, trace_file):
+        """A carrier from one process continues the trace in another."""
+        with span("producer"):
+            carrier = inject_context()
+        assert "traceparent" in carrier
+
+        with use_context(carrier):
+            with span("consumer"):
+                pass
+
+        spans = {s["name"]: s for s in read_spans(trace_file)}
+        assert spans["consumer"]["trace_id"] == spans["producer"]["trace_id"]
+        assert spans["consumer"]["parent_id"] == spans["producer"]["span_id"]
+
+    def test_exceptions_mark_span_as_error(self, trace_file):
+        with pytest.raises(ValueError):
+            with span("failing"):
+                raise ValueError("boom")
+        assert read_spans(trace_file)[0]["status"] == "ERROR"
+
+
+class TestRequestTrace:
+    """Trace a full brainstorm request offline."""
+
+    def test_brainstorm_request_span_tree(self, trace_file, monkeypatch, tmp_path):
+        monkeypatch.setenv("CREWAI_TESTING", "true")
+        monkeypatch.setenv("CREWAI_DISABLE_TELEMETRY", "true")
+        monkeypatch.chdir(tmp_path)
+        shutil.copy(DEMO_CASSETTE, tmp_path / "demo.json")
+        monkeypatch.setattr(settings, "cassette_mode", "replay")
+        monkeypatch.setattr(settings, "cassette_dir", str(tmp_path))
+        monkeypatch.setattr(settings, "cassette_name", "demo")
+        monkeypatch.setattr(settings, "task_checkpoints_enabled", False)
+        reset_active_cassette()
+
+        from contentagency.api.main import app
+        from contentagency.services.data_service import FileDataService
+
+        service = FileDataService(data_dir=str(tmp_path / "data"))
+        try:
+            with patch('contentagency.api.main.data_service', service), \
+                    patch('contentagency.services.crew_runner.data_service', service):
+                response = TestClient(app).post(
+                    "/api/v1/brainstorm",
+                    json={"interests": {"user_id": "u1", "interests": [{"topic": "AI"}]}}
+                )
+        finally:
+            reset_active_cassette()
+
+        assert response.status_code == 200
+        spans = read_spans(trace_file)
+        by_id = {s["span_id"]: s for s in spans}
+
+        def parent_name(name):
+            matching = next(s for s in spans if s["name"] == name)
+            return by_id[matching["parent_id"]]["name"]
+
+        assert {s["trace_id"] for s in spans} == {spans[0]["trace_id"]}
+        assert parent_name("crew.run") == "HTTP POST /api/v1/brainstorm"
+        assert parent_name("crew.task trend_research_task") == "crew.run"
+        assert parent_name("llm.call") == "crew.task trend_research_task"
+        assert parent_name("data_service.save_brainstorm_results") == "crew.save"